@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+#  -*- coding: utf-8 -*-
+"""
+Benchmarks coverage strategies for search and rescue: how many cells each scan covers, and how many steps and how
+much travel it takes to cover a square around the start. The navigator never scans a known cell again, so overlapping
+stops don't cost points scanned, but they do cost extra scans (each one a power-on) and travel. A scan can cover at
+most (2 * radius + 1)^2 cells. Each strategy is run for each scan radius until the square is covered, with a
+destination which is never found. Cells covered outside the square count too.
+"""
+
+from geometry.point import Point2D
+from navigation.destinations import SearchArea
+from navigation.move_strategy import MoveStrategyType, make_move_strategy
+from navigation.navigator import Navigator
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from topology.procedural_topology import ProceduralTopology
+from topology.topology_map import TopologyMap
+
+SQUARE = 61  # cells across the square to cover
+MAX_STEPS = 20000
+START = Point2D(100, 100)
+STRATEGY_TYPES = [MoveStrategyType.SWEEP, MoveStrategyType.SPIRAL_OUT_CW_3, MoveStrategyType.SPIRAL_OUT_CCW]
+
+
+def run(simulated_map, strategy_type, radius):
+    """
+    :return: tuple(steps, scans, cells covered, distance travelled) until the square around the start is covered
+    """
+    sensor = SimulatedTopologySensor(simulated_map=simulated_map, radius=radius, scan_point_cost=1)
+    navigator = Navigator(TopologyMap(), make_move_strategy(strategy_type), SearchArea(radius))
+    half = SQUARE // 2
+    lower_left, upper_right = START.translate(-half, -half), START.translate(half, half)
+    steps = distance = 0
+    previous = START
+    for point in navigator.iter_points_to_destination(START, [sensor]):
+        steps += 1
+        distance += point.distance2d(previous)
+        previous = point
+        covered = navigator.topology_map.count_known_in_rect(lower_left, upper_right)
+        if covered == SQUARE * SQUARE or steps == MAX_STEPS:
+            break
+    return steps, sensor.power_on_count, len(list(navigator.topology_map.iter_all_points_xyz())), distance
+
+
+def main():
+    simulated_map = ProceduralTopology(seed=46)
+    print("Covering {0}x{0} cells around the start".format(SQUARE))
+    print("{:<8} {:<16} {:>8} {:>8} {:>10} {:>10} {:>10} {:>16}".format(
+        "Radius", "Strategy", "Steps", "Scans", "Cells", "Cells/scan", "Travel", "Travel/100 cells"))
+    for radius in (1, 2, 3):
+        for strategy_type in STRATEGY_TYPES:
+            steps, scans, cells, distance = run(simulated_map, strategy_type, radius)
+            print("{:<8} {:<16} {:>8} {:>8} {:>10} {:>10.2f} {:>10.0f} {:>16.1f}".format(
+                radius, strategy_type.name, steps, scans, cells, cells / scans, distance, 100 * distance / cells))
+
+
+if __name__ == '__main__':
+    main()
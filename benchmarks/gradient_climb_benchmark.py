@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+#  -*- coding: utf-8 -*-
+"""
+Benchmarks the gradient climb against the other climb strategies on big procedural maps of different peak densities.
+Sparse peaks make long smooth slopes, dense ones make bumpy ground. For each, shows how many neighbourhoods were
+scanned (each one a power-on), how many points were scanned, how many steps were taken, how often an extraction point
+was found within MAX_STEPS and how high it was on average.
+"""
+
+import random
+from itertools import islice
+from geometry.point import Point2D
+from navigation.destinations import ExtractionPoint
+from navigation.move_strategy import MoveStrategyType, make_move_strategy
+from navigation.navigator import Navigator
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from topology.procedural_topology import ProceduralTopology
+from topology.topology_map import TopologyMap
+
+MAX_STEPS = 500  # some strategies can circle forever from a few starts, so give up after this many steps
+RUNS = 20
+SIZE = 1000
+TILE_SIZE = 128
+DENSITIES = [.0002, .0005, .001, .002]
+STRATEGY_TYPES = [MoveStrategyType.GRADIENT_CLIMB, MoveStrategyType.CLIMB_MOVE_1,
+                  MoveStrategyType.CLIMB_3_CARDINAL_1_ORDINAL, MoveStrategyType.BINARY_SEARCH]
+
+
+def run(simulated_map, start_points, strategy_type):
+    """
+    :return: tuple(scans, points scanned, steps, extraction points found, total height of those found)
+    """
+    sensor = SimulatedTopologySensor(simulated_map=simulated_map, radius=1, scan_point_cost=1)
+    steps = found = total_z = 0
+    for start_point in start_points:
+        navigator = Navigator(TopologyMap(), make_move_strategy(strategy_type), ExtractionPoint())
+        points = list(islice(navigator.iter_points_to_destination(start_point, [sensor]), MAX_STEPS))
+        steps += len(points)
+        if navigator.found:
+            found += 1
+            total_z += navigator.found.z
+    return sensor.power_on_count, sensor.total_cost, steps, found, total_z
+
+
+def main():
+    random.seed(47)
+    start_points = [Point2D(random.randint(0, SIZE), random.randint(0, SIZE)) for _ in range(RUNS)]
+    print("{} starts on {}x{} procedural maps".format(RUNS, SIZE, SIZE))
+    print("{:<10} {:<28} {:>8} {:>10} {:>8} {:>8} {:>10}".format(
+        "Density", "Strategy", "Scans", "Points", "Steps", "Found", "Mean z"))
+    for density in DENSITIES:
+        simulated_map = ProceduralTopology(seed=47, density=density, tile_size=TILE_SIZE)
+        for strategy_type in STRATEGY_TYPES:
+            scans, points, steps, found, total_z = run(simulated_map, start_points, strategy_type)
+            print("{:<10} {:<28} {:>8} {:>10} {:>8} {:>8} {:>10.1f}".format(
+                density, strategy_type.name, scans, points, steps, found, total_z / found if found else 0))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+#  -*- coding: utf-8 -*-
+"""
+Benchmarks how many points get scanned on terrain where most heights are 0, such as sea-level or normalized
+terrain. Compares the TopologyMap, which tracks known cells separately from heights, with the way the map used to
+work, where a height of 0 counted as unknown and was scanned again and again.
+"""
+
+import random
+from itertools import islice
+from geometry.point import Point2D
+from navigation.destinations import ExtractionPoint
+from navigation.move_strategy import MoveStrategyType, make_move_strategy
+from navigation.navigator import Navigator
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from topology.topology_factory import TopologyFactory
+from topology.topology_map import TopologyMap
+
+MAX_STEPS = 200  # the old behavior gets stuck on flat ground, so give up after this many steps
+RUNS = 50
+
+
+class ZeroIsUnknownTopologyMap(TopologyMap):
+    """
+    Reproduces the old behavior, where a height of 0 was treated as unknown
+    """
+    __slots__ = []
+
+    def is_known(self, point):
+        return bool(self._get_raw_z(point.x, point.y))
+
+    def _get_raw_z(self, x, y):
+        z = super()._get_raw_z(x, y)
+        return z if z else None
+
+    def get_window(self, lower_left, width, height):
+        return [[z if z else None for z in row] for row in super().get_window(lower_left, width, height)]
+
+
+class ZeroIsUnknownNavigator(Navigator):
+    def reset(self):
+        super().reset()
+        self._topology_map = ZeroIsUnknownTopologyMap()
+
+
+def run(navigator_class, simulated_map, start_points, strategy_type):
+    """
+    :return: tuple(points scanned, total scan cost, runs that didn't finish)
+    """
+    sensor = SimulatedTopologySensor(simulated_map=simulated_map, power_on_cost=4, scan_point_cost=2)
+    scanned = cost = failed = 0
+    for start_point in start_points:
+        navigator = navigator_class(TopologyMap(), make_move_strategy(strategy_type), ExtractionPoint())
+        try:
+            path = list(islice(navigator.iter_points_to_destination(start_point, [sensor]), MAX_STEPS))
+            if len(path) == MAX_STEPS:
+                failed += 1
+        except TypeError:  # the old behavior could compare a height of None (really 0) with a number
+            failed += 1
+        scanned += navigator.points_scanned
+        cost += navigator.scan_cost
+    return scanned, cost, failed
+
+
+def main():
+    random.seed(30)
+    upper_right = Point2D(60, 60)
+    simulated_map = TopologyFactory.make_fake_topology(upper_right=upper_right, density=.01, max_z=6)
+    cells = [z for _x, _y, z in simulated_map.iter_all_points_xyz()]
+    print("Terrain: {} cells, {:.0%} at height 0".format(len(cells), cells.count(0) / len(cells)))
+
+    start_points = [Point2D(random.randint(0, upper_right.x), random.randint(0, upper_right.y)) for _ in range(RUNS)]
+    print("{:<28} {:>24} {:>14} {:>14} {:>8}".format("Strategy", "Map", "Points scanned", "Scan cost", "Failed"))
+    for strategy_type in [MoveStrategyType.CLIMB_MOVE_1, MoveStrategyType.CLIMB_3_CARDINAL_1_ORDINAL,
+                          MoveStrategyType.BINARY_SEARCH]:
+        for label, navigator_class in [("0 counted as unknown", ZeroIsUnknownNavigator),
+                                       ("known cell flags", Navigator)]:
+            scanned, cost, failed = run(navigator_class, simulated_map, start_points, strategy_type)
+            print("{:<28} {:>24} {:>14} {:>14} {:>8}".format(strategy_type.name, label, scanned, cost, failed))
+
+
+if __name__ == '__main__':
+    main()
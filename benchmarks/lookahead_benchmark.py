@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+#  -*- coding: utf-8 -*-
+"""
+Benchmarks lookahead scan coalescing with a sensor which can see further than the destination needs and is
+expensive to power on. For each strategy, compares the total cost with and without scanning ahead, and shows the
+savings the lookahead expected against what it credits itself with. It only credits power-ons avoided at predicted
+steps, so it doesn't count missions which end sooner because the destination was seen earlier; the difference between
+the first two columns does.
+"""
+
+import random
+from itertools import islice
+from geometry.point import Point2D
+from navigation.destinations import ExtractionPoint
+from navigation.lookahead import Lookahead
+from navigation.move_strategy import MoveStrategyType, make_move_strategy
+from navigation.navigator import Navigator
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from topology.topology_factory import TopologyFactory
+from topology.topology_map import TopologyMap
+
+MAX_STEPS = 500  # some strategies can circle forever from a few starts, so give up after this many steps
+RUNS = 50
+SENSOR_RADIUS = 3
+POWER_ON_COST = 50
+SCAN_POINT_COST = 1
+
+
+def run(lookahead, simulated_map, start_points, strategy_type):
+    """
+    :return: tuple(total cost, times the sensor was powered on)
+    """
+    sensor = SimulatedTopologySensor(simulated_map=simulated_map, radius=SENSOR_RADIUS, power_on_cost=POWER_ON_COST,
+                                     scan_point_cost=SCAN_POINT_COST)
+    cost = 0
+    for start_point in start_points:
+        navigator = Navigator(TopologyMap(), make_move_strategy(strategy_type), ExtractionPoint(), lookahead=lookahead)
+        list(islice(navigator.iter_points_to_destination(start_point, [sensor]), MAX_STEPS))
+        cost += navigator.scan_cost
+    return cost, sensor.power_on_count
+
+
+def main():
+    random.seed(37)
+    upper_right = Point2D(60, 60)
+    simulated_map = TopologyFactory.make_fake_topology(upper_right=upper_right, density=.01)
+    start_points = [Point2D(random.randint(0, upper_right.x), random.randint(0, upper_right.y)) for _ in range(RUNS)]
+    print("Sensor: radius {}, power on {}, {} per point scanned".format(SENSOR_RADIUS, POWER_ON_COST, SCAN_POINT_COST))
+    print("{:<28} {:>12} {:>12} {:>10} {:>10} {:>10} {:>10}".format(
+        "Strategy", "Cost", "Lookahead", "Hit rate", "Expected", "Saved", "Power ons"))
+    for strategy_type in [MoveStrategyType.CLIMB_MOVE_1, MoveStrategyType.CLIMB_3_CARDINAL_1_ORDINAL,
+                          MoveStrategyType.BINARY_SEARCH, MoveStrategyType.SPIRAL_OUT_CW_3,
+                          MoveStrategyType.SPIRAL_OUT_CCW]:
+        cost, _power_ons = run(None, simulated_map, start_points, strategy_type)
+        lookahead = Lookahead()
+        lookahead_cost, power_ons = run(lookahead, simulated_map, start_points, strategy_type)
+        stats = lookahead.stats.get(make_move_strategy(strategy_type).name)
+        hit_rate = stats.hits / stats.predictions if stats and stats.predictions else 0
+        print("{:<28} {:>12} {:>12} {:>10.0%} {:>10.0f} {:>10} {:>10}".format(
+            strategy_type.name, cost, lookahead_cost, hit_rate, stats.expected_savings if stats else 0,
+            stats.savings if stats else 0, power_ons))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+#  -*- coding: utf-8 -*-
+"""
+Benchmarks map deltas: how fast they encode, decode and merge, and how many bytes each cell takes compared with
+sending every known point as JSON. A full map is encoded once, then a drone flies sorties and sends only what it
+scanned on each one to a ground station. The Sorties row is the total of those deltas.
+"""
+
+import json
+import random
+import time
+from itertools import islice
+from geometry.point import Point2D
+from navigation.destinations import ExtractionPoint
+from navigation.move_strategy import MoveStrategyType, make_move_strategy
+from navigation.navigator import Navigator
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from topology.map_delta import encode_delta, iter_delta_cells, merge_delta
+from topology.procedural_topology import ProceduralTopology
+from topology.retention_policy import TrustForeverPolicy
+from topology.topology_map import TopologyMap
+
+MAX_STEPS = 500  # some strategies can circle forever from a few starts, so give up after this many steps
+SORTIES = 30
+SIZE = 255
+
+
+def timed(func, *args):
+    """
+    :return: tuple(what func returned, seconds it took)
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def report(label, cells, data, json_bytes, encode_seconds, decode_seconds, merge_seconds):
+    print("{:<12} {:>8} {:>10} {:>12.2f} {:>12.2f} {:>14,.0f} {:>14,.0f} {:>14,.0f}".format(
+        label, cells, len(data), len(data) / cells, json_bytes / cells, cells / encode_seconds, cells / decode_seconds,
+        cells / merge_seconds))
+
+
+def main():
+    random.seed(43)
+    simulated_map = ProceduralTopology(seed=43)
+    print("{:<12} {:>8} {:>10} {:>12} {:>12} {:>14} {:>14} {:>14}".format(
+        "Delta", "Cells", "Bytes", "Bytes/cell", "JSON/cell", "Encode cell/s", "Decode cell/s", "Merge cell/s"))
+
+    full_map = TopologyMap()
+    for y in range(SIZE + 1):
+        full_map.set_z_row(Point2D(0, y), [simulated_map.get_z(Point2D(x, y)) for x in range(SIZE + 1)])
+    data, encode_seconds = timed(encode_delta, full_map)
+    cells, decode_seconds = timed(lambda: len(list(iter_delta_cells(data))))
+    _changed, merge_seconds = timed(merge_delta, TopologyMap(), data)
+    json_bytes = len(json.dumps(list(full_map.iter_all_points_xyz())))
+    report("Full map", cells, data, json_bytes, encode_seconds, decode_seconds, merge_seconds)
+
+    sensor = SimulatedTopologySensor(simulated_map=simulated_map, radius=3, scan_point_cost=1)
+    navigator = Navigator(TopologyMap(), make_move_strategy(MoveStrategyType.CLIMB_MOVE_1), ExtractionPoint(),
+                          retention_policy=TrustForeverPolicy())
+    ground_station = TopologyMap()
+    totals = [0, b'', 0, 0, 0, 0]
+    for _ in range(SORTIES):
+        start_point = Point2D(random.randint(0, SIZE), random.randint(0, SIZE))
+        known_map = navigator.known_map
+        version = known_map.version
+        list(islice(navigator.iter_points_to_destination(start_point, [sensor]), MAX_STEPS))
+        data, encode_seconds = timed(encode_delta, known_map, version)
+        cells, decode_seconds = timed(lambda: len(list(iter_delta_cells(data))))
+        _changed, merge_seconds = timed(merge_delta, ground_station, data)
+        new_points = [(x, y, z) for x, y, z, _at in iter_delta_cells(data)]
+        for i, value in enumerate([cells, data, len(json.dumps(new_points)), encode_seconds, decode_seconds,
+                                   merge_seconds]):
+            totals[i] += value
+    report("Sorties", *totals)
+    assert sorted(ground_station.iter_all_points_xyz()) == sorted(navigator.known_map.iter_all_points_xyz())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+#  -*- coding: utf-8 -*-
+"""
+Benchmarks mission traces: how much slower missions are when they're traced, how big the trace is, and how fast the
+missions replay from it. Each mission is run with and without a trace several times, and the fastest time of each
+is kept. Then each mission is replayed with the same strategy, which should give the same path without diverging,
+and with another strategy, which diverges as soon as it scans somewhere else. Replay times don't include reading the
+trace.
+"""
+
+import os
+import random
+import tempfile
+import time
+from itertools import islice
+from geometry.point import Point2D
+from navigation.destinations import ExtractionPoint
+from navigation.mission_trace import MissionTrace
+from navigation.move_strategy import MoveStrategyType, make_move_strategy
+from navigation.navigator import Navigator
+from sensors.replay_topology_sensor import ReplayTopologySensor
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from topology.procedural_topology import ProceduralTopology
+from topology.topology_map import TopologyMap
+
+MAX_STEPS = 500  # some strategies can circle forever from a few starts, so give up after this many steps
+MISSIONS = 40
+REPEATS = 7
+STRATEGY_TYPE = MoveStrategyType.CLIMB_MOVE_1
+CHANGED_STRATEGY_TYPE = MoveStrategyType.GRADIENT_CLIMB
+
+
+def fly(start_point, sensors, strategy_type=STRATEGY_TYPE, trace=None):
+    """
+    :return: list of the points the mission generated
+    """
+    navigator = Navigator(TopologyMap(), make_move_strategy(strategy_type), ExtractionPoint(), trace=trace)
+    return list(islice(navigator.iter_points_to_destination(start_point, sensors), MAX_STEPS))
+
+
+def time_missions(simulated_map, start_points, trace_path):
+    """
+    Flies each mission REPEATS times with a trace and as many without, taking turns so both see the same load. The
+    traced runs all go in one trace, as a drone's missions would, so the last run of each mission is replayed
+    :return: tuple(seconds the missions took untraced, seconds traced, list of their paths), the fastest of each
+    mission's runs
+    """
+    seconds = [0, 0]
+    paths = []
+    with MissionTrace(trace_path) as trace:
+        for start_point in start_points:
+            fastest = [float('inf'), float('inf')]
+            for _ in range(REPEATS):
+                for traced in (False, True):
+                    sensor = SimulatedTopologySensor(simulated_map=simulated_map, radius=2, power_on_cost=5,
+                                                     scan_point_cost=1)
+                    start = time.perf_counter()
+                    if traced:
+                        traced_path = fly(start_point, [sensor], trace=trace)
+                    else:
+                        path = fly(start_point, [sensor])
+                    fastest[traced] = min(fastest[traced], time.perf_counter() - start)
+            assert path == traced_path
+            seconds = [total + seconds_one for total, seconds_one in zip(seconds, fastest)]
+            paths.append(path)
+    return seconds[0], seconds[1], paths
+
+
+def main():
+    random.seed(48)
+    simulated_map = ProceduralTopology(seed=48)
+    start_points = [Point2D(random.randint(0, 1000), random.randint(0, 1000)) for _ in range(MISSIONS)]
+    with tempfile.TemporaryDirectory() as trace_dir:
+        trace_path = os.path.join(trace_dir, "missions.mtr")
+        untraced, traced, paths = time_missions(simulated_map, start_points, trace_path)
+        trace_bytes = os.path.getsize(trace_path) // REPEATS
+        steps = sum(len(path) for path in paths)
+        print("{} missions, {} steps".format(MISSIONS, steps))
+        print("Untraced {:.3f}s, traced {:.3f}s, overhead {:.1f}%, {:,} trace bytes, {:.0f} bytes/step".format(
+            untraced, traced, 100 * (traced - untraced) / untraced, trace_bytes, trace_bytes / steps))
+
+        print("{:<16} {:>10} {:>10} {:>10} {:>12}".format("Replay", "Seconds", "Steps", "Same path", "Diverged"))
+        for strategy_type in (STRATEGY_TYPE, CHANGED_STRATEGY_TYPE):
+            seconds = 0
+            same = diverged = replay_steps = 0
+            for i, (start_point, path) in enumerate(zip(start_points, paths)):
+                sensors = ReplayTopologySensor.from_trace(trace_path, (i + 1) * REPEATS - 1, fallback_map=simulated_map)
+                start = time.perf_counter()
+                replayed = fly(start_point, sensors, strategy_type)
+                seconds += time.perf_counter() - start
+                replay_steps += len(replayed)
+                same += replayed == path
+                diverged += any(sensor.diverged for sensor in sensors)
+            print("{:<16} {:>10.3f} {:>10} {:>10} {:>12}".format(
+                strategy_type.name, seconds, replay_steps, same, diverged))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+#  -*- coding: utf-8 -*-
+"""
+Benchmarks sensor power policies on a sensor which is expensive to power on and cheap to leave idle. Reports the
+total cost of many missions for each policy, and how much each saved compared with always turning the sensor off.
+"""
+
+import random
+from itertools import islice
+from geometry.point import Point2D
+from navigation.destinations import ExtractionPoint
+from navigation.move_strategy import MoveStrategyType, make_move_strategy
+from navigation.navigator import Navigator
+from sensors.power_policy import AlwaysOffPolicy, KeepWarmPolicy, HysteresisPolicy, CostModelPolicy
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from topology.topology_factory import TopologyFactory
+from topology.topology_map import TopologyMap
+
+MAX_STEPS = 500  # some strategies can circle forever from a few starts, so give up after this many steps
+RUNS = 50
+POWER_ON_COST = 50
+IDLE_COST = 5
+SCAN_POINT_COST = 1
+
+
+def run(power_policy, simulated_map, start_points, strategy_type):
+    """
+    :return: tuple(total cost, total cost saved by the policy, times the sensor was powered on)
+    """
+    sensor = SimulatedTopologySensor(simulated_map=simulated_map, power_on_cost=POWER_ON_COST,
+                                     scan_point_cost=SCAN_POINT_COST, idle_cost=IDLE_COST)
+    cost = saved = 0
+    for start_point in start_points:
+        navigator = Navigator(TopologyMap(), make_move_strategy(strategy_type), ExtractionPoint(),
+                              power_policy=power_policy)
+        list(islice(navigator.iter_points_to_destination(start_point, [sensor]), MAX_STEPS))
+        cost += navigator.scan_cost
+        saved += power_policy.cost_saved
+    return cost, saved, sensor.power_on_count
+
+
+def main():
+    random.seed(36)
+    upper_right = Point2D(60, 60)
+    simulated_map = TopologyFactory.make_fake_topology(upper_right=upper_right, density=.01)
+    start_points = [Point2D(random.randint(0, upper_right.x), random.randint(0, upper_right.y)) for _ in range(RUNS)]
+    print("Sensor: power on {}, idle {} per step, {} per point scanned".format(POWER_ON_COST, IDLE_COST,
+                                                                            SCAN_POINT_COST))
+    print("{:<28} {:>16} {:>12} {:>12} {:>10}".format("Strategy", "Policy", "Total cost", "Cost saved", "Power ons"))
+    for strategy_type in [MoveStrategyType.CLIMB_MOVE_1, MoveStrategyType.CLIMB_3_CARDINAL_1_ORDINAL,
+                          MoveStrategyType.BINARY_SEARCH, MoveStrategyType.SPIRAL_OUT_CW_3]:
+        for label, power_policy in [("always off", AlwaysOffPolicy()), ("keep warm", KeepWarmPolicy()),
+                                    ("hysteresis 3", HysteresisPolicy(3)), ("cost model", CostModelPolicy())]:
+            cost, saved, power_ons = run(power_policy, simulated_map, start_points, strategy_type)
+            print("{:<28} {:>16} {:>12} {:>12} {:>10}".format(strategy_type.name, label, cost, saved, power_ons))
+
+
+if __name__ == '__main__':
+    main()
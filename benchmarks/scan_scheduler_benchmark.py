@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+#  -*- coding: utf-8 -*-
+"""
+Benchmarks splitting scans between a laser (cheap per point, short range) and a radar (wide range, dearer per point)
+when looking for the highest point within a radius the laser can't reach. Without a scheduler, only the radar can do
+the job. With one, the laser scans the cells next to the drone while the radar scans the rest, at the same time.
+Reports total cost, and the time spent in scans both as it was and as it would have been one sensor after another.
+Each scan takes SCAN_LATENCY seconds, to stand in for real hardware.
+"""
+
+import random
+from itertools import islice
+from geometry.point import Point2D
+from navigation.destinations import HighestInRadius
+from navigation.move_strategy import MoveStrategyType, make_move_strategy
+from navigation.navigator import Navigator
+from navigation.scan_scheduler import ScanScheduler
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from topology.topology_factory import TopologyFactory
+from topology.topology_map import TopologyMap
+
+MAX_STEPS = 500  # some strategies can circle forever from a few starts, so give up after this many steps
+RUNS = 20
+DESTINATION_RADIUS = 3
+SCAN_LATENCY = .002
+
+
+def run(with_laser, simulated_map, start_points, strategy_type):
+    """
+    :return: tuple(total cost, ScanScheduler with the latency totals)
+    """
+    laser = SimulatedTopologySensor(simulated_map=simulated_map, radius=1, power_on_cost=5, scan_point_cost=1,
+                                    scan_latency=SCAN_LATENCY)
+    radar = SimulatedTopologySensor(simulated_map=simulated_map, radius=DESTINATION_RADIUS, power_on_cost=10,
+                                    scan_point_cost=3, scan_latency=SCAN_LATENCY)
+    sensors = [radar, laser] if with_laser else [radar]
+    cost = 0
+    with ScanScheduler() as scan_scheduler:
+        for start_point in start_points:
+            navigator = Navigator(TopologyMap(), make_move_strategy(strategy_type),
+                                  HighestInRadius(DESTINATION_RADIUS), scan_scheduler=scan_scheduler)
+            list(islice(navigator.iter_points_to_destination(start_point, sensors), MAX_STEPS))
+            cost += navigator.scan_cost
+    return cost, scan_scheduler
+
+
+def main():
+    random.seed(38)
+    upper_right = Point2D(60, 60)
+    simulated_map = TopologyFactory.make_fake_topology(upper_right=upper_right, density=.01)
+    start_points = [Point2D(random.randint(0, upper_right.x), random.randint(0, upper_right.y)) for _ in range(RUNS)]
+    print("{:<28} {:>12} {:>12} {:>14} {:>10} {:>14}".format(
+        "Strategy", "Radar only", "Scheduled", "Radar seconds", "Seconds", "Serial seconds"))
+    for strategy_type in [MoveStrategyType.CLIMB_MOVE_1, MoveStrategyType.CLIMB_3_CARDINAL_1_ORDINAL,
+                          MoveStrategyType.SPIRAL_OUT_CW_3]:
+        cost, radar_scheduler = run(False, simulated_map, start_points, strategy_type)
+        scheduled_cost, scan_scheduler = run(True, simulated_map, start_points, strategy_type)
+        print("{:<28} {:>12} {:>12} {:>14.2f} {:>10.2f} {:>14.2f}".format(
+            strategy_type.name, cost, scheduled_cost, radar_scheduler.total_latency, scan_scheduler.total_latency,
+            scan_scheduler.total_serial_latency))
+
+
+if __name__ == '__main__':
+    main()
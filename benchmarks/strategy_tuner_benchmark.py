@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+#  -*- coding: utf-8 -*-
+"""
+Tunes the climb strategies for terrain like TopologyFactory.make_fake_topology makes, at a few peak densities, and
+compares the best settings with the predefined strategies on a corpus of other seeds they weren't tuned on. Saves the
+tuned strategies as JSON, to the path given or tuned_strategies.json, so they can be loaded with load_tuned_strategy.
+"""
+
+import random
+import sys
+import time
+from geometry.point import Point2D
+from navigation.move_strategy import CLIMB_SETTINGS
+from navigation.strategy_tuner import (OBJECTIVES, SETTINGS_DEFAULTS, StrategyTuner, TuningResult, fly_missions,
+                                      save_tuned_strategies)
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from topology.topology_factory import TopologyFactory
+
+DENSITIES = [.005, .02, .05]
+SIZE = 40
+TUNING_SEEDS = range(4)
+TEST_SEEDS = range(100, 104)
+STARTS_PER_MAP = 10
+
+
+def make_terrain(density, seed):
+    random.seed(seed)
+    return TopologyFactory.make_fake_topology(density=density, upper_right=Point2D(SIZE, SIZE))
+
+
+def make_sensor(simulated_map):
+    return SimulatedTopologySensor(simulated_map=simulated_map, power_on_cost=4, scan_point_cost=1)
+
+
+def test_on_unseen_maps(density, settings):
+    """
+    :return: TuningResult of the settings on the TEST_SEEDS maps
+    """
+    result = TuningResult(density, settings, [], 0)
+    for seed in TEST_SEEDS:
+        rng = random.Random(seed)
+        start_points = [Point2D(rng.randint(0, SIZE), rng.randint(0, SIZE)) for _ in range(STARTS_PER_MAP)]
+        (costs,), (found,) = fly_missions(make_terrain, make_sensor, density, seed, [settings], start_points)
+        result.costs.extend(costs)
+        result.found += found
+    return result
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else 'tuned_strategies.json'
+    tuner = StrategyTuner(make_terrain, make_sensor, DENSITIES, seeds=TUNING_SEEDS, starts_per_map=STARTS_PER_MAP,
+                          upper_right=Point2D(SIZE, SIZE), seed=49)
+    start = time.perf_counter()
+    tuned = tuner.tune()
+    print("Tuned in {:.0f}s. Saved to {}".format(time.perf_counter() - start, path))
+    save_tuned_strategies(path, tuned)
+
+    print("Scan costs on {} unseen maps of each density, {} missions each".format(len(TEST_SEEDS), STARTS_PER_MAP))
+    print("{:<8} {:<28} {:>10} {:>10} {:>8}  {}".format("Density", "Strategy", "Mean", "p95", "Found", "Settings"))
+    for density in DENSITIES:
+        rows = [(strategy_type.name, dict(SETTINGS_DEFAULTS, **settings))
+                for strategy_type, settings in CLIMB_SETTINGS.items()]
+        rows += [("Tuned " + objective, tuned[density][objective].settings) for objective in OBJECTIVES]
+        for name, settings in rows:
+            result = test_on_unseen_maps(density, settings)
+            print("{:<8} {:<28} {:>10.1f} {:>10} {:>8}  {}".format(
+                density, name, result.mean, result.p95, result.found, settings))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,10 +4,6 @@
 Illustrates the basic usage of the library
 """
 
-# Sets the python path first in case PYTHONPATH isn't correct
-import sys
-sys.path.extend(['.', './src', './tests', './examples'])
-
 from drone.drone_factory import DroneFactory
 from geometry.point import Point2D
 from navigation.destinations import ExtractionPoint
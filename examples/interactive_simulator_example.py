@@ -1,17 +1,18 @@
 #!/usr/bin/python3
 #  -*- coding: utf-8 -*-
-# Sets the python path first in case PYTHONPATH isn't correct
+import os
 import sys
-sys.path.extend(['.', './src', './tests', './examples'])
-
+import random
+import threading
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from geometry.point import Point2D
 from drone.drone_factory import DroneFactory
 from navigation.move_strategy import MoveStrategyType, make_move_strategy
 from sensors.simulated_topology_sensor import SimulatedTopologySensor
 
 from plot_topology_map import plot_topology_map
-from tests.topology.topology_factory import TopologyFactory
-# import random
+from topology.topology_factory import TopologyFactory
 
 strategies = [
               MoveStrategyType.CLIMB_3_CARDINAL_1_ORDINAL,
@@ -20,24 +21,61 @@ strategies = [
               # MoveStrategyType.SPIRAL_OUT_CW_3
               ]
 
+UPPER_RIGHT = Point2D(48, 32)
+DENSITY = 0.0075
+BATCH_SIZE = 8  # start cells per task sent to a worker
+MAX_PATH_LENGTH = 500  # some strategies can circle forever from a few starts, so give up after this many points
+
 
 class InteractiveSimulatorExample(object):
-    def __init__(self):
-        # random.seed(100)  # for testing, we want to always genereate same map
-        self.tm = TopologyFactory.make_fake_topology(upper_right=Point2D(48, 32), density=0.0075)
+    def __init__(self, seed=None, upper_right=UPPER_RIGHT, density=DENSITY, precompute=True, max_workers=None):
+        """
+        :param seed: random seed the map is generated from. A random one if None
+        :param upper_right: upper right corner of the map
+        :param density: number of peaks / map area
+        :param precompute: True to start precomputing every path in the background
+        :param max_workers: number of worker processes to precompute with. Defaults to the number of CPUs
+        """
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        # the same seed always makes the same map, so the workers can make their own copy
+        self.tm = TopologyFactory.make_fake_topology(upper_right=upper_right, density=density,
+                                                     rng=random.Random(self.seed))
         laser = SimulatedTopologySensor(simulated_map=self.tm, power_on_cost=4, scan_point_cost=2)
         # radar = SimulatedTopologySensor(simulated_map=self.tm, power_on_cost=10, scan_point_cost=0)
-        topology_sensors = [laser]
+        self.topology_sensors = [laser]
         self.strategy_index = 0
         self.move_strategy = strategies[self.strategy_index]
         self.drone = DroneFactory.make_drone(move_strategy=self.move_strategy,
-                                             topology_sensors=topology_sensors)
+                                             topology_sensors=self.topology_sensors)
         self.last_xy = None
+        self.cache = dict()  # (strategy name, seed, x, y) -> tuple(list of (x, y, z, cost), True if gave up)
+        self.precomputer = None
+        if precompute:
+            self.precomputer = PathPrecomputer(self, upper_right, density, max_workers)
+            self.precomputer.start()
 
     def strategy_change(self):
         self.strategy_index = (self.strategy_index + 1) % len(strategies)
         self.move_strategy = strategies[self.strategy_index]
 
+    def cache_key(self, move_strategy, x, y):
+        return move_strategy.name, self.seed, x, y
+
+    def compute_path(self, move_strategy, x, y):
+        """
+        Runs a mission, giving up after MAX_PATH_LENGTH points
+        :param move_strategy: MoveStrategyType
+        :param x: start x
+        :param y: start y
+        :return: tuple(list of (x, y, z, scan cost) of the path, True if it gave up before finding an extraction
+        point)
+        """
+        nav = self.drone.navigator
+        nav.set_move_strategy(make_move_strategy(move_strategy))  # need to reset between runs
+        path = list(islice(nav.iter_points_to_destination(Point2D(x, y), self.topology_sensors), MAX_PATH_LENGTH))
+        points = [(pt.x, pt.y, pt.z, nav.get_scan_cost_at_point(pt)) for pt in path]  # Point3D list to tuple list
+        return points, nav.found is None
+
     def navigate(self, x, y, change_strategy=False):
         if change_strategy:
             if not self.last_xy:
@@ -46,20 +84,164 @@ class InteractiveSimulatorExample(object):
         else:
             self.last_xy = (x, y)
 
-        nav = self.drone.navigator
         if change_strategy:
             self.strategy_change()
 
-        nav.set_move_strategy(make_move_strategy(self.move_strategy))  # need to reset between runs
-        path = list(self.drone.navigate_to_destination_point(Point2D(x, y)))
-        points = [(pt.x, pt.y, pt.z, nav.get_scan_cost_at_point(pt)) for pt in
-                  path]  # convert from Point3D list to tuple list
-        return points, self.move_strategy.name
+        # served from the cache when the background workers got to it, otherwise computed now
+        key = self.cache_key(self.move_strategy, x, y)
+        computed = self.cache.get(key)
+        if computed is None:
+            computed = self.cache[key] = self.compute_path(self.move_strategy, x, y)
+        points, gave_up = computed
+        return points, self.move_strategy.name, gave_up
 
     def run(self):
-        plot_topology_map(self.tm, lambda x, y, c: self.navigate(x, y, c))
+        precomputer = self.precomputer
+        try:
+            plot_topology_map(self.tm, lambda x, y, c: self.navigate(x, y, c),
+                              func_on_move=precomputer.move_cursor if precomputer else None,
+                              func_get_status=precomputer.status if precomputer else None)
+        finally:
+            if precomputer:
+                precomputer.shutdown()
+
+
+class PathPrecomputer(object):
+    """
+    Computes the path from every start cell with every strategy on a pool of worker processes, and puts them in the
+    simulator's cache. Work is handed out a batch at a time, closest to the cursor first, so the cells the user is
+    about to click are done soonest. Each worker makes its own copy of the map from the simulator's seed
+    """
+
+    def __init__(self, simulator, upper_right, density, max_workers=None, batch_size=BATCH_SIZE):
+        """
+        :param simulator: the InteractiveSimulatorExample to fill the cache of
+        :param upper_right: upper right corner of the simulator's map
+        :param density: peak density of the simulator's map
+        :param max_workers: number of worker processes. Defaults to the number of CPUs
+        :param batch_size: start cells per task
+        """
+        self._simulator = simulator
+        self._batch_size = batch_size
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._pending = [(move_strategy, x, y) for move_strategy in strategies
+                         for y in range(upper_right.y + 1) for x in range(upper_right.x + 1)]
+        self._total = len(self._pending)
+        self._done = 0
+        self._cursor = None
+        self._sorted_for = False  # cursor the pending list was last sorted for
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._in_flight = set()  # futures submitted and not finished yet
+        self._executor = ProcessPoolExecutor(self._max_workers, initializer=_init_worker,
+                                             initargs=(simulator.seed, upper_right, density))
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """
+        Starts precomputing in the background
+        """
+        self._thread.start()
+
+    def move_cursor(self, x, y):
+        """
+        Cells closest to here are computed next
+        :param x:
+        :param y:
+        """
+        with self._lock:
+            self._cursor = (x, y)
+
+    @property
+    def progress(self):
+        """
+        :return: tuple(paths computed, total paths)
+        """
+        return self._done, self._total
+
+    def status(self):
+        """
+        :return: how far precomputation has got, for showing in the UI
+        """
+        done, total = self.progress
+        if done == total:
+            return "Precomputed all {} paths".format(total)
+        return "Precomputing paths in the background: {}/{} ({:.0%})".format(done, total, done / total)
+
+    def join(self, timeout=None):
+        """
+        Waits for precomputation to finish
+        :param timeout: seconds
+        """
+        self._thread.join(timeout)
+
+    def shutdown(self):
+        """
+        Stops precomputing
+        """
+        self._stopped.set()
+        for future in list(self._in_flight):  # the ones not started yet are dropped
+            future.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _next_batch(self):
+        """
+        Takes the batch of pending cells closest to the cursor
+        :return: list of (move strategy, x, y)
+        """
+        with self._lock:
+            cursor = self._cursor
+            if cursor is not None and cursor != self._sorted_for:
+                # farthest first, so the closest are popped off the end
+                self._pending.sort(key=lambda task: -((task[1] - cursor[0]) ** 2 + (task[2] - cursor[1]) ** 2))
+                self._sorted_for = cursor
+            batch = self._pending[-self._batch_size:]
+            del self._pending[-self._batch_size:]
+        return batch
+
+    def _run(self):
+        """
+        Keeps the workers busy until everything is computed
+        """
+        cache = self._simulator.cache
+        try:
+            while not self._stopped.is_set():
+                while len(self._in_flight) < 2 * self._max_workers:
+                    batch = self._next_batch()
+                    if not batch:
+                        break
+                    self._in_flight.add(self._executor.submit(_compute_paths, batch))
+                if not self._in_flight:
+                    return
+                finished, self._in_flight = wait(self._in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future.cancelled():
+                        continue
+                    for key, computed in future.result():
+                        cache[key] = computed
+                        self._done += 1
+        except RuntimeError:
+            pass  # the executor was shut down while we were submitting
+
+
+_worker_simulator = None  # each worker process's own simulator
+
+
+def _init_worker(seed, upper_right, density):
+    global _worker_simulator
+    _worker_simulator = InteractiveSimulatorExample(seed, upper_right, density, precompute=False)
+
+
+def _compute_paths(batch):
+    """
+    Runs in a worker process
+    :param batch: list of (move strategy, x, y)
+    :return: list of (cache key, path)
+    """
+    return [(_worker_simulator.cache_key(move_strategy, x, y), _worker_simulator.compute_path(move_strategy, x, y))
+            for move_strategy, x, y in batch]
 
 
 if __name__ == '__main__':
-    example = InteractiveSimulatorExample()
+    example = InteractiveSimulatorExample(seed=int(sys.argv[1]) if len(sys.argv) > 1 else None)
     example.run()
@@ -5,13 +5,22 @@ Plot a TopologyMap and path using matpyplot. This is a bit unpolished:
 - Text could use nicer formatting and positioning,
 - I am not sure how to get rid of the defaut toolbar
 
+The height image is drawn once. Clicks only redraw the path overlays (the end markers, one collection holding all of
+the path numbers, and the stats text), which are blitted over a saved copy of the rest of the figure when the backend
+supports it, so interaction stays fast on big maps.
 """
 import matplotlib.pyplot as plt
 import numpy as np
 import math
+from matplotlib.collections import PathCollection
 from matplotlib.figure import Figure
+from matplotlib.path import Path
+from matplotlib.textpath import TextPath
 
 FONT_SIZE = 20
+STATUS_INTERVAL = 250  # milliseconds between status updates
+LABEL_SIZE = .45  # height of the path numbers, in cells
+LABEL_OFFSET = .2
 
 
 class MyFigure(Figure):
@@ -28,66 +37,96 @@ class MyFigure(Figure):
         self.text(0.5, 0.95, figtitle, ha='center', va='bottom', fontsize=FONT_SIZE * 0.5)
 
 
-def plot_topology_map(topology_map, func_get_path):
+class TopologyMapPlot(object):
     """
-    Plots the map with color coding for heights, and the path drawn.
+    An interactive plot of a map, with the path from a clicked point drawn over it.
     The func_get_path is how the plot interacts with its creator. Basically, func_get_path has the signature
-    list(x,y,z, cost) func_get_path(x,y, bool=switch_strategy). When called, the creator will populate the
-    list with values used for drawing the path
-    :param topology_map:
-    :param func_get_path: the callback function
-    a path of points.
+    tuple(list(x,y,z, cost), strategy name[, gave up]) func_get_path(x,y, bool=switch_strategy). When called, the
+    creator will return the values used for drawing the path. If gave up is True, the path was cut off before reaching
+    an extraction point, and the stats say so
     """
 
-    plt.rcParams.update({'font.size': FONT_SIZE * 0.6})
-
-    lower_left, upper_right = topology_map.boundary_points
-    width, height = topology_map.width_and_height
-    grid = np.zeros((height, width))
-
-    # populate the grid with our topology
-    for x, y, z in topology_map.iter_all_points_xyz():
-        # normalize each point so that the lower left point is on 0,0
-        normalized_x = x - lower_left.x
-        normalized_y = y - lower_left.y
-        grid[normalized_y, normalized_x] = z  # grid is indexed by rows(y) first, not columns(x)
-
-    figtitle = "Path is numbered in order of visitation. From white square to red triangle\n" \
-               "The triangle will have red text if it didn't need to be scanned\n" \
-               "Press the space bar to cycle through strategies, or click a new point"
-
-    fig = plt.figure(FigureClass=MyFigure, figtitle=figtitle)
-    ax = fig.subplots()
-    # fig, ax = plt.subplots()
-
-    # To center axes labels with cells, enlarge the extent by half a cell width on all sides
-    extent = (lower_left.x - .5, upper_right.x + .5, lower_left.y - .5, upper_right.y + .5)
-    ax.imshow(grid, origin='lower', extent=extent)
-
-    def draw_path(path):
+    def __init__(self, topology_map, func_get_path, func_on_move=None, func_get_status=None):
         """
-        Draws the path. This consists of drawing the endpoints and numbering each cell in the path.
-        Also, it indicates cells where a scan was done by making the font color blue for scanned cells,
-        otherwise white. Currently it may glitch of drawing a point outside our range. For now, I'm
-        not worring about it
-        :param path: list of (x,y,z, scan_cost)
+        :param topology_map:
+        :param func_get_path: the callback function
+        :param func_on_move: optional function(x, y) called with the cell under the cursor as it moves over the map
+        :param func_get_status: optional function() -> str, polled every STATUS_INTERVAL to show in a status line,
+        such as progress of background work
+        """
+        self._func_get_path = func_get_path
+        self._func_on_move = func_on_move
+        self._func_get_status = func_get_status
+        self._label_paths = dict()  # path number -> TextPath at the origin, since making them is slow
+        plt.rcParams.update({'font.size': FONT_SIZE * 0.6})
+
+        lower_left, upper_right = topology_map.boundary_points
+        width, height = topology_map.width_and_height
+        # unknown cells come back as None, which become nan and are left blank
+        self.grid = np.array(topology_map.get_window(lower_left, width, height), dtype=float)
+
+        figtitle = "Path is numbered in order of visitation. From white square to red triangle\n" \
+                   "The triangle will have red text if it didn't need to be scanned\n" \
+                   "Press the space bar to cycle through strategies, or click a new point"
+
+        self.figure = fig = plt.figure(FigureClass=MyFigure, figtitle=figtitle)
+        self._ax = ax = fig.subplots()
+
+        # To center axes labels with cells, enlarge the extent by half a cell width on all sides
+        extent = (lower_left.x - .5, upper_right.x + .5, lower_left.y - .5, upper_right.y + .5)
+        self.image = ax.imshow(self.grid, origin='lower', extent=extent)
+        ax.set_autoscale_on(False)  # so the overlays never resize the axes
+
+        # The overlays. They're animated, so a full draw leaves them out and we can blit them over a saved background
+        symbol_size = FONT_SIZE // 2 * 0.75
+        self._start_marker, = ax.plot([], [], 'wo', markersize=symbol_size, animated=True)  # start is a white circle
+        self._end_marker, = ax.plot([], [], 'r^', markersize=symbol_size, animated=True)  # end is a red triangle
+        self._labels = PathCollection([], animated=True, linewidths=0)
+        ax.add_collection(self._labels, autolim=False)
+        self._stats = ax.text(0.5, 1.01, "Click a point to navigate from it to high ground", transform=ax.transAxes,
+                              ha='center', va='bottom', animated=True)
+        self._status = fig.text(0.01, 0.01, "", ha='left', va='bottom', animated=True, fontsize=FONT_SIZE * 0.4)
+        self._background = None
+        self._status_timer = None
+
+        fig.canvas.mpl_connect('draw_event', self._on_draw)
+        fig.canvas.mpl_connect('button_press_event', self._on_click)
+        fig.canvas.mpl_connect('key_press_event', self._on_key)
+        if func_on_move:
+            fig.canvas.mpl_connect('motion_notify_event', self._on_move)
+        if func_get_status:
+            self._status_timer = fig.canvas.new_timer(interval=STATUS_INTERVAL)
+            self._status_timer.add_callback(self.update_status)
+            self._status_timer.start()
+        if fig.canvas.manager is not None:
+            fig.canvas.manager.set_window_title("Plot Path Example")
+
+    @property
+    def overlays(self):
         """
-        font_size = FONT_SIZE // 2
-        symbol_size = font_size * 0.75
-        # Plot start point
-        start_x, start_y, start_z, start_cost = path[0]
-        plt.plot(start_x, start_y, 'wo', markersize=symbol_size)  # start is a white circle
+        :return: list of the artists drawn over the image
+        """
+        return [self._start_marker, self._end_marker, self._labels, self._stats, self._status]
 
-        # Plot end points
-        end_x, end_y, end_z, end_cost = path[-1]
-        plt.plot(end_x, end_y, 'r^', markersize=symbol_size)  # endpoint is a red diamond
+    def update_status(self):
+        """
+        Asks for the status and shows it, if it changed
+        """
+        status = self._func_get_status()
+        if status != self._status.get_text():
+            self._status.set_text(status)
+            self._blit()
 
-        offset = .2
-        for i, point in enumerate(path):
-            color = "blue" if point[3] else "white"  # scanned here
-            plt.text(point[0] - offset, point[1] - offset, str(i), color=color, fontsize=font_size)
+    def show(self):
+        """
+        Shows the plot, big
+        """
+        mng = plt.get_current_fig_manager()
+        if hasattr(mng, 'window'):
+            mng.resize(*mng.window.maxsize())
+        plt.show()
 
-    def replot(cx, cy, change_strategy=False):
+    def replot(self, cx, cy, change_strategy=False):
         """
         Queries for new data and plots it. If change_strategy is True, the creator will populate the new path
         using a different strategy, but the same points as before. If it's False, then the current strategy
@@ -95,61 +134,113 @@ def plot_topology_map(topology_map, func_get_path):
         :param cx: new starting x
         :param cy: new starting y
         :param change_strategy: True if change strategy. If so, x,y are ignored
-        :return:
         """
-        plt.cla()
-        ax.imshow(grid, origin='lower', extent=extent)
-
         # Ask our creator for get a new path from the click origin, or with new strategy
-        path, strategy_name = func_get_path(cx, cy, change_strategy)
-        if not path:
+        found = self._func_get_path(cx, cy, change_strategy)
+        if not found or not found[0]:
             return  # To handle case where we've changed strategy but have no point yet
+        path, strategy_name = found[:2]
+        gave_up = len(found) > 2 and found[2]
 
-        draw_path(path)
+        self._draw_path(path)
 
         # Calculate cost/scan values from the cost element of the tuple (x,y,z, cost)
-        cost = 0
-        scans = 0
-        for p in path:
-            cost += p[3]
-            if p[3]:
-                scans += 1
+        costs = [p[3] for p in path]
+        scans = sum(1 for cost in costs if cost)
+        self._stats.set_text("{} strategy\n({},{}),=> ({},{}){}\nScans: {} Cost: {}".
+                             format(strategy_name, path[0][0], path[0][1], path[-1][0], path[-1][1],
+                                    " gave up after {} moves".format(len(path)) if gave_up else "", scans,
+                                    sum(costs)))
+        self._blit()
+
+    def _draw_path(self, path):
+        """
+        Updates the overlays for the path. This consists of the endpoints and numbering each cell in the path.
+        Also, it indicates cells where a scan was done by making the color blue for scanned cells, otherwise white.
+        The numbers are all in a single collection: one compound path for scanned cells and one for the rest
+        :param path: list of (x,y,z, scan_cost)
+        """
+        self._start_marker.set_data([path[0][0]], [path[0][1]])
+        self._end_marker.set_data([path[-1][0]], [path[-1][1]])
+
+        scanned, not_scanned = [], []
+        for i, (x, y, _z, cost) in enumerate(path):
+            label = self._label_paths.get(i)
+            if label is None:
+                label = self._label_paths[i] = TextPath((0, 0), str(i), size=LABEL_SIZE)
+            (scanned if cost else not_scanned).append(
+                Path(label.vertices + (x - LABEL_OFFSET, y - LABEL_OFFSET), label.codes))
+        paths, colors = [], []
+        for label_paths, color in ((scanned, 'blue'), (not_scanned, 'white')):
+            if label_paths:
+                paths.append(Path.make_compound_path(*label_paths))
+                colors.append(color)
+        self._labels.set_paths(paths)
+        self._labels.set_facecolors(colors)
+
+    def _on_draw(self, _event):
+        """
+        After a full draw (first show, resize), saves the figure without the overlays and puts the overlays back
+        """
+        canvas = self.figure.canvas
+        if getattr(canvas, 'supports_blit', False):
+            self._background = canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_overlays()
 
-        plt.title("{} strategy\n({},{}),=> ({},{})\nScans: {} Cost: {}".
-                  format(strategy_name, path[0][0], path[0][1], path[-1][0], path[-1][1], scans, cost))
+    def _blit(self):
+        """
+        Redraws just the overlays over the saved background, or the whole figure if we can't
+        """
+        canvas = self.figure.canvas
+        if self._background is None:
+            canvas.draw_idle()  # the draw event will draw the overlays
+            return
+        canvas.restore_region(self._background)
+        self._draw_overlays()
+        canvas.blit(self.figure.bbox)
 
-        fig.canvas.draw()
+    def _draw_overlays(self):
+        for artist in self.overlays:
+            self.figure.draw_artist(artist)
 
-    def on_click(event):
+    def _on_click(self, event):
         """
         Handles clicks on cells by replotting new path
         :param event:
         """
-        if not event.xdata or not event.ydata:  # if not clicked on a cell
+        if event.inaxes is not self._ax or event.xdata is None or event.ydata is None:  # if not clicked on a cell
             return
         # get closes integer points
         cx = math.floor(round(event.xdata))
         cy = math.floor(round(event.ydata))
-        replot(cx, cy)
+        self.replot(cx, cy)
 
-    _cid = fig.canvas.mpl_connect('button_press_event', on_click)
+    def _on_move(self, event):
+        """
+        Passes the cell under the cursor to func_on_move
+        :param event:
+        """
+        if event.inaxes is self._ax and event.xdata is not None and event.ydata is not None:
+            self._func_on_move(math.floor(round(event.xdata)), math.floor(round(event.ydata)))
 
-    def on_key(event):
+    def _on_key(self, event):
         """
         Handles keyboard events - spacebar will replot with new strategy
         :param event:
-        :return:
         """
         if event.key == ' ':
-            replot(0, 0, True)
-
-    _cid = fig.canvas.mpl_connect('key_press_event', on_key)
+            self.replot(0, 0, True)
 
-    plt.title("Click a point to navigate from it to high ground")
-    fig.canvas.set_window_title("Plot Path Example")
 
-    # make window big
-    mng = plt.get_current_fig_manager()
-    if hasattr(mng, 'window'):
-        mng.resize(*mng.window.maxsize())
-    plt.show()
+def plot_topology_map(topology_map, func_get_path, func_on_move=None, func_get_status=None):
+    """
+    Plots the map with color coding for heights, and the path drawn.
+    :param topology_map:
+    :param func_get_path: the callback function. See TopologyMapPlot
+    :param func_on_move: optional cursor callback. See TopologyMapPlot
+    :param func_get_status: optional status callback. See TopologyMapPlot
+    :return: the TopologyMapPlot
+    """
+    plot = TopologyMapPlot(topology_map, func_get_path, func_on_move, func_get_status)
+    plot.show()
+    return plot
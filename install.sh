@@ -1,4 +1,4 @@
 #!/usr/bin/env bash
-# installs dependencies for examples in project
+# installs the package, with the optional dependencies for the examples in project
 sudo apt-get install python3-tk python3-pip
-pip3 install --user PyDispatcher matplotlib
\ No newline at end of file
+pip3 install --user -e ".[plot,observers]"
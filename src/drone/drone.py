@@ -3,13 +3,23 @@
 Drone Class. Could be used as base class for any vehicle
 """
 import logging
+from functools import lru_cache
 from geometry.point import Point3D
 
-try:
-    from pydispatch import dispatcher  # see if PyDispatcher package exists
-except ImportError:
-    logging.warn("PyDistpatcher not found. Drone movement won't be published to observers")
-    dispatcher = None
+
+@lru_cache(maxsize=None)
+def _get_dispatcher():
+    """
+    Imports PyDispatcher the first time a drone navigates rather than when this module is imported, since it's
+    optional and slows down starting a process
+    :return: the pydispatch dispatcher module, or None if PyDispatcher isn't installed
+    """
+    try:
+        from pydispatch import dispatcher
+    except ImportError:
+        logging.warning("PyDispatcher not found. Drone movement won't be published to observers")
+        return None
+    return dispatcher
 
 
 class Drone(object):
@@ -65,6 +75,7 @@ class Drone(object):
         """
         logging.info("Start point is " + repr(start_point))
         self._coords = Point3D(start_point.x, start_point.y, 0)  # set start position without calling move_to
+        dispatcher = _get_dispatcher()
 
         # Notify any observers that the drone started
         if dispatcher:
@@ -35,7 +35,8 @@ class DroneFactory(object):
         raise KeyError("Unknown Sensor Type: " + str(sensor))
 
     @staticmethod
-    def make_drone(move_strategy, topology_sensors, destination=ExtractionPoint()):
+    def make_drone(move_strategy, topology_sensors, destination=ExtractionPoint(), power_policy=None,
+                   retention_policy=None, topology_map=None):
         """
         Makes a drone (factory method). Accepts either objects or Enums as arguments.
         We can use a variety of sensors, navigation strategies, and rules, and then we pass the chosen ones
@@ -44,18 +45,23 @@ class DroneFactory(object):
         :param destination: The Destination we're looking for, such as an ExtractionPoint
         :param move_strategy: either a MoveStrategy, a function, or Enum NavigationStrategyType
         :param topology_sensors: a list containing elements of either TopologySensor, or Enum TopologySensorType
+        :param power_policy: PowerPolicy deciding when sensors are turned off. By default, after every scan
+        :param retention_policy: RetentionPolicy deciding which cells of the map are kept from one mission to the
+        next. By default, none are
+        :param topology_map: map of known areas of the topology, such as one kept from another drone's missions. By
+        default, an empty one
         :return:
         """
-
-        # Map of known areas of the topology. In the future, we could persist this map and then
-        # reuse it for this or any drone on subsequent missions
-        topology_map = TopologyMap()
+        if topology_map is None:
+            topology_map = TopologyMap()
 
         # convert the passed-in sensor list to actual sensors in case enums were passed in
         sensors = [s if isinstance(s, TopologySensor) else DroneFactory.make_sensor(s) for s in topology_sensors]
 
         navigator = NavigatorFactory.make_navigator(topology_map=topology_map,
                                                     move_strategy=move_strategy,
-                                                    destination=destination)
+                                                    destination=destination,
+                                                    power_policy=power_policy,
+                                                    retention_policy=retention_policy)
 
         return Drone(navigator, topology_sensors=sensors)
@@ -1,12 +1,14 @@
 # -*- coding: utf-8 -*-
 """
-Simple immutable, hashable Point2D and Point3D classes
+Simple immutable, hashable Point2D and Point3D classes, and PointArray for working on many points at once
 For purposes of this exercise, I am writing it myself, though in reality, the "Jeep" project
 should use a geometry library, such as https://docs.sympy.org/latest/modules/geometry/index.html
-Note that because of this, I'm keeping things simple and not bothering to write test cases. The code
-is pretty trivial.
+Note that because of this, I'm keeping things simple and not bothering to write test cases for the point
+classes. The code is pretty trivial.
 """
 import math
+from array import array
+from itertools import compress
 
 
 class Point2D(object):
@@ -93,3 +95,159 @@ class Point3D(Point2D):
 
     def __repr__(self):
         return '(' + str(self.x) + ',' + str(self.y) + ',' + str(self.z) + ')'
+
+
+class PointArray(object):
+    """
+    Many points kept as arrays of their int coordinates, plus an optional list of heights, so geometry can be done on
+    all of them at once without making a Point2D for each. Iterating gives (x, y) or (x, y, z) tuples, so a PointArray
+    can be passed wherever a list of offsets is expected. Operations return a new PointArray
+    """
+    __slots__ = ['_xs', '_ys', '_zs']
+
+    def __init__(self, xs=(), ys=(), zs=None):
+        """
+        :param xs: iterable of int x coordinates
+        :param ys: iterable of int y coordinates, as many as xs
+        :param zs: optional iterable of heights, as many as xs
+        """
+        self._xs = array('q', xs)
+        self._ys = array('q', ys)
+        self._zs = list(zs) if zs is not None else None
+        if len(self._xs) != len(self._ys) or (self._zs is not None and len(self._zs) != len(self._xs)):
+            raise ValueError("xs, ys and zs must be the same length")
+
+    @classmethod
+    def from_tuples(cls, tuples):
+        """
+        :param tuples: iterable of (x, y) or (x, y, z) tuples
+        :return: PointArray
+        """
+        columns = list(zip(*tuples))
+        if not columns:
+            return cls()
+        return cls(columns[0], columns[1], columns[2] if len(columns) > 2 else None)
+
+    @classmethod
+    def from_points(cls, points):
+        """
+        :param points: iterable of Point2D, or of Point3D to keep their heights
+        :return: PointArray
+        """
+        return cls.from_tuples(pt.to_tuple() for pt in points)
+
+    @property
+    def xs(self):
+        return self._xs
+
+    @property
+    def ys(self):
+        return self._ys
+
+    @property
+    def zs(self):
+        """
+        :return: list of heights, or None if the points are 2D
+        """
+        return self._zs
+
+    def with_z(self, zs):
+        """
+        :param zs: iterable of heights, one for each point
+        :return: PointArray of the same points with those heights
+        """
+        return PointArray(self._xs, self._ys, zs)
+
+    def point(self, i):
+        """
+        :param i: index
+        :return: Point2D, or Point3D if the points have heights
+        """
+        if self._zs is None:
+            return Point2D(self._xs[i], self._ys[i])
+        return Point3D(self._xs[i], self._ys[i], self._zs[i])
+
+    def to_points(self):
+        """
+        :return: list of Point2D, or of Point3D if the points have heights
+        """
+        return [self.point(i) for i in range(len(self._xs))]
+
+    def to_tuples(self):
+        """
+        :return: list of (x, y) or (x, y, z) tuples
+        """
+        return list(self)
+
+    def translate(self, x, y):
+        return PointArray([px + x for px in self._xs], [py + y for py in self._ys], self._zs)
+
+    def scale(self, factor):
+        """
+        Multiplies the coordinates, such as to turn directions into moves of a distance
+        :param factor: int
+        """
+        return PointArray([x * factor for x in self._xs], [y * factor for y in self._ys], self._zs)
+
+    def distance2d(self, other):
+        """
+        :param other: a point
+        :return: list of the distance from each point to it
+        """
+        ox, oy = other.x, other.y
+        return [math.hypot(x - ox, y - oy) for x, y in zip(self._xs, self._ys)]
+
+    def max_orthogonal_distance(self, other):
+        """
+        :param other: a point
+        :return: list of the distance from each point to it along whichever axis is furthest
+        """
+        ox, oy = other.x, other.y
+        return [max(abs(x - ox), abs(y - oy)) for x, y in zip(self._xs, self._ys)]
+
+    def midpoint_to(self, other):
+        """
+        Unlike Point2D.midpoint_to, halves are rounded down, since coordinates are ints
+        :param other: a point
+        :return: PointArray of the points halfway from each point to it
+        """
+        ox, oy = other.x, other.y
+        return PointArray([(x + ox) // 2 for x in self._xs], [(y + oy) // 2 for y in self._ys])
+
+    def compress(self, selectors):
+        """
+        :param selectors: iterable of truth values, one for each point
+        :return: PointArray of the points whose value is true
+        """
+        selectors = list(selectors)
+        zs = list(compress(self._zs, selectors)) if self._zs is not None else None
+        return PointArray(compress(self._xs, selectors), compress(self._ys, selectors), zs)
+
+    def __add__(self, other):
+        """
+        :param other: PointArray
+        :return: PointArray of these points followed by the other's. Heights are kept only if both have them
+        """
+        zs = self._zs + other.zs if self._zs is not None and other.zs is not None else None
+        return PointArray(self._xs + other.xs, self._ys + other.ys, zs)
+
+    def __len__(self):
+        return len(self._xs)
+
+    def __iter__(self):
+        if self._zs is None:
+            return zip(self._xs, self._ys)
+        return zip(self._xs, self._ys, self._zs)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return PointArray(self._xs[i], self._ys[i], self._zs[i] if self._zs is not None else None)
+        if self._zs is None:
+            return self._xs[i], self._ys[i]
+        return self._xs[i], self._ys[i], self._zs[i]
+
+    def __eq__(self, other):
+        return isinstance(other, PointArray) and (self._xs, self._ys, self._zs) == (other.xs, other.ys, other.zs)
+
+    def __repr__(self):
+        return 'PointArray(' + str(self.to_tuples()) + ')'
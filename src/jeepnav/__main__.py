@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""
+Runs the jeepnav command line with python -m jeepnav
+"""
+import sys
+from jeepnav.cli import main
+
+sys.exit(main())
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+The jeepnav command line:
+
+* jeepnav generate: makes a simulated map and stores it as a .npy DEM
+* jeepnav navigate: flies a mission on a stored map from a start point, optionally recording a MissionTrace
+* jeepnav bench: flies missions from random starts on a stored map with each strategy, and tallies the scan costs
+* jeepnav replay: flies a recorded mission again from its trace, without the map, and reports any divergence
+
+A mission runner starts a process for each sortie, so startup time matters. Only the standard library modules needed
+to parse the arguments are imported up front. Each command imports what it uses when it runs, and nothing here
+imports the optional heavy dependencies (numpy, matplotlib, PyDispatcher). Stored maps are memory-mapped, so they
+aren't loaded either. Check with: python -X importtime -m jeepnav navigate map.npy 10 10
+"""
+import argparse
+import sys
+
+DEFAULT_STRATEGY = 'BINARY_SEARCH'
+BENCH_STRATEGIES = ['CLIMB_MOVE_1', 'CLIMB_3_CARDINAL_1_ORDINAL', 'BINARY_SEARCH']
+MAX_STEPS = 500  # missions which haven't found an extraction point by then give up
+NOT_FOUND = 1  # exit status of a mission which didn't find an extraction point
+
+
+def main(argv=None):
+    """
+    Runs a command
+    :param argv: list of arguments, without the program name. By default, sys.argv's
+    :return: exit status
+    """
+    parser = make_parser()
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except (ValueError, OSError) as error:
+        parser.exit(2, "{}: error: {}\n".format(parser.prog, error))
+
+
+def make_parser():
+    """
+    :return: ArgumentParser for the commands
+    """
+    parser = argparse.ArgumentParser(prog='jeepnav', description="Navigate drones to extraction points")
+    commands = parser.add_subparsers(dest='command', metavar='command')
+    commands.required = True
+
+    generate = commands.add_parser('generate', help="make a simulated map and store it as a .npy DEM")
+    generate.add_argument('map', help=".npy file to write")
+    generate.add_argument('--width', type=int, default=48)
+    generate.add_argument('--height', type=int, default=32)
+    generate.add_argument('--density', type=float, default=.0075, help="number of peaks / map area")
+    generate.add_argument('--seed', type=int, default=0, help="the same seed always makes the same map")
+    generate.add_argument('--procedural', action='store_true',
+                          help="generate tile by tile with a ProceduralTopology, which is faster for big maps")
+    generate.set_defaults(func=generate_command)
+
+    navigate = commands.add_parser('navigate', help="fly a mission on a stored map")
+    navigate.add_argument('map', help=".npy DEM, as written by generate")
+    _add_start_arguments(navigate)
+    _add_strategy_arguments(navigate)
+    _add_sensor_arguments(navigate)
+    navigate.add_argument('--trace', help="record the mission to this MissionTrace file")
+    navigate.add_argument('--path', action='store_true', help="print every point flown to")
+    navigate.set_defaults(func=navigate_command)
+
+    bench = commands.add_parser('bench', help="fly missions from random starts on a stored map with each strategy")
+    bench.add_argument('map', help=".npy DEM, as written by generate")
+    bench.add_argument('--strategy', dest='strategies', action='append',
+                       help="MoveStrategyType name. Can be repeated. By default, the climb strategies")
+    bench.add_argument('--missions', type=int, default=20, help="missions flown with each strategy")
+    bench.add_argument('--seed', type=int, default=0, help="seed of the start points")
+    bench.add_argument('--max-steps', type=int, default=MAX_STEPS)
+    _add_sensor_arguments(bench)
+    bench.set_defaults(func=bench_command)
+
+    replay = commands.add_parser('replay', help="fly a recorded mission again from its trace")
+    replay.add_argument('trace', help="MissionTrace file, as recorded by navigate --trace")
+    replay.add_argument('--mission', type=int, default=0, help="which mission in the trace, counting from 0")
+    replay.add_argument('--map', help="map to read cells the trace doesn't have from, once the replay diverges")
+    _add_strategy_arguments(replay)
+    replay.add_argument('--path', action='store_true', help="print every point flown to")
+    replay.set_defaults(func=replay_command)
+    return parser
+
+
+def generate_command(args):
+    """
+    Makes a simulated map and writes it as a .npy DEM
+    """
+    from geometry.point import Point2D
+    from topology.dem import write_npy
+
+    if args.procedural:
+        from topology.procedural_topology import ProceduralTopology
+        simulated_map = ProceduralTopology(seed=args.seed, density=args.density)
+    else:
+        import random
+        from topology.topology_factory import TopologyFactory
+        random.seed(args.seed)
+        simulated_map = TopologyFactory.make_fake_topology(density=args.density,
+                                                           upper_right=Point2D(args.width - 1, args.height - 1))
+    rows = ([simulated_map.get_z(Point2D(x, y)) for x in range(args.width)] for y in reversed(range(args.height)))
+    write_npy(args.map, rows, args.width, args.height, dtype='<i4')
+    print("Wrote a {}x{} map to {}".format(args.width, args.height, args.map))
+    return 0
+
+
+def navigate_command(args):
+    """
+    Flies a mission on a stored map
+    :return: 0 if it found an extraction point, else NOT_FOUND
+    """
+    from geometry.point import Point2D
+    from topology.dem import MemoryMappedTopology
+
+    strategy = _make_strategy(args.strategy, args.tuned)
+    trace = None
+    if args.trace:
+        from navigation.mission_trace import MissionTrace
+        trace = MissionTrace(args.trace)
+    try:
+        with MemoryMappedTopology.from_npy(args.map) as simulated_map:
+            path, navigator = _fly(strategy, _make_sensors(simulated_map, args), Point2D(args.x, args.y),
+                                   args.max_steps, trace)
+    finally:
+        if trace:
+            trace.close()
+    return _report(path, navigator, args.path)
+
+
+def bench_command(args):
+    """
+    Flies missions from random starts on a stored map with each strategy, and prints their scan costs
+    """
+    import random
+    from geometry.point import Point2D
+    from topology.dem import MemoryMappedTopology
+
+    if args.missions < 1:
+        raise ValueError("--missions must be at least 1")
+    strategy_names = args.strategies or BENCH_STRATEGIES
+    strategies = [_make_strategy(name) for name in strategy_names]  # fail on unknown names before flying any
+    print("{:<28} {:>10} {:>10} {:>8}".format("Strategy", "Mean", "Max", "Found"))
+    with MemoryMappedTopology.from_npy(args.map) as simulated_map:
+        width, height = simulated_map.width_and_height
+        rng = random.Random(args.seed)
+        start_points = [Point2D(rng.randrange(width), rng.randrange(height)) for _ in range(args.missions)]
+        for name, strategy in zip(strategy_names, strategies):
+            costs, found = [], 0
+            for start_point in start_points:
+                # a new strategy for each mission, since some keep state between missions
+                _path, navigator = _fly(_make_strategy(name), _make_sensors(simulated_map, args), start_point,
+                                        args.max_steps)
+                costs.append(navigator.scan_cost)
+                found += navigator.found is not None
+            print("{:<28} {:>10.1f} {:>10} {:>8}".format(strategy.name, sum(costs) / len(costs), max(costs),
+                                                         "{}/{}".format(found, len(costs))))
+    return 0
+
+
+def replay_command(args):
+    """
+    Flies a recorded mission again, with sensors which serve the recorded scans, and reports whether it diverged
+    :return: 0 if it found an extraction point, else NOT_FOUND
+    """
+    from navigation.mission_trace import MissionStart, iter_trace
+    from sensors.replay_topology_sensor import ReplayTopologySensor
+
+    strategy = _make_strategy(args.strategy, args.tuned)
+    starts = (record.start_point for record in iter_trace(args.trace) if isinstance(record, MissionStart))
+    start_point = next((point for mission, point in enumerate(starts) if mission == args.mission), None)
+    if start_point is None:
+        raise ValueError("Mission {} isn't in {}".format(args.mission, args.trace))
+    fallback_map = None
+    if args.map:
+        from topology.dem import MemoryMappedTopology
+        fallback_map = MemoryMappedTopology.from_npy(args.map)
+    try:
+        sensors = ReplayTopologySensor.from_trace(args.trace, args.mission, fallback_map=fallback_map)
+        path, navigator = _fly(strategy, sensors, start_point, args.max_steps)
+    finally:
+        if fallback_map:
+            fallback_map.close()
+    divergences = [divergence for sensor in sensors for divergence in sensor.divergences]
+    if divergences:
+        first = min(divergences, key=lambda divergence: divergence.scan_number)
+        print("Diverged from the recorded mission: {} scans weren't the ones recorded, the first at {}".format(
+            len(divergences), first.home_point))
+    else:
+        print("Same as the recorded mission")
+    return _report(path, navigator, args.path)
+
+
+def _add_start_arguments(parser):
+    parser.add_argument('x', type=int, help="x of the start point")
+    parser.add_argument('y', type=int, help="y of the start point")
+
+
+def _add_strategy_arguments(parser):
+    parser.add_argument('--strategy', default=DEFAULT_STRATEGY,
+                        help="MoveStrategyType name, or with --tuned, a saved strategy's name")
+    parser.add_argument('--tuned', help="JSON file of strategies saved by save_tuned_strategies")
+    parser.add_argument('--max-steps', type=int, default=MAX_STEPS)
+
+
+def _add_sensor_arguments(parser):
+    parser.add_argument('--radius', type=int, default=1, help="scan radius of the sensor")
+    parser.add_argument('--power-on-cost', type=_number, default=4)
+    parser.add_argument('--scan-point-cost', type=_number, default=2)
+
+
+def _number(text):
+    """
+    :return: the int or float written in the text
+    """
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+def _make_strategy(name, tuned=None):
+    """
+    :param name: MoveStrategyType name, or the name of a strategy in the tuned file
+    :param tuned: file saved by save_tuned_strategies, or None
+    :return: the move strategy
+    """
+    if tuned:
+        from navigation.strategy_tuner import load_tuned_strategy
+        return load_tuned_strategy(tuned, name)
+    from navigation.move_strategy import MoveStrategyType, make_move_strategy
+    if name not in MoveStrategyType.__members__:
+        raise ValueError("Unknown strategy {!r}. There are: {}".format(name, ', '.join(MoveStrategyType.__members__)))
+    return make_move_strategy(MoveStrategyType[name])
+
+
+def _make_sensors(simulated_map, args):
+    """
+    :return: list of the sensor scanning the map
+    """
+    from sensors.simulated_topology_sensor import SimulatedTopologySensor
+    return [SimulatedTopologySensor(simulated_map=simulated_map, radius=args.radius,
+                                    power_on_cost=args.power_on_cost, scan_point_cost=args.scan_point_cost)]
+
+
+def _fly(strategy, sensors, start_point, max_steps, trace=None):
+    """
+    Flies a mission, giving up after max_steps points
+    :return: tuple(list of the Point3D flown to, the Navigator)
+    """
+    from itertools import islice
+    from navigation.destinations import ExtractionPoint
+    from navigation.navigator import Navigator
+    from topology.topology_map import TopologyMap
+
+    navigator = Navigator(TopologyMap(), strategy, ExtractionPoint(), trace=trace)
+    path = list(islice(navigator.iter_points_to_destination(start_point, sensors), max_steps))
+    return path, navigator
+
+
+def _report(path, navigator, print_path):
+    """
+    Prints how a mission went
+    :return: exit status
+    """
+    if print_path:
+        for point in path:
+            print(point.x, point.y, point.z)
+    if navigator.found is None:
+        print("No extraction point found in {} moves. Scan cost {}".format(len(path), navigator.scan_cost))
+        return NOT_FOUND
+    print("Found extraction point {} in {} moves. Scan cost {}".format(navigator.found, len(path),
+                                                                       navigator.scan_cost))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
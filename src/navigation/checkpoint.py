@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Checkpoints let a navigation carry on after the process running it dies, without paying again for the cells it had
+already scanned. A Checkpointer appends a line of JSON to its file every few steps. Each line only has what changed
+since the line before: the cells scanned, the points scanned from and the ledger rows added since then, and the current
+state of the move strategy and of the navigator (where it is, what it has found). Checkpoints stay cheap however big
+the map gets.
+
+Loading reads the lines back in order, so the cells and rows add up and the last line's state wins. A line cut short
+by a crash while it was being written is ignored, and the mission carries on from the line before it.
+
+The power policy and lookahead aren't checkpointed: a restarted process has its sensors off, and they relearn.
+"""
+import json
+import os
+
+
+class CheckpointState(object):
+    """
+    Everything needed to carry on a mission, read from a checkpoint file
+    """
+    __slots__ = ['cells', 'visits', 'rows', 'steps', 'sensors', 'strategy', 'point', 'previous', 'found',
+                 'points_scanned', 'points_scan_baseline', 'length']
+
+    def __init__(self):
+        self.cells = []  # list of (x, y, z) scanned
+        self.visits = []  # list of (x, y) scanned from, when scanning incrementally
+        self.rows = []  # ledger rows, as from ScanCostLedger.get_mission_rows
+        self.steps = 0  # ledger steps
+        self.sensors = []  # ledger sensor name of each of the navigator's sensors, in order
+        self.strategy = None  # move strategy's get_state
+        self.point = None  # (x, y) of the next point to visit
+        self.previous = None  # (x, y) of the last point yielded, or None
+        self.found = None  # (x, y) of the destination, if found
+        self.points_scanned = 0
+        self.points_scan_baseline = 0
+        self.length = 0  # bytes of the file which were read
+
+    def update(self, record):
+        """
+        Applies a line of the checkpoint file
+        :param record: dict
+        """
+        self.cells.extend(record['cells'])
+        self.visits.extend(record.get('visits', []))  # not in checkpoints written before visits were
+        self.rows.extend(record['rows'])
+        for name in ('steps', 'sensors', 'strategy', 'point', 'previous', 'found', 'points_scanned',
+                     'points_scan_baseline'):
+            setattr(self, name, record[name])
+
+
+class Checkpointer(object):
+    """
+    Writes checkpoints of a navigator's mission to a file, and reads them back
+    """
+    __slots__ = ['_path', '_interval', '_fsync', '_file', '_steps', '_cells', '_visits', '_ledger_rows']
+
+    def __init__(self, path, interval=1, fsync=False):
+        """
+        :param path: checkpoint file. It's started again at the start of every mission
+        :param interval: steps between checkpoints. After a crash, up to this many steps are scanned again
+        :param fsync: True to make sure every checkpoint is on disk before carrying on, which is slower. Otherwise,
+        checkpoints survive the process dying, but maybe not the machine
+        """
+        self._path = path
+        self._interval = interval
+        self._fsync = fsync
+        self._file = None
+        self._steps = 0
+        self._cells = []  # (x, y, z) scanned since the last checkpoint
+        self._visits = []  # (x, y) scanned from since the last checkpoint
+        self._ledger_rows = 0  # ledger rows before this are already checkpointed
+
+    @property
+    def path(self):
+        """
+        :return: the checkpoint file
+        """
+        return self._path
+
+    def start(self, ledger_rows=0):
+        """
+        Starts a new mission, throwing away the previous mission's checkpoints
+        :param ledger_rows: rows already in the navigator's ledger, which aren't part of this mission
+        """
+        self.close()
+        self._file = open(self._path, 'w')
+        self._steps = 0
+        self._cells = []
+        self._visits = []
+        self._ledger_rows = ledger_rows
+
+    def carry_on(self, state, ledger_rows):
+        """
+        Carries on a mission restored from the checkpoint file, appending to it
+        :param state: CheckpointState the mission was restored from. Anything after it in the file is dropped
+        :param ledger_rows: rows in the navigator's ledger once it was restored
+        """
+        self.close()
+        self._file = open(self._path, 'r+')
+        self._file.truncate(state.length)
+        self._file.seek(state.length)
+        self._steps = 0
+        self._cells = []
+        self._visits = []
+        self._ledger_rows = ledger_rows
+
+    def add_cell(self, x, y, z):
+        """
+        Notes a cell scanned since the last checkpoint
+        :param x:
+        :param y:
+        :param z:
+        """
+        self._cells.append((x, y, z))
+
+    def add_visit(self, x, y):
+        """
+        Notes a point scanned from since the last checkpoint
+        :param x:
+        :param y:
+        """
+        self._visits.append((x, y))
+
+    def step(self, func_get_state, force=False):
+        """
+        Called after every step. Checkpoints every interval steps
+        :param func_get_state: function returning the navigator's state, as for save. Only called if checkpointing
+        :param force: True to checkpoint now anyway, such as when the destination was just found
+        """
+        self._steps += 1
+        if force or self._steps % self._interval == 0:
+            self.save(*func_get_state())
+
+    def save(self, ledger, record):
+        """
+        Appends a checkpoint to the file
+        :param ledger: the navigator's ScanCostLedger
+        :param record: dict of the navigator's state. The cells, visits and ledger rows since the last checkpoint are
+        added
+        """
+        rows = ledger.get_mission_rows(self._ledger_rows)
+        self._ledger_rows = len(ledger)
+        record['cells'] = self._cells
+        record['visits'] = self._visits
+        record['rows'] = rows
+        self._file.write(json.dumps(record, separators=(',', ':')))
+        self._file.write('\n')
+        self._file.flush()
+        if self._fsync:
+            os.fsync(self._file.fileno())
+        self._cells = []
+        self._visits = []
+
+    def load(self):
+        """
+        Reads the checkpoint file
+        :return: CheckpointState, or None if there's no checkpoint
+        """
+        if not os.path.exists(self._path):
+            return None
+        state = None
+        with open(self._path, 'rb') as file:
+            for line in file:
+                try:
+                    record = json.loads(line) if line.endswith(b'\n') else None
+                except ValueError:
+                    record = None
+                if record is None:
+                    break  # cut short by a crash while writing
+                state = state or CheckpointState()
+                state.update(record)
+                state.length += len(line)
+        return state
+
+    def close(self):
+        """
+        Closes the checkpoint file. It's kept, so the mission can still be carried on
+        """
+        if self._file:
+            self._file.close()
+            self._file = None
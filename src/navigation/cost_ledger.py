@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+The ScanCostLedger records what scanning cost. Every charge is a row: which mission and step it was at, where, which
+sensor, and how much was for powering on, for the points scanned, and for idling. Rows are kept column by column in
+typed arrays, so thousands of missions take little memory, and they're kept across missions so costs can be analysed
+afterwards, for instance by writing them to CSV or JSON.
+
+Running totals are kept as rows are added, so reading the cost of the mission, of a sensor, or at a point doesn't
+need to add anything up.
+"""
+from array import array
+
+NO_SENSOR = -1  # sensor index of rows not charged to a sensor
+COLUMNS = ['mission', 'step', 'x', 'y', 'sensor', 'power_on_cost', 'point_cost', 'idle_cost', 'points']
+
+
+class MissionCosts(object):
+    """
+    Totals for one mission
+    """
+    __slots__ = ['mission', 'steps', 'rows', 'power_on_cost', 'point_cost', 'idle_cost', 'points', 'by_sensor']
+
+    def __init__(self, mission):
+        self.mission = mission
+        self.steps = 0
+        self.rows = 0
+        self.power_on_cost = 0
+        self.point_cost = 0
+        self.idle_cost = 0
+        self.points = 0
+        self.by_sensor = dict()  # sensor name -> cost
+
+    @property
+    def total(self):
+        """
+        :return: everything the mission cost
+        """
+        return self.power_on_cost + self.point_cost + self.idle_cost
+
+    def to_dict(self):
+        """
+        :return: dict for JSON
+        """
+        return {'mission': self.mission, 'steps': self.steps, 'total': self.total,
+                'power_on_cost': self.power_on_cost, 'point_cost': self.point_cost, 'idle_cost': self.idle_cost,
+                'points': self.points, 'by_sensor': dict(self.by_sensor)}
+
+    def __repr__(self):
+        return "MissionCosts(mission={}, steps={}, total={})".format(self.mission, self.steps, self.total)
+
+
+class ScanCostLedger(object):
+    """
+    Costs of scanning, mission after mission
+    """
+    __slots__ = ['_columns', '_sensor_index', '_sensor_names', '_costs_at_points', '_missions', '_step', '_x', '_y',
+                 '_lifetime']
+
+    def __init__(self):
+        self._columns = {name: array('d' if name.endswith('_cost') else 'l') for name in COLUMNS}
+        self._sensor_index = dict()  # sensor -> index in _sensor_names
+        self._sensor_names = []
+        self._missions = [MissionCosts(0)]  # the last one is the current mission
+        self._lifetime = MissionCosts(None)
+        self._costs_at_points = dict()  # (x,y) -> power on and point cost at the point, this mission
+        self._step = -1
+        self._x = self._y = 0
+
+    @property
+    def mission(self):
+        """
+        :return: MissionCosts of the current mission
+        """
+        return self._missions[-1]
+
+    @property
+    def missions(self):
+        """
+        :return: list of MissionCosts, oldest first. The last is the current mission
+        """
+        return self._missions
+
+    @property
+    def lifetime(self):
+        """
+        :return: MissionCosts totalled over every mission
+        """
+        return self._lifetime
+
+    @property
+    def total(self):
+        """
+        :return: what the current mission has cost so far
+        """
+        return self._missions[-1].total
+
+    @property
+    def sensor_names(self):
+        """
+        :return: list of sensor names, by sensor index
+        """
+        return self._sensor_names
+
+    def __len__(self):
+        """
+        :return: number of rows
+        """
+        return len(self._columns['mission'])
+
+    def new_mission(self):
+        """
+        Starts a new mission. The rows and totals of the previous ones are kept. If the current mission hasn't had any
+        steps yet, it's reused
+        """
+        if self._missions[-1].steps:
+            self._missions.append(MissionCosts(len(self._missions)))
+        self._costs_at_points = dict()
+        self._step = -1
+
+    def begin_step(self, point):
+        """
+        Rows added until the next step are charged to this step and point
+        :param point: where the drone is
+        """
+        self._step += 1
+        self._missions[-1].steps += 1
+        self._lifetime.steps += 1
+        self._x, self._y = point.x, point.y
+
+    def record(self, sensor, power_on_cost=0, point_cost=0, points=0, idle_cost=0):
+        """
+        Adds a row at the current step
+        :param sensor: the sensor charged, or None
+        :param power_on_cost:
+        :param point_cost: cost of the points scanned
+        :param points: how many points were scanned
+        :param idle_cost: cost of leaving the sensor on while moving here
+        """
+        if power_on_cost or point_cost or points or idle_cost:
+            self._append(self._step, self._x, self._y, self._get_sensor_index(sensor), power_on_cost, point_cost,
+                         idle_cost, points)
+
+    def sensor_name(self, sensor):
+        """
+        :param sensor:
+        :return: the name the sensor's rows are recorded under
+        """
+        return self._sensor_names[self._get_sensor_index(sensor)]
+
+    def bind_sensor(self, sensor, name):
+        """
+        Records the sensor's rows under the name from now on. Used when restoring, where the sensor is a new object
+        :param sensor:
+        :param name: a name from sensor_names, or a new one
+        """
+        if name not in self._sensor_names:
+            self._sensor_names.append(name)
+        self._sensor_index[sensor] = self._sensor_names.index(name)
+
+    def get_mission_rows(self, start=0):
+        """
+        :param start: index of the first row to get, from the start of the ledger. Only rows of the current mission
+        are returned
+        :return: list of [step, x, y, sensor name, power on cost, point cost, idle cost, points], as from iter_rows
+        """
+        first = max(start, len(self) - self._missions[-1].rows)  # the current mission's rows are the last ones
+        return [[row[name] for name in COLUMNS[1:]] for row in self.iter_rows(first)]
+
+    def restore_mission(self, rows, steps):
+        """
+        Adds rows to the current mission, carrying on a mission which was checkpointed
+        :param rows: list of rows from get_mission_rows
+        :param steps: steps the mission had taken
+        """
+        for step, x, y, name, power_on_cost, point_cost, idle_cost, points in rows:
+            sensor_index = NO_SENSOR
+            if name:
+                if name not in self._sensor_names:
+                    self._sensor_names.append(name)
+                sensor_index = self._sensor_names.index(name)
+            self._append(step, x, y, sensor_index, power_on_cost, point_cost, idle_cost, points)
+        added = steps - 1 - self._step
+        self._missions[-1].steps += added
+        self._lifetime.steps += added
+        self._step = steps - 1
+
+    def _append(self, step, x, y, sensor_index, power_on_cost, point_cost, idle_cost, points):
+        """
+        Adds a row to the current mission, and to the totals
+        """
+        columns = self._columns
+        columns['mission'].append(len(self._missions) - 1)
+        columns['step'].append(step)
+        columns['x'].append(x)
+        columns['y'].append(y)
+        columns['sensor'].append(sensor_index)
+        columns['power_on_cost'].append(power_on_cost)
+        columns['point_cost'].append(point_cost)
+        columns['idle_cost'].append(idle_cost)
+        columns['points'].append(points)
+
+        name = self._sensor_names[sensor_index] if sensor_index != NO_SENSOR else None
+        self._missions[-1].rows += 1
+        for totals in (self._missions[-1], self._lifetime):
+            totals.power_on_cost += power_on_cost
+            totals.point_cost += point_cost
+            totals.idle_cost += idle_cost
+            totals.points += points
+            if name is not None:
+                totals.by_sensor[name] = totals.by_sensor.get(name, 0) + power_on_cost + point_cost + idle_cost
+        if power_on_cost or point_cost:
+            self._costs_at_points[(x, y)] = self._costs_at_points.get((x, y), 0) + power_on_cost + point_cost
+
+    def get_cost_at(self, x, y):
+        """
+        :param x:
+        :param y:
+        :return: what scanning at the point cost this mission, not counting idling. 0 if it wasn't scanned
+        """
+        return self._costs_at_points.get((x, y), 0)
+
+    def add_cost_at(self, x, y, value):
+        """
+        Charges a cost not attributed to a sensor at a point, at the current step
+        :param x:
+        :param y:
+        :param value:
+        """
+        saved = self._x, self._y
+        self._x, self._y = x, y
+        self.record(None, point_cost=value)
+        self._x, self._y = saved
+
+    def column(self, name):
+        """
+        :param name: one of COLUMNS
+        :return: the column's array. Don't change it
+        """
+        return self._columns[name]
+
+    def iter_rows(self, start=0):
+        """
+        :param start: index of the first row
+        :return: generator of dicts, one per row, with the sensor's name rather than its index
+        """
+        columns = [self._columns[name][start:] for name in COLUMNS]
+        for values in zip(*columns):
+            row = dict(zip(COLUMNS, values))
+            row['sensor'] = self._sensor_names[row['sensor']] if row['sensor'] != NO_SENSOR else ''
+            for name in ('power_on_cost', 'point_cost', 'idle_cost'):
+                if row[name].is_integer():
+                    row[name] = int(row[name])
+            yield row
+
+    def write_csv(self, path):
+        """
+        Writes every row to a CSV file with a header
+        :param path:
+        """
+        import csv  # imported here, since every navigator has a ledger but few write one
+        with open(path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(self.iter_rows())
+
+    def write_json(self, path):
+        """
+        Writes the per-mission totals and every row, column by column, to a JSON file
+        :param path:
+        """
+        import json
+        rows = list(self.iter_rows())
+        with open(path, 'w') as file:
+            json.dump({'sensors': self._sensor_names,
+                       'missions': [mission.to_dict() for mission in self._missions],
+                       'lifetime': self._lifetime.to_dict(),
+                       'rows': {name: [row[name] for row in rows] for name in COLUMNS}}, file)
+
+    def _get_sensor_index(self, sensor):
+        """
+        :param sensor: a sensor or None
+        :return: the sensor's index, which is given to it the first time it's seen
+        """
+        if sensor is None:
+            return NO_SENSOR
+        index = self._sensor_index.get(sensor)
+        if index is None:
+            index = self._sensor_index[sensor] = len(self._sensor_names)
+            self._sensor_names.append(getattr(sensor, 'name', None) or "{}{}".format(type(sensor).__name__, index))
+        return index
@@ -2,10 +2,18 @@
 """
 Functors which serve to return whether a point on a map is a destination (e.g. extraction point). The functors
 also have a radius_needed_to_check property which gives the radius of points that need to be scanned for the
-functor's function (__call__) to be able to be evaluated
+functor's function (__call__) to be able to be evaluated. Many points can be checked at once through
+evaluate_points, which subclasses can speed up by working on a whole window of the map.
+
+Sensors scan points off the edge of the world as OUT_OF_BOUNDS. Those points are never destinations, even when all
+of the points around them are off the edge too.
 """
 
 from abc import ABC, abstractmethod
+from geometry.point import Point2D
+from topology.sliding_window_max_index import SlidingWindowMaxIndex
+from topology.height_encoding import OUT_OF_BOUNDS
+from topology.window import window_max, window_sum, NO_VALUE
 
 
 class Destination(ABC):
@@ -21,6 +29,26 @@ class Destination(ABC):
         :return:
         """
 
+    def is_ruled_out(self, topology_map, point):
+        """
+        Sees if what's known so far already proves that the point can't be a destination, even though not all of
+        the points in its radius are known yet. Lets the navigator stop scanning early. By default, nothing is
+        ruled out until everything is known
+        :param topology_map:
+        :param point:
+        :return: True if the point can't be a destination
+        """
+        return False
+
+    def evaluate_points(self, topology_map, points):
+        """
+        Checks many points at once. By default, this just calls the functor on each point
+        :param topology_map:
+        :param points: list of points to check
+        :return: list of bools, True where the point is a destination
+        """
+        return [self(topology_map, point) for point in points]
+
 
 class ExtractionPoint(Destination):
     """
@@ -28,7 +56,44 @@ class ExtractionPoint(Destination):
     This is a functor method
     """
     def __call__(self, topology_map, point):
-        return topology_map.is_highest_or_tie_in_radius_and_all_known(point, self.radius_needed_to_check)
+        return (topology_map.get_z(point) != OUT_OF_BOUNDS and
+                topology_map.is_highest_or_tie_in_radius_and_all_known(point, self.radius_needed_to_check))
+
+    def is_ruled_out(self, topology_map, point):
+        """
+        A point isn't an extraction point as soon as any point around it is known to be higher
+        :param topology_map:
+        :param point:
+        :return: True if the point is known and a known point in the radius is higher, or it's out of bounds
+        """
+        return is_lower_than_a_known_point_in_radius(topology_map, point, self.radius_needed_to_check)
+
+    def evaluate_points(self, topology_map, points):
+        """
+        Vectorized version of the functor. Rather than looking at the neighbors of every point, gets the window of
+        the map covering all of the points and computes the windowed max height and windowed unknown count once.
+        :param topology_map:
+        :param points: list of points to check
+        :return: list of bools, True where the point is an extraction point
+        """
+        if not points:
+            return []
+        radius = self.radius_needed_to_check
+        left = min(pt.x for pt in points) - radius
+        bottom = min(pt.y for pt in points) - radius
+        width = max(pt.x for pt in points) + radius + 1 - left
+        height = max(pt.y for pt in points) + radius + 1 - bottom
+
+        window = topology_map.get_window(Point2D(left, bottom), width, height)
+        unknown_counts = window_sum([[1 if z is None else 0 for z in row] for row in window], radius)
+        highest = window_max([[NO_VALUE if z is None else z for z in row] for row in window], radius)
+
+        mask = []
+        for pt in points:
+            row, col = pt.y - bottom, pt.x - left
+            z = window[row][col]
+            mask.append(not unknown_counts[row][col] and z == highest[row][col] and z != OUT_OF_BOUNDS)
+        return mask
 
     @property
     def radius_needed_to_check(self):
@@ -37,3 +102,96 @@ class ExtractionPoint(Destination):
         :return:
         """
         return 1
+
+
+class HighestInRadius(Destination):
+    """
+    Determines if a point is the highest (or tied for highest) of all points within a radius of it, with all of
+    them known. ExtractionPoint is the special case of radius 1. For wide radii, checking point by point costs
+    O(radius^2), so this functor keeps a SlidingWindowMaxIndex of the map, which answers in constant time and keeps
+    itself up to date as the map gets filled in
+    """
+    def __init__(self, radius):
+        """
+        :param radius: how far around the point must be known and no higher
+        """
+        self._radius = radius
+        self._index = None
+
+    def _get_index(self, topology_map):
+        """
+        Gets the index for the map, making a new one if we're now looking at a different map
+        :param topology_map:
+        :return: SlidingWindowMaxIndex
+        """
+        if not self._index or self._index.topology_map is not topology_map:
+            self._index = SlidingWindowMaxIndex(topology_map, self._radius)
+        return self._index
+
+    def __call__(self, topology_map, point):
+        return (topology_map.get_z(point) != OUT_OF_BOUNDS and
+                self._get_index(topology_map).is_highest_or_tie_in_radius_and_all_known(point))
+
+    def is_ruled_out(self, topology_map, point):
+        """
+        A point isn't the highest as soon as any point in the radius is known to be higher
+        :param topology_map:
+        :param point:
+        :return: True if the point is known and a known point in the radius is higher, or it's out of bounds
+        """
+        z = topology_map.get_z(point)
+        return z is not None and (z == OUT_OF_BOUNDS or self._get_index(topology_map).max_in_radius(point) > z)
+
+    def evaluate_points(self, topology_map, points):
+        """
+        Checks many points at once using the index
+        :param topology_map:
+        :param points: list of points to check
+        :return: list of bools, True where the point is the highest in its radius
+        """
+        func_is_highest = self._get_index(topology_map).is_highest_or_tie_in_radius_and_all_known
+        func_get_z = topology_map.get_z
+        return [func_get_z(point) != OUT_OF_BOUNDS and func_is_highest(point) for point in points]
+
+    @property
+    def radius_needed_to_check(self):
+        """
+        :return: the radius given at construction
+        """
+        return self._radius
+
+
+class SearchArea(Destination):
+    """
+    A destination which is never found, so a coverage strategy such as SweepCoverageStrategy just covers ground
+    """
+    def __init__(self, radius=1):
+        """
+        :param radius: radius of cells to scan around each point
+        """
+        self._radius = radius
+
+    def __call__(self, topology_map, point):
+        return False
+
+    @property
+    def radius_needed_to_check(self):
+        """
+        :return: the radius given at construction
+        """
+        return self._radius
+
+
+def is_lower_than_a_known_point_in_radius(topology_map, point, radius):
+    """
+    :param topology_map:
+    :param point:
+    :param radius:
+    :return: True if the point is known and a known point in the radius is higher, or it's out of bounds
+    """
+    z = topology_map.get_z(point)
+    if z is None:
+        return False
+    if z == OUT_OF_BOUNDS:
+        return True
+    return any(other_z > z for _x, _y, other_z, _pt in topology_map.iter_known_x_y_z_pt_in_radius(point, radius))
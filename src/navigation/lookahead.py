@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Lookahead scan coalescing. Once a sensor's power_on_cost is paid, scanning a few more cells is cheap. So when the
+navigator scans, it can also ask for the unknown cells around where the move strategy is likely to go over the next
+few steps. If the drone does go there, those steps need no scan, and the sensor isn't powered on again.
+
+The strategy's predict_points guesses the next positions. How often a guess is right is learned for each strategy:
+if a guess is right with probability p, the i-th position ahead is reached with probability p^i. Including the
+i-th position costs its extra cells and is expected to save p^i power-ons, so the number of positions k is chosen to
+minimize the running total of the expected cost. Positions are only worth including while all of their cells are
+within the sensor's radius, since otherwise the step would need a scan anyway.
+"""
+from geometry.point import Point2D
+
+DEFAULT_MAX_STEPS = 4
+
+
+class LookaheadStats(object):
+    """
+    Tallies for one strategy
+    """
+    __slots__ = ['predictions', 'hits', 'coalesced_scans', 'extra_points', 'expected_savings', 'power_ons_avoided',
+                 'power_on_cost_avoided', 'extra_scan_cost']
+
+    def __init__(self):
+        self.predictions = 0  # predicted positions checked against where we actually went
+        self.hits = 0  # of those, how many were right
+        self.coalesced_scans = 0  # scans which also covered predicted positions
+        self.extra_points = 0  # unknown points scanned for predicted positions
+        self.expected_savings = 0  # expected cost saved, as estimated when the scans were done
+        self.power_ons_avoided = 0  # steps which needed no scan thanks to a prediction
+        self.power_on_cost_avoided = 0
+        self.extra_scan_cost = 0  # what the extra points cost
+
+    @property
+    def savings(self):
+        """
+        :return: cost actually saved: power-ons avoided less the cost of the extra points
+        """
+        return self.power_on_cost_avoided - self.extra_scan_cost
+
+    def __repr__(self):
+        return "LookaheadStats(hits={}/{}, expected savings={:.1f}, savings={}, power ons avoided={})".format(
+            self.hits, self.predictions, self.expected_savings, self.savings, self.power_ons_avoided)
+
+
+class Lookahead(object):
+    """
+    Chooses the extra cells to scan, and learns how good each strategy's predictions are
+    """
+    __slots__ = ['_max_steps', '_stats', '_pending']
+
+    def __init__(self, max_steps=DEFAULT_MAX_STEPS):
+        """
+        :param max_steps: most positions to look ahead
+        """
+        self._max_steps = max_steps
+        self._stats = dict()  # strategy name -> LookaheadStats
+        # (predicted point, strategy name, power on cost or None if not scanned ahead) still ahead of us, in order.
+        # Predictions are checked even when they weren't scanned for, so we keep learning how good they are
+        self._pending = []
+
+    @property
+    def stats(self):
+        """
+        :return: dict of strategy name -> LookaheadStats. Carries over from mission to mission
+        """
+        return self._stats
+
+    def hit_rate(self, strategy_name):
+        """
+        Estimates how likely a strategy's next predicted position is right, given the ones before it were
+        :param strategy_name:
+        :return: probability, 0.5 before anything is known
+        """
+        stats = self._stats.get(strategy_name)
+        return (stats.hits + 1) / (stats.predictions + 2) if stats else .5
+
+    def reset(self):
+        """
+        Starts a new mission
+        """
+        self._pending = []
+
+    def observe(self, point, needs_scan):
+        """
+        Checks where we are against the next predicted position. Call at every step, before scanning
+        :param point: where we are
+        :param needs_scan: True if there are unknown points to scan here
+        """
+        if not self._pending:
+            return
+        predicted, strategy_name, power_on_cost = self._pending.pop(0)
+        stats = self._stats[strategy_name]
+        stats.predictions += 1
+        if predicted != point:
+            self._pending = []  # we left the predicted path, so the rest of it won't happen
+            return
+        stats.hits += 1
+        if power_on_cost is not None and not needs_scan:
+            stats.power_ons_avoided += 1
+            stats.power_on_cost_avoided += power_on_cost
+
+    def plan(self, topology_map, move_strategy, point, destination, sensor, unknown_xy):
+        """
+        Chooses which extra cells to scan along with the ones needed here
+        :param topology_map:
+        :param move_strategy: it needs a predict_points method, otherwise there's nothing to look ahead to
+        :param point: where we are
+        :param destination:
+        :param sensor: sensor about to scan
+        :param unknown_xy: list of (x,y) offsets which are about to be scanned
+        :return: list of extra (x,y) offsets to scan
+        """
+        func_predict_points = getattr(move_strategy, 'predict_points', None)
+        if not func_predict_points or not sensor.power_on_cost:
+            return []
+        strategy_name = getattr(move_strategy, 'name', type(move_strategy).__name__)
+        hit_rate = self.hit_rate(strategy_name)
+        radius = destination.radius_needed_to_check
+
+        requested = set(unknown_xy)
+        extra_xy = []
+        total = expected_savings = 0  # running expected cost (negative is good), and expected savings at best k
+        best_k = best_count = 0
+        predicted_points = func_predict_points(topology_map, point, destination, self._max_steps)
+        for k, predicted in enumerate(predicted_points, 1):
+            new_xy = [(predicted.x - point.x + x, predicted.y - point.y + y)
+                      for x, y in topology_map.list_unknown_x_y_in_radius(predicted, radius)]
+            new_xy = [xy for xy in new_xy if xy not in requested]
+            if any(max(abs(x), abs(y)) > sensor.radius for x, y in new_xy):
+                break  # the sensor can't reach all of this position's cells, so it would need a scan anyway
+            requested.update(new_xy)
+            extra_xy.extend(new_xy)
+            total += len(new_xy) * sensor.scan_point_cost - hit_rate ** k * sensor.power_on_cost
+            if total < -expected_savings:
+                best_k, best_count, expected_savings = k, len(extra_xy), -total
+
+        stats = self._stats.setdefault(strategy_name, LookaheadStats())
+        if best_k:
+            stats.coalesced_scans += 1
+            stats.extra_points += best_count
+            stats.extra_scan_cost += best_count * sensor.scan_point_cost
+            stats.expected_savings += expected_savings
+        self._pending = [(Point2D(pt.x, pt.y), strategy_name, sensor.power_on_cost if k < best_k else None)
+                         for k, pt in enumerate(predicted_points)]
+        return extra_xy[:best_count]
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+A MissionTrace records what a navigator did, compactly enough to leave on: every scan (which sensor, the home point,
+the offsets asked for, what came back and what it cost), every decision of the move strategy and every move. Traces
+are for debugging a bad mission, and for re-running a changed strategy with ReplayTopologySensors, which serve the
+scans from the trace instead of from real sensors.
+
+A trace file is FORMAT followed by records, each a kind byte, a fixed size header and, for scans, arrays:
+
+* MISSION: the start point and, for each sensor, its radius and costs
+* SCAN: the sensor's index, home point, number of offsets and of points returned, flags and the cost. Then the
+  offsets as int32 pairs, the offsets of the points returned the same way unless they're just the offsets asked for
+  (SAME_OFFSETS), which is usual, and the heights as int64, or as float64 unless they're all ints (INT_HEIGHTS)
+* DECISION: the point the strategy was at, and the point it chose
+* MOVE: a point the navigator generated, with its height, which is NaN if it wasn't known
+
+Records are buffered and written a chunk at a time, so tracing costs little more than packing the numbers.
+"""
+import struct
+from array import array
+from itertools import chain
+from geometry.point import Point2D, Point3D, PointArray
+
+FORMAT = b'MTR\x01'
+MISSION, SCAN, DECISION, MOVE = range(4)
+INT_HEIGHTS, SAME_OFFSETS = 1, 2  # SCAN flags
+BUFFER_BYTES = 1 << 16
+
+_MISSION = struct.Struct('<qqB')
+_SENSOR = struct.Struct('<iddd')
+_SCAN = struct.Struct('<BqqIIBd')
+_DECISION = struct.Struct('<qqqq')
+_MOVE = struct.Struct('<qqd')
+_NAN = float('nan')
+
+
+class MissionStart(object):
+    """
+    A MISSION record
+    """
+    __slots__ = ['start_point', 'sensors']
+
+    def __init__(self, start_point, sensors):
+        """
+        :param start_point: Point2D
+        :param sensors: list of tuple(radius, power on cost, scan point cost, idle cost), one for each sensor
+        """
+        self.start_point = start_point
+        self.sensors = sensors
+
+
+class ScanRecord(object):
+    """
+    A SCAN record
+    """
+    __slots__ = ['sensor_index', 'home_point', 'offsets', 'scanned', 'cost']
+
+    def __init__(self, sensor_index, home_point, offsets, scanned, cost):
+        """
+        :param sensor_index: index of the sensor in the mission's sensors
+        :param home_point: Point2D at 0,0
+        :param offsets: list of (x,y) offsets asked for
+        :param scanned: list of (x,y,z) offsets and heights returned
+        :param cost: scan cost
+        """
+        self.sensor_index = sensor_index
+        self.home_point = home_point
+        self.offsets = offsets
+        self.scanned = scanned
+        self.cost = cost
+
+
+class DecisionRecord(object):
+    """
+    A DECISION record
+    """
+    __slots__ = ['point', 'next_point']
+
+    def __init__(self, point, next_point):
+        self.point = point
+        self.next_point = next_point
+
+
+class MoveRecord(object):
+    """
+    A MOVE record
+    """
+    __slots__ = ['point']
+
+    def __init__(self, point):
+        """
+        :param point: Point3D generated
+        """
+        self.point = point
+
+
+class MissionTrace(object):
+    """
+    Writes a trace of a navigator's missions to a file. Pass it to the Navigator, which calls the rest
+    """
+    __slots__ = ['_path', '_file', '_buffer', '_sensors']
+
+    def __init__(self, path):
+        """
+        :param path: trace file. Any trace in it is replaced
+        """
+        self._path = path
+        self._file = open(path, 'wb')
+        self._file.write(FORMAT)
+        self._buffer = bytearray()
+        self._sensors = []
+
+    @property
+    def path(self):
+        return self._path
+
+    def start(self, start_point, topology_sensors):
+        """
+        Records the start of a mission
+        :param start_point:
+        :param topology_sensors: the sensors scans will be recorded for, in order
+        """
+        self._sensors = list(topology_sensors)
+        buffer = self._buffer
+        buffer.append(MISSION)
+        buffer += _MISSION.pack(start_point.x, start_point.y, len(self._sensors))
+        for sensor in self._sensors:
+            buffer += _SENSOR.pack(sensor.radius, sensor.power_on_cost, sensor.scan_point_cost, sensor.idle_cost)
+
+    def scan(self, sensor, home_point, offsets, scanned_points, cost):
+        """
+        Records a scan
+        :param sensor: one of the mission's sensors
+        :param home_point: the point at 0,0
+        :param offsets: list or PointArray of (x,y) offsets asked for
+        :param scanned_points: list of (x,y,z, point) the sensor returned, or the PointArray of (x,y) offsets with
+        their heights returned by scan_point_array
+        :param cost: what the scan cost
+        """
+        # struct.pack of the flattened values is faster than making arrays of them
+        point_count = len(scanned_points)
+        if isinstance(scanned_points, PointArray):
+            returned, heights = PointArray(scanned_points.xs, scanned_points.ys), scanned_points.zs
+            if not isinstance(offsets, PointArray):
+                returned = returned.to_tuples()
+        else:
+            returned = [scanned[:2] for scanned in scanned_points]
+            heights = [scanned[2] for scanned in scanned_points]
+        flags = SAME_OFFSETS if returned == offsets else 0
+        try:
+            packed_heights = struct.pack('<%dq' % point_count, *heights)
+            flags |= INT_HEIGHTS
+        except struct.error:  # some aren't ints
+            packed_heights = struct.pack('<%dd' % point_count, *heights)
+        buffer = self._buffer
+        buffer.append(SCAN)
+        buffer += _SCAN.pack(self._sensors.index(sensor), home_point.x, home_point.y, len(offsets), point_count, flags,
+                             cost)
+        buffer += struct.pack('<%di' % (2 * len(offsets)), *chain.from_iterable(offsets))
+        if not flags & SAME_OFFSETS:
+            buffer += struct.pack('<%di' % (2 * point_count), *chain.from_iterable(returned))
+        buffer += packed_heights
+        if len(buffer) >= BUFFER_BYTES:
+            self.flush()
+
+    def decide(self, point, next_point):
+        """
+        Records where the move strategy chose to go
+        :param point: where it was
+        :param next_point: where it chose
+        """
+        self._buffer.append(DECISION)
+        self._buffer += _DECISION.pack(point.x, point.y, next_point.x, next_point.y)
+
+    def move(self, point3d):
+        """
+        Records a point the navigator generated
+        :param point3d:
+        """
+        self._buffer.append(MOVE)
+        z = point3d.z
+        self._buffer += _MOVE.pack(point3d.x, point3d.y, z if z is not None else _NAN)
+
+    def flush(self):
+        """
+        Writes what's buffered to the file
+        """
+        if self._file and self._buffer:
+            self._file.write(self._buffer)
+            self._file.flush()
+            self._buffer = bytearray()
+
+    def close(self):
+        self.flush()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def iter_trace(path):
+    """
+    Reads a trace file
+    :param path:
+    :return: generator yielding MissionStart, ScanRecord, DecisionRecord and MoveRecord, in the order they happened
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    if data[:len(FORMAT)] != FORMAT:
+        raise ValueError("Not a mission trace")
+    pos = len(FORMAT)
+    try:
+        while pos < len(data):
+            kind = data[pos]
+            pos += 1
+            if kind == MISSION:
+                x, y, sensor_count = _MISSION.unpack_from(data, pos)
+                pos += _MISSION.size
+                sensors = []
+                for _ in range(sensor_count):
+                    radius, *costs = _SENSOR.unpack_from(data, pos)
+                    pos += _SENSOR.size
+                    sensors.append((radius, *(_read_number(cost) for cost in costs)))
+                yield MissionStart(Point2D(x, y), sensors)
+            elif kind == SCAN:
+                sensor_index, x, y, offset_count, point_count, flags, cost = _SCAN.unpack_from(data, pos)
+                pos += _SCAN.size
+                offsets, pos = _read_array(data, pos, 'i', 2 * offset_count)
+                if not flags & SAME_OFFSETS:
+                    offsets_returned, pos = _read_array(data, pos, 'i', 2 * point_count)
+                else:
+                    offsets_returned = offsets
+                heights, pos = _read_array(data, pos, 'q' if flags & INT_HEIGHTS else 'd', point_count)
+                yield ScanRecord(sensor_index, Point2D(x, y), list(zip(offsets[::2], offsets[1::2])),
+                                 list(zip(offsets_returned[::2], offsets_returned[1::2], heights)), _read_number(cost))
+            elif kind == DECISION:
+                x, y, next_x, next_y = _DECISION.unpack_from(data, pos)
+                pos += _DECISION.size
+                yield DecisionRecord(Point2D(x, y), Point2D(next_x, next_y))
+            elif kind == MOVE:
+                x, y, z = _MOVE.unpack_from(data, pos)
+                pos += _MOVE.size
+                yield MoveRecord(Point3D(x, y, _read_number(z)))
+            else:
+                raise ValueError("Unknown record kind {} at byte {}".format(kind, pos - 1))
+    except struct.error:
+        raise ValueError("Mission trace is cut short") from None
+
+
+def _read_array(data, pos, typecode, count):
+    """
+    :return: tuple(array of count values, position after them)
+    """
+    values = array(typecode)
+    end = pos + values.itemsize * count
+    if end > len(data):
+        raise ValueError("Mission trace is cut short")
+    values.frombytes(data[pos:end])
+    return values, end
+
+
+def _read_number(value):
+    """
+    :param value: a float from the trace
+    :return: the number as it was recorded: an int if it was one, None if it wasn't known
+    """
+    if value != value:
+        return None
+    return int(value) if value.is_integer() else value
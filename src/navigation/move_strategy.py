@@ -6,10 +6,17 @@ strategies in different situations. For example, if we're searching for high gro
 likely to use a strategy that is always moving to higher ground. If we're doing a search/rescue, we might want
 to spiral out from the start point to make sure we cover every square. A Navigator is free to change strategies
 at any time. It could be programmed to first do a search/rescue, and then move to high ground.
+
+Strategies can also have a predict_points method, which guesses where they'll go over the next few steps without
+changing their state. The navigator uses it to scan ahead (see Lookahead).
+
+Strategies which keep state during a mission have get_state and set_state methods, so a checkpointed mission can
+carry on where it was (see Checkpointer). They also have a begin_mission method, which the navigator calls with the
+known map and the sensors before each mission, to forget the last mission's state.
 """
 import math
 from enum import Enum
-from geometry.point import Point2D
+from geometry.point import Point2D, Point3D, PointArray
 
 
 class MoveStrategyType(Enum):
@@ -22,6 +29,8 @@ class MoveStrategyType(Enum):
     SPIRAL_OUT_CW_3 = 2
     SPIRAL_OUT_CCW = 3
     BINARY_SEARCH = 4
+    SWEEP = 5
+    GRADIENT_CLIMB = 6
 
 
 # For SpiralOutStrategy
@@ -30,6 +39,23 @@ CW = CCW[::-1]  # Clockwise rotation
 
 BINARY_SEARCH_MOVE_AMOUNT = 6
 
+SWEEP_EXTENT = 45  # cells across the first region a SweepCoverageStrategy covers
+
+MAX_JUMP = 16  # longest jump of a GradientClimbStrategy
+JUMP_GAIN = 8
+
+# Kinds of climb strategy settings, for make_climb_strategy
+CLIMB, BINARY_SEARCH = 'climb', 'binary_search'
+
+# Settings of the predefined climb strategies. Settings missing are the ClimbStrategy defaults
+CLIMB_SETTINGS = {
+    MoveStrategyType.CLIMB_MOVE_1: {'kind': CLIMB, 'cardinal_move_amount': 1, 'ordinal_move_amount': 1},
+    MoveStrategyType.CLIMB_3_CARDINAL_1_ORDINAL: {'kind': CLIMB, 'cardinal_move_amount': 3, 'ordinal_move_amount': 1},
+    MoveStrategyType.BINARY_SEARCH: {'kind': BINARY_SEARCH, 'cardinal_move_amount': BINARY_SEARCH_MOVE_AMOUNT,
+                                     'ordinal_move_amount': BINARY_SEARCH_MOVE_AMOUNT, 'cardinal_floor': 3,
+                                     'ordinal_floor': 1},
+}
+
 
 def make_move_strategy(s):
     """
@@ -39,23 +65,43 @@ def make_move_strategy(s):
     :return: A functor (or function)
     """
     if s == MoveStrategyType.CLIMB_MOVE_1:
-        return ClimbStrategy("Climb Move 1", cardinal_move_amount=1, ordinal_move_amount=1)
+        return make_climb_strategy("Climb Move 1", CLIMB_SETTINGS[s])
     elif s == MoveStrategyType.CLIMB_3_CARDINAL_1_ORDINAL:
-        return ClimbStrategy("Climb Move 3 card, 1 ord1", cardinal_move_amount=3, ordinal_move_amount=1)
+        return make_climb_strategy("Climb Move 3 card, 1 ord1", CLIMB_SETTINGS[s])
     elif s == MoveStrategyType.BINARY_SEARCH:
-        return BinarySearchStrategy("Binary Search", cardinal_move_amount=BINARY_SEARCH_MOVE_AMOUNT,
-                                    ordinal_move_amount=BINARY_SEARCH_MOVE_AMOUNT,
-                                    cardinal_range=range(BINARY_SEARCH_MOVE_AMOUNT, 3, -1),
-                                    ordinal_range=range(BINARY_SEARCH_MOVE_AMOUNT, 1, -1)
-                                    )
+        return make_climb_strategy("Binary Search", CLIMB_SETTINGS[s])
     elif s == MoveStrategyType.SPIRAL_OUT_CW_3:
         return SpiralOutStrategy("Spiral Clockwise 3", CW, 3)
     elif s == MoveStrategyType.SPIRAL_OUT_CCW:
         return SpiralOutStrategy("Spiral Counter-Clockwise", CCW)
+    elif s == MoveStrategyType.SWEEP:
+        return SweepCoverageStrategy("Sweep")
+    elif s == MoveStrategyType.GRADIENT_CLIMB:
+        return GradientClimbStrategy("Gradient Climb")
     else:
         raise KeyError('Unknown strategy type')
 
 
+def make_climb_strategy(name, settings):
+    """
+    Makes a ClimbStrategy or BinarySearchStrategy from settings, such as CLIMB_SETTINGS or ones a StrategyTuner found
+    :param name: the strategy's name
+    :param settings: dict with 'kind' CLIMB or BINARY_SEARCH, and the ClimbStrategy arguments. A BINARY_SEARCH one
+    also has 'cardinal_floor' and 'ordinal_floor', the move amounts it shrinks down to
+    :return: the strategy
+    """
+    settings = dict(settings)
+    kind = settings.pop('kind')
+    if kind == CLIMB:
+        return ClimbStrategy(name, **settings)
+    if kind == BINARY_SEARCH:
+        cardinal_floor, ordinal_floor = settings.pop('cardinal_floor'), settings.pop('ordinal_floor')
+        return BinarySearchStrategy(name, cardinal_range=range(settings['cardinal_move_amount'], cardinal_floor, -1),
+                                    ordinal_range=range(settings['ordinal_move_amount'], ordinal_floor, -1),
+                                    **settings)
+    raise ValueError("Unknown kind of climb strategy: {}".format(kind))
+
+
 class ClimbStrategy(object):
     """
     A climb strategy is just a function which receives (topology_map, point, directions).
@@ -64,7 +110,7 @@ class ClimbStrategy(object):
     the class.
     """
     __slots__ = ['name', '_cardinal_move_amount', '_ordinal_move_amount', '_prefer_moving_to_lesser_known_points',
-                 '_prefer_cardinal_to_ordinal']
+                 '_prefer_cardinal_to_ordinal', '_last_move', '_initial_move_amounts']
 
     def __init__(self, name, cardinal_move_amount=1, ordinal_move_amount=1, prefer_moving_to_lesser_known_points=True,
                  prefer_cardinal_to_ordinal=True):
@@ -73,6 +119,36 @@ class ClimbStrategy(object):
         self._ordinal_move_amount = ordinal_move_amount
         self._prefer_moving_to_lesser_known_points = prefer_moving_to_lesser_known_points
         self._prefer_cardinal_to_ordinal = prefer_cardinal_to_ordinal
+        self._last_move = None  # tuple(point we moved from, point we moved to), for predict_points
+        self._initial_move_amounts = (cardinal_move_amount, ordinal_move_amount)
+
+    def begin_mission(self, known_map, topology_sensors):
+        """
+        Forgets the last mission's moves
+        :param known_map: TopologyMap of what's known from past missions
+        :param topology_sensors: sensors which will scan
+        """
+        self._cardinal_move_amount, self._ordinal_move_amount = self._initial_move_amounts
+        self._last_move = None
+
+    def get_state(self):
+        """
+        Gets what the strategy has learned during a mission, so it can carry on after a restart
+        :return: dict which can be saved as JSON
+        """
+        return {'cardinal_move_amount': self._cardinal_move_amount,
+                'ordinal_move_amount': self._ordinal_move_amount,
+                'last_move': [[pt.x, pt.y] for pt in self._last_move] if self._last_move else None}
+
+    def set_state(self, state):
+        """
+        Carries on from a state from get_state
+        :param state: dict
+        """
+        self._cardinal_move_amount = state['cardinal_move_amount']
+        self._ordinal_move_amount = state['ordinal_move_amount']
+        last_move = state['last_move']
+        self._last_move = tuple(Point2D(x, y) for x, y in last_move) if last_move else None
 
     def __call__(self, topology_map, point, destination):
         """
@@ -85,16 +161,44 @@ class ClimbStrategy(object):
 
         # climb strategy wants to move up, so lets find highest points
         radius = destination.radius_needed_to_check
-        directions = [(x, y) for x, y, _z, _pt in topology_map.list_highest_x_y_z_pt_in_radius(point, radius)]
+        directions = PointArray.from_tuples(
+            (x, y) for x, y, _z, _pt in topology_map.list_highest_x_y_z_pt_in_radius(point, radius))
 
         new_point, cardinal = self._determine_new_point(topology_map, point, directions, radius)
+        self._last_move = (point, new_point)
         return new_point
 
+    def predict_points(self, topology_map, point, destination, steps):
+        """
+        Guesses the next points. Climbs tend to keep going the same way, so if we just moved here, we assume we'll
+        keep moving the same way. Otherwise we assume we'll head the way that's uphill from what's known now
+        :param topology_map:
+        :param point: current point
+        :param destination:
+        :param steps: how many points to predict
+        :return: list of up to steps points, in the order they'd be visited
+        """
+        if self._last_move and self._last_move[1] == point:
+            from_point, to_point = self._last_move
+            x, y = to_point.x - from_point.x, to_point.y - from_point.y
+        else:
+            gradient_x, gradient_y = topology_map.estimate_gradient(point, destination.radius_needed_to_check + 1)
+            if not gradient_x and not gradient_y:
+                return []  # no idea which way we'll go
+            directions = [(x, y) for x in (-1, 0, 1) for y in (-1, 0, 1) if x or y]
+            candidate_directions, cardinal = self._choose_candidate_directions(directions)
+            x, y = max(candidate_directions, key=lambda xy: xy[0] * gradient_x + xy[1] * gradient_y)
+            move_amount = self._cardinal_move_amount if cardinal else self._ordinal_move_amount
+            x, y = x * move_amount, y * move_amount
+        if not x and not y:
+            return []
+        return [point.translate(x * i, y * i) for i in range(1, steps + 1)]
+
     def _choose_candidate_directions(self, directions):
         """
         Picks cardinal or ordinal directions depending on preferences and if there are any
-        :param directions: list of (x,y) values of the offsets around the point
-        :return:
+        :param directions: list or PointArray of (x,y) values of the offsets around the point
+        :return: tuple(those directions of the same type, True if they're cardinal)
         """
         edges = edges_only(directions)
         corners = corners_only(directions)
@@ -107,7 +211,7 @@ class ClimbStrategy(object):
         Determines where to go next
         :param topology_map:
         :param point:
-        :param directions:
+        :param directions: PointArray of (x,y) offsets
         :param radius:
         :return:
         """
@@ -117,19 +221,25 @@ class ClimbStrategy(object):
         move_points = translate_points_by_directions(point, candidate_directions, move_amount)
 
         # sort candidate points by how well we know the points around them
-        sorted_move_points = sorted(move_points,
-                                    key=lambda pt: topology_map.count_unknown_in_radius(pt, radius))
+        unknown_counts = topology_map.count_unknown_in_radius_array(move_points, radius)
+        order = sorted(range(len(move_points)), key=unknown_counts.__getitem__)
 
         # pick least or most known point, based on our preference
-        if not sorted_move_points:
+        if not order:
             new_point = point  # just in case this ever happens, pick same point and fix below
         else:
-            new_point = sorted_move_points[-1] if self._prefer_moving_to_lesser_known_points else sorted_move_points[0]
+            new_point = move_points.point(order[-1] if self._prefer_moving_to_lesser_known_points else order[0])
 
         # Handle special case of moving back to a known point. For now, pick a simple rule to move perpendicularly
         # one square, either up or down. This can be improved, but it's not so common so optimize later
+        last_perp = (0, 1)
         while topology_map.count_unknown_in_radius(new_point, radius) == 0:  # if next point is already visited
             perp = ((point.y - new_point.y) // move_amount, (point.x - new_point.x) // move_amount)
+            if new_point.translate(*perp) == point:  # for corners, that's straight back, so turn the other way
+                perp = ((new_point.y - point.y) // move_amount, (point.x - new_point.x) // move_amount)
+            if perp == (0, 0):  # within a move amount of the point, so it would never move again. Keep going instead
+                perp = last_perp
+            last_perp = perp
             new_point = new_point.translate(*perp)
         return new_point, cardinal
 
@@ -149,6 +259,20 @@ class BinarySearchStrategy(ClimbStrategy):
         super().__init__(*args, **kwargs)
         self.highest_point = None
 
+    def begin_mission(self, known_map, topology_sensors):
+        super().begin_mission(known_map, topology_sensors)
+        self.highest_point = None
+
+    def get_state(self):
+        state = super().get_state()
+        state['highest_point'] = [self.highest_point.x, self.highest_point.y] if self.highest_point else None
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        highest_point = state['highest_point']
+        self.highest_point = Point2D(*highest_point) if highest_point else None
+
     def _decrement(self):
         """
         Decreases our move amounts. For now, just subtract 1 and stay in range
@@ -174,7 +298,11 @@ class BinarySearchStrategy(ClimbStrategy):
             if topology_map.get_z(self.highest_point) > topology_map.get_z(point):
                 # we went downhill, so bisect back to high point
                 midpoint = point.midpoint_to(self.highest_point)
-                return Point2D(math.floor(midpoint.x), math.floor(midpoint.y))
+                next_point = Point2D(math.floor(midpoint.x), math.floor(midpoint.y))
+                if next_point == point:  # next to the high point, and halfway floors back here, so go all the way
+                    next_point = self.highest_point
+                self._last_move = (point, next_point)
+                return next_point
             else:
                 self.highest_point = point  # this point is new high
         else:
@@ -182,6 +310,107 @@ class BinarySearchStrategy(ClimbStrategy):
         return next_point
 
 
+class GradientClimbStrategy(ClimbStrategy):
+    """
+    A climb strategy which takes long jumps on smooth ground. It fits a plane to the known points around it and jumps
+    uphill along the plane's slope. The jump is jump_gain times the slope over the root mean square of the plane's
+    residuals, up to a limit, so it's long on smooth slopes and short on bumpy ground. If a jump lands no higher than
+    the highest point we've been to, we overshot, so it goes back halfway and halves the limit. Once the jumps are down
+    to a cell, or the ground is flat, it climbs like a ClimbStrategy
+    """
+    __slots__ = ['_max_jump', '_jump_gain', '_fit_radius', '_jump_limit', '_best']
+
+    def __init__(self, name, max_jump=MAX_JUMP, jump_gain=JUMP_GAIN, fit_radius=None, **kwargs):
+        """
+        :param name:
+        :param max_jump: longest jump, in cells
+        :param jump_gain: how far to jump for a given slope and fit. Bigger is bolder
+        :param fit_radius: radius of the points the plane is fitted to. By default, one more than the destination's
+        radius_needed_to_check
+        :param kwargs: passed to ClimbStrategy
+        """
+        super().__init__(name, **kwargs)
+        self._max_jump = max_jump
+        self._jump_gain = jump_gain
+        self._fit_radius = fit_radius
+        self._jump_limit = max_jump
+        self._best = None  # highest Point3D we've been to
+
+    def begin_mission(self, known_map, topology_sensors):
+        """
+        Starts again with long jumps
+        :param known_map:
+        :param topology_sensors:
+        """
+        super().begin_mission(known_map, topology_sensors)
+        self._jump_limit = self._max_jump
+        self._best = None
+
+    def get_state(self):
+        state = super().get_state()
+        state['jump_limit'] = self._jump_limit
+        state['best'] = list(self._best.to_tuple()) if self._best else None
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        self._jump_limit = state['jump_limit']
+        best = state['best']
+        self._best = Point3D(*best) if best else None
+
+    def __call__(self, topology_map, point, destination):
+        """
+        Jumps uphill, or goes back if we overshot
+        :param topology_map:
+        :param point:
+        :param destination:
+        :return: next point
+        """
+        if self._jump_limit <= 1:
+            return super().__call__(topology_map, point, destination)
+        z = topology_map.get_z(point)
+        if z is None:
+            return super().__call__(topology_map, point, destination)
+        if self._best and z <= self._best.z and point != self._best.to_2d():  # overshot, so go back halfway
+            self._jump_limit //= 2
+            midpoint = point.midpoint_to(self._best)
+            next_point = Point2D(math.floor(midpoint.x), math.floor(midpoint.y))
+            if next_point == point:
+                return super().__call__(topology_map, point, destination)
+        else:
+            self._best = Point3D(point.x, point.y, z)
+            next_point = self._jump(topology_map, point, destination)
+            if next_point is None:
+                return super().__call__(topology_map, point, destination)
+        self._last_move = (point, next_point)
+        return next_point
+
+    def _jump(self, topology_map, point, destination):
+        """
+        Works out where to jump to from the plane fitted around the point
+        :return: the point to jump to, or None if the jump would be a cell or less, or leave us where we are
+        """
+        radius = self._fit_radius if self._fit_radius is not None else destination.radius_needed_to_check + 1
+        fit = topology_map.fit_plane(point, radius)
+        if fit is None:
+            return None
+        slope_x, slope_y, residual = fit
+        slope = math.hypot(slope_x, slope_y)
+        if not slope:
+            return None
+        length = self._jump_limit if not residual else min(self._jump_limit, self._jump_gain * slope / residual)
+        x, y = round(slope_x / slope * length), round(slope_y / slope * length)
+        if max(abs(x), abs(y)) <= 1:
+            return None
+        lower_left, upper_right = topology_map.bounds
+        x, y = point.x + x, point.y + y
+        if lower_left:
+            x, y = max(x, lower_left.x), max(y, lower_left.y)
+        if upper_right:
+            x, y = min(x, upper_right.x), min(y, upper_right.y)
+        return Point2D(x, y) if (x, y) != (point.x, point.y) else None
+
+
 class SpiralOutStrategy(object):
     """
     A strategy that spirals out from a center point blindly.
@@ -192,21 +421,69 @@ class SpiralOutStrategy(object):
         self.name = name
         self._rotation = list(rotation)  # get rotation as point list
         self._step = step
-        self._gen = self._iter_offset()
+        # where we are in the spiral: direction index, length of the sides, sides done at this length, moves done
+        # along this side. Kept as plain values rather than in a generator so we can look ahead
+        self._state = (0, 1, 0, 0)
 
-    def _iter_offset(self):
+    def begin_mission(self, known_map, topology_sensors):
         """
-        Generates next offset values to use
-        :return:
+        Starts a new spiral
+        :param known_map: TopologyMap of what's known from past missions
+        :param topology_sensors: sensors which will scan
         """
-        index = 0
-        length = 1
-        while True:
-            for _ in range(2):
-                for _l in range(length):
-                    yield [self._step * k for k in self._rotation[index]]
-                index = (index + 1) % len(self._rotation)
-            length += 1
+        self._state = (0, 1, 0, 0)
+
+    def get_state(self):
+        """
+        :return: where we are in the spiral, as a dict which can be saved as JSON
+        """
+        return {'spiral': list(self._state)}
+
+    def set_state(self, state):
+        """
+        :param state: dict from get_state
+        """
+        self._state = tuple(state['spiral'])
+
+    def _offset(self, state):
+        """
+        :param state: spiral state
+        :return: the offset to move by in that state
+        """
+        return [self._step * k for k in self._rotation[state[0]]]
+
+    def _advance(self, state):
+        """
+        :param state: spiral state
+        :return: the state after a move
+        """
+        index, length, sides, moves = state
+        moves += 1
+        if moves == length:  # turn the corner
+            moves = 0
+            index = (index + 1) % len(self._rotation)
+            sides += 1
+            if sides == 2:  # every 2 sides, the spiral's sides get longer
+                sides = 0
+                length += 1
+        return index, length, sides, moves
+
+    def predict_points(self, topology_map, point, destination, steps):
+        """
+        The spiral doesn't depend on the map, so we know exactly where we're going
+        :param topology_map:
+        :param point: current point
+        :param destination:
+        :param steps: how many points to predict
+        :return: list of the next steps points
+        """
+        points = []
+        state = self._state
+        for _ in range(steps):
+            point = point.translate(*self._offset(state))
+            points.append(point)
+            state = self._advance(state)
+        return points
 
     def __call__(self, topology_map, point, destination):
         """
@@ -216,25 +493,232 @@ class SpiralOutStrategy(object):
         :param destination:
         :return: Next point
         """
-        offset = next(self._gen)  # get next point from generator
+        offset = self._offset(self._state)
+        self._state = self._advance(self._state)
         return point.translate(*offset)
 
 
+class SweepCoverageStrategy(object):
+    """
+    A coverage strategy for search and rescue. It sweeps a region back and forth in strips (a boustrophedon, or
+    lawnmower, sweep) with its stops as far apart as the square scanned at each one, so scans neither overlap nor
+    leave gaps. That square's radius is the smaller of the sensors' radius and the destination's
+    radius_needed_to_check, since that's all the navigator scans at a stop.
+
+    Stops whose square is already known, in this mission's map or in the known map from past missions, are skipped.
+    What's left of each strip is split into runs of stops next to each other, and after each run the sweep goes to
+    whichever run has the nearest end, so skipped strips cost no travel. The first region is a square around the
+    start. Once it's covered, the sweep carries on over a region twice as big, within the map's bounds if it has any.
+    When everything in the bounds is covered, it stays put. Without bounds, stops can be off the edge of the world.
+    They're scanned as OUT_OF_BOUNDS, which is never a destination, so the sweep just carries on
+    """
+
+    def __init__(self, name, extent=SWEEP_EXTENT, radius=None):
+        """
+        :param name:
+        :param extent: cells across the first region
+        :param radius: radius of the square scanned at each stop. By default, from the sensors and destination
+        """
+        self.name = name
+        self._extent = extent
+        self._radius = radius
+        self._sensor_radius = None
+        self._known_map = None
+        # the sweep: radius of the squares, a point the stops line up with, the region being swept as [left, bottom,
+        # right, top], the stops left in the run we're on and the runs left, as lists of [x, y] so they can be saved
+        self._footprint_radius = None
+        self._anchor = None
+        self._region = None
+        self._run = []
+        self._runs = []
+
+    def begin_mission(self, known_map, topology_sensors):
+        """
+        Forgets the last mission's sweep
+        :param known_map: TopologyMap of what's known from past missions
+        :param topology_sensors: sensors which will scan
+        """
+        self._known_map = known_map
+        self._sensor_radius = min(sensor.radius for sensor in topology_sensors) if topology_sensors else None
+        self._region = None
+        self._run = []
+        self._runs = []
+
+    def get_state(self):
+        """
+        :return: the sweep, as a dict which can be saved as JSON
+        """
+        return {'radius': self._footprint_radius, 'anchor': self._anchor, 'region': self._region, 'run': self._run,
+                'runs': self._runs}
+
+    def set_state(self, state):
+        """
+        :param state: dict from get_state
+        """
+        self._footprint_radius = state['radius']
+        self._anchor = state['anchor']
+        self._region = state['region']
+        self._run = state['run']
+        self._runs = state['runs']
+
+    def __call__(self, topology_map, point, destination):
+        """
+        Gets next point (functor)
+        :param topology_map:
+        :param point:
+        :param destination:
+        :return: Next point
+        """
+        if self._region is None:
+            self._start(topology_map, point, destination)
+        while True:
+            while self._run:
+                x, y = self._run.pop(0)
+                if not self._covered(topology_map, PointArray([x], [y]))[0]:
+                    return Point2D(x, y)
+            if self._runs:
+                self._run = self._pop_nearest_run(point)
+            elif not self._grow(topology_map):
+                return point  # everything in the bounds is covered
+
+    def predict_points(self, topology_map, point, destination, steps):
+        """
+        We'll go to the stops left in this run, unless they're known by the time we get there
+        :param topology_map:
+        :param point: current point
+        :param destination:
+        :param steps: how many points to predict
+        :return: list of up to steps points
+        """
+        return [Point2D(x, y) for x, y in self._run[:steps]]
+
+    def _start(self, topology_map, point, destination):
+        """
+        Plans the sweep of the first region, with the stops lined up with the start
+        """
+        radius = destination.radius_needed_to_check
+        if self._sensor_radius is not None:
+            radius = min(radius, self._sensor_radius)
+        self._footprint_radius = radius if self._radius is None else self._radius
+        self._anchor = [point.x, point.y]
+        half = self._extent // 2
+        self._region = _clip_region(topology_map, [point.x - half, point.y - half, point.x + half, point.y + half])
+        self._runs = self._plan_runs(topology_map, self._region)
+        self._run = []
+
+    def _grow(self, topology_map):
+        """
+        Plans the sweep of a region twice as big, within the bounds
+        :return: False if the region can't grow
+        """
+        left, bottom, right, top = self._region
+        footprint = 2 * self._footprint_radius + 1
+        grow_x = (right - left + footprint) // (2 * footprint) * footprint  # about half the width, in whole squares
+        grow_y = (top - bottom + footprint) // (2 * footprint) * footprint
+        region = _clip_region(topology_map, [left - grow_x, bottom - grow_y, right + grow_x, top + grow_y])
+        if region == self._region:
+            return False
+        self._region = region
+        self._runs = self._plan_runs(topology_map, region)
+        return True
+
+    def _plan_runs(self, topology_map, region):
+        """
+        Lays out the stops covering a region, a strip at a time, and leaves out those already covered
+        :return: list of runs, each a list of [x, y] stops next to each other going east
+        """
+        left, bottom, right, top = region
+        xs = _stop_positions(self._anchor[0], left, right, self._footprint_radius)
+        runs = []
+        for y in _stop_positions(self._anchor[1], bottom, top, self._footprint_radius):
+            run = []
+            for x, covered in zip(xs, self._covered(topology_map, PointArray(xs, [y] * len(xs)))):
+                if not covered:
+                    run.append([x, y])
+                elif run:
+                    runs.append(run)
+                    run = []
+            if run:
+                runs.append(run)
+        return runs
+
+    def _covered(self, topology_map, stops):
+        """
+        :param stops: PointArray
+        :return: list of bools, True where the square around the stop is all known in the map or the known map
+        """
+        radius = self._footprint_radius
+        covered = [not unknown for unknown in topology_map.count_unknown_in_radius_array(stops, radius)]
+        if self._known_map is not None and self._known_map is not topology_map:
+            covered = [done or not unknown for done, unknown in
+                       zip(covered, self._known_map.count_unknown_in_radius_array(stops, radius))]
+        return covered
+
+    def _pop_nearest_run(self, point):
+        """
+        Takes the run with the end nearest to a point out of the runs left
+        :return: the run, starting from that end
+        """
+        def distance(xy):
+            return math.hypot(xy[0] - point.x, xy[1] - point.y)
+
+        run = min(self._runs, key=lambda stops: min(distance(stops[0]), distance(stops[-1])))
+        self._runs.remove(run)
+        if distance(run[-1]) < distance(run[0]):
+            run.reverse()
+        return run
+
+
+def _stop_positions(anchor, low, high, radius):
+    """
+    Spaces stops along a line so the squares around them cover it without overlapping, lined up with the anchor.
+    Stops which would be outside the line are moved to its end
+    :return: list of positions, lowest first
+    """
+    footprint = 2 * radius + 1
+    position = anchor - (anchor + radius - low) // footprint * footprint  # lowest one whose square reaches low
+    positions = []
+    while position - radius <= high:
+        clamped = min(max(position, low), high)
+        if not positions or positions[-1] != clamped:
+            positions.append(clamped)
+        position += footprint
+    return positions
+
+
+def _clip_region(topology_map, region):
+    """
+    :param region: [left, bottom, right, top]
+    :return: the region, clipped to the map's bounds
+    """
+    left, bottom, right, top = region
+    lower_left, upper_right = topology_map.bounds
+    if lower_left:
+        left, bottom = max(left, lower_left.x), max(bottom, lower_left.y)
+    if upper_right:
+        right, top = min(right, upper_right.x), min(top, upper_right.y)
+    return [left, bottom, right, top]
+
+
 def edges_only(directions):
     """
     Chooses edge points in directions directions
-    :param directions: list of tuples (x,y)
-    :return: list of tuples(x,y)
+    :param directions: list of tuples (x,y), or PointArray
+    :return: list of tuples(x,y), or PointArray
     """
+    if isinstance(directions, PointArray):
+        return directions.compress(x * y == 0 for x, y in zip(directions.xs, directions.ys))
     return [(x, y) for x, y in directions if x * y == 0]
 
 
 def corners_only(directions):
     """
     Chooses corner points in directions
-    :param directions: list of tuples (x,y)
-    :return: list of tuples(x,y)
+    :param directions: list of tuples (x,y), or PointArray
+    :return: list of tuples(x,y), or PointArray
     """
+    if isinstance(directions, PointArray):
+        return directions.compress(x * y != 0 for x, y in zip(directions.xs, directions.ys))
     return [(x, y) for x, y in directions if x * y != 0]
 
 
@@ -242,8 +726,10 @@ def translate_points_by_directions(point, directions, amount):
     """
     Translates all points by a distance
     :param point:
-    :param directions: list of (x,y) offsets
+    :param directions: list of (x,y) offsets, or PointArray
     :param amount: A factor used to increase the distance
-    :return: list of new point values
+    :return: list of new point values, or PointArray
     """
+    if isinstance(directions, PointArray):
+        return directions.scale(amount).translate(point.x, point.y)
     return [point.translate(amount * x, amount * y) for x, y in directions]
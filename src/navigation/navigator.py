@@ -4,12 +4,19 @@ The Navigator is in charge of determining where to move to. It uses the drone's
 as it moves around. It has a move strategy which it uses to figure out where to go next given where it is now, and a
 Destination type which tells it if it's found its goal.
 
-It also determines which sensor to use given what needs to be scanned, and stores off tallies of the cost of scanning
+It also determines which sensor to use given what needs to be scanned, and records the cost of scanning in a
+ScanCostLedger.
+Its PowerPolicy decides whether sensors are left on between steps. With a ScanScheduler, a scan can be split between
+several sensors which scan at the same time. With a Checkpointer, a mission can be resumed by another process without
+scanning again. Its RetentionPolicy decides which cells of the map are kept for the next mission. With a MissionTrace,
+its scans, decisions and moves are recorded, so the mission can be replayed without the sensors
 
 It furnishes its points to the jeep through a generator.
 """
-from geometry.point import Point2D
-from topology.topology_map import TopologyMap
+from geometry.point import Point2D, PointArray
+from topology.retention_policy import ForgetAllPolicy
+from sensors.power_policy import AlwaysOffPolicy
+from navigation.cost_ledger import ScanCostLedger
 import logging
 
 
@@ -18,17 +25,43 @@ class Navigator(object):
     The Navigator
     """
 
-    def __init__(self, topology_map, move_strategy, destination):
+    def __init__(self, topology_map, move_strategy, destination, incremental_scan=False, power_policy=None,
+                 lookahead=None, scan_scheduler=None, ledger=None, checkpointer=None, retention_policy=None,
+                 trace=None):
         """
         :param topology_map:
         :param move_strategy:
         :param destination: Destination object
+        :param incremental_scan: If True, sensors which charge per point scan one point at a time, most likely to be
+        higher first, and stop as soon as the destination rules out the current point. Points the move strategy comes
+        back to are scanned fully, so it always learns something new
+        :param power_policy: PowerPolicy deciding when sensors are turned off. By default, right after every scan
+        :param lookahead: optional Lookahead. If given, scans also cover the cells around where the move strategy is
+        likely to go next, when that's expected to save powering on again
+        :param scan_scheduler: optional ScanScheduler. If given, scans are split between the sensors when that's
+        cheaper than using the best one, and the sensors scan at the same time
+        :param ledger: ScanCostLedger to record costs in. By default, a new one. It keeps the costs of past missions
+        :param checkpointer: optional Checkpointer, which saves the mission as it goes so it can be resumed
+        :param retention_policy: RetentionPolicy deciding which cells of the map are kept for the next missions. By
+        default, none
+        :param trace: optional MissionTrace to record the missions in
         """
         self._topology_map = topology_map
+        self._known_map = topology_map  # cells kept from past missions
         self._move_strategy = move_strategy
         self._destination = destination
+        self._incremental_scan = incremental_scan
+        self._power_policy = power_policy or AlwaysOffPolicy()
+        self._lookahead = lookahead
+        self._scan_scheduler = scan_scheduler
         self._found = None
-        self._scan_costs = dict()
+        self._ledger = ledger or ScanCostLedger()
+        self._checkpointer = checkpointer
+        self._retention_policy = retention_policy or ForgetAllPolicy()
+        self._trace = trace
+        self._points_scanned = 0
+        self._points_scan_baseline = 0
+        self._visited = set()  # (x,y) of the points scanned from this mission, when scanning incrementally
 
     @property
     def found(self):
@@ -40,10 +73,88 @@ class Navigator(object):
     @property
     def scan_cost(self):
         """
-        Calculates the total cost of all scans so far
+        Calculates the total cost of all scans so far, including the cost of sensors left on between scans
         :return: Number
         """
-        return sum(self._scan_costs.values())
+        return self._ledger.total
+
+    @property
+    def ledger(self):
+        """
+        :return: The ScanCostLedger, with the costs of this mission and past ones broken down by sensor and step
+        """
+        return self._ledger
+
+    @property
+    def lookahead(self):
+        """
+        :return: The Lookahead, or None. Its stats tell how much scanning ahead saved for each strategy
+        """
+        return self._lookahead
+
+    @property
+    def checkpointer(self):
+        """
+        :return: The Checkpointer, or None
+        """
+        return self._checkpointer
+
+    @property
+    def trace(self):
+        """
+        :return: the MissionTrace missions are recorded in, or None
+        """
+        return self._trace
+
+    @property
+    def topology_map(self):
+        """
+        :return: The TopologyMap of the current mission
+        """
+        return self._topology_map
+
+    @property
+    def known_map(self):
+        """
+        :return: The TopologyMap kept from past missions. The cells of a mission are added to it when it ends
+        """
+        return self._known_map
+
+    @property
+    def retention_policy(self):
+        """
+        :return: The RetentionPolicy
+        """
+        return self._retention_policy
+
+    @property
+    def scan_scheduler(self):
+        """
+        :return: The ScanScheduler, or None. It keeps the total cost and latency of the scans it ran
+        """
+        return self._scan_scheduler
+
+    @property
+    def power_policy(self):
+        """
+        :return: The PowerPolicy. Its cost_saved tells how much it saved this mission
+        """
+        return self._power_policy
+
+    @property
+    def points_scanned(self):
+        """
+        :return: How many points have been scanned so far
+        """
+        return self._points_scanned
+
+    @property
+    def points_scan_baseline(self):
+        """
+        :return: How many points would have been scanned so far if every unknown point in the destination radius
+        were always scanned. Compare with points_scanned to see what incremental scanning saves
+        """
+        return self._points_scan_baseline
 
     def get_scan_cost_at_point(self, point):
         """
@@ -51,9 +162,7 @@ class Navigator(object):
         :param point:
         :return:
         """
-        pt = Point2D(point.x, point.y)
-        cost = self._scan_costs.get(pt, 0)
-        return cost
+        return self._ledger.get_cost_at(point.x, point.y)
 
     def set_scan_cost_at_point(self, point, value):
         """
@@ -62,17 +171,30 @@ class Navigator(object):
         :param point:
         :param value:
         """
-        pt = Point2D(point.x, point.y)
-        previous = self.get_scan_cost_at_point(point)
-        self._scan_costs[pt] = value + previous
+        self._ledger.add_cost_at(point.x, point.y, value)
 
     def reset(self):
         """
         Resets the navigator. Useful when testing
         """
+        self._reset_mission()
+        if self._checkpointer:
+            self._checkpointer.start(len(self._ledger))
+
+    def _reset_mission(self):
+        """
+        Starts a new mission with an empty map. What the known map has is recalled as it's needed
+        """
+        self._known_map = self._retention_policy.apply(self._known_map)
         self._found = None
-        self._topology_map = TopologyMap()
-        self._scan_costs = dict()
+        self._topology_map = self._known_map.empty_copy()
+        self._ledger.new_mission()
+        self._points_scanned = 0
+        self._points_scan_baseline = 0
+        self._visited = set()
+        self._power_policy.reset()
+        if self._lookahead:
+            self._lookahead.reset()
 
     def set_move_strategy(self, move_strategy):
         """
@@ -95,21 +217,119 @@ class Navigator(object):
         :return: (generator) next point to visit. generator ends when destination point is found
         """
         self.reset()  # in case we're recycling the navigator
+        self._begin_strategy_mission(topology_sensors)
+        yield from self._iter_points(start_point, None, topology_sensors)
+
+    def resume(self, topology_sensors):
+        """
+        Carries on the mission saved by the checkpointer, maybe by a process which has since died. The map, costs and
+        move strategy are restored from the checkpoint, so nothing which was checkpointed is scanned again
+        :param topology_sensors: Sensor or sensors from the drone, in the same order as before
+        :return: (generator) the points still to visit, as iter_points_to_destination would have carried on
+        """
+        if not self._checkpointer:
+            raise ValueError("No checkpointer to resume from")
+        state = self._checkpointer.load()
+        if state is None:
+            raise ValueError("No checkpoint in " + str(self._checkpointer.path))
+        point, previous_point3d = self._restore(state, topology_sensors)
+        yield from self._iter_points(point, previous_point3d, topology_sensors)
+
+    def _begin_strategy_mission(self, topology_sensors):
+        """
+        Tells the move strategy a mission is starting, if it wants to know
+        :param topology_sensors:
+        """
+        func_begin_mission = getattr(self._move_strategy, 'begin_mission', None)
+        if func_begin_mission:
+            func_begin_mission(self._known_map, topology_sensors)
+
+    def _iter_points(self, point, previous_point3d, topology_sensors):
+        """
+        Generates points from the point until the destination is found
+        :param point: next point to visit
+        :param previous_point3d: last point generated, or None
+        :param topology_sensors:
+        :return: (generator) next point to visit
+        """
         tm = self._topology_map
-        point = start_point
-        previous_point3d = None
-        while not self._found:  # keep generating points until done
-            new_point = self._determine_next_point(point, topology_sensors)
+        checkpointer = self._checkpointer
+        trace = self._trace
+        if trace:
+            trace.start(point, topology_sensors)
+        try:
+            while not self._found:  # keep generating points until done
+                new_point = self._determine_next_point(point, topology_sensors)
 
-            # Now that we know the previouis point's z, yield that point
-            previous_point3d = tm.make_3d(point)
-            yield previous_point3d
-            point = new_point
+                # Now that we know the previouis point's z, yield that point
+                previous_point3d = tm.make_3d(point)
+                if checkpointer:  # before yielding, so what was just scanned is saved
+                    checkpointer.step(lambda: self._checkpoint_record(new_point, previous_point3d, topology_sensors),
+                                      force=bool(self._found))
+                if trace:
+                    trace.move(previous_point3d)
+                yield previous_point3d
+                point = new_point
+        finally:
+            self._power_policy.end_mission(topology_sensors)  # even if we're stopped early
+            if self._retention_policy.keeps_cells:
+                self._known_map.merge(self._topology_map)
+            if trace:
+                trace.flush()
 
         # If we found a destination, but haven't visited yet, then we need to yield it
-        if point.to_2d() != previous_point3d.to_2d():
+        if previous_point3d is None or point.to_2d() != previous_point3d.to_2d():
+            if trace:
+                trace.move(point)
+                trace.flush()
             yield point
 
+    def _checkpoint_record(self, point, previous_point3d, topology_sensors):
+        """
+        :param point: next point to visit
+        :param previous_point3d: last point generated
+        :param topology_sensors:
+        :return: tuple(ledger, dict of the navigator's state), for Checkpointer.save
+        """
+        ledger = self._ledger
+        func_get_state = getattr(self._move_strategy, 'get_state', None)
+        return ledger, {'steps': ledger.mission.steps,
+                        'sensors': [ledger.sensor_name(sensor) for sensor in topology_sensors],
+                        'strategy': func_get_state() if func_get_state else None,
+                        'point': [point.x, point.y],
+                        'previous': [previous_point3d.x, previous_point3d.y] if previous_point3d else None,
+                        'found': [self._found.x, self._found.y] if self._found else None,
+                        'points_scanned': self._points_scanned,
+                        'points_scan_baseline': self._points_scan_baseline}
+
+    def _restore(self, state, topology_sensors):
+        """
+        Puts the navigator back to where a checkpoint was
+        :param state: CheckpointState
+        :param topology_sensors:
+        :return: tuple(next point to visit, last point generated or None)
+        """
+        self._reset_mission()
+        self._begin_strategy_mission(topology_sensors)  # before its state is restored, which it would forget
+        tm = self._topology_map
+        for x, y, z in state.cells:
+            tm.set_z(Point2D(x, y), z)
+        ledger = self._ledger
+        ledger.restore_mission(state.rows, state.steps)
+        for sensor, name in zip(topology_sensors, state.sensors):
+            ledger.bind_sensor(sensor, name)
+        func_set_state = getattr(self._move_strategy, 'set_state', None)
+        if func_set_state and state.strategy is not None:
+            func_set_state(state.strategy)
+        self._points_scanned = state.points_scanned
+        self._points_scan_baseline = state.points_scan_baseline
+        self._visited = set(map(tuple, state.visits))
+        self._found = tm.make_3d(Point2D(*state.found)) if state.found else None
+        point = self._found or Point2D(*state.point)
+        previous_point3d = tm.make_3d(Point2D(*state.previous)) if state.previous else None
+        self._checkpointer.carry_on(state, len(ledger))
+        return point, previous_point3d
+
     @staticmethod
     def choose_best_sensor(topology_sensors, adjacent_points):
         """
@@ -142,13 +362,22 @@ class Navigator(object):
 
         candidates = self._scan_and_get_destination_point_candidates(point, topology_sensors)
 
-        # Now that we have our candidates, let's see if we've got a destination point
-        for candidate_point in candidates:
-            if self._destination(tm, candidate_point):
+        # Now that we have our candidates, let's see if we've got a destination point. Check them all at once if the
+        # destination knows how to
+        func_evaluate_points = getattr(self._destination, 'evaluate_points', None)
+        if func_evaluate_points:
+            is_destination = func_evaluate_points(tm, candidates)
+        else:
+            is_destination = (self._destination(tm, candidate_point) for candidate_point in candidates)
+
+        for candidate_point, found in zip(candidates, is_destination):
+            if found:
                 self._found = tm.make_3d(candidate_point)
                 return self._found
 
         next_point = self._move_strategy(tm, point, self._destination)
+        if self._trace:
+            self._trace.decide(point, next_point)
 
         return next_point
 
@@ -162,32 +391,194 @@ class Navigator(object):
         :return: a list of candiates for being destination points
         """
         tm = self._topology_map  # for convenience
+        ledger = self._ledger
+        ledger.begin_step(point)
+        idle_sensors = [s for s in topology_sensors if s.is_on]
+        self._power_policy.before_step(topology_sensors)
+        for idle_sensor in idle_sensors:
+            ledger.record(idle_sensor, idle_cost=idle_sensor.idle_cost)
 
         # x,y points below are from the perspective of center point is (0,0)
         # let's figure out what offsets we need to scan
-        unknown_xy = tm.list_unknown_x_y_in_radius(point, self._destination.radius_needed_to_check)
+        unknown_this_mission_xy = tm.unknown_in_radius_array(point, self._destination.radius_needed_to_check)
+        unknown_xy = self._recall(point, unknown_this_mission_xy)
+        # coming back to a point means stopping early didn't tell the move strategy enough to get anywhere, so scan
+        # everything around it this time
+        incremental_scan = self._incremental_scan and not self._visit(point)
         candidate_radius = 0
-        if unknown_xy:  # Likely always true
-            # if we've got many sensors, choose the best (cheapest) one for the job
-            sensor = Navigator.choose_best_sensor(topology_sensors, unknown_xy)
-            if not sensor:
-                raise Exception("No sensor is available")
-            sensor.turn_on()
-            sensor.increment_power_on_count()
-
-            # ask the sensor to scan the unknown adjacent points. It might return MORE than what we asked for, so
-            # we need to use the returned list as the scanned list.
-            scanned_points, scan_cost = sensor.scan_points(unknown_xy, point)
-            self.set_scan_cost_at_point(point, scan_cost + sensor.power_on_cost)
-            for (_sx, _sy, sz, scanned_pt) in scanned_points:
-                if not tm.get_z(scanned_pt):  # if the sensor returned a point we don't know, save it
-                    tm.set_z(scanned_pt, sz)
-            sensor.turn_off()
+        used_sensors = []  # the sensors which scanned this step
+        self._points_scan_baseline += len(unknown_xy)
+        if self._lookahead:
+            self._lookahead.observe(point, bool(unknown_xy))
+        if unknown_xy and incremental_scan and self._destination.is_ruled_out(tm, point):
+            logging.info("Point %s already ruled out, no need to scan", point)
+            # nothing new is known, but the points around are still checked, as they would be after a scan
+            candidate_radius = (Navigator.choose_best_sensor(topology_sensors, unknown_xy).radius +
+                                self._destination.radius_needed_to_check)
+        elif unknown_xy:  # Likely always true
+            # if we've got many sensors, choose the best (cheapest) one for the job. The scan scheduler picks its own,
+            # so with it, the best one is only needed to scan incrementally or to look ahead
+            sensor = None
+            if not self._scan_scheduler or incremental_scan or self._lookahead:
+                sensor = Navigator.choose_best_sensor(topology_sensors, unknown_xy)
+                if not sensor:
+                    raise Exception("No sensor is available")
+
+            if sensor and incremental_scan and sensor.scan_point_cost:
+                power_on_cost = self._power_policy.turn_on(sensor)
+                points_scanned = self._points_scanned
+                scan_cost = self._scan_incrementally(sensor, unknown_xy, point)
+                ledger.record(sensor, power_on_cost, scan_cost, self._points_scanned - points_scanned)
+                used_sensors = [sensor]
+            else:
+                if self._lookahead:  # also scan around where we're likely to go next
+                    unknown_xy = unknown_xy + self._recall(point, PointArray.from_tuples(self._lookahead.plan(
+                        tm, self._move_strategy, point, self._destination, sensor, unknown_xy)))
+                if self._scan_scheduler:
+                    used_sensors = self._scan_scheduled(topology_sensors, unknown_xy, point)
+                else:
+                    power_on_cost = self._power_policy.turn_on(sensor)
+                    # ask the sensor to scan the unknown adjacent points. It might return MORE than what we asked for,
+                    # so we need to use the returned list as the scanned list.
+                    scanned, scan_cost = sensor.scan_point_array(unknown_xy, point)
+                    if self._trace:
+                        self._trace.scan(sensor, point, unknown_xy, scanned, scan_cost)
+                    self._add_scanned_array(point, scanned)
+                    ledger.record(sensor, power_on_cost, scan_cost, len(scanned))
+                    used_sensors = [sensor]
             # As it turns out, we now have many points that we need to check for being destinations. These points
             # consist of all points in the scan radius, of course, and also, there could be points outside these bounds
             # whose "destination status" can now be determined because of these bounds being filled in. It turns out
             # that this radius is our sensor's radius + our destination radius
-            candidate_radius = sensor.radius + self._destination.radius_needed_to_check
+            candidate_radius = max(s.radius for s in used_sensors) + self._destination.radius_needed_to_check
+        elif unknown_this_mission_xy:
+            logging.info("All unknown points recalled for point %s", point)
+            # the points around are checked as they would be had the recalled cells been scanned
+            candidate_radius = (Navigator.choose_best_sensor(topology_sensors, unknown_this_mission_xy).radius +
+                                self._destination.radius_needed_to_check)
         else:
             logging.info("No unknown points found for point %s", point)
+        self._power_policy.after_step(topology_sensors, used_sensors)
         return [pt for _x, _y, _z, pt in tm.iter_x_y_z_pt_in_radius(point, radius=candidate_radius)]
+
+    def _visit(self, point):
+        """
+        Notes that the point is being scanned from
+        :param point:
+        :return: True if it already had been this mission
+        """
+        xy = (point.x, point.y)
+        if xy in self._visited:
+            return True
+        self._visited.add(xy)
+        if self._checkpointer:
+            self._checkpointer.add_visit(point.x, point.y)
+        return False
+
+    def _scan_scheduled(self, topology_sensors, unknown_xy, point):
+        """
+        Splits the scan between the sensors with the scan scheduler, and has them scan at the same time
+        :param topology_sensors: sensors available
+        :param unknown_xy: list of (x,y) offsets to scan
+        :param point: the point at 0,0
+        :return: list of sensors used
+        """
+        assignment = self._scan_scheduler.plan(topology_sensors, unknown_xy)
+        power_on_costs = [self._power_policy.turn_on(sensor) for sensor in assignment]
+        result = self._scan_scheduler.scan(assignment, point)
+        if self._trace:
+            for sensor, offsets in assignment.items():
+                self._trace.scan(sensor, point, offsets, result.points_by_sensor[sensor],
+                                 result.costs_by_sensor[sensor])
+        self._add_scanned_points(result.scanned_points)
+        for sensor, power_on_cost in zip(assignment, power_on_costs):
+            self._ledger.record(sensor, power_on_cost, result.costs_by_sensor[sensor],
+                                len(result.points_by_sensor[sensor]))  # it may have returned more than asked for
+        return list(assignment)
+
+    def _recall(self, point, unknown_xy):
+        """
+        Copies the cells the known map has from past missions into this mission's map, so they aren't scanned
+        :param point: the point at 0,0
+        :param unknown_xy: PointArray of (x,y) offsets unknown this mission
+        :return: PointArray of the (x,y) offsets still unknown
+        """
+        known_map = self._known_map
+        if not self._retention_policy.keeps_cells or known_map is self._topology_map or not unknown_xy:
+            return unknown_xy
+        tm = self._topology_map
+        still_unknown = []
+        for x, y in unknown_xy:
+            known_pt = point.translate(x, y)
+            scanned_at = known_map.get_scanned_at(known_pt)
+            still_unknown.append(scanned_at is None)
+            if scanned_at is None:
+                continue
+            z = known_map.get_z(known_pt)
+            tm.set_z(known_pt, z, scanned_at)
+            if self._checkpointer:
+                self._checkpointer.add_cell(known_pt.x, known_pt.y, z)
+        return unknown_xy.compress(still_unknown)
+
+    def _add_scanned_points(self, scanned_points):
+        """
+        Saves the points returned by a sensor in the map
+        :param scanned_points: list of (x,y,z, point) from the sensor
+        """
+        tm = self._topology_map
+        self._points_scanned += len(scanned_points)
+        for (_sx, _sy, sz, scanned_pt) in scanned_points:
+            if not tm.is_known(scanned_pt):  # if the sensor returned a point we don't know, save it
+                tm.set_z(scanned_pt, sz)
+                if self._checkpointer:
+                    self._checkpointer.add_cell(scanned_pt.x, scanned_pt.y, sz)
+
+    def _add_scanned_array(self, point, scanned):
+        """
+        Saves the points returned by a sensor's scan_point_array in the map
+        :param point: the point at 0,0
+        :param scanned: PointArray of the (x,y) offsets read with their heights
+        """
+        tm = self._topology_map
+        self._points_scanned += len(scanned)
+        scanned = scanned.translate(point.x, point.y)
+        scanned = scanned.compress(not known for known in tm.is_known_array(scanned))  # only the ones we don't know
+        tm.set_z_array(scanned)
+        if self._checkpointer:
+            for x, y, z in scanned:
+                self._checkpointer.add_cell(x, y, z)
+
+    def _scan_incrementally(self, sensor, unknown_xy, point):
+        """
+        Scans the unknown points one at a time, the ones most likely to be higher than the point first. As soon as
+        one is found to be higher, the point can't be a destination, so we stop. Scanning doesn't stop early just
+        because the move is decided, since the climb strategies need every point around to know which is highest
+        :param sensor: sensor which is turned on
+        :param unknown_xy: list of (x,y) offsets to scan
+        :param point: the point at 0,0
+        :return: total scan cost
+        """
+        tm = self._topology_map
+        total_cost = 0
+        for offset in self._order_by_likely_higher(point, unknown_xy):
+            scanned_points, scan_cost = sensor.scan_points([offset], point)
+            if self._trace:
+                self._trace.scan(sensor, point, [offset], scanned_points, scan_cost)
+            total_cost += scan_cost
+            self._add_scanned_points(scanned_points)
+            if self._destination.is_ruled_out(tm, point):
+                break
+        return total_cost
+
+    def _order_by_likely_higher(self, point, unknown_xy):
+        """
+        Sorts offsets by how likely they are to be higher than the point. The point itself goes first, since nothing
+        can be compared to it until it's known. The rest are sorted uphill first, using the slope of the known
+        points around the point
+        :param point:
+        :param unknown_xy: list of (x,y) offsets
+        :return: sorted list of (x,y) offsets
+        """
+        radius = self._destination.radius_needed_to_check + 1
+        gradient_x, gradient_y = self._topology_map.estimate_gradient(point, radius)
+        return sorted(unknown_xy, key=lambda xy: (xy != (0, 0), -(xy[0] * gradient_x + xy[1] * gradient_y)))
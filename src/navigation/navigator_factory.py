@@ -12,12 +12,20 @@ class NavigatorFactory(object):
     """
 
     @staticmethod
-    def make_navigator(topology_map, move_strategy, destination):
+    def make_navigator(topology_map, move_strategy, destination, incremental_scan=False, power_policy=None,
+                       lookahead=None, scan_scheduler=None, checkpointer=None, retention_policy=None, trace=None):
         """
         Makes a navigator
         :param topology_map:
         :param move_strategy:
         :param destination:
+        :param incremental_scan: see Navigator
+        :param power_policy: see Navigator
+        :param lookahead: see Navigator
+        :param scan_scheduler: see Navigator
+        :param checkpointer: see Navigator
+        :param retention_policy: see Navigator
+        :param trace: see Navigator
         :return:
         """
         if isinstance(move_strategy, MoveStrategyType):
@@ -25,4 +33,11 @@ class NavigatorFactory(object):
 
         return Navigator(topology_map=topology_map,
                          move_strategy=move_strategy,
-                         destination=destination)
+                         destination=destination,
+                         incremental_scan=incremental_scan,
+                         power_policy=power_policy,
+                         lookahead=lookahead,
+                         scan_scheduler=scan_scheduler,
+                         checkpointer=checkpointer,
+                         retention_policy=retention_policy,
+                         trace=trace)
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Scan scheduling across several sensors. Navigator.choose_best_sensor gives every unknown offset to one sensor, but a
+drone carrying, say, a laser (cheap per point, short range) and a radar (expensive to power on, wide range) is often
+better off giving the near offsets to one and the far ones to the other. The ScanScheduler splits the offsets between
+the sensors to minimize total cost, taking into account which sensors can reach which offsets, and runs the sub-scans
+at the same time on a thread pool. Each scan's cost and wall-clock latency are reported, along with running totals.
+Since the sub-scans run at the same time, sensors must be safe to use from several threads, and so must the maps
+simulated sensors read (ProceduralTopology locks its tile cache for this).
+
+Splitting is exact: every subset of the sensors is tried, with each offset going to the sensor in the subset which is
+cheapest per point and can reach it. That's fine for the handful of sensors a drone carries.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ScanResult(object):
+    """
+    What a scheduled scan returned
+    """
+    __slots__ = ['scanned_points', 'cost', 'latency', 'serial_latency', 'costs_by_sensor', 'points_by_sensor']
+
+    def __init__(self, scanned_points, cost, latency, serial_latency, costs_by_sensor, points_by_sensor=None):
+        """
+        :param scanned_points: list of (x,y,z, point) from all of the sensors
+        :param cost: total scan cost, not including turning sensors on
+        :param latency: wall-clock seconds the scan took
+        :param serial_latency: seconds the sub-scans took added up, i.e. how long they'd have taken one after another
+        :param costs_by_sensor: dict of sensor -> scan cost
+        :param points_by_sensor: dict of sensor -> list of (x,y,z, point) it returned
+        """
+        self.scanned_points = scanned_points
+        self.cost = cost
+        self.latency = latency
+        self.serial_latency = serial_latency
+        self.costs_by_sensor = costs_by_sensor
+        self.points_by_sensor = points_by_sensor or dict()
+
+    def __repr__(self):
+        return "ScanResult(points={}, cost={}, latency={:.4f}s, serial latency={:.4f}s)".format(
+            len(self.scanned_points), self.cost, self.latency, self.serial_latency)
+
+
+def can_reach(sensor, offset):
+    """
+    :param sensor:
+    :param offset: (x,y)
+    :return: True if the offset is within the sensor's radius
+    """
+    return max(abs(offset[0]), abs(offset[1])) <= sensor.radius
+
+
+class ScanScheduler(object):
+    """
+    Splits scans between sensors and runs them concurrently. Keeps totals over everything it has scanned
+    """
+    __slots__ = ['_max_workers', '_executor', '_executor_size', 'scans', 'total_cost', 'total_latency',
+                 'total_serial_latency']
+
+    def __init__(self, max_workers=None):
+        """
+        :param max_workers: most sub-scans to run at once. Defaults to one per sensor in the biggest scan
+        """
+        self._max_workers = max_workers
+        self._executor = None  # made when first needed
+        self._executor_size = 0
+        self.scans = 0
+        self.total_cost = 0
+        self.total_latency = 0
+        self.total_serial_latency = 0
+
+    def plan(self, topology_sensors, offsets):
+        """
+        Splits the offsets between the sensors to minimize the total cost, including turning on the sensors which are
+        off. An offset no sensor can reach may go to any sensor, as choose_best_sensor would do
+        :param topology_sensors: list of sensors available
+        :param offsets: list of (x,y) offsets to scan
+        :return: dict of sensor -> list of (x,y) offsets, only for the sensors used, in topology_sensors order
+        """
+        if not offsets or not topology_sensors:
+            return dict()
+        # for each offset, the sensors which can reach it, cheapest per point first
+        by_cost = sorted(topology_sensors, key=lambda s: s.scan_point_cost)
+        reachers = []
+        for offset in offsets:
+            reachable = [sensor for sensor in by_cost if can_reach(sensor, offset)]
+            reachers.append(reachable or by_cost)
+
+        best_cost = best = None
+        for mask in range(1, 2 ** len(topology_sensors)):
+            subset = {sensor for i, sensor in enumerate(topology_sensors) if mask & (1 << i)}
+            assignment = dict()
+            for offset, reachable in zip(offsets, reachers):
+                sensor = next((s for s in reachable if s in subset), None)
+                if sensor is None:
+                    break  # this subset can't reach every offset
+                assignment.setdefault(sensor, []).append(offset)
+            else:
+                cost = sum(sensor.estimate_cost_to_scan(xy) for sensor, xy in assignment.items())
+                if best_cost is None or cost < best_cost or (cost == best_cost and len(assignment) < len(best)):
+                    best_cost, best = cost, assignment
+        return {sensor: best[sensor] for sensor in topology_sensors if sensor in best}
+
+    def scan(self, assignment, home_point):
+        """
+        Runs the sensors' sub-scans at the same time. The sensors should be turned on already
+        :param assignment: dict of sensor -> list of (x,y) offsets, as from plan
+        :param home_point: the physical point at 0,0
+        :return: ScanResult
+        """
+        start = time.perf_counter()
+        if len(assignment) == 1:  # nothing to overlap, so don't bother with threads
+            results = [_timed_scan(sensor, offsets, home_point) for sensor, offsets in assignment.items()]
+        else:
+            executor = self._get_executor(len(assignment))
+            futures = [executor.submit(_timed_scan, sensor, offsets, home_point)
+                       for sensor, offsets in assignment.items()]
+            results = [future.result() for future in futures]
+        latency = time.perf_counter() - start
+
+        scanned_points = []
+        costs_by_sensor = dict()
+        points_by_sensor = dict()
+        serial_latency = 0
+        for sensor, (points, cost, seconds) in zip(assignment, results):
+            scanned_points.extend(points)
+            costs_by_sensor[sensor] = cost
+            points_by_sensor[sensor] = points
+            serial_latency += seconds
+        result = ScanResult(scanned_points, sum(costs_by_sensor.values()), latency, serial_latency, costs_by_sensor,
+                            points_by_sensor)
+        self.scans += 1
+        self.total_cost += result.cost
+        self.total_latency += latency
+        self.total_serial_latency += serial_latency
+        return result
+
+    def reset(self):
+        """
+        Zeroes the totals
+        """
+        self.scans = 0
+        self.total_cost = 0
+        self.total_latency = 0
+        self.total_serial_latency = 0
+
+    def close(self):
+        """
+        Stops the worker threads
+        """
+        if self._executor:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _get_executor(self, workers_needed):
+        """
+        :param workers_needed: sub-scans about to run
+        :return: the thread pool, made bigger if needed
+        """
+        workers = self._max_workers or workers_needed
+        if self._executor and self._executor_size < workers:
+            self.close()
+        if not self._executor:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scan')
+            self._executor_size = workers
+        return self._executor
+
+
+def _timed_scan(sensor, offsets, home_point):
+    """
+    :return: tuple(scanned points, scan cost, seconds taken)
+    """
+    start = time.perf_counter()
+    scanned_points, scan_cost = sensor.scan_points(offsets, home_point)
+    return scanned_points, scan_cost, time.perf_counter() - start
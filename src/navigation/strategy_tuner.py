@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+A StrategyTuner searches the settings of the climb strategies (see make_climb_strategy) for the ones which find an
+extraction point for the least scan cost on a class of terrain. The terrain is a corpus of seeded maps for each peak
+density, and every settings tried flies the same missions from the same starts on them, so they're compared fairly.
+
+The search is random, then local: the settings make_move_strategy uses and SAMPLES random ones are tried first. Then
+for a few rounds, the neighbours of each density's best settings (one setting changed by a step) are tried, until
+there are no new ones. Each map is a task for a process pool, so the maps of a corpus are flown at the same time.
+
+For each density, the settings with the lowest mean scan cost and those with the lowest 95th percentile are kept, out
+of those which found an extraction point the most times. A mission which gives up costs less than one which carries on
+to the top, so cost alone would favour settings which get lost. They can be saved as JSON, and loaded back as a named
+strategy.
+"""
+import json
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from geometry.point import Point2D, ORIGIN
+from navigation.destinations import ExtractionPoint
+from navigation.move_strategy import CLIMB, BINARY_SEARCH, CLIMB_SETTINGS, make_climb_strategy
+from navigation.navigator import Navigator
+from topology.topology_map import TopologyMap, OUT_OF_BOUNDS
+
+MAX_MOVE_AMOUNT = 8
+SAMPLES = 40  # random settings tried
+ROUNDS = 3  # rounds of trying the neighbours of the best settings
+MAX_STEPS = 500  # missions which haven't found an extraction point by then give up, as do ones which leave the map
+OBJECTIVES = ('mean', 'p95')
+
+# setting -> the values it can have
+SPACE = {'cardinal_move_amount': range(1, MAX_MOVE_AMOUNT + 1),
+         'ordinal_move_amount': range(1, MAX_MOVE_AMOUNT + 1),
+         'prefer_moving_to_lesser_known_points': (True, False),
+         'prefer_cardinal_to_ordinal': (True, False)}
+SETTINGS_DEFAULTS = {'prefer_moving_to_lesser_known_points': True, 'prefer_cardinal_to_ordinal': True}
+
+
+class TuningResult(object):
+    """
+    How well one settings did on a density's corpus
+    """
+    __slots__ = ['density', 'settings', 'costs', 'found']
+
+    def __init__(self, density, settings, costs, found):
+        """
+        :param density: peak density of the terrain
+        :param settings: settings for make_climb_strategy
+        :param costs: list of the scan cost of each mission
+        :param found: how many missions found an extraction point
+        """
+        self.density = density
+        self.settings = settings
+        self.costs = costs
+        self.found = found
+
+    @property
+    def mean(self):
+        """
+        :return: mean scan cost of the missions
+        """
+        return sum(self.costs) / len(self.costs)
+
+    @property
+    def p95(self):
+        """
+        :return: 95th percentile scan cost of the missions, by nearest rank
+        """
+        return sorted(self.costs)[math.ceil(.95 * len(self.costs)) - 1]
+
+    def to_dict(self):
+        """
+        :return: dict which can be saved as JSON
+        """
+        return {'density': self.density, 'settings': self.settings, 'mean_cost': self.mean, 'p95_cost': self.p95,
+                'missions': len(self.costs), 'found': self.found}
+
+    def __repr__(self):
+        return "TuningResult(density={}, settings={}, mean={:.1f}, p95={}, found={}/{})".format(
+            self.density, self.settings, self.mean, self.p95, self.found, len(self.costs))
+
+
+class StrategyTuner(object):
+    """
+    Tunes climb strategies for terrain densities
+    """
+    __slots__ = ['_func_make_terrain', '_func_make_sensor', '_densities', '_seeds', '_starts_per_map', '_lower_left',
+                 '_upper_right', '_samples', '_rounds', '_max_workers', '_random']
+
+    def __init__(self, func_make_terrain, func_make_sensor, densities, seeds=range(4), starts_per_map=10,
+                 lower_left=ORIGIN, upper_right=Point2D(30, 30), samples=SAMPLES, rounds=ROUNDS, max_workers=None,
+                 seed=0):
+        """
+        The functions are run in the pool's processes, so they have to be ones which can be pickled, such as functions
+        defined at the top of a module
+        :param func_make_terrain: function(density, seed) returning the simulated map of a corpus, like
+        TopologyFactory.make_fake_topology
+        :param func_make_sensor: function(simulated map) returning the sensor the missions scan it with
+        :param densities: list of the peak densities to tune for
+        :param seeds: seed of each map of a density's corpus
+        :param starts_per_map: how many missions are flown on each map
+        :param lower_left: lower-left point of the area missions start in
+        :param upper_right: upper-right point of the area missions start in
+        :param samples: how many random settings are tried
+        :param rounds: most rounds of trying the neighbours of the best settings
+        :param max_workers: most processes to use. 1 flies the missions in this process. By default, one for each CPU
+        :param seed: seed of the random settings and starts
+        """
+        self._func_make_terrain = func_make_terrain
+        self._func_make_sensor = func_make_sensor
+        self._densities = list(densities)
+        self._seeds = list(seeds)
+        self._starts_per_map = starts_per_map
+        self._lower_left = lower_left
+        self._upper_right = upper_right
+        self._samples = samples
+        self._rounds = rounds
+        self._max_workers = max_workers
+        self._random = random.Random(seed)
+
+    def tune(self):
+        """
+        Searches for the best settings
+        :return: dict of density -> dict of objective ('mean' or 'p95') -> TuningResult of the best settings
+        """
+        candidates = [dict(SETTINGS_DEFAULTS, **settings) for settings in CLIMB_SETTINGS.values()]
+        candidates = _unique(candidates + [self.sample_settings() for _ in range(self._samples)], ())
+        results = {density: dict() for density in self._densities}
+        pending = {density: candidates for density in self._densities}
+        executor = ProcessPoolExecutor(self._max_workers) if self._max_workers != 1 else None
+        try:
+            for _ in range(self._rounds + 1):
+                self._evaluate(executor, pending, results)
+                pending = {density: _unique([neighbour for best in _best(results[density].values()).values()
+                                             for neighbour in neighbours(best.settings)], results[density])
+                           for density in self._densities}
+                if not any(pending.values()):
+                    break
+        finally:
+            if executor:
+                executor.shutdown()
+        return {density: _best(density_results.values()) for density, density_results in results.items()}
+
+    def sample_settings(self):
+        """
+        :return: random settings for make_climb_strategy
+        """
+        rng = self._random
+        settings = {name: rng.choice(values) for name, values in SPACE.items()}
+        if rng.random() < .5:
+            settings['kind'] = CLIMB
+        else:
+            settings['kind'] = BINARY_SEARCH
+            for move_amount, floor in [('cardinal_move_amount', 'cardinal_floor'),
+                                       ('ordinal_move_amount', 'ordinal_floor')]:
+                settings[move_amount] = max(settings[move_amount], 2)  # so there's something to shrink
+                settings[floor] = rng.randrange(1, settings[move_amount])
+        return settings
+
+    def _evaluate(self, executor, pending, results):
+        """
+        Flies the missions of the pending settings on every map, and adds a TuningResult for each to results
+        :param executor: ProcessPoolExecutor, or None to fly them in this process
+        :param pending: dict of density -> list of settings
+        :param results: dict of density -> dict of settings key -> TuningResult
+        """
+        tasks = []
+        for density, candidates in pending.items():
+            for seed in self._seeds:
+                if candidates:
+                    args = (self._func_make_terrain, self._func_make_sensor, density, seed, candidates,
+                            self._make_starts(seed))
+                    future = executor.submit(fly_missions, *args) if executor else None
+                    tasks.append((density, candidates, future, args))
+        for density, candidates, future, args in tasks:
+            costs_by_settings, found_by_settings = future.result() if future else fly_missions(*args)
+            for settings, costs, found in zip(candidates, costs_by_settings, found_by_settings):
+                key = _key(settings)
+                if key in results[density]:
+                    result = results[density][key]
+                    result.costs.extend(costs)
+                    result.found += found
+                else:
+                    results[density][key] = TuningResult(density, settings, costs, found)
+
+    def _make_starts(self, seed):
+        """
+        :return: list of the start points of the missions on a map. The same for every density
+        """
+        rng = random.Random(seed)
+        return [Point2D(rng.randint(self._lower_left.x, self._upper_right.x),
+                        rng.randint(self._lower_left.y, self._upper_right.y)) for _ in range(self._starts_per_map)]
+
+
+def fly_missions(func_make_terrain, func_make_sensor, density, seed, candidates, start_points):
+    """
+    Flies a mission from each start with each settings, on one map. Run in the tuner's pool
+    :param func_make_terrain: function(density, seed) returning the simulated map
+    :param func_make_sensor: function(simulated map) returning a sensor
+    :param density: peak density
+    :param seed: the map's seed
+    :param candidates: list of settings
+    :param start_points: list of Point2D
+    :return: tuple(list of the list of mission scan costs of each settings, list of how many missions of each settings
+    found an extraction point)
+    """
+    simulated_map = func_make_terrain(density, seed)
+    costs_by_settings, found_by_settings = [], []
+    for settings in candidates:
+        costs, found = [], 0
+        for start_point in start_points:
+            # a new strategy for each mission, since some keep state between missions
+            navigator = Navigator(TopologyMap(), make_climb_strategy("Tuning", settings), ExtractionPoint())
+            for point in islice(navigator.iter_points_to_destination(start_point, [func_make_sensor(simulated_map)]),
+                                MAX_STEPS):
+                if point.z == OUT_OF_BOUNDS:
+                    break  # off the map everything is as low, so climbs never find their way back
+            costs.append(navigator.scan_cost)
+            found += navigator.found is not None
+        costs_by_settings.append(costs)
+        found_by_settings.append(found)
+    return costs_by_settings, found_by_settings
+
+
+def neighbours(settings):
+    """
+    :param settings: settings for make_climb_strategy
+    :return: list of the settings with one setting changed by a step, which are still valid
+    """
+    result = []
+    for name, value in settings.items():
+        if isinstance(value, bool):
+            changes = [not value]
+        elif name == 'kind':
+            continue
+        else:
+            changes = [value - 1, value + 1]
+        for changed in changes:
+            neighbour = dict(settings, **{name: changed})
+            if _is_valid(neighbour):
+                result.append(neighbour)
+    return result
+
+
+def tuned_strategy_name(density, objective):
+    """
+    :return: name results are saved under
+    """
+    return "density {} {}".format(density, objective)
+
+
+def save_tuned_strategies(path, tuned):
+    """
+    Saves what StrategyTuner.tune returned as JSON
+    :param path: file to write
+    :param tuned: dict of density -> dict of objective -> TuningResult
+    """
+    strategies = {tuned_strategy_name(density, objective): dict(result.to_dict(), objective=objective)
+                  for density, by_objective in tuned.items() for objective, result in by_objective.items()}
+    with open(path, 'w') as file:
+        json.dump({'strategies': strategies}, file, indent=2)
+
+
+def load_tuned_strategy(path, name):
+    """
+    Makes a strategy from settings saved by save_tuned_strategies
+    :param path: file written by save_tuned_strategies
+    :param name: as from tuned_strategy_name, such as "density 0.02 mean"
+    :return: the strategy, with that name
+    """
+    with open(path) as file:
+        strategies = json.load(file)['strategies']
+    if name not in strategies:
+        raise ValueError("No strategy named {!r} in {}. There are: {}".format(name, path, ', '.join(strategies)))
+    return make_climb_strategy(name, strategies[name]['settings'])
+
+
+def _is_valid(settings):
+    """
+    :return: True if make_climb_strategy can use the settings, and they're in the space searched
+    """
+    for name, values in SPACE.items():
+        if name in settings and settings[name] not in values:
+            return False
+    if settings['kind'] == BINARY_SEARCH:
+        return (1 <= settings['cardinal_floor'] < settings['cardinal_move_amount'] and
+                1 <= settings['ordinal_floor'] < settings['ordinal_move_amount'])
+    return True
+
+
+def _best(results):
+    """
+    :param results: TuningResults
+    :return: dict of objective -> TuningResult with the lowest cost by it, of those which found an extraction point
+    the most times. Ties go to the one found first
+    """
+    results = list(results)
+    return {objective: min(results, key=lambda result: (-result.found, getattr(result, objective)))
+            for objective in OBJECTIVES}
+
+
+def _key(settings):
+    """
+    :return: hashable key of the settings
+    """
+    return json.dumps(settings, sort_keys=True)
+
+
+def _unique(candidates, results):
+    """
+    :return: list of the candidates without ones already in results or repeated
+    """
+    keys = set(results)
+    unique = []
+    for settings in candidates:
+        key = _key(settings)
+        if key not in keys:
+            keys.add(key)
+            unique.append(settings)
+    return unique
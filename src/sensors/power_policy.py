@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Power policies decide whether a sensor is turned off after a step, or left on for the next one. Turning a sensor on
+costs its power_on_cost, while leaving it on costs its idle_cost for every step it's on without being used. For
+sensors which are expensive to power on, leaving them on while they're likely to be needed again soon is cheaper.
+
+The navigator tells its policy about every step:
+- before_step: charges the idle cost of sensors which were left on during the move to this step
+- turn_on: readies the sensor about to scan, charging power_on_cost only if it was off
+- after_step: asks the policy which sensors to leave on
+- end_mission: turns everything off
+
+Policies also keep track of the cost they saved compared with always turning sensors off (AlwaysOffPolicy), which
+can be negative if a sensor was left on for nothing.
+"""
+from abc import ABC, abstractmethod
+
+MAX_IDLE_STREAK = 8  # CostModelPolicy lumps together idle streaks this long or longer
+
+
+def as_sensor_set(used_sensor):
+    """
+    :param used_sensor: a sensor, a collection of sensors, or None
+    :return: set of sensors
+    """
+    if used_sensor is None:
+        return set()
+    if isinstance(used_sensor, (list, tuple, set, frozenset, dict)):
+        return set(used_sensor)
+    return {used_sensor}
+
+
+class PowerPolicy(ABC):
+    """
+    Base class for power policies
+    """
+    def __init__(self):
+        self._idle_steps = dict()  # sensor -> steps in a row it wasn't used. Only for sensors used this mission
+        self._power_on_cost_avoided = 0
+        self._idle_cost = 0
+
+    @abstractmethod
+    def keep_on(self, sensor, idle_steps):
+        """
+        Decides whether to leave a sensor on for the next step
+        :param sensor: a sensor which is on
+        :param idle_steps: how many steps in a row the sensor hasn't been used. 0 if it was just used
+        :return: True to leave it on
+        """
+
+    @property
+    def idle_cost(self):
+        """
+        :return: Cost of leaving sensors on without using them, this mission
+        """
+        return self._idle_cost
+
+    @property
+    def cost_saved(self):
+        """
+        :return: How much cheaper this mission was than turning sensors off after every scan. Negative if it cost more
+        """
+        return self._power_on_cost_avoided - self._idle_cost
+
+    def reset(self):
+        """
+        Starts a new mission
+        """
+        self._idle_steps = dict()
+        self._power_on_cost_avoided = 0
+        self._idle_cost = 0
+
+    def before_step(self, sensors):
+        """
+        Charges for the sensors which were left on while moving to this step
+        :param sensors: all of the drone's sensors
+        :return: idle cost
+        """
+        cost = sum(sensor.charge_idle() for sensor in sensors if sensor.is_on)
+        self._idle_cost += cost
+        return cost
+
+    def turn_on(self, sensor):
+        """
+        Readies a sensor to scan
+        :param sensor:
+        :return: cost of turning it on, which is 0 if it was left on
+        """
+        if sensor.is_on:
+            self._power_on_cost_avoided += sensor.power_on_cost
+        return sensor.turn_on()
+
+    def after_step(self, sensors, used_sensor):
+        """
+        Turns off the sensors the policy doesn't want left on
+        :param sensors: all of the drone's sensors
+        :param used_sensor: the sensor which scanned this step, a collection of them if the scan was split, or None
+        """
+        used_sensors = as_sensor_set(used_sensor)
+        for sensor in sensors:
+            if sensor in used_sensors:
+                self._idle_steps[sensor] = 0
+            elif sensor in self._idle_steps:
+                self._idle_steps[sensor] += 1
+            if sensor.is_on and not self.keep_on(sensor, self._idle_steps.get(sensor, 0)):
+                sensor.turn_off()
+
+    def end_mission(self, sensors):
+        """
+        Turns all of the sensors off
+        :param sensors:
+        """
+        for sensor in sensors:
+            if sensor.is_on:
+                sensor.turn_off()
+
+
+class AlwaysOffPolicy(PowerPolicy):
+    """
+    Turns a sensor off as soon as it's done scanning. The default, and the baseline the others are compared with
+    """
+    def keep_on(self, sensor, idle_steps):
+        return False
+
+
+class HysteresisPolicy(PowerPolicy):
+    """
+    Leaves a sensor on until it hasn't been used for timeout steps in a row
+    """
+    def __init__(self, timeout):
+        """
+        :param timeout: steps without being used before the sensor is turned off
+        """
+        super().__init__()
+        self._timeout = timeout
+
+    def keep_on(self, sensor, idle_steps):
+        return idle_steps < self._timeout
+
+
+class KeepWarmPolicy(HysteresisPolicy):
+    """
+    Leaves a sensor on while consecutive steps need it, and turns it off after the first step which doesn't
+    """
+    def __init__(self):
+        super().__init__(timeout=1)
+
+
+class CostModelPolicy(PowerPolicy):
+    """
+    Learns how likely each sensor is to be needed at the next step, given how many steps in a row it hasn't been
+    used, and leaves it on when the expected power-on cost saved is more than the idle cost. What's learned carries
+    over from mission to mission
+    """
+    def __init__(self):
+        super().__init__()
+        self._history = dict()  # sensor -> list of [times seen, times used at the next step] by idle streak
+
+    def after_step(self, sensors, used_sensor):
+        used_sensors = as_sensor_set(used_sensor)
+        for sensor in sensors:
+            idle_steps = self._idle_steps.get(sensor)
+            if idle_steps is not None:  # learn from what happened after the previous step
+                history = self._history.setdefault(sensor, [[0, 0] for _ in range(MAX_IDLE_STREAK + 1)])
+                seen_and_used = history[min(idle_steps, MAX_IDLE_STREAK)]
+                seen_and_used[0] += 1
+                seen_and_used[1] += sensor in used_sensors
+        super().after_step(sensors, used_sensor)
+
+    def probability_needed_next(self, sensor, idle_steps):
+        """
+        Estimates the chance the sensor will be used at the next step
+        :param sensor:
+        :param idle_steps: how many steps in a row the sensor hasn't been used
+        :return: probability, 0.5 if nothing has been learned yet
+        """
+        history = self._history.get(sensor)
+        seen, used = history[min(idle_steps, MAX_IDLE_STREAK)] if history else (0, 0)
+        return (used + 1) / (seen + 2)
+
+    def keep_on(self, sensor, idle_steps):
+        return self.probability_needed_next(sensor, idle_steps) * sensor.power_on_cost > sensor.idle_cost
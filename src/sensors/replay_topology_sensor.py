@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+A ReplayTopologySensor serves scans from a MissionTrace instead of scanning, so a mission can be run again, say with
+a changed move strategy, at memory speed and without the drone. Every cell any scan in the trace returned can be
+served. The sensor has the radius and costs the recorded sensor had, and while the mission asks for the same scans as
+the recorded one did, it returns just what the recorded sensor returned, at the recorded cost.
+
+Once the mission asks for a scan the recorded one didn't, it has diverged: the replay is no longer the recorded
+mission, and cells it asks for may not be in the trace. Each such scan is flagged with a ScanDivergence. Cells which
+aren't in the trace are read from the fallback map if there is one, or else scanned as OUT_OF_BOUNDS.
+"""
+import logging
+from sensors.topology_sensor import TopologySensor
+from navigation.mission_trace import MissionStart, ScanRecord, iter_trace
+from topology.topology_map import OUT_OF_BOUNDS
+
+
+class ScanDivergence(object):
+    """
+    A scan which wasn't the one recorded
+    """
+    __slots__ = ['scan_number', 'home_point', 'offsets', 'expected', 'missing']
+
+    def __init__(self, scan_number, home_point, offsets, expected, missing):
+        """
+        :param scan_number: how many scans the sensor did before this one
+        :param home_point: the point at 0,0
+        :param offsets: list of (x,y) offsets asked for
+        :param expected: ScanRecord of the scan recorded instead, or None if the recorded sensor scanned no more
+        :param missing: list of (x,y) offsets whose cells weren't in the trace
+        """
+        self.scan_number = scan_number
+        self.home_point = home_point
+        self.offsets = offsets
+        self.expected = expected
+        self.missing = missing
+
+    def __repr__(self):
+        return "ScanDivergence(scan={}, home={}, offsets={}, missing={})".format(
+            self.scan_number, self.home_point, len(self.offsets), len(self.missing))
+
+
+class ReplayTopologySensor(TopologySensor):
+    """
+    Scans from a trace
+    """
+    __slots__ = ['_cells', '_scans', '_fallback_map', '_scan_number', '_divergences']
+
+    def __init__(self, cells, scans, radius=1, power_on_cost=0, scan_point_cost=0, idle_cost=0, fallback_map=None):
+        """
+        Use from_trace, rather than this
+        :param cells: dict of (x,y) -> z of the cells which can be served
+        :param scans: list of the ScanRecords the recorded sensor did, in order
+        :param fallback_map: optional map with get_z(point) for cells which aren't in the trace
+        """
+        super().__init__(radius, power_on_cost, scan_point_cost, idle_cost)
+        self._cells = cells
+        self._scans = scans
+        self._fallback_map = fallback_map
+        self._scan_number = 0
+        self._divergences = []
+
+    @classmethod
+    def from_trace(cls, path, mission=0, fallback_map=None):
+        """
+        Makes a sensor for each sensor the mission had
+        :param path: trace file
+        :param mission: which mission in the trace to replay, counting from 0
+        :param fallback_map: optional map with get_z(point) for cells which aren't in the trace
+        :return: list of ReplayTopologySensor, in the order the navigator was given the recorded sensors
+        """
+        cells = dict()
+        sensor_configs = None
+        scans = None
+        mission_number = -1
+        for record in iter_trace(path):
+            if isinstance(record, MissionStart):
+                mission_number += 1
+                if mission_number == mission:
+                    sensor_configs = record.sensors
+                    scans = [[] for _ in sensor_configs]
+            elif isinstance(record, ScanRecord):
+                x, y = record.home_point.x, record.home_point.y
+                for dx, dy, z in record.scanned:
+                    cells[(x + dx, y + dy)] = z
+                if mission_number == mission:
+                    scans[record.sensor_index].append(record)
+        if sensor_configs is None:
+            raise ValueError("Mission {} isn't in {}".format(mission, path))
+        return [cls(cells, sensor_scans, *config, fallback_map=fallback_map)
+                for config, sensor_scans in zip(sensor_configs, scans)]
+
+    @property
+    def divergences(self):
+        """
+        :return: list of ScanDivergence, one for each scan which wasn't the one recorded
+        """
+        return self._divergences
+
+    @property
+    def diverged(self):
+        """
+        :return: True if any scan wasn't the one recorded
+        """
+        return bool(self._divergences)
+
+    def scan_points(self, offsets, home_point):
+        """
+        :param offsets: A list of (x,y) tuples to scan
+        :param home_point: the physical point at 0,0
+        :return: tuple(a list of tuples (x,y,z, point) corresponding to the values of points that were read, scan cost)
+        """
+        scan_number = self._scan_number
+        self._scan_number += 1
+        expected = self._scans[scan_number] if scan_number < len(self._scans) else None
+        if not self._divergences and expected and expected.home_point == home_point and expected.offsets == offsets:
+            scanned_points = [(x, y, z, home_point.translate(x, y)) for x, y, z in expected.scanned]
+            scan_cost = expected.cost
+        else:
+            scanned_points, missing = self._serve(offsets, home_point)
+            scan_cost = self._scan_point_cost * len(scanned_points)
+            divergence = ScanDivergence(scan_number, home_point, offsets, expected, missing)
+            if not self._divergences:
+                logging.info("Replay diverged from the trace at %s", divergence)
+            self._divergences.append(divergence)
+        self._scan_point_count += len(scanned_points)
+        self._total_cost += scan_cost
+        return scanned_points, scan_cost
+
+    def _serve(self, offsets, home_point):
+        """
+        :return: tuple(list of (x,y,z, point) for the offsets, list of the (x,y) offsets whose cells weren't in the
+        trace)
+        """
+        cells = self._cells
+        x0, y0 = home_point.x, home_point.y
+        scanned_points = []
+        missing = []
+        for x, y in offsets:
+            point = home_point.translate(x, y)
+            z = cells.get((x0 + x, y0 + y))
+            if z is None:
+                missing.append((x, y))
+                z = self._fallback_map.get_z(point) if self._fallback_map else None
+                if z is None:
+                    z = OUT_OF_BOUNDS
+            scanned_points.append((x, y, z, point))
+        return scanned_points, missing
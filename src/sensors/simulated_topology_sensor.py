@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import time
+from sensors.topology_sensor import TopologySensor
+from geometry.point import ORIGIN, Point2D
+from topology.topology_map import OUT_OF_BOUNDS
+from topology.dem import MemoryMappedTopology
+
+
+class SimulatedTopologySensor(TopologySensor):
+    """
+    A sensor used in testing. It serves to simulate reading values from a simulated TopologyMap. Anything with
+    a get_z(point) method can be used as the simulated map, such as an unbounded ProceduralTopology or a
+    MemoryMappedTopology
+    """
+
+    __slots__ = ['_simulated_map', '_scan_latency']
+
+    def __init__(self, simulated_map, radius=1, power_on_cost=0, scan_point_cost=0, idle_cost=0, scan_latency=0):
+        """
+        :param simulated_map: the world being scanned
+        :param scan_latency: seconds each scan takes, to simulate the time real hardware needs
+        """
+        super().__init__(radius, power_on_cost, scan_point_cost, idle_cost)
+        self._simulated_map = simulated_map
+        self._scan_latency = scan_latency
+
+    @classmethod
+    def from_npy(cls, path, origin=ORIGIN, nodata=None, **kwargs):
+        """
+        Makes a sensor whose simulated world is a DEM in a .npy file. The file is memory-mapped, so heights are only
+        read as they are scanned, and the DEM can be far bigger than memory
+        :param path: .npy file path
+        :param origin: lower-left point of the DEM
+        :param nodata: height meaning no data. Scanned as OUT_OF_BOUNDS
+        :param kwargs: passed to the constructor, such as radius
+        :return: SimulatedTopologySensor
+        """
+        return cls(MemoryMappedTopology.from_npy(path, origin=origin, nodata=nodata), **kwargs)
+
+    def scan_points(self, offsets, home_point):
+        """
+        A real sensor would only care about the home_point to pass it back in the returned list. Here, though,
+        we use it to lookup into the simulated topology
+        :param offsets: A list of (x,y) tuples to scan
+        :param home_point: the physical point at 0,0
+        :return: tuple(a list of tuples (x,y,z, point) corresponding to the values of points that were read, scan cost)
+        """
+        if self._scan_latency:
+            time.sleep(self._scan_latency)
+        scanned_points = []
+        for x, y in offsets:
+            point = home_point.translate(x, y)
+            z = self._simulated_map.get_z(point)
+            if z is None:  # if off map, we still need to fill in a value
+                z = OUT_OF_BOUNDS
+            scanned_points.append((x, y, z, point))
+
+        self._scan_point_count += len(scanned_points)
+        scan_cost = self._scan_point_cost * len(scanned_points)  # maybe we want to return this also?
+        self._total_cost += scan_cost
+        return scanned_points, scan_cost
+
+    def scan_point_array(self, offsets, home_point):
+        """
+        Looks up all the points in the simulated topology at once, if it has a get_z_array method
+        :param offsets: PointArray of (x,y) offsets to scan
+        :param home_point: the physical point at 0,0
+        :return: tuple(PointArray of the (x,y) offsets read with their heights, scan cost)
+        """
+        if self._scan_latency:
+            time.sleep(self._scan_latency)
+        points = offsets.translate(home_point.x, home_point.y)
+        func_get_z_array = getattr(self._simulated_map, 'get_z_array', None)
+        if func_get_z_array:
+            zs = func_get_z_array(points).zs
+        else:
+            zs = [self._simulated_map.get_z(Point2D(x, y)) for x, y in zip(points.xs, points.ys)]
+        scanned = offsets.with_z([OUT_OF_BOUNDS if z is None else z for z in zs])  # off map still needs a value
+
+        self._scan_point_count += len(scanned)
+        scan_cost = self._scan_point_cost * len(scanned)
+        self._total_cost += scan_cost
+        return scanned, scan_cost
@@ -2,9 +2,11 @@
 """
 Topology Sensors are used to scan points in a radius. They have a cost associated with turning them on, as well as
 a cost for each point scanned. Some sensors might have a high cost to turn on, but a negligable or cheap cost for
-each point then scanned. Sensors keep track of their usage
+each point then scanned. Leaving a sensor on between scans has an idle cost per step instead, so whether to turn it
+off is up to a PowerPolicy. Sensors keep track of their usage
 """
 from abc import ABC, abstractmethod
+from geometry.point import PointArray
 
 
 class TopologySensor(ABC):
@@ -13,17 +15,21 @@ class TopologySensor(ABC):
     In the future, if we have other sensor types, we can pull up
     most of this class into an abstract Sensor class.
     """
-    __slots__ = ['_radius', '_scan_point_cost', '_power_on_cost', '_power_on_count', '_scan_point_count', "_total_cost"]
+    __slots__ = ['_radius', '_scan_point_cost', '_power_on_cost', '_idle_cost', '_is_on', '_power_on_count',
+                 '_scan_point_count', "_total_cost"]
 
-    def __init__(self, radius=1, power_on_cost=0, scan_point_cost=0):
+    def __init__(self, radius=1, power_on_cost=0, scan_point_cost=0, idle_cost=0):
         """
         :param radius: The sensor's scan has this radius
         :param power_on_cost:
         :param scan_point_cost:
+        :param idle_cost: cost of leaving the sensor on for a step without scanning
         """
         self._radius = radius
         self._power_on_cost = power_on_cost
         self._scan_point_cost = scan_point_cost
+        self._idle_cost = idle_cost
+        self._is_on = False
 
         self._power_on_count = 0  # how many times sensor is turned on
         self._scan_point_count = 0  # how many time scans of individual cells are done
@@ -37,6 +43,43 @@ class TopologySensor(ABC):
         """
         return self._power_on_cost
 
+    @property
+    def scan_point_cost(self):
+        """
+        Returns how much it costs to scan each point
+        :return: a number
+        """
+        return self._scan_point_cost
+
+    @property
+    def idle_cost(self):
+        """
+        Returns how much it costs to leave the sensor on for a step without scanning
+        :return: a number
+        """
+        return self._idle_cost
+
+    @property
+    def is_on(self):
+        """
+        :return: True if the sensor is on
+        """
+        return self._is_on
+
+    @property
+    def power_on_count(self):
+        """
+        :return: How many times the sensor has been turned on
+        """
+        return self._power_on_count
+
+    @property
+    def total_cost(self):
+        """
+        :return: Total cost of using the sensor so far: powering on, scanning and idling
+        """
+        return self._total_cost
+
     @property
     def radius(self):
         """
@@ -61,7 +104,7 @@ class TopologySensor(ABC):
 
     def estimate_cost_to_scan(self, adjacent_points):
         """
-        Calculates the cost of turning on the sensor + the
+        Calculates the cost of turning on the sensor (unless it's already on) + the
         cost to scan each adjacent_point. This assumes all adjacent points are equally costly to scan.
         :param adjacent_points: Not used here, but subclasses might have different costs to scan different offsets
         :return:
@@ -69,22 +112,34 @@ class TopologySensor(ABC):
         if not adjacent_points:
             return 0
 
-        return self._power_on_cost + self._scan_point_cost * len(adjacent_points)
+        power_on_cost = 0 if self._is_on else self._power_on_cost
+        return power_on_cost + self._scan_point_cost * len(adjacent_points)
 
     def turn_on(self):
         """
-        Turns on the hardware. Subclass overrides should also call this super method
-        :return:
+        Turns on the hardware, if it's not on already. Subclass overrides should also call this super method
+        :return: the cost of turning it on, which is 0 if it was already on
         """
+        if self._is_on:
+            return 0
+        self._is_on = True
         self._power_on_count += 1
         self._total_cost += self._power_on_cost
+        return self._power_on_cost
 
     def turn_off(self):
         """
-        Turns off the hardware
-        :return:
+        Turns off the hardware. Subclass overrides should also call this super method
         """
-        pass
+        self._is_on = False
+
+    def charge_idle(self):
+        """
+        Charges for a step where the sensor was left on without scanning
+        :return: the idle cost
+        """
+        self._total_cost += self._idle_cost
+        return self._idle_cost
 
     @abstractmethod
     def scan_points(self, offsets, home_point):
@@ -95,4 +150,16 @@ class TopologySensor(ABC):
         :return: a list of of tuples (x,y,z, point) corresponding to the values of points that were read. A sensor
         is free to return MORE that what was asked for. If so, this list will be larger than the offsets list. The
         caller can then use these additional points in its calculations
-        """
\ No newline at end of file
+        """
+
+    def scan_point_array(self, offsets, home_point):
+        """
+        Scan the points desired, without a tuple and point for each. By default, this is done with scan_points, so
+        subclasses which can read many points at once should override it
+        :param offsets: PointArray of (x,y) offsets to scan
+        :param home_point: the physical point at 0,0
+        :return: tuple(PointArray of the (x,y) offsets read with their heights, scan cost). As with scan_points, it
+        may hold more than was asked for
+        """
+        scanned_points, scan_cost = self.scan_points(list(offsets), home_point)
+        return PointArray.from_tuples((x, y, z) for x, y, z, _pt in scanned_points), scan_cost
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+"""
+Reads raster digital elevation models (DEMs) so real terrain can be loaded into a TopologyMap or used as the
+simulated world of a SimulatedTopologySensor. Supported formats:
+
+* ESRI ASCII grid (.asc): a text header followed by rows of heights
+* .npy: a numpy array file holding a 2d array. numpy is not needed to read it
+* raw: headerless row by row binary heights, given their width and dtype
+
+Like make_from_matrix, the first row in a file is the northern-most (highest y) row. Files are read a few rows at a
+time, so they never have to fit in memory as python objects. Binary files can also be memory-mapped with
+MemoryMappedTopology, which reads heights straight from the file as they are asked for.
+"""
+import ast
+import mmap
+import struct
+import sys
+from array import array
+from geometry.point import ORIGIN
+from topology.topology_map import TopologyMap, OUT_OF_BOUNDS
+
+# numpy dtype (without byte order) -> array module typecode
+_TYPECODES = {'i1': 'b', 'u1': 'B', 'i2': 'h', 'u2': 'H', 'i4': 'i', 'u4': 'I', 'i8': 'q', 'u8': 'Q',
+              'f4': 'f', 'f8': 'd'}
+_NPY_MAGIC = b'\x93NUMPY'
+CHUNK_ROWS = 64
+
+
+def iter_esri_ascii_rows(path):
+    """
+    Reads an ESRI ASCII grid one row at a time
+    :param path: file path
+    :return: tuple(header dict, generator yielding a list of heights for each row, with None for NODATA cells).
+    Header keys are lower case, such as ncols, nrows, cellsize, nodata_value
+    """
+    header = dict()
+    with open(path) as file:
+        offset = file.tell()
+        line = file.readline()
+        while line and line.split() and line.split()[0][0].isalpha():  # header lines start with a keyword
+            key, value = line.split()[:2]
+            header[key.lower()] = float(value) if '.' in value or 'e' in value.lower() else int(value)
+            offset = file.tell()
+            line = file.readline()
+    return header, _iter_esri_ascii_values(path, offset, header)
+
+
+def _iter_esri_ascii_values(path, offset, header):
+    """
+    Generates rows of heights from the body of an ESRI ASCII file. A row can span several lines. The file is only
+    opened once the rows are asked for, so it isn't left open if they never are
+    :param offset: position of the body in the file
+    """
+    width = header['ncols']
+    nodata = header.get('nodata_value')
+    with open(path) as file:
+        file.seek(offset)
+        row = []
+        for line in file:
+            for token in line.split():
+                z = float(token)
+                if z.is_integer():
+                    z = int(z)
+                row.append(None if z == nodata else z)
+                if len(row) == width:
+                    yield row
+                    row = []
+
+
+def read_npy_header(file):
+    """
+    Reads the header of a .npy file, leaving the file positioned at the start of the data
+    :param file: binary file object
+    :return: tuple(dtype string such as '<f4', shape tuple)
+    """
+    if file.read(6) != _NPY_MAGIC:
+        raise ValueError("Not a .npy file")
+    major, _minor = file.read(2)
+    length_format = '<H' if major == 1 else '<I'
+    (header_length,) = struct.unpack(length_format, file.read(struct.calcsize(length_format)))
+    header = ast.literal_eval(file.read(header_length).decode('latin1'))
+    if header['fortran_order']:
+        raise ValueError("Fortran ordered .npy files are not supported")
+    if len(header['shape']) != 2:
+        raise ValueError("Expecting a 2d array, got shape " + str(header['shape']))
+    return header['descr'], header['shape']
+
+
+def write_npy(path, rows, width, height, dtype='<f4'):
+    """
+    Writes rows of heights as a .npy file, a few rows at a time. Useful for converting an ESRI ASCII grid to a
+    format which can be memory-mapped
+    :param path: file path
+    :param rows: iterable of rows of heights, northern-most first. None is written as nodata (0 or nan)
+    :param width:
+    :param height:
+    :param dtype: numpy dtype string, such as '<i2' or '<f4'
+    """
+    typecode, swap = _typecode(dtype)
+    nodata = float('nan') if typecode in 'fd' else 0
+    header = "{{'descr': '{}', 'fortran_order': False, 'shape': ({}, {}), }}".format(dtype, height, width)
+    padding = 64 - (len(_NPY_MAGIC) + 4 + len(header) + 1) % 64  # numpy aligns the data on 64 bytes
+    header = header + ' ' * (padding % 64) + '\n'
+    with open(path, 'wb') as file:
+        file.write(_NPY_MAGIC + bytes([1, 0]) + struct.pack('<H', len(header)) + header.encode('latin1'))
+        for row in rows:
+            values = array(typecode, (nodata if z is None else z for z in row))
+            if swap:
+                values.byteswap()
+            values.tofile(file)
+
+
+def iter_binary_rows(path, width, dtype, offset=0, chunk_rows=CHUNK_ROWS):
+    """
+    Reads a raw or .npy file of row by row heights, chunk_rows rows at a time
+    :param path: file path
+    :param width: number of heights in a row
+    :param dtype: numpy dtype string, such as '<i2' or '<f4'
+    :param offset: bytes to skip at the start of the file (the header)
+    :param chunk_rows: rows to read at once
+    :return: generator yielding an array of heights for each row
+    """
+    typecode, swap = _typecode(dtype)
+    item_size = array(typecode).itemsize
+    with open(path, 'rb') as file:
+        file.seek(offset)
+        while True:
+            chunk = array(typecode)
+            chunk.frombytes(file.read(width * item_size * chunk_rows))
+            if not chunk:
+                return
+            if swap:
+                chunk.byteswap()
+            for start in range(0, len(chunk), width):
+                yield chunk[start:start + width]
+
+
+def iter_npy_rows(path, chunk_rows=CHUNK_ROWS):
+    """
+    Reads a .npy file a few rows at a time
+    :param path: file path
+    :param chunk_rows: rows to read at once
+    :return: tuple(shape, generator yielding an array of heights for each row)
+    """
+    with open(path, 'rb') as file:
+        dtype, shape = read_npy_header(file)
+        offset = file.tell()
+    return shape, iter_binary_rows(path, shape[1], dtype, offset=offset, chunk_rows=chunk_rows)
+
+
+def load_rows_into_map(rows, height, topology_map=None, origin=ORIGIN, nodata=None):
+    """
+    Loads rows of heights into a map, one row at a time
+    :param rows: iterable of rows of heights, northern-most first
+    :param height: number of rows
+    :param topology_map: map to load into. If None, makes a new one bounded by the rows
+    :param origin: lower-left point of the rows
+    :param nodata: height meaning no data. Those cells are left unknown. None values are always left unknown
+    :return: the map
+    """
+    for row_index, row in enumerate(rows):
+        if topology_map is None:  # the width is known once there's a row
+            topology_map = TopologyMap(lower_left_bounds=origin,
+                                       upper_right_bounds=origin.translate(len(row) - 1, height - 1))
+        if nodata is not None or isinstance(row, array) and row.typecode in 'fd':
+            row = [None if z == nodata or z != z else z for z in row]  # z != z catches nan
+        topology_map.set_z_row(origin.translate(0, height - row_index - 1), row)
+    if topology_map is None:
+        topology_map = TopologyMap()
+    return topology_map
+
+
+def load_esri_ascii_grid(path, topology_map=None, origin=ORIGIN):
+    """
+    Loads an ESRI ASCII grid into a map, a row at a time. NODATA cells are left unknown
+    :param path: file path
+    :param topology_map: map to load into. If None, makes a new one
+    :param origin: lower-left point of the grid in the map
+    :return: the map
+    """
+    header, rows = iter_esri_ascii_rows(path)
+    return load_rows_into_map(rows, header['nrows'], topology_map, origin)
+
+
+def load_npy(path, topology_map=None, origin=ORIGIN, nodata=None):
+    """
+    Loads a .npy file into a map, a few rows at a time. nan heights are left unknown
+    :param path: file path
+    :param topology_map: map to load into. If None, makes a new one
+    :param origin: lower-left point of the array in the map
+    :param nodata: height meaning no data
+    :return: the map
+    """
+    shape, rows = iter_npy_rows(path)
+    return load_rows_into_map(rows, shape[0], topology_map, origin, nodata)
+
+
+class MemoryMappedTopology(object):
+    """
+    A read-only topology backed by a memory-mapped binary DEM (.npy or raw). Heights are read from the file as they
+    are asked for, so a multi-gigabyte DEM can be the simulated world of a SimulatedTopologySensor without being
+    loaded. Points off the DEM, and nodata cells, are OUT_OF_BOUNDS
+    """
+    __slots__ = ['_file', '_mmap', '_heights', '_width', '_height', '_origin', '_nodata']
+
+    def __init__(self, path, width, height, dtype, offset=0, origin=ORIGIN, nodata=None):
+        """
+        :param path: file path
+        :param width: number of heights in a row
+        :param height: number of rows
+        :param dtype: numpy dtype string, such as '<i2' or '<f4'. Must be in the machine's byte order
+        :param offset: bytes to skip at the start of the file (the header)
+        :param origin: lower-left point of the DEM
+        :param nodata: height meaning no data
+        """
+        typecode, swap = _typecode(dtype)
+        if swap:
+            raise ValueError("Can only memory-map heights in the machine's byte order")
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        item_size = array(typecode).itemsize
+        self._heights = memoryview(self._mmap)[offset:offset + width * height * item_size].cast(typecode)
+        self._width = width
+        self._height = height
+        self._origin = origin
+        self._nodata = nodata
+
+    @classmethod
+    def from_npy(cls, path, origin=ORIGIN, nodata=None):
+        """
+        Memory-maps a .npy file
+        :param path: file path
+        :param origin: lower-left point of the array
+        :param nodata: height meaning no data. nan always means no data
+        :return: MemoryMappedTopology
+        """
+        with open(path, 'rb') as file:
+            dtype, (height, width) = read_npy_header(file)
+            offset = file.tell()
+        return cls(path, width, height, dtype, offset=offset, origin=origin, nodata=nodata)
+
+    @property
+    def width_and_height(self):
+        """
+        :return: tuple(width, height) of the DEM
+        """
+        return self._width, self._height
+
+    def point_is_out_of_bounds(self, point):
+        """
+        :param point:
+        :return: True if the point is off the DEM
+        """
+        x, y = point.x - self._origin.x, point.y - self._origin.y
+        return not (0 <= x < self._width and 0 <= y < self._height)
+
+    def get_z(self, point, default=None):
+        """
+        Reads the height at a point from the file
+        :param point:
+        :param default: Not used, since every point on the DEM has a height. Kept to match TopologyMap.get_z
+        :return: height, or OUT_OF_BOUNDS if off the DEM or nodata
+        """
+        x, y = point.x - self._origin.x, point.y - self._origin.y
+        if not (0 <= x < self._width and 0 <= y < self._height):
+            return OUT_OF_BOUNDS
+        z = self._heights[(self._height - 1 - y) * self._width + x]
+        if z == self._nodata or z != z:  # z != z catches nan
+            return OUT_OF_BOUNDS
+        return z
+
+    def get_z_array(self, points, default=None):
+        """
+        Reads the heights of many points from the file
+        :param points: PointArray
+        :param default: Not used, as in get_z
+        :return: PointArray of the points with their heights, OUT_OF_BOUNDS where off the DEM or nodata
+        """
+        heights, width, height, nodata = self._heights, self._width, self._height, self._nodata
+        origin_x, origin_y = self._origin.x, self._origin.y
+        zs = []
+        for x, y in zip(points.xs, points.ys):
+            x, y = x - origin_x, y - origin_y
+            z = heights[(height - 1 - y) * width + x] if 0 <= x < width and 0 <= y < height else OUT_OF_BOUNDS
+            zs.append(OUT_OF_BOUNDS if z == nodata or z != z else z)
+        return points.with_z(zs)
+
+    def close(self):
+        """
+        Closes the file
+        """
+        self._heights.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _typecode(dtype):
+    """
+    Converts a numpy dtype string to an array module typecode
+    :param dtype: such as '<f4'
+    :return: tuple(typecode, True if the bytes need swapping to the machine's byte order)
+    """
+    byte_order, kind = (dtype[0], dtype[1:]) if dtype[0] in '<>|=' else ('=', dtype)
+    typecode = _TYPECODES.get(kind)
+    if typecode is None or array(typecode).itemsize != int(kind[1:]):
+        raise ValueError("Unsupported dtype " + dtype)
+    swap = byte_order in '<>' and byte_order != ('<' if sys.byteorder == 'little' else '>')
+    return typecode, swap
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+A HeightEncoding stores a TopologyMap's heights in a typed array instead of as python numbers, which takes a
+fraction of the memory on big survey areas. Heights are quantized: the stored value is (height - offset) / scale,
+rounded for the integer dtypes.
+
+Two values of each dtype are reserved as sentinels, so a tile's heights make sense on their own:
+
+* unknown: the smallest value of an integer dtype, or NaN for the float ones. Cells not yet set hold it
+* out of bounds: the next smallest value of an integer dtype, or -inf for the float ones. OUT_OF_BOUNDS is stored as
+  it, and read back as OUT_OF_BOUNDS
+
+Since the scale is positive, stored values sort the same way as heights, with out of bounds the lowest, so the map's
+height pyramid can compare stored values without decoding them. Heights which can't be stored, such as ones out of
+the dtype's range or not numbers, raise ValueError when they're set.
+"""
+import math
+import sys
+from array import array
+from topology.tile import TILE_CELLS
+
+OUT_OF_BOUNDS = float("-inf")
+FLOAT32_MAX = 3.4028234663852886e38
+
+# dtype -> (array typecode, bits, or None for floats)
+DTYPES = {'int16': ('h', 16), 'int32': ('i', 32), 'float32': ('f', None), 'float64': ('d', None)}
+
+
+class HeightEncoding(object):
+    """
+    How heights are stored
+    """
+    __slots__ = ['_dtype', '_typecode', '_scale', '_offset', '_integer', '_unknown', '_out_of_bounds', '_min', '_max',
+                 '_identity']
+
+    def __init__(self, dtype='int16', scale=1, offset=0):
+        """
+        :param dtype: one of DTYPES
+        :param scale: height of one step of the stored value, such as .1 for decimeters. Must be positive
+        :param offset: height stored as 0
+        """
+        if dtype not in DTYPES:
+            raise ValueError("Unknown dtype {}. Use one of {}".format(dtype, ', '.join(DTYPES)))
+        if not scale > 0:
+            raise ValueError("scale must be positive: {}".format(scale))
+        self._dtype = dtype
+        self._typecode, bits = DTYPES[dtype]
+        self._scale = scale
+        self._offset = offset
+        self._integer = bits is not None
+        if self._integer:
+            lowest = -(1 << (bits - 1))
+            self._unknown, self._out_of_bounds = lowest, lowest + 1
+            self._min, self._max = lowest + 2, (1 << (bits - 1)) - 1
+        else:
+            self._unknown, self._out_of_bounds = float("nan"), OUT_OF_BOUNDS
+            highest = FLOAT32_MAX if dtype == 'float32' else sys.float_info.max
+            self._min, self._max = -highest, highest
+        # integer heights stored as they are, so they're read back as ints
+        self._identity = self._integer and scale == 1 and isinstance(offset, int)
+
+    @property
+    def dtype(self):
+        """
+        :return: one of DTYPES
+        """
+        return self._dtype
+
+    @property
+    def typecode(self):
+        """
+        :return: the array module typecode of the stored values
+        """
+        return self._typecode
+
+    @property
+    def scale(self):
+        """
+        :return: height of one step of the stored value
+        """
+        return self._scale
+
+    @property
+    def offset(self):
+        """
+        :return: height stored as 0
+        """
+        return self._offset
+
+    @property
+    def unknown(self):
+        """
+        :return: stored value of cells which aren't known
+        """
+        return self._unknown
+
+    @property
+    def out_of_bounds(self):
+        """
+        :return: stored value of OUT_OF_BOUNDS
+        """
+        return self._out_of_bounds
+
+    @property
+    def height_range(self):
+        """
+        :return: tuple(lowest, highest) height which can be stored, not counting OUT_OF_BOUNDS
+        """
+        return self.decode(self._min), self.decode(self._max)
+
+    @property
+    def bytes_per_height(self):
+        """
+        :return: bytes each height takes
+        """
+        return array(self._typecode).itemsize
+
+    def make_heights(self):
+        """
+        :return: array of a tile's heights, all unknown
+        """
+        return array(self._typecode, [self._unknown]) * TILE_CELLS
+
+    def encode(self, height):
+        """
+        :param height: a height, or OUT_OF_BOUNDS
+        :return: the value to store
+        """
+        if height == OUT_OF_BOUNDS:
+            return self._out_of_bounds
+        if self._identity and isinstance(height, int):
+            value = height - self._offset
+        else:
+            value = (height - self._offset) / self._scale
+            if self._integer and math.isfinite(value):
+                value = round(value)
+        if not self._min <= value <= self._max:  # also catches NaN
+            raise ValueError("Height {} can't be stored as {} with scale {} and offset {}".format(
+                height, self._dtype, self._scale, self._offset))
+        return value
+
+    def decode(self, value):
+        """
+        :param value: a stored value, other than unknown
+        :return: the height, or OUT_OF_BOUNDS
+        """
+        if value == self._out_of_bounds:
+            return OUT_OF_BOUNDS
+        if self._identity:
+            return value + self._offset
+        return value * self._scale + self._offset
+
+    def __repr__(self):
+        return "HeightEncoding(dtype={!r}, scale={!r}, offset={!r})".format(self._dtype, self._scale, self._offset)
@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+A HeightPyramid keeps, for square blocks of a TopologyMap at every scale, the maximum known height and the number
+of known cells. Level k blocks are 2^k cells wide, so level 0 is a cell, level TILE_SHIFT is a tile, and each level
+up merges 2x2 blocks of the level below, like a mipmap or quadtree.
+
+This lets us ask questions about big regions without looking at every cell, such as "where is the highest known
+ground in this rectangle?" or "which part of this rectangle have we explored least?". Queries start at the level
+where the rectangle is covered by a couple of blocks and only go down into blocks that could change the answer.
+
+Levels inside a tile are updated as soon as a cell is set. Levels above a tile are brought up to date lazily, just
+before the next query, from the tiles which changed since.
+
+The levels inside a tile are kept in typed arrays: the known counts always, and the maximum heights when the map has
+a HeightEncoding, as its stored values, so they take a fraction of the memory the tile's cells do. They're kept on the
+tile itself, so when a map with a memory budget spills a tile, its levels go with it.
+"""
+import math
+from array import array
+from topology.tile import TILE_SHIFT, TILE_SIZE, TILE_MASK
+
+NO_VALUE = float("-inf")  # max height of a block with no known cells
+MAX_LEVEL = TILE_SHIFT + 16  # top blocks are 2 million cells wide
+
+
+class _TileSummary(object):
+    """
+    Levels 1 to TILE_SHIFT for a single tile. maxes[k] and counts[k] are row by row sequences of the level k blocks
+    """
+    __slots__ = ['maxes', 'counts']
+
+    def __init__(self, height_encoding, no_value):
+        """
+        :param height_encoding: the map's HeightEncoding, or None if heights are stored as they are
+        :param no_value: max of blocks with no known cells
+        """
+        sizes = [(TILE_SIZE >> k) ** 2 for k in range(1, TILE_SHIFT + 1)]
+        if height_encoding is None:
+            self.maxes = [None] + [[no_value] * size for size in sizes]
+        else:
+            empty = array(height_encoding.typecode, [no_value])
+            self.maxes = [None] + [empty * size for size in sizes]
+        self.counts = [None] + [array('H', bytes(2 * size)) for size in sizes]
+
+
+class HeightPyramid(object):
+    """
+    Max height and known count of blocks at every scale. Created and updated by the TopologyMap it summarizes
+    """
+    __slots__ = ['_tiles', '_encoding', '_no_value', '_levels', '_dirty']
+
+    def __init__(self, tiles, height_encoding=None):
+        """
+        :param tiles: the map's dict of (tile x, tile y) -> tile
+        :param height_encoding: the map's HeightEncoding, or None if heights are stored as they are
+        """
+        self._tiles = tiles
+        self._encoding = height_encoding
+        # max of blocks with no known cells. NaN, the unknown value of the float dtypes, doesn't sort, so they use -inf
+        self._no_value = NO_VALUE
+        if height_encoding is not None and not math.isnan(height_encoding.unknown):
+            self._no_value = height_encoding.unknown
+        self._levels = [None] * (TILE_SHIFT + 1) + [dict() for _ in range(TILE_SHIFT + 1, MAX_LEVEL + 1)]
+        self._dirty = set()  # keys of tiles which changed since the levels above tiles were updated
+
+    def update(self, tile_key, tile, index, newly_known):
+        """
+        Updates the levels inside a tile after one of its cells was set
+        :param tile_key: (tile x, tile y)
+        :param tile: the tile holding the cell
+        :param index: the cell's index in the tile
+        :param newly_known: True if the cell was unknown before
+        """
+        summary = tile.summary
+        if summary is None:
+            summary = tile.summary = _TileSummary(self._encoding, self._no_value)
+        self._dirty.add(tile_key)
+
+        heights, known, no_value = tile.heights, tile.known, self._no_value
+        x, y = index & TILE_MASK, index >> TILE_SHIFT
+        for k in range(1, TILE_SHIFT + 1):
+            x >>= 1
+            y >>= 1
+            width = TILE_SIZE >> k
+            i = y * width + x
+            if k == 1:
+                first = 2 * y * TILE_SIZE + 2 * x
+                new_max = max(heights[j] if known[j] else no_value
+                              for j in (first, first + 1, first + TILE_SIZE, first + TILE_SIZE + 1))
+            else:
+                below = summary.maxes[k - 1]
+                first = 4 * y * width + 2 * x
+                new_max = max(below[first], below[first + 1], below[first + 2 * width], below[first + 2 * width + 1])
+            if newly_known:
+                summary.counts[k][i] += 1
+            elif new_max == summary.maxes[k][i]:
+                break  # nothing changes further up
+            summary.maxes[k][i] = new_max
+
+    def update_row(self, tile_key, tile, row):
+        """
+        Recomputes the levels inside a tile above one of its rows, after several cells in the row were set at once
+        :param tile_key: (tile x, tile y)
+        :param tile: the tile holding the row
+        :param row: the row's y in the tile, 0 to TILE_SIZE - 1
+        """
+        summary = tile.summary
+        if summary is None:
+            summary = tile.summary = _TileSummary(self._encoding, self._no_value)
+        self._dirty.add(tile_key)
+
+        heights, known, no_value = tile.heights, tile.known, self._no_value
+        y = row
+        for k in range(1, TILE_SHIFT + 1):
+            y >>= 1
+            width = TILE_SIZE >> k
+            maxes, counts = summary.maxes[k], summary.counts[k]
+            for x in range(width):
+                i = y * width + x
+                if k == 1:
+                    first = 2 * y * TILE_SIZE + 2 * x
+                    cells = (first, first + 1, first + TILE_SIZE, first + TILE_SIZE + 1)
+                    maxes[i] = max(heights[j] if known[j] else no_value for j in cells)
+                    counts[i] = sum(known[j] for j in cells)
+                else:
+                    first = 4 * y * width + 2 * x
+                    below = (first, first + 1, first + 2 * width, first + 2 * width + 1)
+                    maxes[i] = max(summary.maxes[k - 1][j] for j in below)
+                    counts[i] = sum(summary.counts[k - 1][j] for j in below)
+
+    def max_in_rect(self, lower_left, upper_right):
+        """
+        Finds the highest known cell in a rectangle
+        :param lower_left: corner point, inclusive
+        :param upper_right: corner point, inclusive
+        :return: tuple(height, x, y) or None if nothing in the rectangle is known
+        """
+        self._update_levels_above_tiles()
+        rect = (lower_left.x, lower_left.y, upper_right.x, upper_right.y)
+        best = None
+        stack = self._starting_blocks(rect)
+        while stack:
+            k, bx, by = stack.pop()
+            block_max, count = self._get_block(k, bx, by)
+            if not count or (best and block_max <= best[0]):
+                continue  # nothing here can beat what we have
+            overlap = _overlap(k, bx, by, rect)
+            if overlap == _INSIDE:
+                best = (block_max,) + self._argmax(k, bx, by)
+            elif overlap == _PARTIAL:
+                children = [(k - 1, cx, cy) for cx, cy in _children(bx, by)]
+                # visit the highest child first (it's popped last), so lower ones are more likely to be pruned
+                children.sort(key=lambda child: self._get_block(*child)[0])
+                stack.extend(children)
+        return best
+
+    def count_known_in_rect(self, lower_left, upper_right):
+        """
+        Counts the known cells in a rectangle
+        :param lower_left: corner point, inclusive
+        :param upper_right: corner point, inclusive
+        :return: number of known cells
+        """
+        self._update_levels_above_tiles()
+        rect = (lower_left.x, lower_left.y, upper_right.x, upper_right.y)
+        total = 0
+        stack = self._starting_blocks(rect)
+        while stack:
+            k, bx, by = stack.pop()
+            _block_max, count = self._get_block(k, bx, by)
+            if not count:
+                continue
+            overlap = _overlap(k, bx, by, rect)
+            if overlap == _INSIDE:
+                total += count
+            elif overlap == _PARTIAL:
+                stack.extend((k - 1, cx, cy) for cx, cy in _children(bx, by))
+        return total
+
+    def least_explored_block(self, lower_left, upper_right, level):
+        """
+        Finds a block of the given level inside the rectangle with few known cells. Goes down from the top one
+        level at a time, into the child with the lowest share of known cells, so a block with no known cells is found
+        whenever the way down leads to one
+        :param lower_left: corner point, inclusive
+        :param upper_right: corner point, inclusive
+        :param level: the block to find is 2^level cells wide
+        :return: tuple(block x, block y, known count) where the block's lower left cell is (block x, block y) *
+        2^level, or None if no block of that level fits in the rectangle
+        """
+        self._update_levels_above_tiles()
+        rect = (lower_left.x, lower_left.y, upper_right.x, upper_right.y)
+        candidates = self._starting_blocks(rect)
+        if candidates[0][0] <= level:  # the rectangle is small, so just look at every block of the level in it
+            left, bottom, right, top = rect
+            size = 1 << level
+            candidates = [(level, bx, by) for by in range(-(-bottom // size), (top + 1) // size)
+                          for bx in range(-(-left // size), (right + 1) // size)]
+
+        while candidates:
+            candidates = [block for block in candidates if _contains_block_inside(*block, rect, level)]
+            if not candidates:
+                return None
+            k, bx, by = min(candidates, key=lambda block: self._get_block(*block)[1] / _area_inside(*block, rect))
+            if k == level:
+                return bx, by, self._get_block(k, bx, by)[1]
+            candidates = [(k - 1, cx, cy) for cx, cy in _children(bx, by)]
+        return None
+
+    def _argmax(self, k, bx, by):
+        """
+        Goes down from a block to the cell holding its maximum
+        :return: tuple(x, y) of the cell
+        """
+        block_max = self._get_block(k, bx, by)[0]
+        while k:
+            k -= 1
+            for cx, cy in _children(bx, by):
+                child_max, count = self._get_block(k, cx, cy)
+                if count and child_max == block_max:
+                    bx, by = cx, cy
+                    break
+        return bx, by
+
+    def _get_block(self, k, bx, by):
+        """
+        :param k: level
+        :param bx: block x. The block's lower left cell is (bx, by) * 2^k
+        :param by: block y
+        :return: tuple(max height, known count)
+        """
+        if k > TILE_SHIFT:
+            return self._levels[k].get((bx, by), (NO_VALUE, 0))
+        if k == 0:
+            tile = self._tiles.get((bx >> TILE_SHIFT, by >> TILE_SHIFT))
+            index = ((by & TILE_MASK) << TILE_SHIFT) | (bx & TILE_MASK)
+            if tile is None or not tile.known[index]:
+                return NO_VALUE, 0
+            return tile.heights[index], 1
+        shift = TILE_SHIFT - k
+        tile = self._tiles.get((bx >> shift, by >> shift))
+        if tile is None or tile.summary is None:
+            return NO_VALUE, 0
+        summary = tile.summary
+        width = TILE_SIZE >> k
+        i = (by & (width - 1)) * width + (bx & (width - 1))
+        return summary.maxes[k][i], summary.counts[k][i]
+
+    def _update_levels_above_tiles(self):
+        """
+        Recomputes the blocks bigger than a tile which contain tiles that changed, one level at a time
+        """
+        dirty = self._dirty
+        for k in range(TILE_SHIFT + 1, MAX_LEVEL + 1):
+            if not dirty:
+                break
+            parents = {(bx >> 1, by >> 1) for bx, by in dirty}
+            level = self._levels[k]
+            for bx, by in parents:
+                blocks = [self._get_block(k - 1, cx, cy) for cx, cy in _children(bx, by)]
+                level[(bx, by)] = (max(block_max for block_max, _count in blocks), sum(c for _m, c in blocks))
+            dirty = parents
+        self._dirty = set()
+
+    @staticmethod
+    def _starting_blocks(rect):
+        """
+        Gets the 2x2 (or fewer) blocks of the lowest level which cover the rectangle
+        :param rect: tuple(left, bottom, right, top)
+        :return: list of (level, block x, block y)
+        """
+        left, bottom, right, top = rect
+        k = 0
+        while k < MAX_LEVEL and ((right >> k) - (left >> k) > 1 or (top >> k) - (bottom >> k) > 1):
+            k += 1
+        return [(k, bx, by) for by in range(bottom >> k, (top >> k) + 1) for bx in range(left >> k, (right >> k) + 1)]
+
+
+_OUTSIDE, _PARTIAL, _INSIDE = range(3)
+
+
+def _overlap(k, bx, by, rect):
+    """
+    :return: how a block lies compared to a rectangle: _OUTSIDE, _PARTIAL or _INSIDE
+    """
+    left, bottom, right, top = rect
+    block_left, block_bottom = bx << k, by << k
+    block_right, block_top = block_left + (1 << k) - 1, block_bottom + (1 << k) - 1
+    if block_left > right or block_right < left or block_bottom > top or block_top < bottom:
+        return _OUTSIDE
+    if block_left >= left and block_right <= right and block_bottom >= bottom and block_top <= top:
+        return _INSIDE
+    return _PARTIAL
+
+
+def _contains_block_inside(k, bx, by, rect, level):
+    """
+    :return: True if a level k block contains a whole block of a lower level which is inside the rectangle
+    """
+    left, bottom, right, top = rect
+    shift = k - level
+    size = 1 << level
+    first_x, last_x = max(bx << shift, -(-left // size)), min(((bx + 1) << shift) - 1, (right + 1) // size - 1)
+    first_y, last_y = max(by << shift, -(-bottom // size)), min(((by + 1) << shift) - 1, (top + 1) // size - 1)
+    return first_x <= last_x and first_y <= last_y
+
+
+def _area_inside(k, bx, by, rect):
+    """
+    :return: how many cells of a block lie inside a rectangle
+    """
+    left, bottom, right, top = rect
+    block_left, block_bottom = bx << k, by << k
+    width = min(right, block_left + (1 << k) - 1) - max(left, block_left) + 1
+    height = min(top, block_bottom + (1 << k) - 1) - max(bottom, block_bottom) + 1
+    return max(width, 0) * max(height, 0)
+
+
+def _children(bx, by):
+    """
+    :return: the 4 blocks one level down which make up a block
+    """
+    return (2 * bx, 2 * by), (2 * bx + 1, 2 * by), (2 * bx, 2 * by + 1), (2 * bx + 1, 2 * by + 1)
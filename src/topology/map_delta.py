@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Map deltas let drones and the ground station share what they scanned over a slow radio link. A delta holds the cells
+of a TopologyMap set since a given map version, encoded compactly:
+
+* the header: FORMAT, then the number of tiles
+* for each tile: its tile x and y, a bitmap of its rows which have cells in the delta, and for each of those rows a
+  bitmap of the cells in it. Then a byte saying whether the heights are integers, the time each cell was scanned, and
+  the heights, row by row
+* times, in whole seconds as the map stores them, are stored as the difference from the previous cell's time in the
+  tile, the first from 0. Cells scanned together take a byte each
+* integer heights are stored as the difference from the previous height in the tile, which is small on real ground.
+  Other heights, such as those out of bounds, are stored as 8 byte floats
+
+Numbers are varints: 7 bits per byte, low bits first, with the top bit set on every byte but the last. Signed numbers
+are zigzag encoded first, so small negative numbers stay short.
+
+Merging a delta is idempotent: a cell is only set if it's unknown, or has another height and the delta's copy was
+scanned later. Copies scanned in the same second go to the higher one. Merged cells keep the time they were scanned, so
+two peers end up with the same cells whichever way their deltas go. Merging the same delta again, or a peer's delta
+holding cells merged from us, changes nothing, so map versions don't move and the cells aren't sent back and forth
+forever. Cells a map forgets aren't part of its deltas.
+"""
+import struct
+from geometry.point import Point2D
+from topology.tile import TILE_SHIFT, TILE_SIZE, TILE_MASK
+
+FORMAT = b'TMD\x02'
+_INTEGERS, _FLOATS = 0, 1
+
+
+def encode_delta(topology_map, since_version=0):
+    """
+    Encodes the cells of a map set since a version. Take the map's version before encoding, and pass it as
+    since_version next time, to send only what changed in between
+    :param topology_map: TopologyMap
+    :param since_version: a value of the map's version property. 0 for every known cell
+    :return: bytes
+    """
+    out = bytearray()
+    tile_count = 0
+    decode = topology_map.height_encoding.decode if topology_map.height_encoding else None
+    for key in topology_map.iter_tile_keys_changed_since(since_version):
+        if _encode_tile(out, key, topology_map.get_tile(key), since_version, decode):
+            tile_count += 1
+    header = bytearray(FORMAT)
+    _write_varint(header, tile_count)
+    return bytes(header + out)
+
+
+def iter_delta_cells(data):
+    """
+    Decodes a delta
+    :param data: bytes from encode_delta
+    :return: generator yielding x, y, z, scanned_at
+    """
+    if data[:len(FORMAT)] != FORMAT:
+        raise ValueError("Not a map delta")
+    tile_count, pos = _read_varint(data, len(FORMAT))
+    for _ in range(tile_count):
+        tile_x, pos = _read_varint(data, pos)
+        tile_y, pos = _read_varint(data, pos)
+        left, bottom = _unzigzag(tile_x) << TILE_SHIFT, _unzigzag(tile_y) << TILE_SHIFT
+        row_mask, pos = _read_varint(data, pos)
+        indexes = []
+        for row in _iter_bits(row_mask):
+            column_mask, pos = _read_varint(data, pos)
+            indexes.extend((row << TILE_SHIFT) | column for column in _iter_bits(column_mask))
+        try:
+            kind = data[pos]
+        except IndexError:
+            raise ValueError("Map delta is cut short") from None
+        pos += 1
+        times = []
+        scanned_at = 0
+        for _index in indexes:
+            difference, pos = _read_varint(data, pos)
+            scanned_at += _unzigzag(difference)
+            times.append(scanned_at)
+        if kind == _FLOATS:
+            try:
+                heights = struct.unpack_from('<{}d'.format(len(indexes)), data, pos)
+            except struct.error:
+                raise ValueError("Map delta is cut short") from None
+            pos += 8 * len(indexes)
+        if kind == _INTEGERS:
+            z = 0
+            for index, scanned_at in zip(indexes, times):
+                difference, pos = _read_varint(data, pos)
+                z += _unzigzag(difference)
+                yield left | (index & TILE_MASK), bottom | (index >> TILE_SHIFT), z, scanned_at
+        elif kind == _FLOATS:
+            for index, scanned_at, z in zip(indexes, times, heights):
+                yield left | (index & TILE_MASK), bottom | (index >> TILE_SHIFT), z, scanned_at
+        else:
+            raise ValueError("Unknown height encoding {} at byte {}".format(kind, pos))
+
+
+def merge_delta(topology_map, data):
+    """
+    Applies a delta from a peer to a map. A cell is set if it's unknown, or if the delta's copy has another height
+    and was scanned after ours, or at the same time and is higher. It's stamped with the time the peer scanned it.
+    Cells out of the map's bounds are ignored
+    :param topology_map: TopologyMap
+    :param data: bytes from encode_delta
+    :return: how many cells were set
+    """
+    changed = 0
+    row = []  # heights of a run of cells in a row, None for those which are left as they are
+    row_x = row_y = row_scanned_at = None
+    for x, y, z, scanned_at in iter_delta_cells(data):
+        if row and (y != row_y or x != row_x + len(row) or scanned_at != row_scanned_at):
+            topology_map.set_z_row(Point2D(row_x, row_y), row, row_scanned_at)
+            row = []
+        if not row:
+            row_x, row_y, row_scanned_at = x, y, scanned_at
+        point = Point2D(x, y)
+        local_scanned_at, local_z = topology_map.get_scanned_at(point), topology_map.get_z(point)
+        # ties on time go to the higher height, so peers agree however their deltas cross
+        if topology_map.point_is_out_of_bounds(point) or (local_scanned_at is not None and (
+                local_z == z or (scanned_at, z) < (local_scanned_at, local_z))):
+            row.append(None)
+        else:
+            row.append(z)
+            changed += 1
+    if row:
+        topology_map.set_z_row(Point2D(row_x, row_y), row, row_scanned_at)
+    return changed
+
+
+def _encode_tile(out, key, tile, since_version, decode=None):
+    """
+    Appends a tile's cells set since the version to the delta
+    :param decode: the map's HeightEncoding.decode, if it has one, so deltas hold heights rather than stored values
+    :return: True if the tile had any
+    """
+    known, cell_versions = tile.known, tile.cell_versions
+    indexes = [i for i, (is_known, version) in enumerate(zip(known, cell_versions))
+               if is_known and version > since_version]
+    if not indexes:
+        return False
+    column_masks = [0] * TILE_SIZE
+    for index in indexes:
+        column_masks[index >> TILE_SHIFT] |= 1 << (index & TILE_MASK)
+    _write_varint(out, _zigzag(key[0]))
+    _write_varint(out, _zigzag(key[1]))
+    _write_varint(out, sum(1 << row for row, mask in enumerate(column_masks) if mask))
+    for mask in column_masks:
+        if mask:
+            _write_varint(out, mask)
+
+    heights = [tile.heights[i] for i in indexes]
+    if decode:
+        heights = [decode(z) for z in heights]
+    integers = all(type(z) is int for z in heights)
+    out.append(_INTEGERS if integers else _FLOATS)
+    previous = 0
+    for index in indexes:
+        scanned_at = tile.scanned_at[index]
+        _write_varint(out, _zigzag(scanned_at - previous))
+        previous = scanned_at
+    if integers:
+        previous = 0
+        for z in heights:
+            _write_varint(out, _zigzag(z - previous))
+            previous = z
+    else:
+        out += struct.pack('<{}d'.format(len(heights)), *heights)
+    return True
+
+
+def _zigzag(value):
+    """
+    Maps signed to unsigned numbers: 0, -1, 1, -2, 2... to 0, 1, 2, 3, 4...
+    """
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value):
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def _write_varint(out, value):
+    """
+    Appends an unsigned number to a bytearray, 7 bits per byte
+    """
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    """
+    :return: tuple(unsigned number, position after it)
+    """
+    value = shift = 0
+    while True:
+        try:
+            byte = data[pos]
+        except IndexError:
+            raise ValueError("Map delta is cut short") from None
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+def _iter_bits(mask):
+    """
+    :return: generator yielding the positions of the set bits, lowest first
+    """
+    position = 0
+    while mask:
+        if mask & 1:
+            yield position
+        mask >>= 1
+        position += 1
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+An unbounded, deterministic simulated topology. Unlike TopologyFactory.make_fake_topology, which builds a whole
+bounded map up front, a ProceduralTopology generates square tiles of terrain the first time they are looked at.
+The peaks in a tile are placed using a hash of the tile coordinate and the seed, so any cell always has the same
+height no matter in which order the tiles are generated. Only the most recently used tiles are kept, so long
+simulated missions run in constant memory. The cache is locked, so the sub-scans of a ScanScheduler can read the
+topology from several threads at once.
+"""
+import random
+import threading
+from array import array
+from collections import OrderedDict
+from geometry.point import Point2D, Point3D
+
+_MASK_64 = (1 << 64) - 1
+STYLES = ['cone', 'pyramid']
+
+
+class ProceduralTopology(object):
+    """
+    Can be used in place of a TopologyMap as the simulated map of a SimulatedTopologySensor
+    """
+    __slots__ = ['_seed', '_density', '_tile_size', '_max_z', '_cache_size', '_tiles', '_generated_count',
+                 '_lock']
+
+    def __init__(self, seed=0, density=.005, tile_size=32, max_z=None, cache_size=64):
+        """
+        :param seed: Same seed gives the same terrain
+        :param density: average number of peaks / area
+        :param tile_size: width and height of a generated tile
+        :param max_z: Maximum peak height. A peak never reaches further than the neighboring tiles, so it can't be
+        greater than tile_size
+        :param cache_size: Maximum number of tiles kept in memory
+        """
+        if max_z is None:
+            max_z = tile_size
+        if max_z > tile_size:
+            raise ValueError("max_z can't be bigger than tile_size")
+
+        self._seed = seed
+        self._density = density
+        self._tile_size = tile_size
+        self._max_z = max_z
+        self._cache_size = cache_size
+        self._tiles = OrderedDict()  # (tile x, tile y) -> heights. Ordered from least to most recently used
+        self._generated_count = 0
+        self._lock = threading.Lock()  # guards the cache, whose least recently used order changes on every read
+
+    @property
+    def cached_tile_count(self):
+        """
+        :return: How many tiles are currently held in memory
+        """
+        return len(self._tiles)
+
+    @property
+    def generated_tile_count(self):
+        """
+        :return: How many times a tile has been generated, including regenerating ones dropped from the cache
+        """
+        return self._generated_count
+
+    def point_is_out_of_bounds(self, point):
+        """
+        The terrain goes on forever
+        :param point:
+        :return: False
+        """
+        return False
+
+    def get_z(self, point, default=None):
+        """
+        Gets the z value (height) at a point, generating its tile if needed
+        :param point:
+        :param default: Not used, since every point has a height. Kept to match TopologyMap.get_z
+        :return: height
+        """
+        size = self._tile_size
+        tile_x, x = divmod(point.x, size)
+        tile_y, y = divmod(point.y, size)
+        return self._get_tile(tile_x, tile_y)[y * size + x]
+
+    def get_z_array(self, points, default=None):
+        """
+        Gets the heights of many points, looking up each tile once for a run of points in it
+        :param points: PointArray
+        :param default: Not used, as in get_z
+        :return: PointArray of the points with their heights
+        """
+        size = self._tile_size
+        zs = []
+        key = tile = None
+        for x, y in zip(points.xs, points.ys):
+            tile_x, x = divmod(x, size)
+            tile_y, y = divmod(y, size)
+            if (tile_x, tile_y) != key:
+                key = (tile_x, tile_y)
+                tile = self._get_tile(tile_x, tile_y)
+            zs.append(tile[y * size + x])
+        return points.with_z(zs)
+
+    def _get_tile(self, tile_x, tile_y):
+        """
+        Gets the heights of a tile from the cache, or generates them
+        :param tile_x:
+        :param tile_y:
+        :return: array of heights, row by row
+        """
+        key = (tile_x, tile_y)
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+                return tile
+
+            tile = self._generate_tile(tile_x, tile_y)
+            self._tiles[key] = tile
+            if len(self._tiles) > self._cache_size:
+                self._tiles.popitem(last=False)  # drop the least recently used tile
+            return tile
+
+    def _generate_tile(self, tile_x, tile_y):
+        """
+        Calculates the heights in a tile. Peaks from neighboring tiles can spill over into this one, so their
+        peaks are included too. Where peaks overlap, the highest one wins.
+        :param tile_x:
+        :param tile_y:
+        :return: array of heights, row by row
+        """
+        self._generated_count += 1
+        size = self._tile_size
+        left = tile_x * size
+        bottom = tile_y * size
+        heights = array('i', bytes(array('i').itemsize * size * size))
+
+        for neighbor_x in range(tile_x - 1, tile_x + 2):
+            for neighbor_y in range(tile_y - 1, tile_y + 2):
+                for seed, style, steepness in self._iter_peaks(neighbor_x, neighbor_y):
+                    if style == 'cone':
+                        z_func = Point2D.distance2d
+                    else:
+                        z_func = Point2D.max_orthogonal_distance
+                    # only visit the cells in the tile which the peak can reach
+                    reach = seed.z
+                    for y in range(max(bottom, seed.y - reach), min(bottom + size, seed.y + reach + 1)):
+                        row = (y - bottom) * size
+                        for x in range(max(left, seed.x - reach), min(left + size, seed.x + reach + 1)):
+                            z = round(steepness * (seed.z - z_func(Point2D(x, y), seed)))
+                            index = row + x - left
+                            if z > heights[index]:
+                                heights[index] = z
+        return heights
+
+    def _iter_peaks(self, tile_x, tile_y):
+        """
+        Generates the peaks belonging to a tile. They only depend on the seed and the tile coordinate
+        :param tile_x:
+        :param tile_y:
+        :return: generator yielding (Point3D, style, steepness)
+        """
+        rng = random.Random(_mix(self._seed, tile_x, tile_y))
+        size = self._tile_size
+        expected = self._density * size * size
+        count = int(expected) + (1 if rng.random() < expected % 1 else 0)
+        for _ in range(count):
+            x = tile_x * size + rng.randrange(size)
+            y = tile_y * size + rng.randrange(size)
+            z = rng.randint(1, self._max_z)
+            yield Point3D(x, y, z), rng.choice(STYLES), rng.uniform(1, 4)
+
+
+def _mix(seed, tile_x, tile_y):
+    """
+    Hashes a seed and tile coordinate into a 64 bit number (splitmix64 finalizer). Unlike hash(), the result is the
+    same on every platform and python version
+    :param seed:
+    :param tile_x:
+    :param tile_y:
+    :return: int
+    """
+    h = (seed * 0x9E3779B97F4A7C15 + tile_x * 0xBF58476D1CE4E5B9 + tile_y * 0x94D049BB133111EB) & _MASK_64
+    h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & _MASK_64
+    h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & _MASK_64
+    return h ^ (h >> 31)
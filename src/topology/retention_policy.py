@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Retention policies decide what a navigator keeps of its TopologyMap from one mission to the next. Every cell of the
+map remembers when it was scanned, and at the start of a mission the policy forgets the cells it no longer trusts, so
+they're scanned again if they're needed. The rest are free: repeat sorties over ground that doesn't change cost
+almost nothing to scan.
+
+The navigator keeps the cells of every mission in its known map, which is what the policy is applied to. Each mission
+still starts with an empty map of its own, and copies cells from the known map instead of scanning them, so move
+strategies see the map grow the same way whether the cells were scanned or remembered.
+
+- ForgetAllPolicy: starts every mission with an empty map (keeping its bounds). The default
+- TrustForeverPolicy: keeps every cell
+- TimeToLivePolicy: forgets cells older than a fixed age
+- RegionMaxAgePolicy: like TimeToLivePolicy, but the age depends on where the cell is, such as for a riverbed which
+  changes faster than the hills around it
+
+Ages are measured by the map's clock, which is time.time unless the map was given another one.
+"""
+from abc import ABC, abstractmethod
+
+
+class RetentionPolicy(ABC):
+    """
+    Base class for retention policies
+    """
+    keeps_cells = True  # False if nothing is ever kept, so the navigator needn't save the cells of its missions
+
+    @abstractmethod
+    def apply(self, topology_map):
+        """
+        Called at the start of every mission
+        :param topology_map: the navigator's known map, with the cells of every mission so far
+        :return: the known map to keep, which may be the same one with some cells forgotten
+        """
+
+
+class ForgetAllPolicy(RetentionPolicy):
+    """
+    Nothing is kept between missions
+    """
+    keeps_cells = False
+
+    def apply(self, topology_map):
+        return topology_map.empty_copy()
+
+
+class TrustForeverPolicy(RetentionPolicy):
+    """
+    Everything is kept between missions
+    """
+    def apply(self, topology_map):
+        return topology_map
+
+
+class MaxAgePolicy(RetentionPolicy):
+    """
+    Base class for policies which forget cells older than a maximum age
+    """
+    @abstractmethod
+    def max_age(self, x, y):
+        """
+        :param x:
+        :param y:
+        :return: how old the cell at x, y may be before it's scanned again, or None if it can be trusted forever
+        """
+
+    def apply(self, topology_map):
+        topology_map.forget_stale(self.max_age)
+        return topology_map
+
+
+class TimeToLivePolicy(MaxAgePolicy):
+    """
+    Every cell is trusted for the same time
+    """
+    def __init__(self, ttl):
+        """
+        :param ttl: how old a cell may be, by the map's clock
+        """
+        if ttl < 0:
+            raise ValueError("ttl can't be negative: {}".format(ttl))
+        self._ttl = ttl
+
+    @property
+    def ttl(self):
+        """
+        :return: how old a cell may be
+        """
+        return self._ttl
+
+    def max_age(self, x, y):
+        return self._ttl
+
+
+class RegionMaxAgePolicy(MaxAgePolicy):
+    """
+    Cells are trusted for a time which depends on the region they're in
+    """
+    def __init__(self, regions, default_max_age=None):
+        """
+        :param regions: list of (lower left Point2D, upper right Point2D, max age). The corners are inclusive. Where
+        regions overlap, the first one wins. A max age of None trusts the region's cells forever
+        :param default_max_age: max age of cells outside every region, or None to trust them forever
+        """
+        for lower_left, upper_right, _max_age in regions:
+            if lower_left.x > upper_right.x or lower_left.y > upper_right.y:
+                raise ValueError("Region corners are the wrong way round: {} {}".format(lower_left, upper_right))
+        self._regions = [(lower_left.x, lower_left.y, upper_right.x, upper_right.y, max_age)
+                         for lower_left, upper_right, max_age in regions]
+        self._default_max_age = default_max_age
+
+    def max_age(self, x, y):
+        for left, bottom, right, top, max_age in self._regions:
+            if left <= x <= right and bottom <= y <= top:
+                return max_age
+        return self._default_max_age
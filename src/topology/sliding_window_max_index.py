@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+An index over a TopologyMap which answers "what is the highest known height within radius cells of this point?"
+and "how many cells within radius of this point are unknown?" in constant time, however big the radius is.
+
+The answers are computed one map tile at a time with a separable sliding window max and sum, so each cell costs
+a constant amount of work. A computed tile is kept until the map changes somewhere within radius of it: before
+every query, the index asks the map which tiles changed since it last looked and throws away only the computed
+tiles those changes can reach. After a scan, just the tiles around the scan get recomputed.
+"""
+from geometry.point import Point2D
+from topology.tile import TILE_SHIFT, TILE_SIZE, TILE_MASK
+from topology.window import valid_window_max, valid_window_sum, NO_VALUE
+
+
+class SlidingWindowMaxIndex(object):
+    """
+    Windowed max height and unknown count for every cell of a map, for one radius
+    """
+    __slots__ = ['_topology_map', '_radius', '_version', '_blocks']
+
+    def __init__(self, topology_map, radius):
+        """
+        :param topology_map: The map to index
+        :param radius: radius of the window around each cell
+        """
+        self._topology_map = topology_map
+        self._radius = radius
+        self._version = topology_map.version  # map version we're up to date with
+        self._blocks = dict()  # (tile x, tile y) -> (list of maximums, list of unknown counts), row by row
+
+    @property
+    def topology_map(self):
+        """
+        :return: The indexed map
+        """
+        return self._topology_map
+
+    @property
+    def radius(self):
+        """
+        :return: radius of the window around each cell
+        """
+        return self._radius
+
+    def max_in_radius(self, point):
+        """
+        Gets the highest known height within radius of the point
+        :param point:
+        :return: height, or float("-inf") if nothing is known
+        """
+        maximums, _unknown_counts, index = self._lookup(point)
+        return maximums[index]
+
+    def count_unknown_in_radius(self, point):
+        """
+        Calculates how many points within the radius of this point are unknown
+        :param point:
+        :return: number of unknown points
+        """
+        _maximums, unknown_counts, index = self._lookup(point)
+        return unknown_counts[index]
+
+    def is_highest_or_tie_in_radius_and_all_known(self, point):
+        """
+        Same as TopologyMap.is_highest_or_tie_in_radius_and_all_known for the index's radius, but in constant time
+        :param point:
+        :return: True if the point is highest (or tied) and all points in the radius are known
+        """
+        maximums, unknown_counts, index = self._lookup(point)
+        return not unknown_counts[index] and self._topology_map.get_z(point) == maximums[index]
+
+    def _lookup(self, point):
+        """
+        Finds the computed block holding the point, computing it if needed
+        :param point:
+        :return: tuple(maximums, unknown counts, index of the point in both)
+        """
+        self._discard_changed_blocks()
+        key = (point.x >> TILE_SHIFT, point.y >> TILE_SHIFT)
+        block = self._blocks.get(key)
+        if block is None:
+            block = self._blocks[key] = self._compute_block(*key)
+        maximums, unknown_counts = block
+        return maximums, unknown_counts, ((point.y & TILE_MASK) << TILE_SHIFT) | (point.x & TILE_MASK)
+
+    def _discard_changed_blocks(self):
+        """
+        Throws away the computed blocks whose windows reach a tile that changed since we last looked
+        """
+        tm = self._topology_map
+        if tm.version == self._version:
+            return
+        reach = -(-self._radius // TILE_SIZE)  # how many tiles away a change can be felt (rounding up)
+        for tile_x, tile_y in tm.iter_tile_keys_changed_since(self._version):
+            for block_y in range(tile_y - reach, tile_y + reach + 1):
+                for block_x in range(tile_x - reach, tile_x + reach + 1):
+                    self._blocks.pop((block_x, block_y), None)
+        self._version = tm.version
+
+    def _compute_block(self, tile_x, tile_y):
+        """
+        Computes the windowed max and unknown count for every cell in a tile from the part of the map the
+        windows cover: the tile plus a margin of radius all around it
+        :param tile_x:
+        :param tile_y:
+        :return: tuple(list of maximums, list of unknown counts), row by row like a tile
+        """
+        radius = self._radius
+        lower_left = Point2D((tile_x << TILE_SHIFT) - radius, (tile_y << TILE_SHIFT) - radius)
+        window = self._topology_map.get_window(lower_left, TILE_SIZE + 2 * radius, TILE_SIZE + 2 * radius)
+        maximums = valid_window_max([[NO_VALUE if z is None else z for z in row] for row in window], radius)
+        unknown_counts = valid_window_sum([[1 if z is None else 0 for z in row] for row in window], radius)
+        return ([z for row in maximums for z in row],
+                [count for row in unknown_counts for count in row])
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+A TopologyMap stores its cells in dense square tiles. A tile is created the first time one of its cells is set.
+Cells are numbered row by row, so the cell at (x, y) is at index ((y & TILE_MASK) << TILE_SHIFT) | (x & TILE_MASK)
+of tile (x >> TILE_SHIFT, y >> TILE_SHIFT)
+"""
+from array import array
+
+TILE_SHIFT = 5
+TILE_SIZE = 1 << TILE_SHIFT  # width and height of a tile
+TILE_MASK = TILE_SIZE - 1
+TILE_CELLS = TILE_SIZE * TILE_SIZE
+
+
+class Tile(object):
+    """
+    A dense square of cells. Heights are stored row by row, with a flag for each cell saying if it's known, the
+    time it was last scanned, and the map version when it was last set. Times are stored as whole seconds and versions
+    as 32 bit numbers, so with a HeightEncoding a cell takes about a dozen bytes rather than sixty
+    """
+    __slots__ = ['heights', 'known', 'scanned_at', 'cell_versions', 'known_count', 'version', 'summary']
+
+    def __init__(self, height_encoding=None):
+        """
+        :param height_encoding: HeightEncoding the heights are stored with. By default, they're python numbers
+        """
+        self.heights = height_encoding.make_heights() if height_encoding else [0] * TILE_CELLS
+        self.known = bytearray(TILE_CELLS)  # 1 where the cell is known
+        self.scanned_at = array('I', [0]) * TILE_CELLS  # map clock time each cell was last set, in seconds
+        self.cell_versions = array('I', [0]) * TILE_CELLS  # map version each cell was last set
+        self.known_count = 0
+        self.version = 0  # map version of the last change to this tile
+        self.summary = None  # the map's HeightPyramid levels inside the tile, kept with it so they spill with it
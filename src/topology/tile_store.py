@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+A SpillingTileStore holds a TopologyMap's tiles within a memory budget, for drones which fly long enough to map more
+than fits in memory. Only the most recently used tiles are kept in memory. When there are more than the budget, the
+least recently used tile is written to a spill file and dropped, and it's read back the next time it's used. A tile
+which hasn't changed since it was last written isn't written again.
+
+The store looks like the OrderedDict the map otherwise keeps its tiles in: it's ordered from least to most recently
+changed tile, and reading a tile that was spilled reads it back transparently. Going through every tile, such as to
+list every known point, reads back the spilled ones one at a time, so it's slow but stays within the budget.
+
+The spill file is only appended to. Once less than half of it holds tiles that are still needed, it's compacted.
+
+A tile is spilled along with its HeightPyramid summary. All the store keeps in memory for a spilled tile is its key
+and where its latest copy is in the spill file.
+"""
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from topology.tile import Tile
+
+COMPACT_MIN_BYTES = 1 << 20  # don't bother compacting smaller spill files
+
+
+class SpillingTileStore(object):
+    """
+    Maps (tile x, tile y) to Tile, keeping at most max_resident tiles in memory
+    """
+    __slots__ = ['_max_resident', '_path', '_file', '_order', '_resident', '_spilled', '_live_bytes', '_evictions',
+                 '_faults', '_writes']
+
+    def __init__(self, max_resident, path=None):
+        """
+        :param max_resident: most tiles kept in memory, at least 1. A tile takes about 20KB
+        :param path: spill file. It's overwritten, and deleted by close. By default, a temporary file
+        """
+        if max_resident < 1:
+            raise ValueError("At least one tile must fit in memory: {}".format(max_resident))
+        self._max_resident = max_resident
+        self._path = path
+        self._file = open(path, 'w+b') if path else tempfile.TemporaryFile()
+        self._order = OrderedDict()  # every key, from least to most recently changed
+        self._resident = OrderedDict()  # key -> Tile in memory, from least to most recently used
+        self._spilled = dict()  # key -> (offset, length, version) of the tile's latest copy in the spill file
+        self._live_bytes = 0  # bytes of the spill file holding latest copies
+        self._evictions = 0
+        self._faults = 0
+        self._writes = 0
+
+    @property
+    def max_resident(self):
+        """
+        :return: most tiles kept in memory
+        """
+        return self._max_resident
+
+    @property
+    def resident_count(self):
+        """
+        :return: how many tiles are in memory
+        """
+        return len(self._resident)
+
+    @property
+    def evictions(self):
+        """
+        :return: how many times a tile was dropped from memory
+        """
+        return self._evictions
+
+    @property
+    def faults(self):
+        """
+        :return: how many times a tile was read back from the spill file
+        """
+        return self._faults
+
+    @property
+    def writes(self):
+        """
+        :return: how many times a tile was written to the spill file. Less than evictions when tiles were dropped
+        without having changed
+        """
+        return self._writes
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, key):
+        return key in self._order
+
+    def __iter__(self):
+        return iter(self._order)
+
+    def __reversed__(self):
+        return reversed(self._order)
+
+    def __getitem__(self, key):
+        tile = self.get(key)
+        if tile is None:
+            raise KeyError(key)
+        return tile
+
+    def __setitem__(self, key, tile):
+        self._order[key] = None
+        self._order.move_to_end(key)
+        self._resident[key] = tile
+        self._resident.move_to_end(key)
+        self._evict()
+
+    def get(self, key, default=None):
+        """
+        Gets a tile, reading it back from the spill file if needed
+        :param key: (tile x, tile y)
+        :param default: returned if there's no such tile
+        :return: Tile
+        """
+        tile = self._resident.get(key)
+        if tile is not None:
+            self._resident.move_to_end(key)
+            return tile
+        if key not in self._order:
+            return default
+        tile = self._read(key)
+        self._faults += 1
+        self._resident[key] = tile
+        self._evict()
+        return tile
+
+    def move_to_end(self, key):
+        """
+        Marks a tile as the most recently changed
+        :param key: (tile x, tile y)
+        """
+        self._order.move_to_end(key)
+
+    def items(self):
+        """
+        Generates every tile, from least to most recently changed, reading back the spilled ones
+        :return: generator yielding ((tile x, tile y), Tile)
+        """
+        for key in list(self._order):
+            yield key, self.get(key)
+
+    def close(self):
+        """
+        Closes the spill file, deleting it. The spilled tiles are lost
+        """
+        self._file.close()
+        if self._path and os.path.exists(self._path):
+            os.remove(self._path)
+
+    def _evict(self):
+        """
+        Drops the least recently used tiles until they fit in memory, writing the ones which changed since they were
+        last written
+        """
+        while len(self._resident) > self._max_resident:
+            key, tile = self._resident.popitem(last=False)
+            self._evictions += 1
+            spilled = self._spilled.get(key)
+            if spilled is None or spilled[2] != tile.version:
+                self._write(key, tile)
+
+    def _write(self, key, tile):
+        """
+        Appends a tile to the spill file
+        """
+        data = pickle.dumps((tile.heights, bytes(tile.known), tile.scanned_at, tile.cell_versions, tile.known_count,
+                             tile.version, tile.summary), pickle.HIGHEST_PROTOCOL)
+        spilled = self._spilled.get(key)
+        if spilled is not None:
+            self._live_bytes -= spilled[1]
+        file = self._file
+        file.seek(0, os.SEEK_END)
+        self._spilled[key] = (file.tell(), len(data), tile.version)
+        file.write(data)
+        self._live_bytes += len(data)
+        self._writes += 1
+        if file.tell() > max(COMPACT_MIN_BYTES, 2 * self._live_bytes):
+            self._compact()
+
+    def _read(self, key):
+        """
+        Reads a tile back from the spill file
+        :return: Tile
+        """
+        offset, length, _version = self._spilled[key]
+        self._file.seek(offset)
+        heights, known, scanned_at, cell_versions, known_count, version, summary = pickle.loads(
+            self._file.read(length))
+        tile = Tile.__new__(Tile)  # without making cells which would be replaced
+        tile.heights = heights
+        tile.known = bytearray(known)
+        tile.scanned_at = scanned_at
+        tile.cell_versions = cell_versions
+        tile.known_count = known_count
+        tile.version = version
+        tile.summary = summary
+        return tile
+
+    def _compact(self):
+        """
+        Copies the latest copy of each spilled tile to a new spill file, which replaces the old one
+        """
+        old_file = self._file
+        if self._path:
+            new_path = self._path + '.compacting'
+            new_file = open(new_path, 'w+b')
+        else:
+            new_file = tempfile.TemporaryFile()
+        spilled = dict()
+        for key, (offset, length, version) in self._spilled.items():
+            old_file.seek(offset)
+            spilled[key] = (new_file.tell(), length, version)
+            new_file.write(old_file.read(length))
+        old_file.close()
+        if self._path:
+            os.replace(new_path, self._path)
+        self._file = new_file
+        self._spilled = spilled
@@ -29,14 +29,12 @@ class TopologyFactory(object):
             tm = TopologyMap()
 
         for row in range(height):
-            for col in range(width):
-                # reversing rows to make y value
-                point = Point2D(origin.x + col, origin.y + height - row - 1)
-                tm.set_z(point, topology_matrix[row][col])
+            # reversing rows to make y value
+            tm.set_z_row(Point2D(origin.x, origin.y + height - row - 1), topology_matrix[row])
         return tm
 
     @staticmethod
-    def make_fake_topology(density=.02, lower_left=ORIGIN, upper_right=Point2D(30, 30), max_z=None):
+    def make_fake_topology(density=.02, lower_left=ORIGIN, upper_right=Point2D(30, 30), max_z=None, rng=random):
         """
         Generates a topology to test with. It's possible that the resulting topology could have more "extraction points"
         (peaks or flat areas) than the number of seeds because of the way the generated peaks collide.
@@ -46,6 +44,8 @@ class TopologyFactory(object):
         :param lower_left: lower-left point
         :param upper_right: upper-right point
         :param max_z: Maximum z value to generate
+        :param rng: random.Random to generate with, so the same seed makes the same map. By default, the random
+        module's shared one
         :return: generated topology map
         """
         styles = ['cone', 'pyramid']
@@ -69,9 +69,9 @@ class TopologyFactory(object):
             max_z_pass = round(max_z / i)
             min_z_pass = max_z_pass // 2
 
-            seeds = factory._random_points_3d(seeds_per_pass, min_z_pass, max_z_pass)
-            steepness = random.uniform(1, 4)  # the resulting step height between adjacent cells
-            factory._add_peaks_from_seed_points3d(seeds, random.choice(styles), steepness=steepness)
+            seeds = factory._random_points_3d(seeds_per_pass, min_z_pass, max_z_pass, rng)
+            steepness = rng.uniform(1, 4)  # the resulting step height between adjacent cells
+            factory._add_peaks_from_seed_points3d(seeds, rng.choice(styles), steepness=steepness)
         return factory._tm
 
     @property
@@ -126,12 +126,13 @@ class TopologyFactory(object):
 
         return self._tm
 
-    def _random_points_3d(self, number_of_seeds, min_z, max_z):
+    def _random_points_3d(self, number_of_seeds, min_z, max_z, rng=random):
         """
         Creates a list of unique (x,y,z) tuples
         :param number_of_seeds: Number of unique points to generate
         :param min_z: Minimum z value to generate
         :param max_z: Maximum z value to generate
+        :param rng: random.Random to generate with
         :return:
         """
         # Sanity check. We can't get more seeds than what's available in the bounds
@@ -139,8 +140,8 @@ class TopologyFactory(object):
 
         found = {}
         while len(found) < number_of_seeds:
-            pt = Point2D(random.randint(self._lower_left.x, self._upper_right.x),
-                         random.randint(self._lower_left.y, self._upper_right.y))
+            pt = Point2D(rng.randint(self._lower_left.x, self._upper_right.x),
+                         rng.randint(self._lower_left.y, self._upper_right.y))
             if pt not in found:  # make sure unique
-                found[pt] = random.randint(min_z, max_z)
+                found[pt] = rng.randint(min_z, max_z)
         return [Point3D(pt.x, pt.y, z) for pt, z in found.items()]
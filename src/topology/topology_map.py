@@ -2,31 +2,84 @@
 """
 A TopologyMap is essentially like a real topology map. Think of it as a piece of graph paper, in which every known
 cell has a height value. The Navigator draws values in the cells as it uses scanners.
+
+The cells are stored in dense square tiles of TILE_SIZE x TILE_SIZE, which are created the first time one of their
+cells is set. Every change to the map bumps its version, and each tile remembers the version of its last change, so
+anything derived from the map (such as a SlidingWindowMaxIndex) can find out what changed since it last looked.
+
+Whether a cell is known is tracked separately from its height, so a height of 0 (sea level) is as known as any other.
+Heights are python numbers, unless the map has a HeightEncoding, which stores them quantized in typed arrays.
+
+The tiles also act as a bucketed grid over the known cells: for each row of tiles, the map keeps the sorted tile x
+values, so rectangle and radius queries only visit tiles which exist and skip unknown cells a row at a time.
+
+With a memory budget, the tiles are kept in a SpillingTileStore instead, which writes the least recently used tiles
+to a spill file and reads them back when they're used again. The HeightPyramid levels inside a tile are kept on the
+tile, so they're spilled with it. What stays in memory for every tile ever touched is only where to find it: its key
+in the tile rows and the store, and its share of the pyramid levels above tiles, a few hundred bytes where a tile
+takes about 20KB.
+
+Every cell also remembers when it was last set, by the map's clock, so a RetentionPolicy can decide which cells are
+too old to trust on a later mission and forget them.
+
+Methods ending in _array take and return PointArrays, for working on many points without a Point2D for each.
 """
-from geometry.point import Point2D, Point3D
+import logging
+import math
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from geometry.point import Point2D, Point3D, PointArray
+from topology.height_encoding import OUT_OF_BOUNDS
+from topology.height_pyramid import HeightPyramid
+from topology.tile import Tile, TILE_SHIFT, TILE_SIZE, TILE_MASK
+from topology.tile_store import SpillingTileStore
 
-OUT_OF_BOUNDS = float("-inf")
 NO_BOUNDS = float("inf")
 
 
 class TopologyMap(object):
     """
     The map keeps track of all of the areas where it's
-    already been. This helps us avoid rescanning areas that we've already scanned. Currently this
-    map is regenerated every run. In the future, we can persist and then it can
-    be used by any drone on a mission to the area. We could also persist the extraction points that
-    have been discovered.
+    already been. This helps us avoid rescanning areas that we've already scanned. A navigator's RetentionPolicy
+    decides whether the map is kept for later missions, and a kept map can be given to any drone on a mission to the
+    area. In the future, we can persist it. We could also persist the extraction points that have been discovered.
 
     This class contains many small helper methods for querying and generating points in a radius around a given point.
     """
 
-    __slots__ = ['_known_z', '_lower_left', '_upper_right', '_lower_left_bounds', '_upper_right_bounds']
+    __slots__ = ['_tiles', '_tile_rows', '_tile_row_keys', '_version', '_pyramid', '_lower_left', '_upper_right',
+                 '_lower_left_bounds', '_upper_right_bounds', '_func_clock', '_encoding']
 
-    def __init__(self, lower_left_bounds=None, upper_right_bounds=None):
-        self._known_z = dict()  # keeps track of points already tracked to reduce cost of firing laser
+    def __init__(self, lower_left_bounds=None, upper_right_bounds=None, func_clock=time.time,
+                 max_resident_tiles=None, spill_path=None, height_encoding=None):
+        """
+        :param lower_left_bounds: optional lower left corner of the area which can be navigated
+        :param upper_right_bounds: optional upper right corner of the area which can be navigated
+        :param func_clock: function returning the current time, which cells are stamped with when they're set. Cells
+        are stamped to the whole second, so it must be in seconds, from 0 to 2^32 - 1, as time.time is until 2106
+        :param max_resident_tiles: optional memory budget, as the most tiles kept in memory. The rest are spilled to
+        a file. By default, every tile is kept in memory
+        :param spill_path: file to spill tiles to, if there's a budget. By default, a temporary file
+        :param height_encoding: optional HeightEncoding to store heights with, which takes less memory. Setting a
+        height it can't store raises ValueError. By default, heights are stored as they are
+        """
+        # keeps track of points already tracked to reduce cost of firing laser. Maps (tile x, tile y) to a Tile,
+        # ordered from least to most recently changed
+        if max_resident_tiles is None:
+            self._tiles = OrderedDict()
+        else:
+            self._tiles = SpillingTileStore(max_resident_tiles, spill_path)
+        self._version = 0
+        self._tile_rows = dict()  # tile y -> sorted list of tile x of existing tiles
+        self._tile_row_keys = []  # sorted list of tile y which have tiles
+        # max height and known count of blocks at every scale
+        self._pyramid = HeightPyramid(self._tiles, height_encoding)
 
         self._lower_left_bounds = lower_left_bounds
         self._upper_right_bounds = upper_right_bounds
+        self._func_clock = func_clock
+        self._encoding = height_encoding
 
         # for convenience, let's store off a list of offsets from 0, 0 to use in adjacent calculations
         self._lower_left = None
@@ -38,14 +91,63 @@ class TopologyMap(object):
         :param point:
         :return:
         """
-        if self._lower_left_bounds and (point.x < self._lower_left_bounds.x or point.y < self._lower_left_bounds.y):
+        return self._xy_is_out_of_bounds(point.x, point.y)
+
+    def _xy_is_out_of_bounds(self, x, y):
+        if self._lower_left_bounds and (x < self._lower_left_bounds.x or y < self._lower_left_bounds.y):
             return True
 
-        if self._upper_right_bounds and (point.x > self._upper_right_bounds.x or point.y > self._upper_right_bounds.y):
+        if self._upper_right_bounds and (x > self._upper_right_bounds.x or y > self._upper_right_bounds.y):
             return True
 
         return False
 
+    def empty_copy(self):
+        """
+        Makes a map with nothing known, but with the same bounds, clock, memory budget and height encoding as this
+        one. Its tiles are spilled to a temporary file
+        :return: TopologyMap
+        """
+        tile_store = self.tile_store
+        return TopologyMap(self._lower_left_bounds, self._upper_right_bounds, self._func_clock,
+                           max_resident_tiles=tile_store.max_resident if tile_store is not None else None,
+                           height_encoding=self._encoding)
+
+    @property
+    def bounds(self):
+        """
+        :return: tuple(lower left bounds, upper right bounds), either of which is None if the map isn't bounded there
+        """
+        return self._lower_left_bounds, self._upper_right_bounds
+
+    @property
+    def height_encoding(self):
+        """
+        :return: the HeightEncoding heights are stored with, or None if they're stored as they are
+        """
+        return self._encoding
+
+    @property
+    def tile_store(self):
+        """
+        :return: the SpillingTileStore if the map has a memory budget, or None. Its evictions and faults tell how
+        often tiles go to and from the spill file, for tuning the budget
+        """
+        return self._tiles if isinstance(self._tiles, SpillingTileStore) else None
+
+    def close(self):
+        """
+        Deletes the spill file, if the map has one. The map can't be used afterwards
+        """
+        if self.tile_store is not None:
+            self._tiles.close()
+
+    def now(self):
+        """
+        :return: the current time by the map's clock
+        """
+        return self._func_clock()
+
     def get_z(self, point, default=None):
         """
         Gets z value (height) at a point. If out of bounds, returns OUT_OF_BOUNDS
@@ -56,16 +158,99 @@ class TopologyMap(object):
         if self.point_is_out_of_bounds(point):
             return OUT_OF_BOUNDS
 
-        found = self._known_z.get(point)
-        return found if found else default
+        found = self._get_raw_z(point.x, point.y)
+        return default if found is None else found
 
-    def set_z(self, point, height):
+    def get_z_array(self, points, default=None):
+        """
+        Gets the heights of many points at once. Points out of bounds get OUT_OF_BOUNDS
+        :param points: PointArray
+        :param default: height of the points which aren't known
+        :return: PointArray of the points with their heights
+        """
+        zs = []
+        for x, y in zip(points.xs, points.ys):
+            if self._xy_is_out_of_bounds(x, y):
+                zs.append(OUT_OF_BOUNDS)
+            else:
+                found = self._get_raw_z(x, y)
+                zs.append(default if found is None else found)
+        return points.with_z(zs)
+
+    def is_known(self, point):
+        """
+        Sees if a point's height is known, whatever the height is. Unlike get_z, this ignores the bounds
+        :param point:
+        :return: True if known
+        """
+        tile = self._tiles.get((point.x >> TILE_SHIFT, point.y >> TILE_SHIFT))
+        return tile is not None and tile.known[((point.y & TILE_MASK) << TILE_SHIFT) | (point.x & TILE_MASK)] == 1
+
+    def is_known_array(self, points):
+        """
+        Sees which of many points' heights are known, as is_known does for one
+        :param points: PointArray
+        :return: list of True for each point which is known
+        """
+        tiles = self._tiles
+        known = []
+        for x, y in zip(points.xs, points.ys):
+            tile = tiles.get((x >> TILE_SHIFT, y >> TILE_SHIFT))
+            known.append(tile is not None and tile.known[((y & TILE_MASK) << TILE_SHIFT) | (x & TILE_MASK)] == 1)
+        return known
+
+    def get_scanned_at(self, point):
+        """
+        Gets when a point's height was last set
+        :param point:
+        :return: time by the map's clock, to the whole second, or None if not known
+        """
+        tile = self._tiles.get((point.x >> TILE_SHIFT, point.y >> TILE_SHIFT))
+        if tile is None:
+            return None
+        index = ((point.y & TILE_MASK) << TILE_SHIFT) | (point.x & TILE_MASK)
+        return tile.scanned_at[index] if tile.known[index] else None
+
+    def _get_raw_z(self, x, y):
+        """
+        Gets the stored height of a cell
+        :param x:
+        :param y:
+        :return: height, or None if not known
+        """
+        tile = self._tiles.get((x >> TILE_SHIFT, y >> TILE_SHIFT))
+        if tile is None:
+            return None
+        index = ((y & TILE_MASK) << TILE_SHIFT) | (x & TILE_MASK)
+        if not tile.known[index]:
+            return None
+        return tile.heights[index] if self._encoding is None else self._encoding.decode(tile.heights[index])
+
+    def set_z(self, point, height, scanned_at=None):
         """
         Sets z value at a point to the passed height
         :param point:
         :param height:
+        :param scanned_at: when the height was scanned, by the map's clock. By default, now
         """
-        self._known_z[point] = height
+        stored = height if self._encoding is None else self._encoding.encode(height)
+        key = (point.x >> TILE_SHIFT, point.y >> TILE_SHIFT)
+        tile = self._tiles.get(key)
+        if tile is None:
+            tile = self._add_tile(key)
+        else:
+            self._tiles.move_to_end(key)
+        self._version += 1
+        tile.version = self._version
+        index = ((point.y & TILE_MASK) << TILE_SHIFT) | (point.x & TILE_MASK)
+        tile.heights[index] = stored
+        tile.scanned_at[index] = int(self._func_clock() if scanned_at is None else scanned_at)
+        tile.cell_versions[index] = self._version
+        newly_known = not tile.known[index]
+        if newly_known:
+            tile.known[index] = 1
+            tile.known_count += 1
+        self._pyramid.update(key, tile, index, newly_known)
 
         # adjust our current bounds
         if not self._upper_right:
@@ -74,6 +259,152 @@ class TopologyMap(object):
             self._upper_right = Point2D(max(self._upper_right.x, point.x), max(self._upper_right.y, point.y))
             self._lower_left = Point2D(min(self._lower_left.x, point.x), min(self._lower_left.y, point.y))
 
+    def set_z_row(self, point, heights, scanned_at=None):
+        """
+        Sets the heights of a row of cells going east from a point. Much faster than calling set_z for each cell,
+        since the work of keeping the tiles and pyramid up to date is done once per tile instead of once per cell
+        :param point: western-most point of the row
+        :param heights: iterable of heights. None leaves a cell as it is
+        :param scanned_at: when the heights were scanned, by the map's clock. By default, now
+        """
+        if self._encoding is None:
+            heights = list(heights)
+        else:  # before changing anything, in case one can't be stored
+            heights = [None if z is None else self._encoding.encode(z) for z in heights]
+        y = point.y
+        row_offset = (y & TILE_MASK) << TILE_SHIFT
+        min_x = max_x = None
+        start = 0
+        now = int(self._func_clock() if scanned_at is None else scanned_at)
+        while start < len(heights):
+            x = point.x + start
+            count = min(TILE_SIZE - (x & TILE_MASK), len(heights) - start)  # how many cells fit in this tile
+            run = heights[start:start + count]
+            start += count
+            known_xs = [i for i, z in enumerate(run) if z is not None]
+            if not known_xs:
+                continue
+            if min_x is None:
+                min_x = x + known_xs[0]
+            max_x = x + known_xs[-1]
+
+            key = (x >> TILE_SHIFT, y >> TILE_SHIFT)
+            tile = self._tiles.get(key)
+            if tile is None:
+                tile = self._add_tile(key)
+            else:
+                self._tiles.move_to_end(key)
+            self._version += 1
+            tile.version = self._version
+            first = row_offset | (x & TILE_MASK)
+            tile_heights, known, scanned_at, cell_versions = (tile.heights, tile.known, tile.scanned_at,
+                                                              tile.cell_versions)
+            for i in known_xs:
+                tile_heights[first + i] = run[i]
+                scanned_at[first + i] = now
+                cell_versions[first + i] = self._version
+                if not known[first + i]:
+                    known[first + i] = 1
+                    tile.known_count += 1
+            self._pyramid.update_row(key, tile, y & TILE_MASK)
+
+        if min_x is not None:
+            if not self._upper_right:
+                self._lower_left, self._upper_right = Point2D(min_x, y), Point2D(max_x, y)
+            else:
+                self._upper_right = Point2D(max(self._upper_right.x, max_x), max(self._upper_right.y, y))
+                self._lower_left = Point2D(min(self._lower_left.x, min_x), min(self._lower_left.y, y))
+
+    def set_z_array(self, points, scanned_at=None):
+        """
+        Sets the heights of many points at once. Points next to each other in a row are set together, as by set_z_row
+        :param points: PointArray with heights
+        :param scanned_at: when the heights were scanned, by the map's clock. By default, now
+        """
+        if points.zs is None:
+            raise ValueError("Points need heights to be set")
+        if self._encoding is not None:  # before changing anything, in case one can't be stored
+            for z in points.zs:
+                self._encoding.encode(z)
+        now = self._func_clock() if scanned_at is None else scanned_at
+        row = []
+        row_x = row_y = None
+        for x, y, z in points:
+            if row and (y != row_y or x != row_x + len(row)):
+                self.set_z_row(Point2D(row_x, row_y), row, now)
+                row = []
+            if not row:
+                row_x, row_y = x, y
+            row.append(z)
+        if row:
+            self.set_z_row(Point2D(row_x, row_y), row, now)
+
+    def merge(self, other):
+        """
+        Copies every known point of another map into this one, with the time it was scanned
+        :param other: TopologyMap
+        """
+        for (tile_x, tile_y), tile in other._tiles.items():
+            if not tile.known_count:
+                continue
+            left, bottom = tile_x << TILE_SHIFT, tile_y << TILE_SHIFT
+            for index, known in enumerate(tile.known):
+                if known:
+                    z = tile.heights[index] if other._encoding is None else other._encoding.decode(tile.heights[index])
+                    self.set_z(Point2D(left | (index & TILE_MASK), bottom | (index >> TILE_SHIFT)), z,
+                               tile.scanned_at[index])
+
+    def forget_stale(self, func_max_age):
+        """
+        Forgets the known cells which were set too long ago, so they have to be scanned again. The bounds of the
+        known points are left as they are
+        :param func_max_age: function taking x, y and returning how old the cell there may be, or None if it can be
+        trusted forever
+        :return: how many cells were forgotten
+        """
+        now = self._func_clock()
+        unknown = 0 if self._encoding is None else self._encoding.unknown
+        forgotten = 0
+        for key in list(self._tiles):
+            tile = self._tiles[key]
+            if not tile.known_count:
+                continue
+            left, bottom = key[0] << TILE_SHIFT, key[1] << TILE_SHIFT
+            heights, known, scanned_at = tile.heights, tile.known, tile.scanned_at
+            stale_rows = set()
+            for index in range(len(known)):
+                if not known[index]:
+                    continue
+                max_age = func_max_age(left | (index & TILE_MASK), bottom | (index >> TILE_SHIFT))
+                if max_age is not None and now - scanned_at[index] > max_age:
+                    known[index] = 0
+                    heights[index] = unknown
+                    tile.known_count -= 1
+                    forgotten += 1
+                    stale_rows.add(index >> TILE_SHIFT)
+            if stale_rows:
+                self._tiles.move_to_end(key)  # keeps the tiles ordered by their last change
+                self._version += 1
+                tile.version = self._version
+                for row in stale_rows:
+                    self._pyramid.update_row(key, tile, row)
+        return forgotten
+
+    def _add_tile(self, key):
+        """
+        Creates an empty tile and adds it to the tile rows index
+        :param key: (tile x, tile y)
+        :return: Tile
+        """
+        tile = self._tiles[key] = Tile(self._encoding)
+        tile_x, tile_y = key
+        row = self._tile_rows.get(tile_y)
+        if row is None:
+            row = self._tile_rows[tile_y] = []
+            insort(self._tile_row_keys, tile_y)
+        insort(row, tile_x)
+        return tile
+
     def make_3d(self, point2d):
         """
         Converts a 2d point to a 3d one by looking up its z value
@@ -82,6 +413,72 @@ class TopologyMap(object):
         """
         return Point3D(point2d.x, point2d.y, self.get_z(point2d))
 
+    @property
+    def version(self):
+        """
+        Number which increases every time the map changes
+        :return:
+        """
+        return self._version
+
+    def get_tile(self, tile_key):
+        """
+        Gets one of the tiles the map's cells are stored in. Don't change it
+        :param tile_key: (tile x, tile y)
+        :return: Tile, or None if none of its cells were ever set
+        """
+        return self._tiles.get(tile_key)
+
+    def iter_tile_keys_changed_since(self, version):
+        """
+        Generates the keys of the tiles which changed after the given map version, most recently changed first
+        :param version: a value of the version property
+        :return: generator yielding (tile x, tile y)
+        """
+        for key in reversed(self._tiles):
+            if self._tiles[key].version <= version:
+                return
+            yield key
+
+    def highest_known_in_rect(self, lower_left, upper_right):
+        """
+        Finds the highest known point in a rectangle, using the height pyramid so that big rectangles cost about
+        as much as small ones
+        :param lower_left: corner point, inclusive
+        :param upper_right: corner point, inclusive
+        :return: Point3D, or None if nothing in the rectangle is known
+        """
+        found = self._pyramid.max_in_rect(lower_left, upper_right)
+        if found is None:
+            return None
+        z, x, y = found
+        return Point3D(x, y, z if self._encoding is None else self._encoding.decode(z))
+
+    def count_known_in_rect(self, lower_left, upper_right):
+        """
+        Counts the known points in a rectangle using the height pyramid
+        :param lower_left: corner point, inclusive
+        :param upper_right: corner point, inclusive
+        :return: number of known points
+        """
+        return self._pyramid.count_known_in_rect(lower_left, upper_right)
+
+    def least_explored_block(self, lower_left, upper_right, block_size):
+        """
+        Finds a square block inside a rectangle with few known points, such as a good place to go exploring.
+        :param lower_left: corner point, inclusive
+        :param upper_right: corner point, inclusive
+        :param block_size: width of the block, rounded down to a power of 2
+        :return: tuple(lower left Point2D of the block, its width, number of known points in it), or None if the
+        rectangle is smaller than the block
+        """
+        level = max(block_size, 1).bit_length() - 1
+        found = self._pyramid.least_explored_block(lower_left, upper_right, level)
+        if found is None:
+            return None
+        block_x, block_y, count = found
+        return Point2D(block_x << level, block_y << level), 1 << level, count
+
     @property
     def width_and_height(self):
         """
@@ -104,7 +501,47 @@ class TopologyMap(object):
         Generates all of the known points in the map as x,y,z in no specific order
         :return: generator yielding x,y,z
         """
-        return ((pt.x, pt.y, z) for pt, z in self._known_z.items())
+        for (tile_x, tile_y), tile in self._tiles.items():
+            if not tile.known_count:
+                continue
+            left, bottom = tile_x << TILE_SHIFT, tile_y << TILE_SHIFT
+            decode = self._encoding.decode if self._encoding else None
+            for index, (z, known) in enumerate(zip(tile.heights, tile.known)):
+                if known:
+                    yield left | (index & TILE_MASK), bottom | (index >> TILE_SHIFT), decode(z) if decode else z
+
+    def get_window(self, lower_left, width, height):
+        """
+        Gets the heights in a rectangle of the map as rows, with the bottom row first. Unknown cells are None
+        :param lower_left: lower-left corner of the rectangle
+        :param width:
+        :param height:
+        :return: list of rows, each one a list of heights
+        """
+        right = lower_left.x + width
+        decode = self._encoding.decode if self._encoding else None
+        rows = []
+        for y in range(lower_left.y, lower_left.y + height):
+            row = []
+            offset = (y & TILE_MASK) << TILE_SHIFT
+            x = lower_left.x
+            while x < right:  # copy a slice of each tile the row passes through
+                end = min(right, ((x >> TILE_SHIFT) + 1) << TILE_SHIFT)
+                tile = self._tiles.get((x >> TILE_SHIFT, y >> TILE_SHIFT))
+                if tile is None:
+                    row.extend([None] * (end - x))
+                else:
+                    start = offset | (x & TILE_MASK)
+                    stop = start + end - x
+                    if decode:
+                        row.extend(decode(z) if known else None
+                                   for z, known in zip(tile.heights[start:stop], tile.known[start:stop]))
+                    else:
+                        row.extend(z if known else None
+                                   for z, known in zip(tile.heights[start:stop], tile.known[start:stop]))
+                x = end
+            rows.append(row)
+        return rows
 
     def iter_x_y_z_pt_in_radius(self, point, radius):
         """
@@ -113,10 +550,9 @@ class TopologyMap(object):
         :param point: center point
         :return: generator yielding x, y, z, pt
         """
-        point.translate(0, 2)
         for (x, y) in iter_x_y_in_radius(radius):
             pt = point.translate(x, y)
-            z = self._known_z.get(pt)
+            z = self._get_raw_z(pt.x, pt.y)
             yield x, y, z, pt
 
     def count_unknown_in_radius(self, point, radius):
@@ -126,7 +562,33 @@ class TopologyMap(object):
         :param radius:
         :return: number of points unknown
         """
-        return len(self.list_unknown_x_y_in_radius(point, radius))
+        return self._count_unknown_around(point.x, point.y, radius)
+
+    def count_unknown_in_radius_array(self, points, radius):
+        """
+        Calculates how many points we've not seen yet in a radius out from each of many points
+        :param points: PointArray
+        :param radius:
+        :return: list of the number of points unknown around each one
+        """
+        return [self._count_unknown_around(x, y, radius) for x, y in zip(points.xs, points.ys)]
+
+    def _count_unknown_around(self, x, y, radius):
+        """
+        Counts the unknown cells in a square, a row of a tile at a time
+        """
+        known = 0
+        left, right = x - radius, x + radius
+        for row_y in range(y - radius, y + radius + 1):
+            offset, tile_y = (row_y & TILE_MASK) << TILE_SHIFT, row_y >> TILE_SHIFT
+            start = left
+            while start <= right:
+                stop = min(right, start | TILE_MASK)
+                tile = self._tiles.get((start >> TILE_SHIFT, tile_y))
+                if tile is not None and tile.known_count:
+                    known += tile.known.count(1, offset | (start & TILE_MASK), (offset | (stop & TILE_MASK)) + 1)
+                start = stop + 1
+        return (2 * radius + 1) ** 2 - known
 
     def list_unknown_x_y_in_radius(self, point, radius):
         """
@@ -134,7 +596,27 @@ class TopologyMap(object):
         :param radius:
         :return: list of unknown points
         """
-        return [(x, y) for x, y, _pt in self.iter_unknown_x_y_pt_in_radius(point, radius)]
+        return self.unknown_in_radius_array(point, radius).to_tuples()
+
+    def unknown_in_radius_array(self, point, radius):
+        """
+        Gets the offsets of the unknown cells within a radius of a point, in row order
+        :param point:
+        :param radius:
+        :return: PointArray of (x,y) offsets from the point
+        """
+        xs, ys = [], []
+        size = range(-radius, radius + 1)
+        for y in size:
+            row_y = point.y + y
+            offset, tile_y = (row_y & TILE_MASK) << TILE_SHIFT, row_y >> TILE_SHIFT
+            for x in size:
+                row_x = point.x + x
+                tile = self._tiles.get((row_x >> TILE_SHIFT, tile_y))
+                if tile is None or not tile.known[offset | (row_x & TILE_MASK)]:
+                    xs.append(x)
+                    ys.append(y)
+        return PointArray(xs, ys)
 
     def iter_unknown_x_y_pt_in_radius(self, point, radius):
         """
@@ -143,16 +625,55 @@ class TopologyMap(object):
         :param radius:
         :return: generator of x,y,z point
         """
-        return ((x, y, pt) for x, y, known, pt in self.iter_x_y_z_pt_in_radius(point, radius) if not known)
+        return ((x, y, pt) for x, y, z, pt in self.iter_x_y_z_pt_in_radius(point, radius) if z is None)
 
     def iter_known_x_y_z_pt_in_radius(self, point, radius):
         """
-        Generates x,y,z,pt for unknown cells within a radius of point.
+        Generates x,y,z,pt for known cells within a radius of point.
         :param point:
         :param radius:
         :return: Generator x,y,z,pt
         """
-        return ((x, y, z, pt) for x, y, z, pt in self.iter_x_y_z_pt_in_radius(point, radius) if z)
+        return ((x - point.x, y - point.y, z, Point2D(x, y)) for x, y, z in self.iter_known_in_radius(point, radius))
+
+    def iter_known_in_radius(self, point, radius):
+        """
+        Generates the known cells within a radius of a point, in row order
+        :param point: center point
+        :param radius:
+        :return: generator yielding x,y,z
+        """
+        return self.iter_known_in_rect(point.translate(-radius, -radius), point.translate(radius, radius))
+
+    def iter_known_in_rect(self, lower_left, upper_right):
+        """
+        Generates the known cells in a rectangle in row order: bottom row first, each row from west to east.
+        Only tiles which exist are visited, and unknown cells are skipped a row of a tile at a time, so the cost
+        depends on the number of known cells found rather than the size of the rectangle
+        :param lower_left: corner point, inclusive
+        :param upper_right: corner point, inclusive
+        :return: generator yielding x,y,z
+        """
+        left, bottom, right, top = lower_left.x, lower_left.y, upper_right.x, upper_right.y
+        decode = self._encoding.decode if self._encoding else None
+        row_keys = self._tile_row_keys
+        for tile_y in row_keys[bisect_left(row_keys, bottom >> TILE_SHIFT):bisect_right(row_keys, top >> TILE_SHIFT)]:
+            row = self._tile_rows[tile_y]
+            tiles = [(tile_x, self._tiles[(tile_x, tile_y)]) for tile_x in
+                     row[bisect_left(row, left >> TILE_SHIFT):bisect_right(row, right >> TILE_SHIFT)]]
+            tiles = [(tile_x << TILE_SHIFT, tile) for tile_x, tile in tiles if tile.known_count]
+            if not tiles:
+                continue
+            for y in range(max(bottom, tile_y << TILE_SHIFT), min(top, (tile_y << TILE_SHIFT) | TILE_MASK) + 1):
+                offset = (y & TILE_MASK) << TILE_SHIFT
+                for tile_left, tile in tiles:
+                    start = offset | (max(left, tile_left) & TILE_MASK)
+                    stop = offset | (min(right, tile_left | TILE_MASK) & TILE_MASK)
+                    known, heights = tile.known, tile.heights
+                    index = known.find(1, start, stop + 1)
+                    while index != -1:
+                        yield tile_left | (index & TILE_MASK), y, decode(heights[index]) if decode else heights[index]
+                        index = known.find(1, index + 1, stop + 1)
 
     def list_highest_x_y_z_pt_in_radius(self, point, radius):
         """
@@ -164,7 +685,7 @@ class TopologyMap(object):
         # Figure out the max height by walking adjacent points and maxing on the z value
         known = list(self.iter_known_x_y_z_pt_in_radius(point, radius))
         if not known:
-            print("not known at", point)
+            logging.debug("Nothing known around %s", point)
             return []
 
         max_z = max(z for (_x, _y, z, _pt) in known)
@@ -188,6 +709,49 @@ class TopologyMap(object):
                 return True
         return False
 
+    def estimate_gradient(self, point, radius):
+        """
+        Estimates which way is uphill from the known points around a point, by weighing each direction by how much
+        higher it is than their average. Out of bounds points are left out
+        :param point:
+        :param radius:
+        :return: tuple(x, y) pointing uphill, (0, 0) if nothing is known or it's flat
+        """
+        known = [(x - point.x, y - point.y, z) for x, y, z in self.iter_known_in_radius(point, radius)
+                 if z != OUT_OF_BOUNDS]
+        if not known:
+            return 0, 0
+        mean_z = sum(z for _x, _y, z in known) / len(known)
+        return sum(x * (z - mean_z) for x, _y, z in known), sum(y * (z - mean_z) for _x, y, z in known)
+
+    def fit_plane(self, point, radius):
+        """
+        Fits a plane to the known points around a point by least squares. Out of bounds points are left out
+        :param point:
+        :param radius:
+        :return: tuple(slope in x, slope in y, root mean square of the residuals), or None if the known points don't
+        pin down a plane
+        """
+        known = [(x - point.x, y - point.y, z) for x, y, z in self.iter_known_in_radius(point, radius)
+                 if z != OUT_OF_BOUNDS]
+        n = len(known)
+        if n < 3:
+            return None
+        # normal equations of z = a + b x + c y, solved by Cramer's rule
+        sx, sy = sum(x for x, _y, _z in known), sum(y for _x, y, _z in known)
+        sxx, syy = sum(x * x for x, _y, _z in known), sum(y * y for _x, y, _z in known)
+        sxy = sum(x * y for x, y, _z in known)
+        sz = sum(z for _x, _y, z in known)
+        sxz, syz = sum(x * z for x, _y, z in known), sum(y * z for _x, y, z in known)
+        det = n * (sxx * syy - sxy * sxy) - sx * (sx * syy - sxy * sy) + sy * (sx * sxy - sxx * sy)
+        if not det:
+            return None  # all the points are in a line
+        a = (sz * (sxx * syy - sxy * sxy) - sx * (sxz * syy - sxy * syz) + sy * (sxz * sxy - sxx * syz)) / det
+        b = (n * (sxz * syy - sxy * syz) - sz * (sx * syy - sxy * sy) + sy * (sx * syz - sxz * sy)) / det
+        c = (n * (sxx * syz - sxz * sxy) - sx * (sx * syz - sxz * sy) + sz * (sx * sxy - sxx * sy)) / det
+        squared_error = sum((z - a - b * x - c * y) ** 2 for x, y, z in known)
+        return b, c, math.sqrt(squared_error / max(n - 3, 1))
+
 
 def iter_x_y_in_radius(radius):
     """
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers for evaluating whole windows (rectangles) of a map at once. A window is a list of rows, each a list of
+values, like the one returned by TopologyMap.get_window. Windowed operations are separable: a square window of a
+given radius is done as a pass along each row followed by a pass along each column.
+
+The max uses the van Herk/Gil-Werman algorithm and the sum uses running totals, so both take a constant amount of
+work per cell no matter how big the radius is.
+"""
+from itertools import accumulate
+
+NO_VALUE = float("-inf")
+
+
+def window_max(rows, radius):
+    """
+    For every cell, gets the maximum value within radius cells of it. Near the edges, only the cells inside the
+    window are considered
+    :param rows: list of rows of numbers
+    :param radius:
+    :return: list of rows of maximums, same size as rows
+    """
+    return _separable(rows, radius, _padded_sliding_max)
+
+
+def window_sum(rows, radius):
+    """
+    For every cell, gets the sum of the values within radius cells of it.
+    :param rows: list of rows of numbers
+    :param radius:
+    :return: list of rows of sums, same size as rows
+    """
+    return _separable(rows, radius, _padded_sliding_sum)
+
+
+def valid_window_max(rows, radius):
+    """
+    Like window_max, but only for cells which are at least radius cells from every edge, so the result has
+    2 * radius fewer rows and columns
+    :param rows: list of rows of numbers
+    :param radius:
+    :return: list of rows of maximums
+    """
+    width = 2 * radius + 1
+    return _transpose([sliding_max(column, width) for column in _transpose([sliding_max(row, width) for row in rows])])
+
+
+def valid_window_sum(rows, radius):
+    """
+    Like window_sum, but only for cells which are at least radius cells from every edge
+    :param rows: list of rows of numbers
+    :param radius:
+    :return: list of rows of sums
+    """
+    width = 2 * radius + 1
+    return _transpose([sliding_sum(column, width) for column in _transpose([sliding_sum(row, width) for row in rows])])
+
+
+def sliding_max(values, width):
+    """
+    van Herk/Gil-Werman sliding max. The values are split into blocks of width. Any window of that width covers the
+    end of one block and the start of the next, so its max is the max of a suffix max and a prefix max. That's
+    about 3 comparisons per value regardless of width.
+    :param values: list of numbers
+    :param width: window width
+    :return: list of len(values) - width + 1 maximums, one for each window values[i:i + width]
+    """
+    n = len(values)
+    if width <= 1 or n == 0:
+        return list(values)
+
+    prefix = list(values)  # max from the start of the block up to each value
+    suffix = list(values)  # max from each value up to the end of the block
+    for i in range(1, n):
+        if i % width and prefix[i - 1] > prefix[i]:
+            prefix[i] = prefix[i - 1]
+    for i in range(n - 2, -1, -1):
+        if (i + 1) % width and suffix[i + 1] > suffix[i]:
+            suffix[i] = suffix[i + 1]
+
+    return [max(suffix[i], prefix[i + width - 1]) for i in range(n - width + 1)]
+
+
+def sliding_sum(values, width):
+    """
+    Sliding sum using running totals
+    :param values: list of numbers
+    :param width: window width
+    :return: list of len(values) - width + 1 sums, one for each window values[i:i + width]
+    """
+    totals = [0]
+    totals.extend(accumulate(values))
+    return [totals[i + width] - totals[i] for i in range(len(values) - width + 1)]
+
+
+def _padded_sliding_max(row, radius):
+    padding = [NO_VALUE] * radius
+    return sliding_max(padding + list(row) + padding, 2 * radius + 1)
+
+
+def _padded_sliding_sum(row, radius):
+    padding = [0] * radius
+    return sliding_sum(padding + list(row) + padding, 2 * radius + 1)
+
+
+def _separable(rows, radius, func_sliding):
+    """
+    Applies a 1d sliding window function along the rows and then along the columns
+    :param rows:
+    :param radius:
+    :param func_sliding: function(values, radius) -> list the same length as values
+    :return: list of rows
+    """
+    return _transpose([func_sliding(column, radius) for column in
+                       _transpose([func_sliding(row, radius) for row in rows])])
+
+
+def _transpose(rows):
+    """
+    :param rows:
+    :return: list of columns as rows
+    """
+    return [list(column) for column in zip(*rows)]
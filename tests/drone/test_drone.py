@@ -4,8 +4,8 @@ import logging
 import random
 from drone.drone_factory import DroneFactory
 from drone.drone import Drone
-from tests.sensors.simulated_topology_sensor import SimulatedTopologySensor
-from tests.topology.topology_factory import TopologyFactory
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from topology.topology_factory import TopologyFactory
 from geometry.point import Point2D
 from navigation.move_strategy import MoveStrategyType
 from pydispatch import dispatcher
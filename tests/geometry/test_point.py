@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+from geometry.point import Point2D, Point3D, PointArray
+
+
+class TestPointArray(TestCase):
+    def setUp(self):
+        self.points = [Point2D(0, 0), Point2D(3, -4), Point2D(-1, 1), Point2D(2, 0)]
+        self.pa = PointArray.from_points(self.points)
+
+    def test_same_as_points(self):
+        other = Point2D(1, 2)
+        self.assertEqual([pt.to_tuple() for pt in self.points], list(self.pa))
+        self.assertEqual([pt.translate(5, -1) for pt in self.points], self.pa.translate(5, -1).to_points())
+        self.assertEqual([pt.distance2d(other) for pt in self.points], self.pa.distance2d(other))
+        self.assertEqual([pt.max_orthogonal_distance(other) for pt in self.points],
+                         self.pa.max_orthogonal_distance(other))
+        self.assertEqual([Point2D(0, 1), Point2D(2, -1), Point2D(0, 1), Point2D(1, 1)],
+                         self.pa.midpoint_to(other).to_points())  # halves rounded down
+
+    def test_filtering_and_heights(self):
+        self.assertEqual(PointArray([3, 2], [-4, 0]), self.pa.compress(x > 0 for x in self.pa.xs))
+        with_z = self.pa.with_z([5, 6, 7, 8.5])
+        self.assertEqual(Point3D(2, 0, 8.5), with_z.point(3))
+        self.assertEqual(PointArray([-1, 2], [1, 0], [7, 8.5]), with_z.compress([0, 0, 1, 1]))
+        self.assertEqual(with_z, PointArray.from_points(with_z.to_points()))
+        self.assertEqual(PointArray([6, -2], [-8, 2], [6, 7]), with_z[1:3].scale(2))
+        self.assertEqual((3, -4, 6), with_z[1])
+        self.assertEqual(0, len(PointArray.from_tuples([])))
+        self.assertRaises(ValueError, PointArray, [1, 2], [1])
+        self.assertRaises(TypeError, PointArray, [1.5], [1])
+
+    def test_concatenation(self):
+        with_z = self.pa.with_z([5, 6, 7, 8])
+        self.assertEqual(PointArray.from_tuples(list(with_z) + [(9, 9, 1)]), with_z + PointArray([9], [9], [1]))
+        self.assertEqual(self.pa, self.pa[:2] + self.pa[2:])
+        self.assertIsNone((with_z + self.pa).zs)  # heights only kept if both have them
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import subprocess
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from unittest import TestCase
+from jeepnav.cli import NOT_FOUND, main
+from navigation.mission_trace import iter_trace
+from geometry.point import Point2D
+from topology.dem import MemoryMappedTopology
+
+SRC = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+
+
+def run(*argv):
+    """
+    :return: tuple(exit status, what was printed)
+    """
+    output = io.StringIO()
+    with redirect_stdout(output):
+        status = main(list(argv))
+    return status, output.getvalue()
+
+
+class TestCli(TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.map_path = os.path.join(self._directory.name, 'map.npy')
+        self.trace_path = os.path.join(self._directory.name, 'mission.mtr')
+        run('generate', self.map_path, '--width', '20', '--height', '12', '--density', '.02', '--seed', '3')
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_generate(self):
+        with MemoryMappedTopology.from_npy(self.map_path) as simulated_map:
+            self.assertEqual((20, 12), simulated_map.width_and_height)
+            self.assertIsInstance(simulated_map.get_z(Point2D(19, 11)), int)
+        procedural_path = os.path.join(self._directory.name, 'procedural.npy')
+        self.assertEqual(0, run('generate', procedural_path, '--procedural', '--width', '40', '--height', '40')[0])
+        with MemoryMappedTopology.from_npy(procedural_path) as simulated_map:
+            self.assertEqual((40, 40), simulated_map.width_and_height)
+
+    def test_navigate_and_replay(self):
+        status, output = run('navigate', self.map_path, '5', '5', '--trace', self.trace_path, '--path')
+        self.assertEqual(0, status)
+        lines = output.splitlines()
+        self.assertTrue(lines[-1].startswith("Found extraction point"))
+        self.assertEqual(Point2D(5, 5), next(iter_trace(self.trace_path)).start_point)
+
+        status, replayed = run('replay', self.trace_path, '--path')
+        self.assertEqual(0, status)
+        self.assertEqual(["Same as the recorded mission"] + lines, replayed.splitlines())
+
+        status, output = run('replay', self.trace_path, '--strategy', 'SPIRAL_OUT_CCW', '--map', self.map_path)
+        self.assertTrue(output.startswith("Diverged from the recorded mission"))
+
+    def test_gives_up_after_max_steps(self):
+        status, output = run('navigate', self.map_path, '5', '5', '--strategy', 'SPIRAL_OUT_CCW', '--max-steps', '2')
+        self.assertEqual(NOT_FOUND, status)
+        self.assertTrue(output.startswith("No extraction point found in 2 moves"))
+
+    def test_bench(self):
+        status, output = run('bench', self.map_path, '--missions', '3', '--strategy', 'CLIMB_MOVE_1',
+                             '--strategy', 'BINARY_SEARCH')
+        self.assertEqual(0, status)
+        lines = output.splitlines()
+        self.assertEqual(3, len(lines))
+        self.assertTrue(lines[2].startswith("Binary Search"))
+        self.assertTrue(lines[2].endswith("3/3"))
+
+    def test_errors(self):
+        with redirect_stdout(io.StringIO()), open(os.devnull, 'w') as devnull:
+            stderr, sys.stderr = sys.stderr, devnull
+            try:
+                for argv in [('navigate', self.map_path, '5', '5', '--strategy', 'NOPE'),
+                             ('navigate', os.path.join(self._directory.name, 'missing.npy'), '5', '5'),
+                             ('replay', self.map_path),
+                             ('bench', self.map_path, '--missions', '0')]:
+                    with self.assertRaises(SystemExit) as context:
+                        main(list(argv))
+                    self.assertEqual(2, context.exception.code)
+            finally:
+                sys.stderr = stderr
+
+    def test_navigate_imports_no_heavy_dependencies(self):
+        check = ("import sys; from jeepnav.cli import main; main({!r}); "
+                 "print(sorted(m for m in ('numpy', 'matplotlib', 'pydispatch') if m in sys.modules))")
+        environment = dict(os.environ, PYTHONPATH=os.path.abspath(SRC))
+        output = subprocess.run([sys.executable, '-c', check.format(['navigate', self.map_path, '5', '5'])],
+                                env=environment, stdout=subprocess.PIPE, universal_newlines=True,
+                                check=True).stdout
+        self.assertEqual("[]", output.splitlines()[-1])
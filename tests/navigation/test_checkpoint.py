@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+import os
+import random
+import tempfile
+from itertools import islice
+from unittest import TestCase
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from topology.topology_factory import TopologyFactory
+from navigation.checkpoint import Checkpointer
+from navigation.navigator_factory import NavigatorFactory
+from navigation.move_strategy import make_move_strategy, MoveStrategyType, SweepCoverageStrategy
+from navigation.destinations import ExtractionPoint
+from geometry.point import Point2D
+from topology.retention_policy import TrustForeverPolicy
+from topology.topology_map import TopologyMap
+
+START = Point2D(5, 5)
+
+
+class TestCheckpoint(TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._directory.name, 'mission.jsonl')
+        self.simulated_map = TopologyFactory.make_from_matrix([[(x * 7 + y * 13) % 10 + x + y for x in range(12)]
+                                                                for y in range(12)])
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def make_navigator(self, strategy_type, interval=1, incremental_scan=False):
+        sensor = SimulatedTopologySensor(simulated_map=self.simulated_map, power_on_cost=4, scan_point_cost=2)
+        navigator = NavigatorFactory.make_navigator(topology_map=TopologyMap(),
+                                                    move_strategy=make_move_strategy(strategy_type),
+                                                    destination=ExtractionPoint(),
+                                                    checkpointer=Checkpointer(self.path, interval),
+                                                    incremental_scan=incremental_scan)
+        return navigator, sensor
+
+    def crash_and_resume(self, strategy_type, crash_after, interval=1, incremental_scan=False):
+        navigator, sensor = self.make_navigator(strategy_type, incremental_scan=incremental_scan)
+        path = list(islice(navigator.iter_points_to_destination(START, [sensor]), 200))
+
+        crashed, crashed_sensor = self.make_navigator(strategy_type, interval, incremental_scan)
+        before_crash = list(islice(crashed.iter_points_to_destination(START, [crashed_sensor]), crash_after))
+        resumed, resumed_sensor = self.make_navigator(strategy_type, interval, incremental_scan)
+        after_crash = list(islice(resumed.resume([resumed_sensor]), 200))
+        return path, navigator, before_crash, after_crash, resumed, crashed_sensor, resumed_sensor
+
+    def test_resume_carries_on_without_scanning_again(self):
+        for strategy_type in MoveStrategyType:
+            with self.subTest(strategy_type=strategy_type):
+                path, navigator, before, after, resumed, crashed_sensor, resumed_sensor = self.crash_and_resume(
+                    strategy_type, 4)
+                self.assertEqual(path, before + after)
+                self.assertEqual(navigator.scan_cost, resumed.scan_cost)
+                self.assertEqual(navigator.scan_cost, crashed_sensor.total_cost + resumed_sensor.total_cost)
+                self.assertEqual(navigator.points_scanned, resumed.points_scanned)
+                self.assertEqual(navigator.found, resumed.found)
+
+    def test_resume_remembers_points_visited(self):
+        for strategy_type in MoveStrategyType:
+            with self.subTest(strategy_type=strategy_type):
+                path, navigator, before, after, resumed, _crashed_sensor, _resumed_sensor = self.crash_and_resume(
+                    strategy_type, 4, incremental_scan=True)
+                self.assertEqual(path, before + after)  # points come back to are scanned fully, as they would have been
+                self.assertEqual(navigator.points_scanned, resumed.points_scanned)
+
+    def test_resumed_sweep_skips_what_is_known(self):
+        simulated_map = TopologyFactory.make_fake_topology(density=.003, upper_right=Point2D(39, 39),
+                                                           rng=random.Random(0))
+        sensor = SimulatedTopologySensor(simulated_map=simulated_map, power_on_cost=4, scan_point_cost=2)
+
+        def make_navigator(known_map, checkpointer=None):
+            return NavigatorFactory.make_navigator(topology_map=known_map,
+                                                   move_strategy=SweepCoverageStrategy('Sweep', extent=9),
+                                                   destination=ExtractionPoint(), checkpointer=checkpointer,
+                                                   retention_policy=TrustForeverPolicy())
+
+        def make_known_map():  # what a past mission found
+            known_map = TopologyMap()
+            list(islice(make_navigator(known_map).iter_points_to_destination(Point2D(4, 4), [sensor]), 200))
+            return known_map
+
+        path = list(islice(make_navigator(make_known_map()).iter_points_to_destination(START, [sensor]), 200))
+        for crash_after in range(1, len(path), 3):
+            with self.subTest(crash_after=crash_after):
+                known_map = make_known_map()
+                checkpoint_path = os.path.join(self._directory.name, 'sweep{}.jsonl'.format(crash_after))
+                crashed = make_navigator(known_map, Checkpointer(checkpoint_path))
+                before_crash = list(islice(crashed.iter_points_to_destination(START, [sensor]), crash_after))
+                resumed = make_navigator(known_map, Checkpointer(checkpoint_path))
+                self.assertEqual(path, before_crash + list(islice(resumed.resume([sensor]), 200)))
+
+    def test_interval_rescans_since_last_checkpoint(self):
+        path, navigator, before, after, resumed, crashed_sensor, resumed_sensor = self.crash_and_resume(
+            MoveStrategyType.SPIRAL_OUT_CCW, 4, interval=3)
+        self.assertEqual(path, before[:3] + after)  # carries on after the 3rd point, the last checkpoint
+        self.assertEqual(navigator.scan_cost, resumed.scan_cost)
+
+    def test_partly_written_checkpoint_ignored(self):
+        navigator, sensor = self.make_navigator(MoveStrategyType.SPIRAL_OUT_CCW)
+        path = list(islice(navigator.iter_points_to_destination(START, [sensor]), 5))
+        navigator, sensor = self.make_navigator(MoveStrategyType.SPIRAL_OUT_CCW)
+        list(islice(navigator.iter_points_to_destination(START, [sensor]), 3))
+        navigator.checkpointer.close()
+        with open(self.path, 'a') as file:
+            file.write('{"cells":[[1,')  # the process died while writing
+        resumed, resumed_sensor = self.make_navigator(MoveStrategyType.SPIRAL_OUT_CCW)
+        self.assertEqual(3, resumed.checkpointer.load().steps)
+        self.assertEqual(path[3:], list(islice(resumed.resume([resumed_sensor]), 2)))
+        resumed.checkpointer.close()
+        self.assertEqual(5, resumed.checkpointer.load().steps)  # the line cut short was replaced
+
+    def test_finished_mission_resumes_to_nothing_new(self):
+        navigator, sensor = self.make_navigator(MoveStrategyType.CLIMB_MOVE_1)
+        path = list(navigator.iter_points_to_destination(START, [sensor]))
+        resumed, resumed_sensor = self.make_navigator(MoveStrategyType.CLIMB_MOVE_1)
+        remaining = list(resumed.resume([resumed_sensor]))
+        self.assertEqual(navigator.found, path[-1])
+        self.assertEqual([], remaining)  # the destination was the last point visited, so there's nowhere to go
+        self.assertEqual(0, resumed_sensor.total_cost)
+
+    def test_resume_needs_checkpoint(self):
+        navigator = NavigatorFactory.make_navigator(topology_map=TopologyMap(),
+                                                    move_strategy=MoveStrategyType.CLIMB_MOVE_1,
+                                                    destination=ExtractionPoint())
+        with self.assertRaises(ValueError):
+            next(navigator.resume([]))
+        navigator, sensor = self.make_navigator(MoveStrategyType.CLIMB_MOVE_1)
+        with self.assertRaises(ValueError):
+            next(navigator.resume([sensor]))
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+import csv
+import json
+import os
+import tempfile
+from unittest import TestCase
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from tests.topology.test_topology_map import make_example_topology
+from navigation.cost_ledger import ScanCostLedger
+from navigation.navigator_factory import NavigatorFactory
+from navigation.move_strategy import MoveStrategyType
+from navigation.destinations import ExtractionPoint
+from navigation.scan_scheduler import ScanScheduler
+from geometry.point import Point2D, PointArray
+from sensors.power_policy import KeepWarmPolicy
+from topology.topology_map import TopologyMap
+
+
+class WideBeamSensor(SimulatedTopologySensor):
+    """
+    Also returns a cell it wasn't asked for with every scan
+    """
+    def scan_points(self, offsets, home_point):
+        return super().scan_points(list(offsets) + [(0, 5)], home_point)
+
+    def scan_point_array(self, offsets, home_point):
+        return super().scan_point_array(offsets + PointArray([0], [5]), home_point)
+
+
+class TestScanCostLedger(TestCase):
+    def setUp(self):
+        self.laser = SimulatedTopologySensor(simulated_map=make_example_topology())
+        self.ledger = ScanCostLedger()
+        self.ledger.begin_step(Point2D(1, 2))
+        self.ledger.record(self.laser, power_on_cost=4, point_cost=18, points=9)
+        self.ledger.begin_step(Point2D(2, 2))
+        self.ledger.record(self.laser, idle_cost=1)
+        self.ledger.record(self.laser, point_cost=6, points=3)
+
+    def test_totals(self):
+        mission = self.ledger.mission
+        self.assertEqual(4 + 18 + 1 + 6, self.ledger.total)
+        self.assertEqual((4, 24, 1, 12, 2), (mission.power_on_cost, mission.point_cost, mission.idle_cost,
+                                             mission.points, mission.steps))
+        self.assertEqual({'SimulatedTopologySensor0': 29}, mission.by_sensor)
+        self.assertEqual(22, self.ledger.get_cost_at(1, 2))
+        self.assertEqual(6, self.ledger.get_cost_at(2, 2))  # idling isn't charged to the point
+        self.assertEqual(0, self.ledger.get_cost_at(5, 5))
+
+    def test_rows_in_typed_columns(self):
+        self.assertEqual(3, len(self.ledger))
+        self.assertEqual('d', self.ledger.column('point_cost').typecode)
+        self.assertEqual([0, 1, 1], list(self.ledger.column('step')))
+        self.ledger.record(self.laser)  # nothing to record
+        self.assertEqual(3, len(self.ledger))
+
+    def test_new_mission_keeps_history(self):
+        self.ledger.new_mission()
+        self.assertEqual(0, self.ledger.total)
+        self.assertEqual(0, self.ledger.get_cost_at(1, 2))
+        self.ledger.new_mission()  # nothing happened, so the mission is reused
+        self.ledger.begin_step(Point2D(0, 0))
+        self.ledger.add_cost_at(0, 0, 5)
+        self.assertEqual([29, 5], [mission.total for mission in self.ledger.missions])
+        self.assertEqual(34, self.ledger.lifetime.total)
+        self.assertEqual([0, 0, 0, 1], list(self.ledger.column('mission')))
+
+    def test_write_csv_and_json(self):
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, 'costs.csv')
+            json_path = os.path.join(directory, 'costs.json')
+            self.ledger.write_csv(csv_path)
+            self.ledger.write_json(json_path)
+            with open(csv_path, newline='') as file:
+                rows = list(csv.DictReader(file))
+            with open(json_path) as file:
+                data = json.load(file)
+        self.assertEqual(3, len(rows))
+        self.assertEqual({'mission': '0', 'step': '0', 'x': '1', 'y': '2', 'sensor': 'SimulatedTopologySensor0',
+                          'power_on_cost': '4', 'point_cost': '18', 'idle_cost': '0', 'points': '9'}, rows[0])
+        self.assertEqual(['SimulatedTopologySensor0'], data['sensors'])
+        self.assertEqual(29, data['missions'][0]['total'])
+        self.assertEqual([18, 0, 6], data['rows']['point_cost'])
+
+
+class TestNavigatorLedger(TestCase):
+    def test_breakdown_matches_sensor_costs(self):
+        laser = SimulatedTopologySensor(simulated_map=make_example_topology(), power_on_cost=50, scan_point_cost=1,
+                                        idle_cost=1)
+        navigator = NavigatorFactory.make_navigator(topology_map=TopologyMap(),
+                                                    move_strategy=MoveStrategyType.CLIMB_MOVE_1,
+                                                    destination=ExtractionPoint(), power_policy=KeepWarmPolicy())
+        path = list(navigator.iter_points_to_destination(Point2D(4, 1), [laser]))
+        ledger = navigator.ledger
+        self.assertEqual(laser.total_cost, navigator.scan_cost)
+        self.assertEqual(navigator.power_policy.idle_cost, ledger.mission.idle_cost)
+        self.assertEqual(laser.power_on_count * 50, ledger.mission.power_on_cost)
+        self.assertEqual(navigator.points_scanned, ledger.mission.points)
+        self.assertEqual(navigator.scan_cost - ledger.mission.idle_cost,
+                         sum(navigator.get_scan_cost_at_point(pt) for pt in path))
+
+        first_cost = navigator.scan_cost
+        list(navigator.iter_points_to_destination(Point2D(4, 1), [laser]))  # resets, but keeps the history
+        self.assertEqual(2, len(ledger.missions))
+        self.assertEqual(first_cost, ledger.missions[0].total)
+        self.assertEqual(laser.total_cost, ledger.lifetime.total)
+
+    def test_points_are_what_the_sensors_returned(self):
+        for scan_scheduler in (None, ScanScheduler()):
+            laser = WideBeamSensor(simulated_map=make_example_topology(), power_on_cost=4, scan_point_cost=1)
+            navigator = NavigatorFactory.make_navigator(topology_map=TopologyMap(),
+                                                        move_strategy=MoveStrategyType.CLIMB_MOVE_1,
+                                                        destination=ExtractionPoint(), scan_scheduler=scan_scheduler)
+            list(navigator.iter_points_to_destination(Point2D(4, 1), [laser]))
+            self.assertEqual(laser._scan_point_count, navigator.ledger.mission.points)
+            self.assertEqual(navigator.points_scanned, navigator.ledger.mission.points)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+import random
+from navigation.destinations import Destination, ExtractionPoint, HighestInRadius
+from topology.topology_map import TopologyMap, OUT_OF_BOUNDS
+from tests.topology.test_topology_map import make_example_topology
+from topology.topology_factory import TopologyFactory
+from geometry.point import Point2D
+
+
+class EverySecondColumn(Destination):
+    """
+    A destination without its own evaluate_points, to test the default one
+    """
+    def __call__(self, topology_map, point):
+        return point.x % 2 == 0
+
+    @property
+    def radius_needed_to_check(self):
+        return 0
+
+
+class TestDestinations(TestCase):
+
+    def setUp(self):
+        self.destination = ExtractionPoint()
+
+    def assert_batch_matches_functor(self, tm, points):
+        expecting = [self.destination(tm, pt) for pt in points]
+        self.assertEqual(expecting, self.destination.evaluate_points(tm, points))
+
+    def test_extraction_point(self):
+        tm = make_example_topology()
+        self.assertTrue(self.destination(tm, Point2D(2, 2)))
+        self.assertFalse(self.destination(tm, Point2D(3, 2)))
+
+    def test_evaluate_points_on_example_topology(self):
+        tm = make_example_topology()
+        points = [Point2D(x, y) for y in range(-1, 7) for x in range(-1, 8)]
+        mask = self.destination.evaluate_points(tm, points)
+        self.assertIn(Point2D(2, 2), [pt for pt, found in zip(points, mask) if found])
+        self.assert_batch_matches_functor(tm, points)
+
+    def test_evaluate_points_on_partially_known_map(self):
+        random.seed(3)
+        simulated_map = TopologyFactory.make_fake_topology(upper_right=Point2D(20, 20), density=.05)
+        tm = TopologyMap()
+        for x, y, z in simulated_map.iter_all_points_xyz():
+            if random.random() < .8:
+                tm.set_z(Point2D(x, y), z)
+        points = [Point2D(x, y) for y in range(-2, 23) for x in range(-2, 23)]
+        self.assert_batch_matches_functor(tm, points)
+
+    def test_evaluate_scattered_points(self):
+        tm = make_example_topology()
+        points = [Point2D(6, 5), Point2D(2, 2), Point2D(0, 0)]
+        self.assertEqual([False, True, False], self.destination.evaluate_points(tm, points))
+
+    def test_evaluate_no_points(self):
+        self.assertEqual([], self.destination.evaluate_points(TopologyMap(), []))
+
+    def test_default_evaluate_points(self):
+        points = [Point2D(x, 0) for x in range(4)]
+        self.assertEqual([True, False, True, False], EverySecondColumn().evaluate_points(TopologyMap(), points))
+
+    def test_highest_in_radius_1_is_extraction_point(self):
+        tm = make_example_topology()
+        points = [Point2D(x, y) for y in range(-1, 7) for x in range(-1, 8)]
+        self.assertEqual(self.destination.evaluate_points(tm, points),
+                         HighestInRadius(1).evaluate_points(tm, points))
+
+    def test_highest_in_radius_wide(self):
+        tm = make_example_topology()
+        destination = HighestInRadius(4)
+        self.assertFalse(destination(tm, Point2D(2, 2)))  # the 4 at (6,4) is within 4 cells
+        self.assertEqual(4, destination.radius_needed_to_check)
+
+    def test_highest_in_radius_follows_map(self):
+        destination = HighestInRadius(2)
+        tm = make_example_topology(set_bounds=False)
+        self.assertFalse(destination(tm, Point2D(4, 3)))
+        tm = TopologyMap()
+        for x in range(-2, 3):
+            for y in range(-2, 3):
+                tm.set_z(Point2D(x, y), 1)
+        self.assertTrue(destination(tm, Point2D(0, 0)))
+        tm.set_z(Point2D(2, 2), 5)
+        self.assertFalse(destination(tm, Point2D(0, 0)))
+
+    def test_out_of_bounds_is_never_a_destination(self):
+        tm = TopologyMap()
+        for x in range(-2, 3):
+            for y in range(-2, 3):
+                tm.set_z(Point2D(x, y), OUT_OF_BOUNDS)  # scanned off the edge of the world
+        for destination in [self.destination, HighestInRadius(1)]:
+            with self.subTest(destination=destination):
+                self.assertFalse(destination(tm, Point2D(0, 0)))
+                self.assertEqual([False], destination.evaluate_points(tm, [Point2D(0, 0)]))
+                self.assertTrue(destination.is_ruled_out(tm, Point2D(0, 0)))
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from tests.topology.test_topology_map import make_example_topology
+from navigation.lookahead import Lookahead
+from navigation.navigator import Navigator
+from navigation.move_strategy import make_move_strategy, MoveStrategyType
+from navigation.destinations import ExtractionPoint
+from geometry.point import Point2D
+from topology.topology_map import TopologyMap
+
+
+class TestPredictPoints(TestCase):
+    def test_spiral_predicts_exactly_without_moving(self):
+        strategy = make_move_strategy(MoveStrategyType.SPIRAL_OUT_CW_3)
+        tm = TopologyMap()
+        point = Point2D(0, 0)
+        for _ in range(3):
+            predicted = strategy.predict_points(tm, point, ExtractionPoint(), 5)
+            self.assertEqual(predicted, strategy.predict_points(tm, point, ExtractionPoint(), 5))
+            actual = []
+            for _ in range(5):
+                point = strategy(tm, point, ExtractionPoint())
+                actual.append(point)
+            self.assertEqual(predicted, actual)
+
+    def test_climb_predicts_it_keeps_going(self):
+        strategy = make_move_strategy(MoveStrategyType.CLIMB_MOVE_1)
+        tm = make_example_topology()
+        point = Point2D(4, 1)
+        next_point = strategy(tm, point, ExtractionPoint())
+        dx, dy = next_point.x - point.x, next_point.y - point.y
+        self.assertEqual([next_point.translate(dx, dy), next_point.translate(2 * dx, 2 * dy)],
+                         strategy.predict_points(tm, next_point, ExtractionPoint(), 2))
+
+    def test_climb_predicts_nothing_without_gradient(self):
+        strategy = make_move_strategy(MoveStrategyType.CLIMB_MOVE_1)
+        self.assertEqual([], strategy.predict_points(TopologyMap(), Point2D(0, 0), ExtractionPoint(), 3))
+
+
+class TestLookahead(TestCase):
+    def run_spiral(self, lookahead):
+        sensor = SimulatedTopologySensor(simulated_map=make_example_topology(), radius=3, power_on_cost=50,
+                                         scan_point_cost=1)
+        navigator = Navigator(TopologyMap(), make_move_strategy(MoveStrategyType.SPIRAL_OUT_CCW), ExtractionPoint(),
+                              lookahead=lookahead)
+        path = list(navigator.iter_points_to_destination(Point2D(3, 2), [sensor]))
+        return path, navigator.scan_cost, sensor.power_on_count
+
+    def test_spiral_saves_power_ons(self):
+        path, cost, power_ons = self.run_spiral(None)
+        lookahead = Lookahead()
+        lookahead_path, lookahead_cost, lookahead_power_ons = self.run_spiral(lookahead)
+        self.assertEqual(path[-1], lookahead_path[-1])  # seeing further can only get us there sooner
+        self.assertLessEqual(len(lookahead_path), len(path))
+        self.assertLess(lookahead_power_ons, power_ons)
+        self.assertLess(lookahead_cost, cost)
+        stats = lookahead.stats[make_move_strategy(MoveStrategyType.SPIRAL_OUT_CCW).name]
+        self.assertEqual(stats.predictions, stats.hits)  # the spiral always goes where it said
+        self.assertEqual(1, stats.coalesced_scans)
+        self.assertLess(0, stats.expected_savings)
+
+    def test_no_predictions_no_extra_points(self):
+        sensor = SimulatedTopologySensor(simulated_map=make_example_topology(), radius=3, power_on_cost=50)
+        lookahead = Lookahead()
+
+        def strategy(topology_map, point, destination):
+            return point.translate(1, 0)
+
+        self.assertEqual([], lookahead.plan(TopologyMap(), strategy, Point2D(0, 0), ExtractionPoint(), sensor,
+                                            [(0, 0)]))
+
+    def test_hit_rate_learned(self):
+        lookahead = Lookahead()
+        self.assertEqual(.5, lookahead.hit_rate('CLIMB_MOVE_1'))
+        sensor = SimulatedTopologySensor(simulated_map=make_example_topology(), radius=3, power_on_cost=50)
+        strategy = make_move_strategy(MoveStrategyType.SPIRAL_OUT_CW_3)
+        tm = TopologyMap()
+        point = Point2D(0, 0)
+        lookahead.plan(tm, strategy, point, ExtractionPoint(), sensor, [])
+        lookahead.observe(Point2D(9, 9), True)  # not where it predicted
+        lookahead.observe(strategy.predict_points(tm, point, ExtractionPoint(), 2)[1], True)  # forgotten after a miss
+        stats = lookahead.stats[strategy.name]
+        self.assertEqual((1, 0), (stats.predictions, stats.hits))
+        self.assertEqual(1 / 3, lookahead.hit_rate(strategy.name))
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from unittest import TestCase
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from tests.topology.test_topology_map import make_example_topology
+from navigation.mission_trace import MissionTrace, MissionStart, ScanRecord, DecisionRecord, MoveRecord, iter_trace
+from navigation.navigator_factory import NavigatorFactory
+from navigation.scan_scheduler import ScanScheduler
+from navigation.move_strategy import MoveStrategyType
+from navigation.destinations import ExtractionPoint
+from geometry.point import Point2D, Point3D
+from topology.topology_map import TopologyMap, OUT_OF_BOUNDS
+
+
+class TestMissionTrace(TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._directory.name, 'mission.mtr')
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_round_trip(self):
+        sensors = [SimulatedTopologySensor(None, radius=2, power_on_cost=4, scan_point_cost=1.5, idle_cost=1),
+                   SimulatedTopologySensor(None)]
+        with MissionTrace(self.path) as trace:
+            trace.start(Point2D(3, -4), sensors)
+            trace.scan(sensors[1], Point2D(3, -4), [(0, 0), (1, -1)],
+                       [(0, 0, 7, Point2D(3, -4)), (1, -1, 9, Point2D(4, -5))], 2)
+            trace.scan(sensors[0], Point2D(3, -4), [(0, 1)],
+                       [(0, 1, 2.5, Point2D(3, -3)), (5, 5, OUT_OF_BOUNDS, Point2D(8, 1))], 3.25)
+            trace.decide(Point2D(3, -4), Point2D(4, -5))
+            trace.move(Point3D(3, -4, 7))
+            trace.move(Point3D(4, -5, None))
+        start, int_scan, float_scan, decision, move, unknown_move = list(iter_trace(self.path))
+        self.assertIsInstance(start, MissionStart)
+        self.assertEqual(Point2D(3, -4), start.start_point)
+        self.assertEqual([(2, 4, 1.5, 1), (1, 0, 0, 0)], start.sensors)
+        self.assertIsInstance(int_scan, ScanRecord)
+        self.assertEqual((1, Point2D(3, -4), [(0, 0), (1, -1)], [(0, 0, 7), (1, -1, 9)], 2),
+                         (int_scan.sensor_index, int_scan.home_point, int_scan.offsets, int_scan.scanned,
+                          int_scan.cost))
+        self.assertIs(int, type(int_scan.scanned[0][2]))
+        self.assertEqual(([(0, 1)], [(0, 1, 2.5), (5, 5, OUT_OF_BOUNDS)], 3.25),
+                         (float_scan.offsets, float_scan.scanned, float_scan.cost))
+        self.assertIsInstance(decision, DecisionRecord)
+        self.assertEqual((Point2D(3, -4), Point2D(4, -5)), (decision.point, decision.next_point))
+        self.assertIsInstance(move, MoveRecord)
+        self.assertEqual(Point3D(3, -4, 7), move.point)
+        self.assertIsNone(unknown_move.point.z)
+
+    def test_bad_traces(self):
+        with open(self.path, 'wb') as file:
+            file.write(b'{"json": 1}')
+        self.assertRaises(ValueError, list, iter_trace(self.path))
+        with MissionTrace(self.path) as trace:
+            trace.start(Point2D(0, 0), [SimulatedTopologySensor(None)])
+            trace.move(Point3D(0, 0, 1))
+        with open(self.path, 'rb') as file:
+            data = file.read()
+        with open(self.path, 'wb') as file:
+            file.write(data[:-3])
+        self.assertRaises(ValueError, list, iter_trace(self.path))
+
+    def trace_mission(self, scheduler=None, incremental_scan=False):
+        simulated_map = make_example_topology()
+        sensors = [SimulatedTopologySensor(simulated_map=simulated_map, power_on_cost=4, scan_point_cost=2),
+                   SimulatedTopologySensor(simulated_map=simulated_map, power_on_cost=2, scan_point_cost=3)]
+        with MissionTrace(self.path) as trace:
+            navigator = NavigatorFactory.make_navigator(topology_map=TopologyMap(),
+                                                        move_strategy=MoveStrategyType.CLIMB_MOVE_1,
+                                                        destination=ExtractionPoint(), scan_scheduler=scheduler,
+                                                        incremental_scan=incremental_scan, trace=trace)
+            path = list(navigator.iter_points_to_destination(Point2D(4, 1), sensors))
+        return path, navigator, list(iter_trace(self.path))
+
+    def test_navigator_records_mission(self):
+        for scheduler, incremental_scan in [(None, False), (ScanScheduler(), False), (None, True)]:
+            path, navigator, records = self.trace_mission(scheduler, incremental_scan)
+            self.assertEqual(path, [record.point for record in records if isinstance(record, MoveRecord)])
+            scans = [record for record in records if isinstance(record, ScanRecord)]
+            self.assertEqual(navigator.ledger.mission.point_cost, sum(scan.cost for scan in scans))
+            self.assertEqual(navigator.points_scanned, sum(len(scan.scanned) for scan in scans))
+            decisions = [record for record in records if isinstance(record, DecisionRecord)]
+            self.assertEqual([point.to_2d() for point in path[1:]], [decision.next_point for decision in decisions])
+            self.assertIsInstance(records[0], MissionStart)
+            self.assertEqual(2, len(records[0].sensors))
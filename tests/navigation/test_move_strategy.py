@@ -1,5 +1,19 @@
 # -*- coding: utf-8 -*-
 import unittest
+import json
+import math
+import random
+from itertools import islice
+from geometry.point import Point2D, PointArray, ORIGIN
+from navigation.destinations import ExtractionPoint, HighestInRadius, SearchArea
+from navigation.move_strategy import (ClimbStrategy, GradientClimbStrategy, MoveStrategyType, SweepCoverageStrategy,
+                                      make_move_strategy)
+from navigation.navigator import Navigator
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from topology.procedural_topology import ProceduralTopology
+from topology.retention_policy import TrustForeverPolicy
+from topology.topology_factory import TopologyFactory
+from topology.topology_map import TopologyMap, OUT_OF_BOUNDS, iter_x_y_in_radius
 
 
 # TODO write test cases for each MoveStrategy. This will take some time
@@ -10,3 +24,119 @@ class TestMoveStrategy(unittest.TestCase):
 
     def test_Naive_(self):
         pass
+
+    def test_climb_turns_away_from_the_point_at_corners(self):
+        tm = TopologyMap()
+        for y in range(21):
+            for x in range(13):
+                tm.set_z(Point2D(x, y), 5 if (x, y) == (11, 11) else 0)
+        # the corner up and to the right is highest, but known all round. Stepping perpendicularly from it would lead
+        # straight back to the point, so it turns the other way, towards the unknown cells
+        self.assertEqual(Point2D(12, 10), ClimbStrategy("Climb")(tm, Point2D(10, 10), ExtractionPoint()))
+
+    def test_climb_steps_off_known_ground(self):
+        tm = TopologyMap()
+        for y in range(21):
+            tm.set_z_row(Point2D(0, y), [0] * 21)
+        strategy = ClimbStrategy("Climb", cardinal_move_amount=2, ordinal_move_amount=4,
+                                 prefer_cardinal_to_ordinal=False)
+        # the corner 4 away is known, and stepping perpendicularly from it heads back within a move of the point
+        new_point, cardinal = strategy._determine_new_point(tm, Point2D(10, 10), PointArray([-1], [-1]), 1)
+        self.assertFalse(cardinal)
+        self.assertGreater(tm.count_unknown_in_radius(new_point, 1), 0)
+
+    def test_binary_search_goes_back_to_the_high_point_next_to_it(self):
+        tm = TopologyMap()
+        for y in range(-3, 4):
+            tm.set_z_row(Point2D(-3, y), [0] * 7)
+        tm.set_z(Point2D(1, 0), 2)
+        strategy = make_move_strategy(MoveStrategyType.BINARY_SEARCH)
+        strategy.highest_point = Point2D(1, 0)
+        # we went downhill from the high point next door. Halfway back floors to where we are, so we'd never move
+        self.assertEqual(Point2D(1, 0), strategy(tm, ORIGIN, ExtractionPoint()))
+
+
+class TestSweepCoverageStrategy(unittest.TestCase):
+    def setUp(self):
+        self.simulated_map = ProceduralTopology(seed=46)
+
+    def sweep(self, navigator, steps, radius=1):
+        sensor = SimulatedTopologySensor(simulated_map=self.simulated_map, radius=radius, scan_point_cost=1)
+        points = [pt.to_2d() for pt in islice(navigator.iter_points_to_destination(Point2D(10, 7), [sensor]), steps)]
+        return points, sensor
+
+    def test_covers_bounds_without_overlap(self):
+        navigator = Navigator(TopologyMap(Point2D(0, 0), Point2D(20, 14)), SweepCoverageStrategy("Sweep", extent=9),
+                              SearchArea())
+        points, sensor = self.sweep(navigator, 40)
+        self.assertEqual(21 * 15, navigator.topology_map.count_known_in_rect(Point2D(0, 0), Point2D(20, 14)))
+        self.assertEqual(21 * 15 // 9, sensor.power_on_count)  # every scan covers 9 new cells
+        self.assertEqual(points[34:], [points[34]] * 6)  # then it stays put
+        self.assertEqual([(10, 7), (7, 7), (7, 4), (10, 4), (13, 4), (13, 7)], [pt.to_tuple() for pt in points[:6]])
+
+    def test_uses_smallest_sensor_radius(self):
+        navigator = Navigator(TopologyMap(), SweepCoverageStrategy("Sweep"), HighestInRadius(3))
+        points, _sensor = self.sweep(navigator, 3, radius=2)
+        self.assertEqual(5, points[1].max_orthogonal_distance(points[2]))
+
+    def test_skips_what_is_known(self):
+        strategy = SweepCoverageStrategy("Sweep", extent=9)
+        navigator = Navigator(TopologyMap(Point2D(0, 0), Point2D(20, 14)), strategy, SearchArea(),
+                              retention_policy=TrustForeverPolicy())
+        self.sweep(navigator, 40)
+        points, sensor = self.sweep(navigator, 5)
+        self.assertEqual([Point2D(10, 7)] * 5, points)  # nothing left to cover
+        self.assertEqual(0, sensor.power_on_count)
+
+    def test_finds_extraction_points_on_the_map(self):
+        for seed in range(4):
+            simulated_map = TopologyFactory.make_fake_topology(upper_right=Point2D(59, 59), rng=random.Random(seed))
+            sensor = SimulatedTopologySensor(simulated_map=simulated_map, power_on_cost=4, scan_point_cost=2)
+            # without bounds, the first region sticks out past the west edge, and stops there scan nothing but
+            # OUT_OF_BOUNDS
+            for topology_map in [TopologyMap(), TopologyMap(Point2D(0, 0), Point2D(59, 59))]:
+                navigator = Navigator(topology_map, SweepCoverageStrategy("Sweep"), ExtractionPoint())
+                list(islice(navigator.iter_points_to_destination(Point2D(10, 40), [sensor]), 500))
+                with self.subTest(seed=seed, bounds=topology_map.bounds):
+                    found = navigator.found
+                    self.assertIsNotNone(simulated_map.get_z(found))
+                    self.assertNotEqual(OUT_OF_BOUNDS, found.z)
+                    self.assertTrue(ExtractionPoint()(navigator.topology_map, found.to_2d()))
+
+    def test_state(self):
+        strategy = SweepCoverageStrategy("Sweep", extent=9)
+        navigator = Navigator(TopologyMap(), strategy, SearchArea())
+        self.sweep(navigator, 4)
+        restored = SweepCoverageStrategy("Sweep", extent=9)
+        restored.set_state(json.loads(json.dumps(strategy.get_state())))
+        tm, point, destination = navigator.topology_map, Point2D(10, 4), SearchArea()
+        self.assertEqual(strategy.predict_points(tm, point, destination, 3),
+                         restored.predict_points(tm, point, destination, 3))
+        self.assertEqual([strategy(tm, point, destination) for _ in range(20)],
+                         [restored(tm, point, destination) for _ in range(20)])
+
+
+class TestGradientClimbStrategy(unittest.TestCase):
+    def test_jump_adapts_to_fit(self):
+        strategy = GradientClimbStrategy("Gradient Climb", max_jump=10, jump_gain=2)
+        tm = TopologyMap()
+        for x, y in iter_x_y_in_radius(2):
+            tm.set_z(Point2D(x, y), 3 * x + 4 * y)
+        self.assertEqual(Point2D(6, 8), strategy(tm, ORIGIN, ExtractionPoint()))  # smooth, so as far as it can
+        tm.set_z(Point2D(-2, 2), 20)
+        slope_x, slope_y, residual = tm.fit_plane(ORIGIN, 2)
+        length = 2 * math.hypot(slope_x, slope_y) / residual
+        self.assertLess(length, 5)
+        next_point = strategy(tm, ORIGIN, ExtractionPoint())
+        self.assertAlmostEqual(length, next_point.distance2d(ORIGIN), delta=1)
+
+    def test_fewer_scans_on_smooth_ground(self):
+        simulated_map = ProceduralTopology(seed=47, density=.0005, tile_size=128)
+        scans = []
+        for strategy_type in (MoveStrategyType.GRADIENT_CLIMB, MoveStrategyType.CLIMB_MOVE_1):
+            sensor = SimulatedTopologySensor(simulated_map=simulated_map, scan_point_cost=1)
+            navigator = Navigator(TopologyMap(), make_move_strategy(strategy_type), ExtractionPoint())
+            list(islice(navigator.iter_points_to_destination(Point2D(300, 200), [sensor]), 500))
+            self.assertIsNotNone(navigator.found)
+            scans.append(sensor.power_on_count)
+        self.assertLess(2 * scans[0], scans[1])
@@ -1,13 +1,18 @@
 # -*- coding: utf-8 -*-
+import random
+from itertools import islice
 from unittest import TestCase
-from tests.sensors.simulated_topology_sensor import SimulatedTopologySensor
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from sensors.topology_sensor import TopologySensor
 from navigation.navigator import Navigator
 from topology.topology_map import TopologyMap
 from tests.topology.test_topology_map import make_example_topology
 from navigation.navigator_factory import NavigatorFactory
 from navigation.move_strategy import make_move_strategy, MoveStrategyType
-from geometry.point import Point2D, Point3D
+from geometry.point import Point2D, Point3D, PointArray
 from navigation.destinations import ExtractionPoint
+from topology.topology_factory import TopologyFactory
+from sensors.power_policy import KeepWarmPolicy
 
 
 # TEST_MAP = [
@@ -57,6 +62,19 @@ class TestNavigator(TestCase):
         path = list(self.navigator.iter_points_to_destination(point, self.sensors))
         self.assertCountEqual([Point3D(4, 1, 1), Point3D(3, 2, 2), Point3D(2, 2, 3)], path)
 
+    def test_navigator_can_be_reused(self):
+        simulated_map = TopologyFactory.make_fake_topology(upper_right=Point2D(39, 39), rng=random.Random(2))
+        laser = SimulatedTopologySensor(simulated_map=simulated_map, power_on_cost=4, scan_point_cost=2)
+        for move_strategy in MoveStrategyType:
+            navigator = NavigatorFactory.make_navigator(topology_map=TopologyMap(), move_strategy=move_strategy,
+                                                        destination=ExtractionPoint())
+            list(islice(navigator.iter_points_to_destination(Point2D(5, 30), [laser]), 200))
+            fresh = NavigatorFactory.make_navigator(topology_map=TopologyMap(), move_strategy=move_strategy,
+                                                    destination=ExtractionPoint())
+            with self.subTest(move_strategy=move_strategy):
+                self.assertEqual(list(islice(fresh.iter_points_to_destination(Point2D(20, 8), [laser]), 200)),
+                                 list(islice(navigator.iter_points_to_destination(Point2D(20, 8), [laser]), 200)))
+
     def test_scan_and_get_destination_point_candidates(self):
         # we should get the point, its 8 surrounding points, and for each of those 8, their surrounding points
         # the result is essentially a 5x5 grid of points centered around the origin point
@@ -85,3 +103,156 @@ class TestNavigator(TestCase):
         offsets = [(-1, 0), (0, 1), (1, 1)]
         best = Navigator.choose_best_sensor(self.sensors, offsets)
         self.assertEqual(self.laser, best)
+
+    def test_points_scanned(self):
+        list(self.navigator.iter_points_to_destination(Point2D(4, 1), [self.laser]))
+        self.assertEqual(self.navigator.points_scan_baseline, self.navigator.points_scanned)
+
+
+class ArrayOnlySensor(SimulatedTopologySensor):
+    """
+    Can only scan PointArrays, to check a full scan is passed through without a tuple for each offset
+    """
+    def scan_points(self, offsets, home_point):
+        raise AssertionError("Scanned with a list of offsets")
+
+    def scan_point_array(self, offsets, home_point):
+        if not isinstance(offsets, PointArray):
+            raise AssertionError("Scanned with a list of offsets")
+        return super().scan_point_array(offsets, home_point)
+
+
+class TupleScanSensor(SimulatedTopologySensor):
+    """
+    Scans PointArrays with scan_points, as sensors which can't read many points at once do
+    """
+    scan_point_array = TopologySensor.scan_point_array
+
+
+class TestPointArrayScan(TestCase):
+    def test_same_as_scanning_tuples(self):
+        simulated_map = TopologyFactory.make_fake_topology(upper_right=Point2D(40, 40), rng=random.Random(4))
+        for strategy in [MoveStrategyType.CLIMB_MOVE_1, MoveStrategyType.BINARY_SEARCH]:
+            missions = []
+            for sensor_class in [ArrayOnlySensor, TupleScanSensor]:
+                navigator = NavigatorFactory.make_navigator(topology_map=TopologyMap(),
+                                                            move_strategy=make_move_strategy(strategy),
+                                                            destination=ExtractionPoint())
+                sensor = sensor_class(simulated_map, radius=2, scan_point_cost=1)
+                points = list(islice(navigator.iter_points_to_destination(Point2D(8, 24), [sensor]), 500))
+                known = list(navigator._topology_map.iter_known_in_rect(Point2D(-5, -5), Point2D(45, 45)))
+                missions.append((points, known, navigator.points_scanned))
+            with self.subTest(strategy=strategy):
+                self.assertEqual(missions[0], missions[1])
+                self.assertGreater(len(missions[0][1]), 25)
+
+
+class TestIncrementalScan(TestCase):
+    def setUp(self):
+        simulated_map = make_example_topology()
+        self.laser = SimulatedTopologySensor(simulated_map=simulated_map, power_on_cost=4, scan_point_cost=2)
+        self.navigator = NavigatorFactory.make_navigator(topology_map=TopologyMap(),
+                                                         move_strategy=make_move_strategy(
+                                                             MoveStrategyType.CLIMB_MOVE_1),
+                                                         destination=ExtractionPoint(),
+                                                         incremental_scan=True)
+
+    def test_stops_when_ruled_out(self):
+        self.navigator._scan_and_get_destination_point_candidates(Point2D(4, 1), [self.laser])
+        self.assertEqual(9, self.navigator.points_scan_baseline)
+        self.assertLess(self.navigator.points_scanned, 9)
+        self.assertEqual(self.navigator.points_scanned, self.laser._scan_point_count)
+
+    def test_checks_neighbours_when_already_ruled_out(self):
+        tm = self.navigator._topology_map
+        for x in range(2, 5):
+            for y in range(3):
+                tm.set_z(Point2D(x, y), 5 if (x, y) == (3, 1) else 1)
+        # (4,1) is ruled out by (3,1) without scanning, but (3,1) is an extraction point and still a candidate
+        candidates = self.navigator._scan_and_get_destination_point_candidates(Point2D(4, 1), [self.laser])
+        self.assertEqual(0, self.laser._scan_point_count)
+        self.assertIn(Point2D(3, 1), candidates)
+
+    def test_scans_uphill_first(self):
+        tm = self.navigator._topology_map
+        for x, y, z in [(3, 0, 1), (4, 0, 1), (5, 0, 1), (3, 1, 2), (4, 1, 1), (5, 1, 1)]:
+            tm.set_z(Point2D(x, y), z)
+        # the known points slope up to the west, so the north west point is scanned first
+        self.assertEqual([(-1, 1), (0, 1), (1, 1)],
+                         self.navigator._order_by_likely_higher(Point2D(4, 1), [(1, 1), (0, 1), (-1, 1)]))
+
+    def test_finds_extraction_point(self):
+        path = list(self.navigator.iter_points_to_destination(Point2D(4, 1), [self.laser]))
+        self.assertEqual(Point3D(2, 2, 3), path[-1])
+        self.assertLess(self.navigator.points_scanned, self.navigator.points_scan_baseline)
+
+    def test_missions_end_on_a_peak(self):
+        for seed in range(3):
+            simulated_map = TopologyFactory.make_fake_topology(upper_right=Point2D(59, 59), rng=random.Random(seed))
+            laser = SimulatedTopologySensor(simulated_map=simulated_map, power_on_cost=4, scan_point_cost=2)
+            for move_strategy in MoveStrategyType:
+                navigator = NavigatorFactory.make_navigator(topology_map=TopologyMap(), move_strategy=move_strategy,
+                                                            destination=ExtractionPoint(), incremental_scan=True)
+                for start in [Point2D(10, 40), Point2D(45, 12)]:
+                    with self.subTest(seed=seed, move_strategy=move_strategy, start=start):
+                        list(islice(navigator.iter_points_to_destination(start, [laser]), 1000))
+                        found = navigator.found
+                        self.assertIsNotNone(found)  # it got there, without going round in circles
+                        self.assertFalse(simulated_map.point_is_out_of_bounds(found))
+                        self.assertEqual(simulated_map.get_z(found), found.z)
+                        self.assertEqual(found.z, max(z for _x, _y, z, _pt in
+                                                      simulated_map.iter_known_x_y_z_pt_in_radius(found, 1)))
+
+    def test_free_points_are_scanned_all_at_once(self):
+        radar = SimulatedTopologySensor(simulated_map=make_example_topology(), power_on_cost=10, scan_point_cost=0)
+        self.navigator._scan_and_get_destination_point_candidates(Point2D(4, 1), [radar])
+        self.assertEqual(9, self.navigator.points_scanned)
+
+
+class TestZeroHeightTerrain(TestCase):
+    def test_zero_height_points_are_not_rescanned(self):
+        simulated_map = TopologyFactory.make_from_matrix([[0, 0, 0, 0, 0],
+                                                          [0, 0, 0, 0, 0],
+                                                          [0, 0, 0, 0, 1],
+                                                          [0, 0, 0, 0, 0]], set_bounds=False)
+        laser = SimulatedTopologySensor(simulated_map=simulated_map, power_on_cost=4, scan_point_cost=2)
+        navigator = NavigatorFactory.make_navigator(topology_map=TopologyMap(),
+                                                    move_strategy=make_move_strategy(MoveStrategyType.CLIMB_MOVE_1),
+                                                    destination=ExtractionPoint())
+        path = list(navigator.iter_points_to_destination(Point2D(2, 1), [laser]))
+        self.assertEqual([Point3D(2, 1, 0)], path)  # flat ground is an extraction point too
+        path = list(navigator.iter_points_to_destination(Point2D(3, 1), [laser]))
+        self.assertEqual(Point3D(4, 1, 1), path[-1])
+        known = list(navigator._topology_map.iter_all_points_xyz())
+        self.assertEqual(len(known), navigator.points_scanned)  # every point was only scanned once
+
+
+class TestPowerPolicy(TestCase):
+    def make_navigator(self, power_policy=None):
+        return NavigatorFactory.make_navigator(topology_map=TopologyMap(),
+                                               move_strategy=make_move_strategy(MoveStrategyType.CLIMB_MOVE_1),
+                                               destination=ExtractionPoint(), power_policy=power_policy)
+
+    def test_power_on_counted_once(self):
+        sensor = SimulatedTopologySensor(simulated_map=make_example_topology(), power_on_cost=4, scan_point_cost=2)
+        navigator = self.make_navigator()
+        list(navigator.iter_points_to_destination(Point2D(4, 1), [sensor]))
+        self.assertEqual(3, sensor.power_on_count)  # once per scan
+        self.assertEqual(sensor.total_cost, navigator.scan_cost)
+        self.assertFalse(sensor.is_on)
+
+    def test_keep_warm_saves_power_on_cost(self):
+        path = None
+        costs = []
+        for power_policy in [None, KeepWarmPolicy()]:
+            sensor = SimulatedTopologySensor(simulated_map=make_example_topology(), power_on_cost=50,
+                                             scan_point_cost=1, idle_cost=1)
+            navigator = self.make_navigator(power_policy)
+            found_path = list(navigator.iter_points_to_destination(Point2D(4, 1), [sensor]))
+            self.assertEqual(path or found_path, found_path)  # power doesn't change where we go
+            path = found_path
+            costs.append(navigator.scan_cost)
+            self.assertEqual(sensor.total_cost, navigator.scan_cost)
+            self.assertFalse(sensor.is_on)  # turned off at the end of the mission
+        self.assertEqual(costs[0] - costs[1], navigator.power_policy.cost_saved)
+        self.assertEqual(2 * 50 - 2, navigator.power_policy.cost_saved)  # 2 power ons avoided, 2 steps idle
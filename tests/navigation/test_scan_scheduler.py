@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from tests.topology.test_topology_map import make_example_topology
+from navigation.scan_scheduler import ScanScheduler
+from navigation.navigator_factory import NavigatorFactory
+from navigation.move_strategy import MoveStrategyType
+from navigation.destinations import ExtractionPoint
+from geometry.point import Point2D
+from topology.topology_map import TopologyMap
+
+NEAR = [(x, y) for x in (-1, 0, 1) for y in (-1, 0, 1)]
+FAR = [(3, 0), (3, 1), (-3, 2)]
+
+
+class TestScanScheduler(TestCase):
+    def setUp(self):
+        simulated_map = make_example_topology()
+        self.laser = SimulatedTopologySensor(simulated_map=simulated_map, radius=1, power_on_cost=4,
+                                             scan_point_cost=2)
+        self.radar = SimulatedTopologySensor(simulated_map=simulated_map, radius=3, power_on_cost=10,
+                                             scan_point_cost=3)
+        self.sensors = [self.radar, self.laser]
+        self.scheduler = ScanScheduler()
+
+    def tearDown(self):
+        self.scheduler.close()
+
+    def test_single_sensor_when_cheapest(self):
+        self.assertEqual({self.laser: NEAR}, self.scheduler.plan(self.sensors, NEAR))
+
+    def test_split_by_range(self):
+        # only the radar reaches the far offsets, but the laser is cheaper for the near ones
+        plan = self.scheduler.plan(self.sensors, NEAR + FAR)
+        self.assertEqual({self.radar: FAR, self.laser: NEAR}, plan)
+        self.assertEqual([self.radar, self.laser], list(plan))
+
+    def test_no_split_when_power_on_outweighs(self):
+        plan = self.scheduler.plan(self.sensors, [(0, 0), (3, 0)])
+        self.assertEqual({self.radar: [(0, 0), (3, 0)]}, plan)  # 10 + 2 * 3 < 10 + 3 + 4 + 2
+
+    def test_unreachable_offsets_go_to_cheapest(self):
+        self.assertEqual({self.laser: [(9, 9)]}, self.scheduler.plan(self.sensors, [(9, 9)]))
+
+    def test_scan_merges_and_totals(self):
+        plan = self.scheduler.plan(self.sensors, NEAR + FAR)
+        result = self.scheduler.scan(plan, Point2D(3, 2))
+        self.assertEqual(len(NEAR + FAR), len(result.scanned_points))
+        self.assertEqual(len(NEAR) * 2 + len(FAR) * 3, result.cost)
+        self.assertEqual({self.laser: len(NEAR) * 2, self.radar: len(FAR) * 3}, result.costs_by_sensor)
+        self.assertEqual((1, result.cost), (self.scheduler.scans, self.scheduler.total_cost))
+
+    def test_scans_run_at_the_same_time(self):
+        simulated_map = make_example_topology()
+        slow = [SimulatedTopologySensor(simulated_map=simulated_map, radius=radius, scan_point_cost=cost,
+                                        scan_latency=.2) for radius, cost in [(1, 1), (3, 2)]]
+        result = self.scheduler.scan(self.scheduler.plan(slow, NEAR + FAR), Point2D(3, 2))
+        self.assertEqual(2, len(result.costs_by_sensor))
+        self.assertGreaterEqual(result.serial_latency, .4)
+        self.assertLess(result.latency, .35)
+
+
+class TestNavigatorWithScheduler(TestCase):
+    def test_same_path_lower_cost(self):
+        results = []
+        for scheduler in [None, ScanScheduler()]:
+            simulated_map = make_example_topology()
+            laser = SimulatedTopologySensor(simulated_map=simulated_map, power_on_cost=4, scan_point_cost=2)
+            radar = SimulatedTopologySensor(simulated_map=simulated_map, power_on_cost=2, scan_point_cost=3)
+            navigator = NavigatorFactory.make_navigator(topology_map=TopologyMap(),
+                                                        move_strategy=MoveStrategyType.CLIMB_MOVE_1,
+                                                        destination=ExtractionPoint(), scan_scheduler=scheduler)
+            path = list(navigator.iter_points_to_destination(Point2D(4, 1), [laser, radar]))
+            results.append((path, navigator.scan_cost, laser.total_cost + radar.total_cost))
+            self.assertEqual(scheduler, navigator.scan_scheduler)
+        (path, cost, sensor_cost), (scheduled_path, scheduled_cost, scheduled_sensor_cost) = results
+        self.assertEqual(path, scheduled_path)
+        self.assertLessEqual(scheduled_cost, cost)
+        self.assertEqual(scheduled_sensor_cost, scheduled_cost)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import os
+import random
+import tempfile
+from unittest import TestCase
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from topology.topology_factory import TopologyFactory
+from navigation.move_strategy import (BINARY_SEARCH, CLIMB, BinarySearchStrategy, ClimbStrategy, MoveStrategyType,
+                                      make_climb_strategy, make_move_strategy)
+from navigation.strategy_tuner import (SETTINGS_DEFAULTS, StrategyTuner, TuningResult, _best, fly_missions,
+                                       load_tuned_strategy, neighbours, save_tuned_strategies, tuned_strategy_name)
+from geometry.point import Point2D
+
+
+def make_terrain(density, seed):
+    random.seed(seed)
+    return TopologyFactory.make_fake_topology(density=density, upper_right=Point2D(15, 15))
+
+
+def make_slope(density, seed):
+    return TopologyFactory.make_from_matrix([list(range(5))] * 5)
+
+
+def make_sensor(simulated_map):
+    return SimulatedTopologySensor(simulated_map=simulated_map, power_on_cost=4, scan_point_cost=1)
+
+
+class TestStrategyTuner(TestCase):
+    def test_make_climb_strategy(self):
+        strategy = make_climb_strategy("Tuned", {'kind': BINARY_SEARCH, 'cardinal_move_amount': 5,
+                                                 'ordinal_move_amount': 4, 'cardinal_floor': 2, 'ordinal_floor': 1,
+                                                 'prefer_cardinal_to_ordinal': False})
+        self.assertIsInstance(strategy, BinarySearchStrategy)
+        self.assertEqual("Tuned", strategy.name)
+        self.assertEqual((range(5, 2, -1), range(4, 1, -1)), (strategy.cardinal_range, strategy.ordinal_range))
+        self.assertIs(ClimbStrategy, type(make_climb_strategy("Tuned", {'kind': CLIMB})))
+        self.assertRaises(ValueError, make_climb_strategy, "Tuned", {'kind': 'spiral'})
+        binary_search = make_move_strategy(MoveStrategyType.BINARY_SEARCH)
+        self.assertEqual((range(6, 3, -1), range(6, 1, -1)),
+                         (binary_search.cardinal_range, binary_search.ordinal_range))
+
+    def test_samples_and_neighbours_are_valid(self):
+        tuner = StrategyTuner(make_terrain, make_sensor, [.02], seed=1)
+        for _ in range(50):
+            settings = tuner.sample_settings()
+            make_climb_strategy("Sampled", settings)
+            for neighbour in neighbours(settings) + [settings]:
+                self.assertTrue(1 <= neighbour['cardinal_move_amount'] <= 8)
+                if neighbour['kind'] == BINARY_SEARCH:
+                    self.assertTrue(1 <= neighbour['cardinal_floor'] < neighbour['cardinal_move_amount'])
+                    self.assertTrue(1 <= neighbour['ordinal_floor'] < neighbour['ordinal_move_amount'])
+        settings = dict(SETTINGS_DEFAULTS, kind=CLIMB, cardinal_move_amount=1, ordinal_move_amount=8)
+        self.assertEqual(4, len(neighbours(settings)))
+
+    def test_result_statistics(self):
+        result = TuningResult(.02, {'kind': CLIMB}, list(range(1, 21)), 18)
+        self.assertEqual(10.5, result.mean)
+        self.assertEqual(19, result.p95)
+
+    def test_missions_leaving_the_map_give_up(self):
+        settings = dict(SETTINGS_DEFAULTS, kind=CLIMB, cardinal_move_amount=8, ordinal_move_amount=8)
+        costs_by_settings, found_by_settings = fly_missions(make_slope, make_sensor, .01, 0, [settings],
+                                                            [Point2D(1, 2)])
+        # the climb jumps off the east edge, and would wander off the map until MAX_STEPS
+        self.assertEqual([0], found_by_settings)
+        self.assertEqual([[2 * (4 + 9)]], costs_by_settings)
+
+    def test_settings_which_get_lost_are_not_chosen(self):
+        lost = dict(SETTINGS_DEFAULTS, kind=CLIMB, cardinal_move_amount=8, ordinal_move_amount=8)
+        climbing = dict(SETTINGS_DEFAULTS, kind=CLIMB, cardinal_move_amount=1, ordinal_move_amount=1)
+        costs_by_settings, found_by_settings = fly_missions(make_slope, make_sensor, .01, 0, [lost, climbing],
+                                                            [Point2D(1, 2), Point2D(0, 0)])
+        results = [TuningResult(.01, settings, costs, found)
+                   for settings, costs, found in zip([lost, climbing], costs_by_settings, found_by_settings)]
+        self.assertEqual([0, 2], [result.found for result in results])
+        self.assertLess(results[0].mean, results[1].mean)  # getting lost early is cheaper
+        self.assertEqual({'mean': results[1], 'p95': results[1]}, _best(results))
+
+    def test_tune_save_and_load(self):
+        tuner = StrategyTuner(make_terrain, make_sensor, [.01, .05], seeds=range(2), starts_per_map=3,
+                              upper_right=Point2D(15, 15), samples=4, rounds=1, max_workers=1)
+        tuned = tuner.tune()
+        self.assertEqual({.01, .05}, set(tuned))
+        default = StrategyTuner(make_terrain, make_sensor, [.01], seeds=range(2), starts_per_map=3,
+                                upper_right=Point2D(15, 15), samples=0, rounds=0, max_workers=1).tune()[.01]
+        for objective in ('mean', 'p95'):
+            self.assertEqual(6, len(tuned[.01][objective].costs))
+            self.assertLessEqual(getattr(tuned[.01][objective], objective), getattr(default[objective], objective))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tuned.json')
+            save_tuned_strategies(path, tuned)
+            name = tuned_strategy_name(.05, 'p95')
+            strategy = load_tuned_strategy(path, name)
+            self.assertEqual(name, strategy.name)
+            self.assertEqual(tuned[.05]['p95'].settings['cardinal_move_amount'],
+                             strategy.get_state()['cardinal_move_amount'])
+            self.assertRaises(ValueError, load_tuned_strategy, path, "density 1 mean")
+
+    def test_process_pool_gives_same_results(self):
+        results = []
+        for max_workers in (1, 2):
+            tuner = StrategyTuner(make_terrain, make_sensor, [.03], seeds=range(2), starts_per_map=2,
+                                  upper_right=Point2D(15, 15), samples=2, rounds=0, max_workers=max_workers)
+            results.append({objective: (result.settings, result.costs)
+                            for objective, result in tuner.tune()[.03].items()})
+        self.assertEqual(results[0], results[1])
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import unittest
+from sensors.power_policy import AlwaysOffPolicy, KeepWarmPolicy, HysteresisPolicy, CostModelPolicy
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from topology.topology_factory import TopologyFactory
+
+
+def run_steps(policy, sensor, used_at_steps):
+    """
+    Runs the policy through steps, using the sensor at some of them
+    :return: total power on and idle cost
+    """
+    cost = 0
+    policy.reset()
+    for used in used_at_steps:
+        cost += policy.before_step([sensor])
+        if used:
+            cost += policy.turn_on(sensor)
+        policy.after_step([sensor], sensor if used else None)
+    policy.end_mission([sensor])
+    return cost
+
+
+class TestPowerPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.sensor = SimulatedTopologySensor(TopologyFactory.make_from_matrix([[1]]), power_on_cost=10, idle_cost=1)
+
+    def test_sensor_charges_power_on_only_when_off(self):
+        self.assertEqual(10, self.sensor.turn_on())
+        self.assertEqual(0, self.sensor.turn_on())
+        self.assertEqual(1, self.sensor.power_on_count)
+        self.assertEqual(0, self.sensor.estimate_cost_to_scan([(0, 0)]))
+        self.sensor.turn_off()
+        self.assertEqual(10, self.sensor.estimate_cost_to_scan([(0, 0)]))
+        self.assertEqual(10, self.sensor.total_cost)
+
+    def test_always_off(self):
+        policy = AlwaysOffPolicy()
+        self.assertEqual(30, run_steps(policy, self.sensor, [True, True, False, True]))
+        self.assertEqual(0, policy.cost_saved)
+        self.assertEqual(3, self.sensor.power_on_count)
+
+    def test_keep_warm(self):
+        policy = KeepWarmPolicy()
+        # on, idle 1 while moving, reused; idle 1 then off; on again
+        self.assertEqual(10 + 1 + 1 + 10, run_steps(policy, self.sensor, [True, True, False, True]))
+        self.assertEqual(10 - 2, policy.cost_saved)
+        self.assertFalse(self.sensor.is_on)
+
+    def test_hysteresis(self):
+        policy = HysteresisPolicy(timeout=3)
+        self.assertEqual(10 + 3, run_steps(policy, self.sensor, [True, False, False, True]))
+        self.assertEqual(10 - 3, policy.cost_saved)
+        self.assertEqual(10 + 3 + 10, run_steps(policy, self.sensor, [True, False, False, False, True]))
+        self.assertEqual(-3, policy.cost_saved)
+
+    def test_cost_model_learns(self):
+        policy = CostModelPolicy()
+        self.assertAlmostEqual(.5, policy.probability_needed_next(self.sensor, 0))
+        run_steps(policy, self.sensor, [True] * 10)
+        self.assertGreater(policy.probability_needed_next(self.sensor, 0), .9)
+        run_steps(policy, self.sensor, [True, False] * 10)  # now it's never needed right after it's used
+        self.assertLess(policy.probability_needed_next(self.sensor, 0), .5)
+        self.assertGreater(policy.probability_needed_next(self.sensor, 1), .9)
+
+    def test_cost_model_turns_off_when_idling_is_expensive(self):
+        sensor = SimulatedTopologySensor(TopologyFactory.make_from_matrix([[1]]), power_on_cost=10, idle_cost=20)
+        policy = CostModelPolicy()
+        self.assertEqual(30, run_steps(policy, sensor, [True, True, True]))
+        self.assertEqual(0, policy.cost_saved)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+from unittest import TestCase
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from tests.topology.test_topology_map import make_example_topology
+from sensors.replay_topology_sensor import ReplayTopologySensor
+from navigation.mission_trace import MissionTrace
+from navigation.navigator_factory import NavigatorFactory
+from navigation.move_strategy import MoveStrategyType
+from navigation.destinations import ExtractionPoint
+from geometry.point import Point2D
+from topology.topology_map import TopologyMap, OUT_OF_BOUNDS
+
+START = Point2D(4, 1)
+
+
+class TestReplayTopologySensor(TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._directory.name, 'mission.mtr')
+        self.simulated_map = make_example_topology()
+        self.sensors = [SimulatedTopologySensor(simulated_map=self.simulated_map, power_on_cost=4, scan_point_cost=2),
+                        SimulatedTopologySensor(simulated_map=self.simulated_map, radius=2, power_on_cost=9,
+                                                scan_point_cost=1)]
+        with MissionTrace(self.path) as trace:
+            self.path_flown, self.cost = self.fly(self.sensors, MoveStrategyType.CLIMB_MOVE_1, trace)
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    @staticmethod
+    def fly(sensors, strategy_type, trace=None):
+        navigator = NavigatorFactory.make_navigator(topology_map=TopologyMap(), move_strategy=strategy_type,
+                                                    destination=ExtractionPoint(), trace=trace)
+        return list(navigator.iter_points_to_destination(START, sensors)), navigator.scan_cost
+
+    def test_replays_same_mission(self):
+        sensors = ReplayTopologySensor.from_trace(self.path)
+        self.assertEqual([(1, 4, 2, 0), (2, 9, 1, 0)], [(s.radius, s.power_on_cost, s.scan_point_cost, s.idle_cost)
+                                                        for s in sensors])
+        path, cost = self.fly(sensors, MoveStrategyType.CLIMB_MOVE_1)
+        self.assertEqual(self.path_flown, path)
+        self.assertEqual(self.cost, cost)
+        self.assertEqual([s.total_cost for s in self.sensors], [s.total_cost for s in sensors])
+        self.assertFalse(any(sensor.diverged for sensor in sensors))
+
+    def test_flags_divergence(self):
+        sensors = ReplayTopologySensor.from_trace(self.path)
+        path, _cost = self.fly(sensors, MoveStrategyType.SPIRAL_OUT_CCW)
+        self.assertNotEqual(self.path_flown, path)
+        divergences = [divergence for sensor in sensors for divergence in sensor.divergences]
+        self.assertTrue(divergences)
+        self.assertTrue(any(divergence.missing for divergence in divergences))
+
+        with_fallback = ReplayTopologySensor.from_trace(self.path, fallback_map=self.simulated_map)
+        expected = [SimulatedTopologySensor(simulated_map=self.simulated_map, power_on_cost=4, scan_point_cost=2),
+                    SimulatedTopologySensor(simulated_map=self.simulated_map, radius=2, power_on_cost=9,
+                                            scan_point_cost=1)]
+        self.assertEqual(self.fly(expected, MoveStrategyType.SPIRAL_OUT_CCW),
+                         self.fly(with_fallback, MoveStrategyType.SPIRAL_OUT_CCW))
+        self.assertTrue(any(sensor.diverged for sensor in with_fallback))
+
+    def test_serves_cells_not_in_trace_as_out_of_bounds(self):
+        sensor = ReplayTopologySensor.from_trace(self.path)[0]
+        scanned_points, cost = sensor.scan_points([(0, 0), (1000, 1000)], Point2D(-50, -50))
+        self.assertEqual([OUT_OF_BOUNDS, OUT_OF_BOUNDS], [z for _x, _y, z, _pt in scanned_points])
+        self.assertEqual(4, cost)
+        self.assertEqual([(0, 0), (1000, 1000)], sensor.divergences[0].missing)
+        self.assertRaises(ValueError, ReplayTopologySensor.from_trace, self.path, 1)
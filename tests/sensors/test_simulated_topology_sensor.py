@@ -1,13 +1,25 @@
 # -*- coding: utf-8 -*-
+import os
+import tempfile
 import unittest
-from tests.sensors.simulated_topology_sensor import SimulatedTopologySensor
-from tests.topology.topology_factory import TopologyFactory
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from topology.topology_factory import TopologyFactory
 from topology.topology_map import OUT_OF_BOUNDS
-from geometry.point import Point2D
+from topology.dem import write_npy
+from topology.procedural_topology import ProceduralTopology
+from geometry.point import Point2D, PointArray
 
 X = OUT_OF_BOUNDS  # For convenience in test comparisons, just call it X
 
 
+class GetZOnly(object):
+    """
+    A simulated map with nothing but get_z, so the sensor has to look up one point at a time
+    """
+    def __init__(self, simulated_map):
+        self.get_z = simulated_map.get_z
+
+
 class TestSimulatedTopologySensor(unittest.TestCase):
     """
     Remember that in the test cases, the expected matrices must be flipped because
@@ -48,3 +60,30 @@ class TestSimulatedTopologySensor(unittest.TestCase):
         self.sensor.scan_points(offsets, home_point)
         self.sensor.scan_points(offsets, home_point)
         self.assertEqual(8, self.sensor._scan_point_count)
+
+    def test_scan_memory_mapped_dem(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'dem.npy')
+            write_npy(path, [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12]], 4, 3, dtype='=i4')
+            sensor = SimulatedTopologySensor.from_npy(path, radius=1)
+            scan_results, _ = sensor.scan_points([(-1, 0), (0, 0), (1, 0)], Point2D(0, 1))
+            self.assertEqual([X, 5, 6], [z for _x, _y, z, _point in scan_results])
+            sensor._simulated_map.close()
+
+    def test_scan_point_array_same_as_scan_points(self):
+        matrix = [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12]]
+        offsets = PointArray([-1, 0, 1, 3, 100, -5, 2], [0, 0, 0, 1, 100, -5, -1])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'dem.npy')
+            write_npy(path, matrix, 4, 3, dtype='=i4')
+            from_matrix = TopologyFactory.make_from_matrix(matrix)
+            for simulated_map in [from_matrix, GetZOnly(from_matrix), ProceduralTopology(seed=3, tile_size=4),
+                                  SimulatedTopologySensor.from_npy(path)._simulated_map]:
+                with self.subTest(simulated_map=type(simulated_map).__name__):
+                    sensor = SimulatedTopologySensor(simulated_map, scan_point_cost=2)
+                    scanned, scan_cost = sensor.scan_point_array(offsets, Point2D(0, 1))
+                    expecting, expected_cost = SimulatedTopologySensor(simulated_map, scan_point_cost=2).scan_points(
+                        list(offsets), Point2D(0, 1))
+                    self.assertEqual([(x, y, z) for x, y, z, _point in expecting], list(scanned))
+                    self.assertEqual((expected_cost, 7, 14), (scan_cost, sensor._scan_point_count, sensor.total_cost))
+                    getattr(simulated_map, 'close', lambda: None)()
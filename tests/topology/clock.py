@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+Fake clock for tests of maps which stamp their cells
+"""
+
+
+class Clock(object):
+    """
+    Clock which only moves when told to
+    """
+    def __init__(self):
+        self.time = 0
+
+    def __call__(self):
+        return self.time
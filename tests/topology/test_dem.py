@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+import gc
+import os
+import tempfile
+import unittest
+import warnings
+from topology.dem import iter_esri_ascii_rows, load_esri_ascii_grid, write_npy, read_npy_header, iter_npy_rows, \
+    load_npy, iter_binary_rows, MemoryMappedTopology
+from topology.topology_map import OUT_OF_BOUNDS
+from geometry.point import Point2D
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+ESRI_ASCII = """ncols 4
+nrows 3
+xllcorner 100.0
+yllcorner 200.0
+cellsize 30
+NODATA_value -9999
+1 2 3 4
+5 -9999 7
+8
+9 10 11.5 12
+"""
+MATRIX = [[1, 2, 3, 4], [5, None, 7, 8], [9, 10, 11.5, 12]]
+
+
+class TestDem(unittest.TestCase):
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self._directory.name, name)
+
+    def _write_esri_ascii(self):
+        path = self._path('dem.asc')
+        with open(path, 'w') as file:
+            file.write(ESRI_ASCII)
+        return path
+
+    def test_esri_ascii_rows(self):
+        header, rows = iter_esri_ascii_rows(self._write_esri_ascii())
+        self.assertEqual({'ncols': 4, 'nrows': 3, 'xllcorner': 100.0, 'yllcorner': 200.0, 'cellsize': 30,
+                          'nodata_value': -9999}, header)
+        self.assertEqual(MATRIX, list(rows))  # the second row spans two lines
+
+    def test_esri_ascii_rows_not_read_leave_no_file_open(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            iter_esri_ascii_rows(self._write_esri_ascii())
+            gc.collect()
+        self.assertEqual([], [warning for warning in caught if issubclass(warning.category, ResourceWarning)])
+
+    def test_load_esri_ascii_grid(self):
+        tm = load_esri_ascii_grid(self._write_esri_ascii(), origin=Point2D(10, 20))
+        self.assertEqual(9, tm.get_z(Point2D(10, 20)))  # first row of the file is the top row
+        self.assertEqual(4, tm.get_z(Point2D(13, 22)))
+        self.assertFalse(tm.is_known(Point2D(11, 21)))  # nodata
+        self.assertEqual(11, tm.count_known_in_rect(Point2D(10, 20), Point2D(13, 22)))
+        self.assertFalse(tm.point_is_out_of_bounds(Point2D(13, 22)))
+        self.assertTrue(tm.point_is_out_of_bounds(Point2D(14, 22)))
+        self.assertTrue(tm.point_is_out_of_bounds(Point2D(10, 19)))
+
+    def test_npy_round_trip(self):
+        path = self._path('dem.npy')
+        write_npy(path, MATRIX, 4, 3, dtype='<f4')
+        with open(path, 'rb') as file:
+            self.assertEqual(('<f4', (3, 4)), read_npy_header(file))
+            self.assertEqual(0, file.tell() % 64)
+        shape, rows = iter_npy_rows(path, chunk_rows=2)
+        rows = [list(row) for row in rows]
+        self.assertEqual(3, len(rows))
+        self.assertEqual([9, 10, 11.5, 12], rows[2])
+        self.assertNotEqual(rows[1][1], rows[1][1])  # None was written as nan
+
+        tm = load_npy(path)
+        self.assertEqual(11.5, tm.get_z(Point2D(2, 0)))
+        self.assertFalse(tm.is_known(Point2D(1, 1)))
+
+    def test_raw_big_endian(self):
+        path = self._path('dem.raw')
+        write_npy(path, [[1, 2, 3], [4, 5, 6]], 3, 2, dtype='>i2')
+        with open(path, 'rb') as file:
+            read_npy_header(file)
+            offset = file.tell()
+        self.assertEqual([[1, 2, 3], [4, 5, 6]], [list(row) for row in iter_binary_rows(path, 3, '>i2', offset)])
+
+    def test_load_nodata(self):
+        path = self._path('dem.npy')
+        write_npy(path, [[1, -1], [-1, 2]], 2, 2, dtype='<i4')
+        tm = load_npy(path, nodata=-1)
+        self.assertEqual(2, tm.count_known_in_rect(Point2D(0, 0), Point2D(1, 1)))
+
+    def test_unsupported_dtype(self):
+        self.assertRaises(ValueError, write_npy, self._path('dem.npy'), MATRIX, 4, 3, dtype='<c8')
+
+    def test_memory_mapped_topology(self):
+        path = self._path('dem.npy')
+        write_npy(path, MATRIX, 4, 3, dtype='=f8')
+        with MemoryMappedTopology.from_npy(path, origin=Point2D(-1, -1)) as topology:
+            self.assertEqual((4, 3), topology.width_and_height)
+            self.assertEqual(9, topology.get_z(Point2D(-1, -1)))
+            self.assertEqual(12, topology.get_z(Point2D(2, -1)))
+            self.assertEqual(OUT_OF_BOUNDS, topology.get_z(Point2D(0, 0)))  # nodata
+            self.assertEqual(OUT_OF_BOUNDS, topology.get_z(Point2D(3, -1)))
+            self.assertTrue(topology.point_is_out_of_bounds(Point2D(-2, 0)))
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_reads_numpy_files(self):
+        path = self._path('dem.npy')
+        numpy.save(path, numpy.arange(12, dtype=numpy.int16).reshape(3, 4))
+        tm = load_npy(path)
+        self.assertEqual(8, tm.get_z(Point2D(0, 0)))
+        with MemoryMappedTopology.from_npy(path) as topology:
+            self.assertEqual(3, topology.get_z(Point2D(3, 2)))
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpy_reads_our_files(self):
+        path = self._path('dem.npy')
+        write_npy(path, [[1, 2], [3, 4]], 2, 2, dtype='<i2')
+        self.assertEqual([[1, 2], [3, 4]], numpy.load(path).tolist())
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+import math
+import random
+import tracemalloc
+from topology.height_encoding import HeightEncoding
+from topology.map_delta import encode_delta, merge_delta
+from topology.tile import Tile, TILE_CELLS
+from topology.topology_map import TopologyMap, OUT_OF_BOUNDS
+from geometry.point import Point2D, Point3D
+
+
+class TestHeightEncoding(TestCase):
+    def test_round_trip(self):
+        for dtype in ('int16', 'int32'):
+            encoding = HeightEncoding(dtype)
+            for z in (0, -3, 1200, encoding.height_range[0], encoding.height_range[1]):
+                self.assertEqual(z, encoding.decode(encoding.encode(z)))
+                self.assertIs(int, type(encoding.decode(encoding.encode(z))))
+        encoding = HeightEncoding('int16', scale=.1, offset=-500)
+        self.assertAlmostEqual(123.4, encoding.decode(encoding.encode(123.4)))
+        self.assertAlmostEqual(-500 - 3276.6, encoding.height_range[0])  # the 2 lowest values are sentinels
+        encoding = HeightEncoding('float32', scale=.5, offset=10)
+        self.assertEqual(10.25, encoding.decode(encoding.encode(10.25)))
+        self.assertEqual(-1e300, HeightEncoding('float64').decode(HeightEncoding('float64').encode(-1e300)))
+
+    def test_sentinels(self):
+        for dtype in ('int16', 'int32', 'float32', 'float64'):
+            encoding = HeightEncoding(dtype)
+            self.assertEqual(OUT_OF_BOUNDS, encoding.decode(encoding.encode(OUT_OF_BOUNDS)))
+            self.assertLess(encoding.out_of_bounds, encoding.encode(encoding.height_range[0]))
+            self.assertNotEqual(encoding.unknown, encoding.out_of_bounds)
+        self.assertEqual((-32768, -32767), (HeightEncoding().unknown, HeightEncoding().out_of_bounds))
+        self.assertTrue(math.isnan(HeightEncoding('float32').unknown))
+
+    def test_bad_values(self):
+        encoding = HeightEncoding('int16')
+        for z in (32768, -32767, float('nan'), float('inf')):
+            self.assertRaises(ValueError, encoding.encode, z)
+        self.assertRaises(ValueError, HeightEncoding('float32').encode, 1e39)
+        self.assertRaises(ValueError, HeightEncoding, 'int8')
+        self.assertRaises(ValueError, HeightEncoding, 'int16', 0)
+
+
+class TestEncodedTopologyMap(TestCase):
+    def setUp(self):
+        random.seed(44)
+        self.encoding = HeightEncoding('int16', scale=.5, offset=100)
+        self.tm = TopologyMap(height_encoding=self.encoding)
+        self.expected = TopologyMap()
+        for _ in range(1500):
+            point, z = Point2D(random.randint(-50, 70), random.randint(-40, 60)), random.randint(-200, 1500) / 2
+            self.tm.set_z(point, z)
+            self.expected.set_z(point, z)
+        for tm in (self.tm, self.expected):
+            tm.set_z(Point2D(3, 3), OUT_OF_BOUNDS)
+            tm.set_z_row(Point2D(-20, 61), [1, None, 2.5, 3])
+
+    def test_same_as_unencoded_map(self):
+        self.assertEqual(sorted(self.expected.iter_all_points_xyz()), sorted(self.tm.iter_all_points_xyz()))
+        rect = (Point2D(-30, -30), Point2D(65, 62))
+        self.assertEqual(list(self.expected.iter_known_in_rect(*rect)), list(self.tm.iter_known_in_rect(*rect)))
+        self.assertEqual(self.expected.highest_known_in_rect(*rect), self.tm.highest_known_in_rect(*rect))
+        self.assertEqual(self.expected.get_window(rect[0], 95, 92), self.tm.get_window(rect[0], 95, 92))
+        self.assertEqual(OUT_OF_BOUNDS, self.tm.get_z(Point2D(3, 3)))
+        self.assertIsNone(self.tm.get_z(Point2D(-19, 61)))
+        self.assertIs(self.encoding, self.tm.empty_copy().height_encoding)
+
+    def test_out_of_range_changes_nothing(self):
+        version = self.tm.version
+        self.assertRaises(ValueError, self.tm.set_z, Point2D(0, 0), 20000)
+        self.assertRaises(ValueError, self.tm.set_z_row, Point2D(-50, -40), [1, 2, 20000])
+        self.assertEqual(version, self.tm.version)
+        self.assertEqual(self.expected.get_z(Point2D(-50, -40)), self.tm.get_z(Point2D(-50, -40)))
+        self.assertEqual(sorted(self.expected.iter_all_points_xyz()), sorted(self.tm.iter_all_points_xyz()))
+
+    def test_deltas_merge_and_forgetting(self):
+        peer = TopologyMap()
+        merge_delta(peer, encode_delta(self.tm))
+        self.assertEqual(sorted(self.expected.iter_all_points_xyz()), sorted(peer.iter_all_points_xyz()))
+        encoded_peer = TopologyMap(height_encoding=HeightEncoding('int32'))
+        encoded_peer.merge(self.tm)
+        self.assertEqual(Point3D(-20, 61, 1), encoded_peer.highest_known_in_rect(Point2D(-20, 61), Point2D(-20, 61)))
+        self.assertEqual(len(list(self.tm.iter_all_points_xyz())), self.tm.forget_stale(lambda x, y: -1))
+        self.assertIsNone(self.tm.highest_known_in_rect(Point2D(-50, -40), Point2D(70, 62)))
+        self.tm.set_z(Point2D(5, 5), -50)  # the lowest height which can be stored
+        self.assertEqual(Point3D(5, 5, -50), self.tm.highest_known_in_rect(Point2D(-50, -40), Point2D(70, 62)))
+
+    def test_same_as_unencoded_map_with_floats(self):
+        tm = TopologyMap(height_encoding=HeightEncoding('float32'))
+        tm.merge(self.expected)
+        rect = (Point2D(-30, -30), Point2D(65, 62))
+        self.assertEqual(self.expected.highest_known_in_rect(*rect), tm.highest_known_in_rect(*rect))
+        self.assertEqual(self.expected.count_known_in_rect(*rect), tm.count_known_in_rect(*rect))
+
+    def test_less_memory(self):
+        self.assertEqual(2 * TILE_CELLS, len(Tile(self.encoding).heights.tobytes()))
+        self.assertEqual(4, HeightEncoding('float32').bytes_per_height)
+        width = 128
+        tracemalloc.start()
+        try:
+            tm = TopologyMap(height_encoding=self.encoding)
+            for y in range(width):
+                tm.set_z_row(Point2D(0, y), [x * .5 + 1000.5 for x in range(width)])
+            tm.highest_known_in_rect(Point2D(0, 0), Point2D(width - 1, width - 1))
+            size = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        # heights, known flags, scan times and versions, and the pyramid. Python numbers took 57 to 65 bytes a cell
+        self.assertLess(size / width ** 2, 16)
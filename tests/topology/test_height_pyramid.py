@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+import random
+from topology.topology_map import TopologyMap
+from geometry.point import Point2D, Point3D
+
+
+class TestHeightPyramid(TestCase):
+    """
+    The pyramid is used through the TopologyMap, so test it through the map's queries
+    """
+
+    def setUp(self):
+        random.seed(31)
+        self.tm = TopologyMap()
+        self.known = dict()
+        for _ in range(3000):
+            x, y = random.randint(-90, 90), random.randint(-70, 110)
+            self.set_z(x, y, random.randint(-5, 200))
+
+    def set_z(self, x, y, z):
+        self.tm.set_z(Point2D(x, y), z)
+        self.known[(x, y)] = z
+
+    def random_rects(self, count):
+        for _ in range(count):
+            left, bottom = random.randint(-100, 100), random.randint(-100, 100)
+            yield Point2D(left, bottom), Point2D(left + random.randint(0, 90), bottom + random.randint(0, 90))
+
+    def in_rect(self, lower_left, upper_right):
+        return {xy: z for xy, z in self.known.items()
+                if lower_left.x <= xy[0] <= upper_right.x and lower_left.y <= xy[1] <= upper_right.y}
+
+    def assert_highest_matches(self, lower_left, upper_right):
+        inside = self.in_rect(lower_left, upper_right)
+        found = self.tm.highest_known_in_rect(lower_left, upper_right)
+        if not inside:
+            self.assertIsNone(found)
+        else:
+            self.assertEqual(max(inside.values()), found.z)
+            self.assertEqual(found.z, inside[(found.x, found.y)])
+
+    def test_highest_known_in_rect(self):
+        for lower_left, upper_right in self.random_rects(200):
+            self.assert_highest_matches(lower_left, upper_right)
+
+    def test_highest_known_single_cell(self):
+        self.set_z(1000, 1000, 7)
+        self.assertEqual(Point3D(1000, 1000, 7), self.tm.highest_known_in_rect(Point2D(1000, 1000),
+                                                                                 Point2D(1000, 1000)))
+
+    def test_highest_known_after_lowering(self):
+        top = self.tm.highest_known_in_rect(Point2D(-100, -100), Point2D(120, 120))
+        self.set_z(top.x, top.y, -10)  # the old highest point is now the lowest
+        self.assert_highest_matches(Point2D(-100, -100), Point2D(120, 120))
+        for lower_left, upper_right in self.random_rects(50):
+            self.assert_highest_matches(lower_left, upper_right)
+
+    def test_count_known_in_rect(self):
+        for lower_left, upper_right in self.random_rects(200):
+            self.assertEqual(len(self.in_rect(lower_left, upper_right)),
+                             self.tm.count_known_in_rect(lower_left, upper_right))
+
+    def test_least_explored_block(self):
+        lower_left, upper_right = Point2D(-100, -100), Point2D(140, 140)
+        corner, width, count = self.tm.least_explored_block(lower_left, upper_right, 8)
+        self.assertEqual(8, width)
+        self.assertEqual(0, count)  # there's lots of unexplored land beyond y=110
+        self.assertTrue(lower_left.x <= corner.x and corner.x + width - 1 <= upper_right.x)
+        self.assertTrue(lower_left.y <= corner.y and corner.y + width - 1 <= upper_right.y)
+
+    def test_least_explored_block_count(self):
+        for lower_left, upper_right in self.random_rects(50):
+            found = self.tm.least_explored_block(lower_left, upper_right, 4)
+            if found is None:
+                self.assertTrue(upper_right.x - lower_left.x < 7 or upper_right.y - lower_left.y < 7)
+                continue
+            corner, width, count = found
+            self.assertEqual(len(self.in_rect(corner, corner.translate(width - 1, width - 1))), count)
+
+    def test_least_explored_block_too_small(self):
+        self.assertIsNone(self.tm.least_explored_block(Point2D(1, 1), Point2D(3, 3), 4))
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+import random
+from tests.topology.clock import Clock
+from topology.map_delta import encode_delta, iter_delta_cells, merge_delta
+from topology.topology_map import TopologyMap, OUT_OF_BOUNDS
+from geometry.point import Point2D
+
+
+class TestMapDelta(TestCase):
+    def setUp(self):
+        random.seed(8)
+        self.clock = Clock()
+        self.tm = TopologyMap(func_clock=self.clock)
+        for _ in range(1500):
+            self.tm.set_z(Point2D(random.randint(-60, 60), random.randint(-60, 60)), random.randint(-20, 900))
+
+    def test_round_trip(self):
+        self.tm.set_z(Point2D(100, 3), OUT_OF_BOUNDS)
+        self.tm.set_z(Point2D(101, 3), 2.5)
+        cells = sorted((x, y, z, 0) for x, y, z in self.tm.iter_all_points_xyz())
+        self.assertEqual(cells, sorted(iter_delta_cells(encode_delta(self.tm))))
+
+    def test_only_cells_set_since_version(self):
+        version = self.tm.version
+        self.clock.time = 5
+        self.tm.set_z(Point2D(3, 4), 1)
+        self.tm.set_z_row(Point2D(30, -2), [7, 8, None, 9])
+        delta = encode_delta(self.tm, version)
+        self.assertEqual([(3, 4, 1, 5), (30, -2, 7, 5), (31, -2, 8, 5), (33, -2, 9, 5)],
+                         sorted(iter_delta_cells(delta)))
+        # 3 tiles, each with up to a 13 byte header, and 4 cells, each with a byte for its time and its height
+        self.assertLessEqual(len(delta), 5 + 3 * 13 + 4 * 3)
+        self.assertEqual(0, len(list(iter_delta_cells(encode_delta(self.tm, self.tm.version)))))
+
+    def test_merge_is_idempotent(self):
+        peer = TopologyMap(func_clock=self.clock)
+        delta = encode_delta(self.tm)
+        self.assertEqual(len(list(self.tm.iter_all_points_xyz())), merge_delta(peer, delta))
+        self.assertEqual(sorted(self.tm.iter_all_points_xyz()), sorted(peer.iter_all_points_xyz()))
+        version = peer.version
+        self.assertEqual(0, merge_delta(peer, delta))
+        self.assertEqual(version, peer.version)
+        self.assertEqual(0, merge_delta(self.tm, encode_delta(peer)))  # nothing echoes back
+
+    def test_newer_cells_win(self):
+        peer = TopologyMap(func_clock=self.clock)
+        peer.set_z(Point2D(0, 0), 1)
+        self.clock.time = 10
+        peer.set_z(Point2D(1, 0), 1)
+        other = TopologyMap(func_clock=self.clock)
+        self.clock.time = 5
+        other.set_z_row(Point2D(0, 0), [2, 2])
+        self.clock.time = 30
+        # each cell has its own time, so only the peer's newer one is taken, and keeps the time it was scanned
+        self.assertEqual(1, merge_delta(other, encode_delta(peer)))
+        self.assertEqual([(2, 5), (1, 10)], [(other.get_z(Point2D(x, 0)), other.get_scanned_at(Point2D(x, 0)))
+                                             for x in (0, 1)])
+        self.assertEqual(1, merge_delta(peer, encode_delta(other)))
+        self.assertEqual(sorted(other.iter_all_points_xyz()), sorted(peer.iter_all_points_xyz()))
+        self.assertEqual(0, merge_delta(other, encode_delta(peer)))  # the peers agree, and stay that way
+        self.clock.time = 40
+        peer.set_z(Point2D(0, 0), 3)
+        self.assertEqual(1, merge_delta(other, encode_delta(peer, peer.version - 1)))
+        self.assertEqual((3, 40), (other.get_z(Point2D(0, 0)), other.get_scanned_at(Point2D(0, 0))))
+
+    def test_same_time_goes_to_the_higher(self):
+        peer = TopologyMap(func_clock=self.clock)
+        other = TopologyMap(func_clock=self.clock)
+        peer.set_z_row(Point2D(0, 0), [1, 5, 3])
+        other.set_z_row(Point2D(0, 0), [2, 4, 3])
+        peer_delta, other_delta = encode_delta(peer), encode_delta(other)
+        self.assertEqual(1, merge_delta(peer, other_delta))
+        self.assertEqual(1, merge_delta(other, peer_delta))
+        self.assertEqual(sorted(other.iter_all_points_xyz()), sorted(peer.iter_all_points_xyz()))
+        self.assertEqual([2, 5, 3], [peer.get_z(Point2D(x, 0)) for x in range(3)])
+        self.assertEqual(0, merge_delta(peer, encode_delta(other)))  # and they stay that way
+
+    def test_bounds_and_bad_data(self):
+        bounded = TopologyMap(Point2D(0, 0), Point2D(9, 9))
+        self.assertEqual(self.tm.count_known_in_rect(Point2D(0, 0), Point2D(9, 9)),
+                         merge_delta(bounded, encode_delta(self.tm)))
+        delta = encode_delta(self.tm)
+        self.assertRaises(ValueError, list, iter_delta_cells(b'nope' + delta))
+        self.assertRaises(ValueError, list, iter_delta_cells(delta[:len(delta) // 2]))
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from topology.procedural_topology import ProceduralTopology
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from geometry.point import Point2D
+from topology.topology_map import iter_x_y_in_radius
+
+
+class TestProceduralTopology(TestCase):
+
+    def setUp(self):
+        self.topology = ProceduralTopology(seed=7, density=.01, tile_size=16, cache_size=4)
+
+    def test_same_seed_same_terrain(self):
+        other = ProceduralTopology(seed=7, density=.01, tile_size=16, cache_size=4)
+        points = [Point2D(x * 13, y * 7) for x, y in iter_x_y_in_radius(5)]
+        self.assertEqual([self.topology.get_z(pt) for pt in points], [other.get_z(pt) for pt in points])
+
+    def test_different_seed_different_terrain(self):
+        other = ProceduralTopology(seed=8, density=.01, tile_size=16, cache_size=4)
+        points = [Point2D(x, y) for x, y in iter_x_y_in_radius(20)]
+        self.assertNotEqual([self.topology.get_z(pt) for pt in points], [other.get_z(pt) for pt in points])
+
+    def test_order_of_generation_does_not_matter(self):
+        """
+        Tiles are generated independently, so a cell has the same height even after its tile was dropped from the
+        cache and generated again
+        """
+        point = Point2D(-5, 3)
+        z = self.topology.get_z(point)
+        for i in range(10):  # push the tile out of the cache
+            self.topology.get_z(Point2D(1000 * i, 0))
+        self.assertEqual(z, self.topology.get_z(point))
+
+    def test_cache_is_bounded(self):
+        for i in range(20):
+            self.topology.get_z(Point2D(100 * i, -100 * i))
+        self.assertEqual(4, self.topology.cached_tile_count)
+        self.assertEqual(20, self.topology.generated_tile_count)
+
+    def test_recently_used_tile_is_kept(self):
+        home = Point2D(0, 0)
+        for i in range(1, 20):
+            self.topology.get_z(home)
+            self.topology.get_z(Point2D(100 * i, 0))
+        self.assertEqual(20, self.topology.generated_tile_count)  # home was only generated once
+
+    def test_never_out_of_bounds(self):
+        far_away = Point2D(100000, -100000)
+        self.assertFalse(self.topology.point_is_out_of_bounds(far_away))
+        self.assertGreaterEqual(self.topology.get_z(far_away), 0)
+
+    def test_max_z_larger_than_tile(self):
+        with self.assertRaises(ValueError):
+            ProceduralTopology(tile_size=16, max_z=17)
+
+    def test_simulated_sensor_scans_far_away(self):
+        sensor = SimulatedTopologySensor(self.topology)
+        home_point = Point2D(100000, 100000)
+        offsets = list(iter_x_y_in_radius(1))
+        scanned_points, _cost = sensor.scan_points(offsets, home_point)
+        expecting = [(x, y, self.topology.get_z(home_point.translate(x, y)), home_point.translate(x, y))
+                     for x, y in offsets]
+        self.assertEqual(expecting, scanned_points)
+
+    def test_tiles_can_be_read_from_several_threads(self):
+        """
+        A ScanScheduler's sub-scans read the simulated map at the same time, while tiles are being dropped
+        """
+        points = [Point2D(x * 16, y * 16) for x in range(-4, 4) for y in range(-4, 4)]
+        expected = [ProceduralTopology(seed=7, density=.01, tile_size=16).get_z(pt) for pt in points]
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # switch threads as often as possible
+        try:
+            with ThreadPoolExecutor(8) as executor:
+                heights = list(executor.map(lambda offset: [self.topology.get_z(pt) for pt in
+                                                            points[offset:] + points[:offset]], range(8)))
+        finally:
+            sys.setswitchinterval(switch_interval)
+        for offset, rotated in enumerate(heights):
+            self.assertEqual(expected[offset:] + expected[:offset], rotated)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+import random
+from itertools import islice
+from unittest import TestCase
+from sensors.simulated_topology_sensor import SimulatedTopologySensor
+from tests.topology.clock import Clock
+from tests.topology.test_topology_map import make_example_topology
+from topology.topology_factory import TopologyFactory
+from topology.retention_policy import ForgetAllPolicy, TrustForeverPolicy, TimeToLivePolicy, RegionMaxAgePolicy
+from topology.topology_map import TopologyMap
+from navigation.navigator_factory import NavigatorFactory
+from navigation.move_strategy import MoveStrategyType
+from navigation.destinations import ExtractionPoint
+from geometry.point import Point2D, Point3D
+
+
+class TestRetentionPolicy(TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.tm = TopologyMap(Point2D(-50, -50), Point2D(50, 50), func_clock=self.clock)
+        self.tm.set_z_row(Point2D(-3, 0), range(40))  # spans two tiles
+        self.clock.time = 10
+        self.tm.set_z(Point2D(5, 5), 7)
+        self.clock.time = 25
+
+    def test_cells_are_stamped(self):
+        self.assertEqual(0, self.tm.get_scanned_at(Point2D(-3, 0)))
+        self.assertEqual(10, self.tm.get_scanned_at(Point2D(5, 5)))
+        self.assertIsNone(self.tm.get_scanned_at(Point2D(5, 6)))
+        self.tm.set_z(Point2D(5, 6), 7, 30.9)
+        self.assertEqual(30, self.tm.get_scanned_at(Point2D(5, 6)))  # to the whole second
+
+    def test_forget_all_keeps_bounds(self):
+        tm = ForgetAllPolicy().apply(self.tm)
+        self.assertEqual(0, tm.count_known_in_rect(Point2D(-50, -50), Point2D(50, 50)))
+        self.assertTrue(tm.point_is_out_of_bounds(Point2D(51, 0)))
+
+    def test_trust_forever(self):
+        self.assertIs(self.tm, TrustForeverPolicy().apply(self.tm))
+        self.assertEqual(41, self.tm.count_known_in_rect(Point2D(-50, -50), Point2D(50, 50)))
+
+    def test_time_to_live(self):
+        version = self.tm.version
+        self.assertIs(self.tm, TimeToLivePolicy(20).apply(self.tm))
+        self.assertGreater(self.tm.version, version)
+        self.assertEqual(1, self.tm.count_known_in_rect(Point2D(-50, -50), Point2D(50, 50)))
+        self.assertIsNone(self.tm.get_z(Point2D(0, 0)))
+        self.assertEqual(Point3D(5, 5, 7), self.tm.highest_known_in_rect(Point2D(-50, -50), Point2D(50, 50)))
+        self.assertEqual(1, len(list(self.tm.iter_all_points_xyz())))
+        self.assertRaises(ValueError, TimeToLivePolicy, -1)
+
+    def test_region_max_age(self):
+        policy = RegionMaxAgePolicy([(Point2D(0, 0), Point2D(9, 9), 5), (Point2D(-9, -9), Point2D(9, 9), None)],
+                                    default_max_age=30)
+        self.assertEqual((5, None, 30), (policy.max_age(0, 0), policy.max_age(-1, 0), policy.max_age(10, 0)))
+        self.assertEqual(11, self.tm.forget_stale(policy.max_age))  # x 0 to 9 on the row, and 5, 5
+        self.assertTrue(self.tm.is_known(Point2D(-1, 0)))
+        self.assertFalse(self.tm.is_known(Point2D(9, 0)))
+        self.assertTrue(self.tm.is_known(Point2D(36, 0)))
+        self.assertRaises(ValueError, RegionMaxAgePolicy, [(Point2D(1, 0), Point2D(0, 0), 1)])
+
+
+class TestNavigatorRetention(TestCase):
+    def setUp(self):
+        self.laser = SimulatedTopologySensor(simulated_map=make_example_topology(), power_on_cost=5,
+                                             scan_point_cost=1)
+
+    def sortie(self, navigator):
+        laser = self.laser
+        cost = laser.total_cost
+        path = list(navigator.iter_points_to_destination(Point2D(4, 1), [laser]))
+        return path, laser.total_cost - cost
+
+    def make_navigator(self, clock, retention_policy):
+        return NavigatorFactory.make_navigator(topology_map=TopologyMap(func_clock=clock),
+                                               move_strategy=MoveStrategyType.CLIMB_MOVE_1,
+                                               destination=ExtractionPoint(), retention_policy=retention_policy)
+
+    def test_repeat_sortie_is_free_when_map_is_kept(self):
+        navigator = self.make_navigator(Clock(), TrustForeverPolicy())
+        path, cost = self.sortie(navigator)
+        repeat_path, repeat_cost = self.sortie(navigator)
+        self.assertGreater(cost, 0)
+        self.assertEqual((path, 0), (repeat_path, repeat_cost))
+        self.assertEqual([cost, 0], [mission.total for mission in navigator.ledger.missions])
+
+    def test_repeat_sorties_fly_the_same_path(self):
+        rng = random.Random(1)
+        simulated_map = TopologyFactory.make_fake_topology(upper_right=Point2D(59, 59), rng=rng)
+        starts = [Point2D(rng.randrange(60), rng.randrange(60)) for _ in range(6)]
+        for move_strategy in (MoveStrategyType.CLIMB_MOVE_1, MoveStrategyType.CLIMB_3_CARDINAL_1_ORDINAL):
+            for radius in (1, 2):
+                laser = SimulatedTopologySensor(simulated_map=simulated_map, radius=radius, power_on_cost=4,
+                                                scan_point_cost=1)
+                navigator = NavigatorFactory.make_navigator(topology_map=TopologyMap(), move_strategy=move_strategy,
+                                                            destination=ExtractionPoint(),
+                                                            retention_policy=TrustForeverPolicy())
+                for start in starts + starts:  # the second time round, much of the map is recalled
+                    fresh = NavigatorFactory.make_navigator(topology_map=TopologyMap(), move_strategy=move_strategy,
+                                                            destination=ExtractionPoint())
+                    with self.subTest(move_strategy=move_strategy, radius=radius, start=start):
+                        self.assertEqual(list(islice(fresh.iter_points_to_destination(start, [laser]), 500)),
+                                         list(islice(navigator.iter_points_to_destination(start, [laser]), 500)))
+                        self.assertEqual(fresh.found, navigator.found)
+
+    def test_stale_map_is_scanned_again(self):
+        clock = Clock()
+        navigator = self.make_navigator(clock, TimeToLivePolicy(100))
+        path, cost = self.sortie(navigator)
+        clock.time = 50
+        self.assertEqual((path, 0), self.sortie(navigator))
+        clock.time = 101
+        self.assertEqual((path, cost), self.sortie(navigator))
+
+    def test_map_passed_in_is_used(self):
+        navigator = self.make_navigator(Clock(), TrustForeverPolicy())
+        path, cost = self.sortie(navigator)
+        other = NavigatorFactory.make_navigator(topology_map=navigator.known_map,
+                                                move_strategy=MoveStrategyType.CLIMB_MOVE_1,
+                                                destination=ExtractionPoint(), retention_policy=TrustForeverPolicy())
+        self.assertEqual((path, 0), self.sortie(other))
+
+    def test_default_forgets_everything(self):
+        navigator = self.make_navigator(Clock(), None)
+        path, cost = self.sortie(navigator)
+        self.assertEqual((path, cost), self.sortie(navigator))
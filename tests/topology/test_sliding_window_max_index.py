@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+import random
+from topology.sliding_window_max_index import SlidingWindowMaxIndex
+from topology.topology_map import TopologyMap
+from topology.topology_factory import TopologyFactory
+from geometry.point import Point2D
+
+
+class TestSlidingWindowMaxIndex(TestCase):
+
+    def setUp(self):
+        random.seed(21)
+        self.simulated_map = TopologyFactory.make_fake_topology(upper_right=Point2D(40, 40), density=.03)
+        self.tm = TopologyMap()
+        self.points = [Point2D(x, y) for y in range(-3, 44, 2) for x in range(-3, 44, 3)]
+
+    def fill(self, fraction):
+        for x, y, z in self.simulated_map.iter_all_points_xyz():
+            if random.random() < fraction:
+                self.tm.set_z(Point2D(x, y), z)
+
+    def assert_matches_map(self, index):
+        for pt in self.points:
+            self.assertEqual(self.tm.count_unknown_in_radius(pt, index.radius), index.count_unknown_in_radius(pt))
+            self.assertEqual(self.tm.is_highest_or_tie_in_radius_and_all_known(pt, index.radius),
+                             index.is_highest_or_tie_in_radius_and_all_known(pt))
+
+    def test_matches_map_queries(self):
+        self.fill(.9)
+        for radius in (1, 4, 12):
+            self.assert_matches_map(SlidingWindowMaxIndex(self.tm, radius))
+
+    def test_fully_known(self):
+        self.fill(1)
+        index = SlidingWindowMaxIndex(self.tm, 3)
+        self.assert_matches_map(index)
+        self.assertEqual(0, index.count_unknown_in_radius(Point2D(20, 20)))
+
+    def test_max_in_radius(self):
+        self.tm.set_z(Point2D(5, 5), 9)
+        self.tm.set_z(Point2D(7, 5), 12)
+        index = SlidingWindowMaxIndex(self.tm, 2)
+        self.assertEqual(12, index.max_in_radius(Point2D(5, 5)))
+        self.assertEqual(9, index.max_in_radius(Point2D(3, 5)))
+        self.assertEqual(float("-inf"), index.max_in_radius(Point2D(100, 5)))
+
+    def test_updates_after_map_changes(self):
+        self.fill(.5)
+        index = SlidingWindowMaxIndex(self.tm, 5)
+        self.assert_matches_map(index)
+        self.fill(.7)  # fill in some more, as a scan would
+        self.assert_matches_map(index)
+        self.tm.set_z(Point2D(31, 33), 1000)  # change is felt in neighboring tiles
+        self.assert_matches_map(index)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+import os
+import random
+import tempfile
+import tracemalloc
+import topology.tile_store
+from topology.tile_store import SpillingTileStore
+from topology.sliding_window_max_index import SlidingWindowMaxIndex
+from topology.topology_map import TopologyMap
+from geometry.point import Point2D, Point3D
+
+
+class TestSpillingTileStore(TestCase):
+    """
+    A map with a memory budget must answer exactly like one without
+    """
+
+    def setUp(self):
+        random.seed(42)
+        self.directory = tempfile.TemporaryDirectory()
+        self.spill_path = os.path.join(self.directory.name, 'tiles.spill')
+        self.tm = TopologyMap(max_resident_tiles=3, spill_path=self.spill_path)
+        self.expected = TopologyMap()
+        for _ in range(2000):
+            self.set_z(random.randint(-70, 90), random.randint(-60, 100), random.randint(-5, 300))
+
+    def tearDown(self):
+        self.tm.close()
+        self.directory.cleanup()
+
+    def set_z(self, x, y, z):
+        self.tm.set_z(Point2D(x, y), z)
+        self.expected.set_z(Point2D(x, y), z)
+
+    def test_same_as_unbounded_map(self):
+        store = self.tm.tile_store
+        self.assertLessEqual(store.resident_count, 3)
+        self.assertGreater(store.evictions, 0)
+        self.assertEqual(sorted(self.expected.iter_all_points_xyz()), sorted(self.tm.iter_all_points_xyz()))
+        for y in range(-62, 102, 7):
+            for x in range(-72, 92, 5):
+                self.assertEqual(self.expected.get_z(Point2D(x, y)), self.tm.get_z(Point2D(x, y)))
+        rect = (Point2D(-20, -30), Point2D(75, 40))
+        self.assertEqual(self.expected.highest_known_in_rect(*rect), self.tm.highest_known_in_rect(*rect))
+        self.assertEqual(self.expected.count_known_in_rect(*rect), self.tm.count_known_in_rect(*rect))
+        self.assertLessEqual(store.resident_count, 3)
+        self.assertIsNone(self.expected.tile_store)
+
+    def test_changes_to_spilled_tiles_are_kept(self):
+        index = SlidingWindowMaxIndex(self.tm, 4)
+        expected_index = SlidingWindowMaxIndex(self.expected, 4)
+        points = [Point2D(x, y) for y in range(-60, 100, 9) for x in range(-70, 90, 11)]
+        self.assertEqual([expected_index.max_in_radius(pt) for pt in points],
+                         [index.max_in_radius(pt) for pt in points])
+        self.set_z(-70, -60, 500)  # in the tile which was used least recently
+        self.tm.set_z_row(Point2D(80, 100), [400] * 10)
+        self.expected.set_z_row(Point2D(80, 100), [400] * 10)
+        self.assertEqual([expected_index.max_in_radius(pt) for pt in points],
+                         [index.max_in_radius(pt) for pt in points])
+        self.assertEqual(Point3D(-70, -60, 500), self.tm.highest_known_in_rect(Point2D(-70, -60), Point2D(90, 100)))
+
+    def test_unchanged_tiles_are_not_written_again(self):
+        store = self.tm.tile_store
+        list(self.tm.iter_all_points_xyz())
+        writes, faults = store.writes, store.faults
+        list(self.tm.iter_all_points_xyz())
+        self.assertEqual(writes, store.writes)
+        self.assertGreater(store.faults, faults)
+
+    def test_compaction(self):
+        compact_min_bytes = topology.tile_store.COMPACT_MIN_BYTES
+        topology.tile_store.COMPACT_MIN_BYTES = 0
+        try:
+            for _ in range(1000):
+                self.set_z(random.randint(-70, 90), random.randint(-60, 100), random.randint(-5, 300))
+        finally:
+            topology.tile_store.COMPACT_MIN_BYTES = compact_min_bytes
+        self.assertEqual(sorted(self.expected.iter_all_points_xyz()), sorted(self.tm.iter_all_points_xyz()))
+        store = self.tm.tile_store
+        self.assertGreater(store.writes, 2 * len(store))  # so most of what was written is out of date
+        self.assertLess(os.path.getsize(self.spill_path), 2 * len(store) * 16 * 1024)  # a tile pickles to under 16KB
+
+    def test_close_deletes_spill_file(self):
+        self.assertTrue(os.path.exists(self.spill_path))
+        self.tm.close()
+        self.assertFalse(os.path.exists(self.spill_path))
+        self.assertRaises(ValueError, SpillingTileStore, 0)
+
+    def test_empty_copy_keeps_budget(self):
+        copy = self.tm.empty_copy()
+        self.assertEqual(3, copy.tile_store.max_resident)
+        self.assertEqual(0, len(copy.tile_store))
+        copy.close()
+
+
+class TestResidentSize(TestCase):
+    def resident_size(self, tile_count, max_resident_tiles):
+        """
+        :return: bytes allocated by a map with a row of cells set in each of tile_count tiles, and the map
+        """
+        tracemalloc.start()
+        try:
+            tm = TopologyMap(max_resident_tiles=max_resident_tiles)
+            for i in range(tile_count):
+                tm.set_z_row(Point2D((i % 20) * 32, (i // 20) * 32), range(32))
+            tm.highest_known_in_rect(Point2D(0, 0), Point2D(640, 640))  # builds the levels above the tiles
+            return tracemalloc.get_traced_memory()[0], tm
+        finally:
+            tracemalloc.stop()
+
+    def test_stays_flat_as_more_tiles_are_touched(self):
+        sizes = []
+        for tile_count in [100, 400]:
+            size, tm = self.resident_size(tile_count, 4)
+            self.assertEqual(tile_count, len(tm.tile_store))
+            self.assertEqual(tile_count * 32, tm.count_known_in_rect(Point2D(0, 0), Point2D(640, 640)))
+            tm.close()
+            sizes.append(size)
+        tile_size = (self.resident_size(400, None)[0] - self.resident_size(100, None)[0]) / 300
+        per_tile = (sizes[1] - sizes[0]) / 300  # only the indexes of where each tile is
+        self.assertGreater(tile_size, 16 * 1024)
+        self.assertLess(per_tile, tile_size / 20)
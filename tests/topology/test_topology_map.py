@@ -1,8 +1,9 @@
 # -*- coding: utf-8 -*-
 from unittest import TestCase
-from topology.topology_map import TopologyMap, OUT_OF_BOUNDS
-from geometry.point import Point2D, ORIGIN
-from tests.topology.topology_factory import TopologyFactory
+import random
+from topology.topology_map import TopologyMap, OUT_OF_BOUNDS, iter_x_y_in_radius
+from geometry.point import Point2D, ORIGIN, PointArray
+from topology.topology_factory import TopologyFactory
 
 TEST_MAP = [
     #    0  1  2  3  4  5  6
@@ -213,3 +214,134 @@ class TestTopologyMap(TestCase):
         """
         self.tm = make_example_topology(origin=Point2D(10, 20))
         self.assertNotEqual(OUT_OF_BOUNDS, self.tm.get_z(Point2D(12, 25)))
+
+    def test_get_window(self):
+        self.tm = make_example_topology(origin=Point2D(30, -2))
+        window = self.tm.get_window(Point2D(29, -2), 4, 2)
+        self.assertEqual([[None, 1, 1, 1], [None, 1, 1, 2]], window)
+
+    def test_get_window_across_tiles(self):
+        self.tm.set_z(Point2D(-1, 0), 1)
+        self.tm.set_z(Point2D(0, 0), 2)
+        self.tm.set_z(Point2D(32, 0), 3)
+        window = self.tm.get_window(Point2D(-1, 0), 34, 1)
+        self.assertEqual([1, 2] + [None] * 31 + [3], window[0])
+
+    def test_version_increases(self):
+        version = self.tm.version
+        self.tm.set_z(Point2D(3, 3), 10)
+        self.assertGreater(self.tm.version, version)
+
+    def test_iter_tile_keys_changed_since(self):
+        self.tm.set_z(Point2D(3, 3), 10)
+        version = self.tm.version
+        self.tm.set_z(Point2D(-40, 3), 10)
+        self.tm.set_z(Point2D(100, 3), 10)
+        self.tm.set_z(Point2D(-35, 3), 10)
+        changed = list(self.tm.iter_tile_keys_changed_since(version))
+        self.assertCountEqual([(-2, 0), (3, 0)], changed)
+
+    def test_zero_height_is_known(self):
+        point = Point2D(3, 3)
+        self.assertFalse(self.tm.is_known(point))
+        self.tm.set_z(point, 0)
+        self.assertTrue(self.tm.is_known(point))
+        self.assertEqual(0, self.tm.get_z(point, default=5))
+        self.assertEqual(8, self.tm.count_unknown_in_radius(point, 1))
+        self.assertEqual([(0, 0, 0, point)], list(self.tm.iter_known_x_y_z_pt_in_radius(point, 1)))
+
+    def test_zero_height_can_be_highest(self):
+        point = Point2D(3, 3)
+        for x, y in iter_x_y_in_radius(1):
+            self.tm.set_z(point.translate(x, y), -x * x)
+        self.assertTrue(self.tm.is_highest_or_tie_in_radius_and_all_known(point, 1))
+
+    def test_iter_known_in_rect_row_order(self):
+        random.seed(32)
+        known = dict()
+        for _ in range(500):
+            x, y = random.randint(-80, 80), random.randint(-80, 80)
+            known[(x, y)] = random.randint(0, 10)
+            self.tm.set_z(Point2D(x, y), known[(x, y)])
+        for _ in range(50):
+            left, bottom = random.randint(-90, 90), random.randint(-90, 90)
+            right, top = left + random.randint(0, 70), bottom + random.randint(0, 70)
+            expecting = sorted(((x, y, z) for (x, y), z in known.items()
+                                if left <= x <= right and bottom <= y <= top), key=lambda xyz: (xyz[1], xyz[0]))
+            self.assertEqual(expecting, list(self.tm.iter_known_in_rect(Point2D(left, bottom), Point2D(right, top))))
+
+    def test_iter_known_in_rect_sparse_transect(self):
+        for x in range(-5000, 5000, 7):
+            self.tm.set_z(Point2D(x, 3), x)
+        found = list(self.tm.iter_known_in_rect(Point2D(-10000, -10000), Point2D(10000, 10000)))
+        self.assertEqual([(x, 3, x) for x in range(-5000, 5000, 7)], found)
+
+    def test_iter_known_in_radius(self):
+        self.tm = make_example_topology(set_bounds=False)
+        self.tm.set_z(Point2D(4, -1), 9)
+        self.assertEqual([(4, -1, 9), (3, 0, 1), (4, 0, 1), (5, 0, 1), (3, 1, 1), (4, 1, 1), (5, 1, 1)],
+                         list(self.tm.iter_known_in_radius(Point2D(4, 0), 1)))
+
+    def test_set_z_row_matches_set_z(self):
+        random.seed(33)
+        by_row = TopologyMap()
+        by_cell = TopologyMap()
+        for y in range(-40, 40, 3):
+            x0 = random.randint(-70, 10)
+            heights = [random.choice([None, random.randint(-5, 50)]) for _ in range(random.randint(1, 100))]
+            by_row.set_z_row(Point2D(x0, y), heights)
+            for i, z in enumerate(heights):
+                if z is not None:
+                    by_cell.set_z(Point2D(x0 + i, y), z)
+        self.assertEqual(sorted(by_cell.iter_all_points_xyz()), sorted(by_row.iter_all_points_xyz()))
+        self.assertEqual(by_cell.boundary_points, by_row.boundary_points)
+        for _ in range(30):
+            lower_left = Point2D(random.randint(-80, 40), random.randint(-50, 40))
+            upper_right = lower_left.translate(random.randint(0, 60), random.randint(0, 60))
+            highest = by_cell.highest_known_in_rect(lower_left, upper_right)
+            found = by_row.highest_known_in_rect(lower_left, upper_right)
+            self.assertEqual(highest and highest.z, found and found.z)
+            self.assertEqual(by_cell.count_known_in_rect(lower_left, upper_right),
+                             by_row.count_known_in_rect(lower_left, upper_right))
+
+    def test_set_z_row_overwrites(self):
+        self.tm.set_z_row(Point2D(30, 0), [5, 6, 7])
+        self.tm.set_z_row(Point2D(31, 0), [1, None])
+        self.assertEqual([(30, 0, 5), (31, 0, 1), (32, 0, 7)], list(self.tm.iter_known_in_rect(ORIGIN, Point2D(40, 0))))
+        self.assertEqual(7, self.tm.highest_known_in_rect(ORIGIN, Point2D(40, 0)).z)
+
+    def test_array_methods_match_point_methods(self):
+        random.seed(45)
+        tm = make_example_topology()
+        for _ in range(300):
+            self.tm.set_z(Point2D(random.randint(-40, 40), random.randint(-40, 40)), random.randint(0, 9))
+        points = PointArray([random.randint(-45, 45) for _ in range(50)], [random.randint(-45, 45) for _ in range(50)])
+        self.assertEqual([self.tm.count_unknown_in_radius(pt, 2) for pt in points.to_points()],
+                         self.tm.count_unknown_in_radius_array(points, 2))
+        for pt in points.to_points():
+            self.assertEqual([(x, y) for x, y, _pt in self.tm.iter_unknown_x_y_pt_in_radius(pt, 2)],
+                             list(self.tm.unknown_in_radius_array(pt, 2)))
+        self.assertEqual([self.tm.get_z(pt, 0) for pt in points.to_points()], self.tm.get_z_array(points, 0).zs)
+        self.assertEqual([self.tm.is_known(pt) for pt in points.to_points()], self.tm.is_known_array(points))
+        self.assertEqual([OUT_OF_BOUNDS, 1, 4], tm.get_z_array(PointArray([-1, 0, 6], [0, 0, 4])).zs)
+
+    def test_set_z_array(self):
+        points = PointArray([3, 4, 5, 9, 5], [0, 0, 0, 0, 1], [7, None, 8, 1, 2])
+        self.tm.set_z_array(points, scanned_at=12)
+        self.assertEqual([(3, 0, 7), (5, 0, 8), (9, 0, 1), (5, 1, 2)],
+                         list(self.tm.iter_known_in_rect(ORIGIN, Point2D(9, 1))))
+        self.assertEqual(12, self.tm.get_scanned_at(Point2D(5, 1)))
+        self.assertRaises(ValueError, self.tm.set_z_array, PointArray([1], [1]))
+
+    def test_fit_plane(self):
+        for x in range(-2, 3):
+            for y in range(-1, 3):
+                self.tm.set_z(Point2D(10 + x, 20 + y), 5 + 2 * x - 3 * y)
+        self.tm.set_z(Point2D(9, 19), OUT_OF_BOUNDS)
+        self.assertEqual((2, -3, 0), self.tm.fit_plane(Point2D(10, 20), 2))
+        self.tm.set_z(Point2D(12, 22), 30)
+        slope_x, slope_y, residual = self.tm.fit_plane(Point2D(10, 20), 2)
+        self.assertGreater(residual, 1)
+        self.assertGreater(slope_x, 2)
+        self.assertIsNone(self.tm.fit_plane(Point2D(10, 30), 2))  # nothing known
+        self.assertIsNone(self.tm.fit_plane(Point2D(10, 24), 2))  # only a row is known
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+import random
+from topology.window import sliding_max, sliding_sum, window_max, window_sum
+
+
+def naive_window(rows, radius, func_reduce):
+    height, width = len(rows), len(rows[0])
+    return [[func_reduce(rows[j][i]
+                         for j in range(max(0, y - radius), min(height, y + radius + 1))
+                         for i in range(max(0, x - radius), min(width, x + radius + 1)))
+             for x in range(width)] for y in range(height)]
+
+
+class TestWindow(TestCase):
+
+    def setUp(self):
+        random.seed(11)
+        self.rows = [[random.randint(0, 50) for _x in range(17)] for _y in range(13)]
+
+    def test_sliding_max(self):
+        values = [random.randint(0, 100) for _ in range(40)]
+        for width in range(1, 12):
+            expecting = [max(values[i:i + width]) for i in range(len(values) - width + 1)]
+            self.assertEqual(expecting, sliding_max(values, width))
+
+    def test_sliding_sum(self):
+        values = [random.randint(0, 100) for _ in range(40)]
+        for width in range(1, 12):
+            expecting = [sum(values[i:i + width]) for i in range(len(values) - width + 1)]
+            self.assertEqual(expecting, sliding_sum(values, width))
+
+    def test_window_max(self):
+        for radius in range(0, 8):
+            self.assertEqual(naive_window(self.rows, radius, max), window_max(self.rows, radius))
+
+    def test_window_sum(self):
+        for radius in range(0, 8):
+            self.assertEqual(naive_window(self.rows, radius, sum), window_sum(self.rows, radius))
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import random
+from unittest import TestCase
+from unittest.mock import patch
+
+import interactive_simulator_example
+from interactive_simulator_example import InteractiveSimulatorExample, PathPrecomputer, strategies
+from geometry.point import Point2D
+
+UPPER_RIGHT = Point2D(6, 4)
+DENSITY = .2
+
+
+class TestInteractiveSimulatorExample(TestCase):
+
+    def test_seed_makes_same_map(self):
+        first = InteractiveSimulatorExample(seed=7, upper_right=UPPER_RIGHT, density=DENSITY, precompute=False)
+        second = InteractiveSimulatorExample(seed=7, upper_right=UPPER_RIGHT, density=DENSITY, precompute=False)
+        self.assertEqual(list(first.tm.iter_all_points_xyz()), list(second.tm.iter_all_points_xyz()))
+
+    def test_seed_leaves_global_random_alone(self):
+        random.seed(1)
+        expected = random.random()
+        random.seed(1)
+        InteractiveSimulatorExample(seed=7, upper_right=UPPER_RIGHT, density=DENSITY, precompute=False)
+        self.assertEqual(expected, random.random())
+
+    def test_path_cut_off_is_flagged(self):
+        simulator = InteractiveSimulatorExample(seed=7, upper_right=UPPER_RIGHT, density=DENSITY, precompute=False)
+        with patch.object(interactive_simulator_example, 'MAX_PATH_LENGTH', 1):
+            points, _name, gave_up = simulator.navigate(0, 0)
+        self.assertEqual(1, len(points))
+        self.assertTrue(gave_up)
+        self.assertFalse(simulator.navigate(6, 4)[2])
+
+    def test_precomputes_every_path(self):
+        simulator = InteractiveSimulatorExample(seed=7, upper_right=UPPER_RIGHT, density=DENSITY, max_workers=2)
+        simulator.precomputer.join(timeout=60)
+        simulator.precomputer.shutdown()
+        self.assertEqual((35 * len(strategies),) * 2, simulator.precomputer.progress)
+        self.assertIn("all", simulator.precomputer.status())
+
+        expecting = InteractiveSimulatorExample(seed=7, upper_right=UPPER_RIGHT, density=DENSITY, precompute=False)
+        for x, y in [(0, 0), (3, 2), (6, 4)]:
+            key = simulator.cache_key(simulator.move_strategy, x, y)
+            self.assertEqual(expecting.navigate(x, y), simulator.navigate(x, y))
+            self.assertIn(key, simulator.cache)
+
+    def test_closest_to_cursor_first(self):
+        simulator = InteractiveSimulatorExample(seed=7, upper_right=UPPER_RIGHT, density=DENSITY, precompute=False)
+        precomputer = PathPrecomputer(simulator, UPPER_RIGHT, DENSITY, max_workers=1, batch_size=3)
+        precomputer.move_cursor(5, 1)
+        self.assertEqual({(5, 1)}, {(x, y) for _strategy, x, y in precomputer._next_batch()})
+        precomputer.shutdown()
@@ -1,15 +1,62 @@
 # -*- coding: utf-8 -*-
 from unittest import TestCase
 
-from plot_topology_map import plot_topology_map
-from tests.topology.topology_factory import TopologyFactory
+import matplotlib
+matplotlib.use('Agg')  # draw off screen, so the test can run anywhere
+import matplotlib.pyplot as plt
+from plot_topology_map import plot_topology_map, TopologyMapPlot
+from topology.topology_factory import TopologyFactory
+from topology.topology_map import TopologyMap
+from geometry.point import Point2D
 import random
 
+PATH = [(0, 1, 2, 6), (1, 1, 3, 0), (2, 2, 5, 2)]
+
 
 class TestPlotTopologyMap(TestCase):
 
+    def tearDown(self):
+        plt.close('all')
+
     def test_plot_topology_map(self):
         # # Test whether we can actually plot the map
         random.seed(5)  # for testing, we want to always genereate same map
         tm = TopologyFactory.make_fake_topology()
-        plot_topology_map(tm, lambda x, y: [(0, 1, 2), (3, 4, 5)])  # unittest will catch any exception
+        plot_topology_map(tm, lambda x, y, c: (PATH, 'test'))  # unittest will catch any exception
+
+    def test_grid_comes_from_map(self):
+        tm = TopologyMap()
+        tm.set_z(Point2D(1, 1), 4)
+        tm.set_z(Point2D(3, 2), 7)
+        plot = TopologyMapPlot(tm, lambda x, y, c: (PATH, 'test'))
+        self.assertEqual((2, 3), plot.grid.shape)
+        self.assertEqual(4, plot.grid[0, 0])
+        self.assertEqual(7, plot.grid[1, 2])
+        self.assertTrue(plot.grid[0, 1] != plot.grid[0, 1])  # unknown cells are nan
+
+    def test_replot_only_updates_overlays(self):
+        random.seed(5)
+        tm = TopologyFactory.make_fake_topology()
+        calls = []
+        plot = TopologyMapPlot(tm, lambda x, y, c: calls.append((x, y, c)) or (PATH, 'test'))
+        plot.figure.canvas.draw()
+        image = plot.image
+        plot.replot(3, 4)
+        plot.replot(0, 0, True)
+        self.assertEqual([(3, 4, False), (0, 0, True)], calls)
+        self.assertIs(image, plot.image)
+        self.assertEqual([image], list(plot.figure.axes[0].images))
+        start_marker, end_marker, labels, stats, _status = plot.overlays
+        self.assertEqual(([2], [2]), tuple(list(data) for data in end_marker.get_data()))
+        self.assertEqual(2, len(labels.get_paths()))  # one for scanned cells, one for the rest
+        self.assertIn("Scans: 2 Cost: 8", stats.get_text())
+
+    def test_replot_says_when_path_gave_up(self):
+        plot = TopologyMapPlot(TopologyFactory.make_from_matrix([[1, 2], [3, 4]]), lambda x, y, c: (PATH, 'test', True))
+        plot.replot(0, 0)
+        self.assertIn("gave up after 3 moves", plot.overlays[3].get_text())
+
+    def test_replot_without_path(self):
+        plot = TopologyMapPlot(TopologyFactory.make_from_matrix([[1, 2], [3, 4]]), lambda x, y, c: None)
+        plot.replot(0, 0, True)
+        self.assertEqual(0, len(plot.overlays[2].get_paths()))